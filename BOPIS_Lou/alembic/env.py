@@ -30,10 +30,15 @@ from app.core.config import settings # For DB URL, will be used later
 from app.db.base import Base  # Import the Base
 
 # Crucially, import all your models here so they register with Base.metadata
-from app.models.sql_models import Tenant, User, Product, Order, OrderItem, PickupTimeSlot, Lane, StaffAssignment, Notification
+from app.models.sql_models import Tenant, User, Product, Order, OrderItem, PickupTimeSlot, Lane, StaffAssignment, Notification, IdempotencyRecord, TenantChangeCounter, SyncTombstone, InventoryMovement, InventoryDailyRollup, StockAlert, TenantOrderStatusCount, TenantDailySales, SalesRollup, SalesRollupWatermark, ArchivedOrder, ArchivedOrderItem, ArchivedNotification
 # Add any other models if they were missed.
 
 target_metadata = Base.metadata
+
+def include_object(object, name, type_, reflected, compare_to):
+    # The SQLite FTS5 table for product search (and its shadow tables) is created by DDL
+    # events, not declared as a model; autogenerate must not propose dropping it.
+    return not (type_ == "table" and name.startswith("products_fts"))
 # --- END MODIFICATION ---
 
 # other values from the config, defined by the needs of env.py,
@@ -63,6 +68,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -93,7 +99,7 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata, include_object=include_object
         )
 
         with context.begin_transaction():
@@ -1,5 +1,12 @@
 """initial_migration_attempt_2
 
+Baseline schema: the tables, constraints and indexes the application had before the inventory
+ledger, delta sync and dashboard tables were added (tenants, users, products, orders, order
+items, pickup slots, lanes, staff assignments, notifications). Those follow in e1a7c3f95b20.
+
+Databases created earlier with Base.metadata.create_all of that application already have this
+schema; mark them with `alembic stamp 5271de4ae265` and continue with `alembic upgrade head`.
+
 Revision ID: 5271de4ae265
 Revises:
 Create Date: 2025-05-30 04:57:43.565933
@@ -9,6 +16,7 @@ from typing import Sequence, Union
 
 from alembic import op
 import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
 
 
 # revision identifiers, used by Alembic.
@@ -17,12 +25,181 @@ down_revision: Union[str, None] = None
 branch_labels: Union[str, Sequence[str], None] = None
 depends_on: Union[str, Sequence[str], None] = None
 
+# Native enum types on PostgreSQL (VARCHAR elsewhere), created once here and shared by the
+# tables using them; create_type=False stops each create_table from creating them again.
+user_role = postgresql.ENUM('customer', 'picker', 'counter', 'tenant_admin', 'super_admin', name='userrole', create_type=False)
+order_type = postgresql.ENUM('BOPIS', 'POS_SALE', name='ordertype', create_type=False)
+order_status = postgresql.ENUM(
+    'CART', 'PENDING_PAYMENT', 'PAYMENT_FAILED', 'ORDER_CONFIRMED', 'PROCESSING', 'READY_FOR_PICKUP', 'COMPLETED', 'CANCELLED', 'REFUNDED',
+    name='orderstatus', create_type=False
+)
+payment_status = postgresql.ENUM('UNPAID', 'PAID', 'FAILED', 'REFUNDED', name='paymentstatus', create_type=False)
+lane_status = postgresql.ENUM('OPEN', 'CLOSED', 'BUSY', name='lanestatus', create_type=False)
+notification_status = postgresql.ENUM('UNREAD', 'READ', 'ARCHIVED', name='notificationstatus', create_type=False)
+ENUMS = [user_role, order_type, order_status, payment_status, lane_status, notification_status]
+
+
+def _timestamp(name: str, **kwargs) -> sa.Column:
+    return sa.Column(name, sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True, **kwargs)
+
 
 def upgrade() -> None:
     """Upgrade schema."""
-    pass
+    bind = op.get_bind()
+    for enum in ENUMS:
+        enum.create(bind, checkfirst=True)
+
+    op.create_table('tenants',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    _timestamp('created_at'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_tenants_id'), 'tenants', ['id'], unique=False)
+    op.create_index(op.f('ix_tenants_name'), 'tenants', ['name'], unique=True)
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('username', sa.String(), nullable=False),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('password_hash', sa.String(), nullable=False),
+    sa.Column('role', user_role, nullable=False),
+    sa.Column('tenant_id', sa.Integer(), nullable=True),
+    _timestamp('created_at'),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+    op.create_index(op.f('ix_users_username'), 'users', ['username'], unique=True)
+    op.create_table('products',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('price', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('sku', sa.String(), nullable=False),
+    sa.Column('tenant_id', sa.Integer(), nullable=False),
+    sa.Column('stock_quantity', sa.Integer(), nullable=False),
+    sa.Column('image_url', sa.String(), nullable=True),
+    sa.Column('version', sa.Integer(), server_default='1', nullable=False),
+    _timestamp('last_synced_at'),
+    _timestamp('created_at'),
+    _timestamp('updated_at'),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('sku', 'tenant_id', name='_sku_tenant_uc')
+    )
+    op.create_index(op.f('ix_products_id'), 'products', ['id'], unique=False)
+    op.create_index(op.f('ix_products_sku'), 'products', ['sku'], unique=False)
+    op.create_table('pickup_time_slots',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tenant_id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('start_time', sa.Time(timezone=True), nullable=False),
+    sa.Column('end_time', sa.Time(timezone=True), nullable=False),
+    sa.Column('capacity', sa.Integer(), nullable=False),
+    sa.Column('current_orders', sa.Integer(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    _timestamp('created_at'),
+    _timestamp('updated_at'),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_pickup_time_slots_id'), 'pickup_time_slots', ['id'], unique=False)
+    # lanes.current_order_id and orders.assigned_lane_id reference each other: lanes first,
+    # its foreign key to orders once orders exists.
+    op.create_table('lanes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tenant_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('status', lane_status, nullable=False),
+    sa.Column('current_order_id', sa.Integer(), nullable=True),
+    _timestamp('created_at'),
+    _timestamp('updated_at'),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_lanes_id'), 'lanes', ['id'], unique=False)
+    op.create_table('orders',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('tenant_id', sa.Integer(), nullable=False),
+    sa.Column('order_type', order_type, nullable=False),
+    sa.Column('status', order_status, nullable=False),
+    sa.Column('payment_status', payment_status, nullable=False),
+    sa.Column('total_amount', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('pickup_token', sa.String(), nullable=True),
+    sa.Column('pickup_slot_id', sa.Integer(), nullable=True),
+    sa.Column('assigned_lane_id', sa.Integer(), nullable=True),
+    sa.Column('identity_verification_product_id', sa.Integer(), nullable=True),
+    _timestamp('created_at'),
+    _timestamp('updated_at'),
+    sa.ForeignKeyConstraint(['assigned_lane_id'], ['lanes.id'], ),
+    sa.ForeignKeyConstraint(['identity_verification_product_id'], ['products.id'], ),
+    sa.ForeignKeyConstraint(['pickup_slot_id'], ['pickup_time_slots.id'], ),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_orders_id'), 'orders', ['id'], unique=False)
+    op.create_index(op.f('ix_orders_pickup_token'), 'orders', ['pickup_token'], unique=True)
+    with op.batch_alter_table('lanes') as batch_op: # A table rebuild on SQLite (empty here)
+        batch_op.create_foreign_key('lanes_current_order_id_fkey', 'orders', ['current_order_id'], ['id'])
+    op.create_table('order_items',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('price_at_purchase', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_order_items_id'), 'order_items', ['id'], unique=False)
+    op.create_table('staff_assignments',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('tenant_id', sa.Integer(), nullable=False),
+    sa.Column('assigned_role', user_role, nullable=False),
+    sa.Column('lane_id', sa.Integer(), nullable=True),
+    _timestamp('start_time'),
+    sa.Column('end_time', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.ForeignKeyConstraint(['lane_id'], ['lanes.id'], ),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_staff_assignments_id'), 'staff_assignments', ['id'], unique=False)
+    op.create_table('notifications',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('tenant_id', sa.Integer(), nullable=False),
+    sa.Column('message', sa.Text(), nullable=False),
+    sa.Column('related_order_id', sa.Integer(), nullable=True),
+    sa.Column('status', notification_status, nullable=False),
+    _timestamp('created_at'),
+    sa.Column('read_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['related_order_id'], ['orders.id'], ),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_notifications_id'), 'notifications', ['id'], unique=False)
 
 
 def downgrade() -> None:
     """Downgrade schema."""
-    pass
+    for table in ('notifications', 'staff_assignments', 'order_items'):
+        op.drop_table(table) # Their indexes go with them
+    with op.batch_alter_table('lanes') as batch_op:
+        batch_op.drop_constraint('lanes_current_order_id_fkey', type_='foreignkey')
+    op.drop_table('orders')
+    op.drop_table('lanes')
+    op.drop_table('pickup_time_slots')
+    op.drop_table('products')
+    op.drop_table('users')
+    op.drop_table('tenants')
+    bind = op.get_bind()
+    for enum in ENUMS:
+        enum.drop(bind, checkfirst=True)
@@ -0,0 +1,46 @@
+"""hot_path_composite_indexes
+
+Composite and partial indexes for the picker / counter queues, cart lookup, notification
+inbox, slot listings and product listings changed since a timestamp (see
+app/cli/index_audit.py). On PostgreSQL the indexes are built with CREATE INDEX
+CONCURRENTLY, outside the migration transaction, so orders stay writable meanwhile
+(see app/db/online_migrations.py).
+
+Revision ID: b7e2d4c91a36
+Revises: e1a7c3f95b20
+Create Date: 2026-10-19 14:05:12.418306
+
+"""
+from typing import Sequence, Union
+
+from app.db import online_migrations
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2d4c91a36'
+down_revision: Union[str, None] = 'e1a7c3f95b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, columns, partial index condition)
+INDEXES = [
+    ('ix_orders_tenant_status_created_at', 'orders', ['tenant_id', 'status', 'created_at'], None),
+    ('ix_orders_ready_tenant_updated_at', 'orders', ['tenant_id', 'updated_at'], "status = 'READY_FOR_PICKUP'"),
+    ('ix_orders_cart_user_tenant', 'orders', ['user_id', 'tenant_id'], "status = 'CART'"),
+    ('ix_notifications_user_status_created_at', 'notifications', ['user_id', 'status', 'created_at'], None),
+    ('ix_pickup_time_slots_tenant_date_start_time', 'pickup_time_slots', ['tenant_id', 'date', 'start_time'], None),
+    ('ix_products_tenant_updated_at', 'products', ['tenant_id', 'updated_at'], None),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Databases created by Base.metadata.create_all already have these indexes (kept as is).
+    for name, table, columns, where in INDEXES:
+        online_migrations.create_index_concurrently(name, table, columns, where=where)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, columns, where in reversed(INDEXES):
+        online_migrations.drop_index_concurrently(name, table)
@@ -0,0 +1,104 @@
+"""order_notification_archive
+
+Archive tables for finished orders, their items and old notifications (see
+app/services/archive_service.py). The foreign key from the inventory ledger to `orders`
+is dropped: movements keep the ID of an order after it moves to `orders_archive`.
+
+Revision ID: c4f1a8e0d2b7
+Revises: b7e2d4c91a36
+Create Date: 2026-10-19 16:42:37.102254
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4f1a8e0d2b7'
+down_revision: Union[str, None] = 'b7e2d4c91a36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Enum types created by the baseline revision
+order_type = postgresql.ENUM('BOPIS', 'POS_SALE', name='ordertype', create_type=False)
+order_status = postgresql.ENUM(
+    'CART', 'PENDING_PAYMENT', 'PAYMENT_FAILED', 'ORDER_CONFIRMED', 'PROCESSING', 'READY_FOR_PICKUP', 'COMPLETED', 'CANCELLED', 'REFUNDED',
+    name='orderstatus', create_type=False
+)
+payment_status = postgresql.ENUM('UNPAID', 'PAID', 'FAILED', 'REFUNDED', name='paymentstatus', create_type=False)
+notification_status = postgresql.ENUM('UNREAD', 'READ', 'ARCHIVED', name='notificationstatus', create_type=False)
+
+# The baseline created the ledger FK unnamed; PostgreSQL named it like this, SQLite batch mode needs the name.
+LEDGER_NAMING_CONVENTION = {"fk": "%(table_name)s_%(column_0_name)s_fkey"}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('orders_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('tenant_id', sa.Integer(), nullable=False),
+    sa.Column('order_type', order_type, nullable=False),
+    sa.Column('status', order_status, nullable=False),
+    sa.Column('payment_status', payment_status, nullable=False),
+    sa.Column('total_amount', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('pickup_token', sa.String(), nullable=True),
+    sa.Column('paid_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('pickup_slot_id', sa.Integer(), nullable=True),
+    sa.Column('assigned_lane_id', sa.Integer(), nullable=True),
+    sa.Column('identity_verification_product_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('change_seq', sa.BigInteger(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_orders_archive_tenant_completed_at', 'orders_archive', ['tenant_id', 'completed_at'], unique=False)
+    op.create_index('ix_orders_archive_user_created_at', 'orders_archive', ['user_id', 'created_at'], unique=False)
+    op.create_table('order_items_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('price_at_purchase', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['order_id'], ['orders_archive.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_order_items_archive_order_id'), 'order_items_archive', ['order_id'], unique=False)
+    op.create_table('notifications_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('tenant_id', sa.Integer(), nullable=False),
+    sa.Column('message', sa.Text(), nullable=False),
+    sa.Column('related_order_id', sa.Integer(), nullable=True),
+    sa.Column('status', notification_status, nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('read_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_notifications_archive_user_created_at', 'notifications_archive', ['user_id', 'created_at'], unique=False)
+
+    with op.batch_alter_table('inventory_movements', naming_convention=LEDGER_NAMING_CONVENTION) as batch_op:
+        batch_op.drop_constraint('inventory_movements_order_id_fkey', type_='foreignkey')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Fails while the ledger references archived orders; restore or delete those movements first.
+    with op.batch_alter_table('inventory_movements', naming_convention=LEDGER_NAMING_CONVENTION) as batch_op:
+        batch_op.create_foreign_key('inventory_movements_order_id_fkey', 'orders', ['order_id'], ['id'])
+
+    op.drop_index('ix_notifications_archive_user_created_at', table_name='notifications_archive')
+    op.drop_table('notifications_archive')
+    op.drop_index(op.f('ix_order_items_archive_order_id'), table_name='order_items_archive')
+    op.drop_table('order_items_archive')
+    op.drop_index('ix_orders_archive_user_created_at', table_name='orders_archive')
+    op.drop_index('ix_orders_archive_tenant_completed_at', table_name='orders_archive')
+    op.drop_table('orders_archive')
@@ -0,0 +1,302 @@
+"""ledger_sync_and_metrics_schema
+
+Schema of the inventory ledger, delta sync, idempotency, stock alert and dashboard features
+on top of the baseline:
+- New columns, all nullable so no table is rewritten: `tenants.default_reorder_threshold`,
+  `products.reorder_threshold`, `orders.paid_at` / `completed_at`, and `change_seq` on
+  products, pickup slots, lanes and orders.
+- New (empty) tables: idempotency records, change counters and tombstones, the inventory
+  ledger and its daily rollups, stock alerts, dashboard counters and sales rollups.
+- `change_seq` of existing rows is backfilled in committed batches, then the tenants' change
+  counters start above the highest backfilled number. Each table gets its own residue of
+  `id * 4`, so rows of one tenant never share a sequence number and the first delta sync
+  (`since=0`) returns every row. Carts are not tracked and keep a NULL `change_seq`.
+- Indexes on the existing tables, including product search, are built concurrently after the
+  backfill (see app/db/online_migrations.py).
+
+Deploy the application after this revision: it allocates sequence numbers from the counters
+created here. Run `python -m app.cli.reconcile_metrics` afterwards to count the existing
+orders in the dashboard counters (orders paid before this revision have no `paid_at` and stay
+out of the daily sales).
+
+Revision ID: e1a7c3f95b20
+Revises: 5271de4ae265
+Create Date: 2026-10-19 11:12:48.207391
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.db import online_migrations
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1a7c3f95b20'
+down_revision: Union[str, None] = '5271de4ae265'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Enum types created by the baseline revision
+order_type = postgresql.ENUM('BOPIS', 'POS_SALE', name='ordertype', create_type=False)
+order_status = postgresql.ENUM(
+    'CART', 'PENDING_PAYMENT', 'PAYMENT_FAILED', 'ORDER_CONFIRMED', 'PROCESSING', 'READY_FOR_PICKUP', 'COMPLETED', 'CANCELLED', 'REFUNDED',
+    name='orderstatus', create_type=False
+)
+payment_status = postgresql.ENUM('UNPAID', 'PAID', 'FAILED', 'REFUNDED', name='paymentstatus', create_type=False)
+# Enum types of this revision
+idempotency_status = postgresql.ENUM('IN_PROGRESS', 'COMPLETED', name='idempotencystatus', create_type=False)
+inventory_movement_type = postgresql.ENUM(
+    'SALE', 'POS_SALE', 'CANCELLATION', 'RECEIPT', 'STOCK_COUNT', 'DAMAGE', 'CORRECTION', name='inventorymovementtype', create_type=False
+)
+sales_bucket_granularity = postgresql.ENUM('HOUR', 'DAY', name='salesbucketgranularity', create_type=False)
+ENUMS = [idempotency_status, inventory_movement_type, sales_bucket_granularity]
+
+# (table, residue of change_seq modulo 4) for the tables tracked by delta sync
+CHANGE_SEQ_TABLES = [('products', 0), ('pickup_time_slots', 1), ('lanes', 2), ('orders', 3)]
+# Rows left unstamped: carts are not tracked (see app/db/change_tracking.py)
+UNTRACKED_ROWS = {'orders': "status = 'CART'"}
+
+# (name, table, columns) built concurrently on the existing tables
+INDEXES = [
+    ('ix_products_tenant_change_seq', 'products', ['tenant_id', 'change_seq']),
+    ('ix_pickup_time_slots_tenant_change_seq', 'pickup_time_slots', ['tenant_id', 'change_seq']),
+    ('ix_lanes_tenant_change_seq', 'lanes', ['tenant_id', 'change_seq']),
+    ('ix_orders_tenant_change_seq', 'orders', ['tenant_id', 'change_seq']),
+    ('ix_orders_tenant_completed_at', 'orders', ['tenant_id', 'completed_at']),
+]
+
+# SQLite product search (see the products_fts statements in app/models/sql_models.py)
+SQLITE_PRODUCTS_FTS = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(name, sku, content='products', content_rowid='id', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN "
+    "INSERT INTO products_fts(rowid, name, sku) VALUES (new.id, new.name, new.sku); END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name, sku) VALUES ('delete', old.id, old.name, old.sku); END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, sku ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name, sku) VALUES ('delete', old.id, old.name, old.sku); "
+    "INSERT INTO products_fts(rowid, name, sku) VALUES (new.id, new.name, new.sku); END",
+    "INSERT INTO products_fts(products_fts) VALUES ('rebuild')", # Index the existing products
+]
+SQLITE_PRODUCTS_FTS_DROP = [
+    "DROP TRIGGER IF EXISTS products_fts_ai", "DROP TRIGGER IF EXISTS products_fts_ad", "DROP TRIGGER IF EXISTS products_fts_au",
+    "DROP TABLE IF EXISTS products_fts",
+]
+
+
+def _timestamp(name: str, **kwargs) -> sa.Column:
+    return sa.Column(name, sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True, **kwargs)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    dialect = op.get_context().dialect.name
+    for enum in ENUMS:
+        enum.create(bind, checkfirst=True)
+
+    op.add_column('tenants', sa.Column('default_reorder_threshold', sa.Integer(), nullable=True))
+    op.add_column('products', sa.Column('reorder_threshold', sa.Integer(), nullable=True))
+    op.add_column('orders', sa.Column('paid_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('orders', sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True))
+    for table, _ in CHANGE_SEQ_TABLES:
+        op.add_column(table, sa.Column('change_seq', sa.BigInteger(), nullable=True))
+
+    op.create_table('idempotency_records',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tenant_id', sa.Integer(), nullable=False),
+    sa.Column('key', sa.String(), nullable=False),
+    sa.Column('request_fingerprint', sa.String(length=64), nullable=False),
+    sa.Column('status', idempotency_status, nullable=False),
+    sa.Column('response_status_code', sa.Integer(), nullable=True),
+    sa.Column('response_body', sa.Text(), nullable=True),
+    sa.Column('locked_until', sa.DateTime(timezone=True), nullable=True),
+    _timestamp('created_at'),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('tenant_id', 'key', name='_idempotency_tenant_key_uc')
+    )
+    op.create_index(op.f('ix_idempotency_records_id'), 'idempotency_records', ['id'], unique=False)
+    op.create_table('tenant_change_counters',
+    sa.Column('tenant_id', sa.Integer(), nullable=False),
+    sa.Column('last_seq', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+    sa.PrimaryKeyConstraint('tenant_id')
+    )
+    op.create_table('sync_tombstones',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tenant_id', sa.Integer(), nullable=False),
+    sa.Column('entity_type', sa.String(), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('change_seq', sa.BigInteger(), nullable=False),
+    _timestamp('deleted_at'),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_sync_tombstones_id'), 'sync_tombstones', ['id'], unique=False)
+    op.create_index('ix_sync_tombstones_tenant_change_seq', 'sync_tombstones', ['tenant_id', 'change_seq'], unique=False)
+    op.create_table('inventory_movements',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tenant_id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=True),
+    sa.Column('sku', sa.String(), nullable=False),
+    sa.Column('movement_type', inventory_movement_type, nullable=False),
+    sa.Column('quantity_delta', sa.Integer(), nullable=False),
+    sa.Column('quantity_after', sa.Integer(), nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('note', sa.String(), nullable=True),
+    _timestamp('created_at'),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_inventory_movements_id'), 'inventory_movements', ['id'], unique=False)
+    op.create_index('ix_inventory_movements_tenant_created_at', 'inventory_movements', ['tenant_id', 'created_at'], unique=False)
+    op.create_index('ix_inventory_movements_tenant_product_id', 'inventory_movements', ['tenant_id', 'product_id', 'id'], unique=False)
+    op.create_table('inventory_daily_rollups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tenant_id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=True),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('received', sa.Integer(), nullable=False),
+    sa.Column('sold_bopis', sa.Integer(), nullable=False),
+    sa.Column('sold_pos', sa.Integer(), nullable=False),
+    sa.Column('cancelled', sa.Integer(), nullable=False),
+    sa.Column('adjusted', sa.Integer(), nullable=False),
+    sa.Column('handed_over', sa.Integer(), nullable=False),
+    sa.Column('net_change', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('tenant_id', 'product_id', 'day', name='_inventory_rollup_tenant_product_day_uc')
+    )
+    op.create_index(op.f('ix_inventory_daily_rollups_id'), 'inventory_daily_rollups', ['id'], unique=False)
+    op.create_index('ix_inventory_daily_rollups_tenant_day', 'inventory_daily_rollups', ['tenant_id', 'day'], unique=False)
+    op.create_table('stock_alerts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tenant_id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('threshold', sa.Integer(), nullable=False),
+    sa.Column('triggered_stock_quantity', sa.Integer(), nullable=False),
+    sa.Column('triggered_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('resolved_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_notified_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('product_id')
+    )
+    op.create_index(op.f('ix_stock_alerts_id'), 'stock_alerts', ['id'], unique=False)
+    op.create_index('ix_stock_alerts_tenant_active', 'stock_alerts', ['tenant_id', 'is_active'], unique=False)
+    op.create_table('tenant_order_status_counts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tenant_id', sa.Integer(), nullable=False),
+    sa.Column('status', order_status, nullable=False),
+    sa.Column('slot', sa.Integer(), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('tenant_id', 'status', 'slot', name='_tenant_order_status_count_uc')
+    )
+    op.create_index(op.f('ix_tenant_order_status_counts_id'), 'tenant_order_status_counts', ['id'], unique=False)
+    op.create_table('tenant_daily_sales',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tenant_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('slot', sa.Integer(), nullable=False),
+    sa.Column('paid_orders', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('tenant_id', 'day', 'slot', name='_tenant_daily_sales_tenant_day_uc')
+    )
+    op.create_index(op.f('ix_tenant_daily_sales_id'), 'tenant_daily_sales', ['id'], unique=False)
+    op.create_table('sales_rollups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tenant_id', sa.Integer(), nullable=False),
+    sa.Column('granularity', sales_bucket_granularity, nullable=False),
+    sa.Column('bucket_start', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=True),
+    sa.Column('sku', sa.String(), nullable=False),
+    sa.Column('product_name', sa.String(), nullable=False),
+    sa.Column('order_type', order_type, nullable=False),
+    sa.Column('payment_status', payment_status, nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('tenant_id', 'granularity', 'bucket_start', 'product_id', 'order_type', 'payment_status', name='_sales_rollup_bucket_uc')
+    )
+    op.create_index(op.f('ix_sales_rollups_id'), 'sales_rollups', ['id'], unique=False)
+    op.create_index('ix_sales_rollups_tenant_granularity_bucket', 'sales_rollups', ['tenant_id', 'granularity', 'bucket_start'], unique=False)
+    op.create_table('sales_rollup_watermarks',
+    sa.Column('tenant_id', sa.Integer(), nullable=False),
+    sa.Column('completed_until', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('refreshed_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['tenant_id'], ['tenants.id'], ),
+    sa.PrimaryKeyConstraint('tenant_id')
+    )
+
+    for table, residue in CHANGE_SEQ_TABLES:
+        where = f"change_seq IS NULL AND NOT ({UNTRACKED_ROWS[table]})" if table in UNTRACKED_ROWS else "change_seq IS NULL"
+        online_migrations.backfill_in_batches(table, f"change_seq = id * 4 + {residue}", where=where)
+    stamped_rows = " UNION ALL ".join(f"SELECT tenant_id, change_seq FROM {table}" for table, _ in CHANGE_SEQ_TABLES)
+    op.execute(
+        "INSERT INTO tenant_change_counters (tenant_id, last_seq) "
+        f"SELECT tenant_id, MAX(change_seq) FROM ({stamped_rows}) AS stamped WHERE change_seq IS NOT NULL GROUP BY tenant_id"
+    )
+
+    for name, table, columns in INDEXES:
+        online_migrations.create_index_concurrently(name, table, columns)
+    if dialect == 'postgresql':
+        online_migrations.create_index_concurrently(
+            'ix_products_search_tsv', 'products', [sa.text("to_tsvector('simple', name || ' ' || sku)")], postgresql_using='gin'
+        )
+        online_migrations.create_index_concurrently(
+            'ix_products_tenant_sku_prefix', 'products', ['tenant_id', 'sku'], postgresql_ops={'sku': 'text_pattern_ops'}
+        )
+    elif dialect == 'sqlite':
+        for statement in SQLITE_PRODUCTS_FTS:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_context().dialect.name
+    if dialect == 'postgresql':
+        online_migrations.drop_index_concurrently('ix_products_tenant_sku_prefix', 'products')
+        online_migrations.drop_index_concurrently('ix_products_search_tsv', 'products')
+    elif dialect == 'sqlite':
+        for statement in SQLITE_PRODUCTS_FTS_DROP:
+            op.execute(statement)
+    for name, table, _ in reversed(INDEXES):
+        online_migrations.drop_index_concurrently(name, table)
+
+    for table in (
+        'sales_rollup_watermarks', 'sales_rollups', 'tenant_daily_sales', 'tenant_order_status_counts', 'stock_alerts',
+        'inventory_daily_rollups', 'inventory_movements', 'sync_tombstones', 'tenant_change_counters', 'idempotency_records'
+    ):
+        op.drop_table(table) # Their indexes go with them
+
+    for table, _ in CHANGE_SEQ_TABLES:
+        with op.batch_alter_table(table) as batch_op: # A table rebuild on SQLite
+            batch_op.drop_column('change_seq')
+            if table == 'orders':
+                batch_op.drop_column('completed_at')
+                batch_op.drop_column('paid_at')
+            elif table == 'products':
+                batch_op.drop_column('reorder_threshold')
+    with op.batch_alter_table('tenants') as batch_op:
+        batch_op.drop_column('default_reorder_threshold')
+    bind = op.get_bind()
+    for enum in ENUMS:
+        enum.drop(bind, checkfirst=True)
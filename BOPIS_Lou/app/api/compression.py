@@ -0,0 +1,156 @@
+"""
+Response compression with Accept-Encoding negotiation.
+
+`CompressionMiddleware` picks the best encoding the client accepts (by q-value, then by
+server preference br > zstd > gzip) and compresses the response with Starlette's responder
+machinery, which already handles the details:
+- bodies smaller than the minimum size are sent as is;
+- streaming responses (exports, static files) are compressed chunk by chunk and flushed
+  after every chunk, so clients still receive data progressively;
+- responses that already carry a `Content-Encoding` (precompressed static files), partial
+  responses (206) and already-compressed media types (gzip snapshots, images) are skipped.
+
+Brotli and zstd are used when the optional `brotli` / `zstandard` packages are installed;
+gzip is always available.
+"""
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import DEFAULT_EXCLUDED_CONTENT_TYPES, GZipResponder, IdentityResponder
+from starlette.types import ASGIApp, Receive, Scope, Send
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError: # pragma: no cover - optional dependency
+    brotli = None # type: ignore
+
+try:
+    import zstandard
+except ImportError: # pragma: no cover - optional dependency
+    zstandard = None # type: ignore
+
+
+class BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int, *, exclude_content_types: Tuple[str, ...]) -> None:
+        super().__init__(app, minimum_size, exclude_content_types=exclude_content_types)
+        self.quality = quality
+        self._compressor = None
+
+    async def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        if self._compressor is None:
+            self._compressor = brotli.Compressor(quality=self.quality)
+        data = self._compressor.process(body)
+        return data + (self._compressor.flush() if more_body else self._compressor.finish())
+
+
+class ZstdResponder(IdentityResponder):
+    content_encoding = "zstd"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, level: int, *, exclude_content_types: Tuple[str, ...]) -> None:
+        super().__init__(app, minimum_size, exclude_content_types=exclude_content_types)
+        self.level = level
+        self._compressor = None
+
+    async def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        if self._compressor is None:
+            self._compressor = zstandard.ZstdCompressor(level=self.level).compressobj()
+        data = self._compressor.compress(body)
+        return data + (self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK) if more_body else self._compressor.flush())
+
+
+def available_encodings() -> List[str]:
+    """Content codings this server can produce, most preferred first."""
+    encodings = []
+    if brotli is not None:
+        encodings.append("br")
+    if zstandard is not None:
+        encodings.append("zstd")
+    encodings.append("gzip")
+    return encodings
+
+
+def parse_accept_encoding(accept_encoding: str) -> Dict[str, float]:
+    """Parses an Accept-Encoding header into {coding: q-value}; invalid q-values count as 0."""
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def negotiate_encoding(accept_encoding: Optional[str], encodings: List[str]) -> Optional[str]:
+    """
+    Chooses a content coding for a response (RFC 9110, 12.5.3).
+
+    Args:
+        accept_encoding: Raw Accept-Encoding request header, if any.
+        encodings: Codings the server can produce, most preferred first.
+
+    Returns:
+        The coding with the highest q-value (ties go to server preference), or None for identity.
+    """
+    if not accept_encoding:
+        return None
+    accepted = parse_accept_encoding(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for coding in encodings:
+        quality = accepted.get(coding, wildcard)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing responses with the negotiated br, zstd or gzip coding.
+
+    Args:
+        app: The wrapped ASGI app.
+        minimum_size: Bodies smaller than this (in bytes, non-streaming) are not compressed.
+        gzip_level: zlib level for gzip (1-9).
+        brotli_quality: Brotli quality (0-11); 4-5 is the usual choice for dynamic responses.
+        zstd_level: Zstandard level (1-22).
+        exclude_content_types: Media types that are never compressed.
+    """
+
+    def __init__(
+        self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4, zstd_level: int = 3,
+        exclude_content_types: Tuple[str, ...] = DEFAULT_EXCLUDED_CONTENT_TYPES
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.zstd_level = zstd_level
+        self.exclude_content_types = exclude_content_types
+        self.encodings = available_encodings()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("Accept-Encoding"), self.encodings)
+        responder: ASGIApp
+        if encoding == "br":
+            responder = BrotliResponder(self.app, self.minimum_size, self.brotli_quality, exclude_content_types=self.exclude_content_types)
+        elif encoding == "zstd":
+            responder = ZstdResponder(self.app, self.minimum_size, self.zstd_level, exclude_content_types=self.exclude_content_types)
+        elif encoding == "gzip":
+            responder = GZipResponder(self.app, self.minimum_size, compresslevel=self.gzip_level, exclude_content_types=self.exclude_content_types)
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size, exclude_content_types=self.exclude_content_types)
+        await responder(scope, receive, send)
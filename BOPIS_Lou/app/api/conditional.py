@@ -0,0 +1,67 @@
+"""
+Helpers for conditional GET requests (ETag / If-None-Match).
+
+Validators are derived from cheap aggregates (row count and highest per-tenant `change_seq`,
+see `app.db.change_tracking`) or from single columns, so an unchanged resource is answered
+with 304 without loading or serializing any rows.
+"""
+from fastapi import Response, status
+from typing import Any, Dict, Optional
+import hashlib
+import json
+
+
+def build_etag(*parts: Any) -> str:
+    """
+    Builds a weak ETag from the values that identify a version of a representation.
+
+    Args:
+        parts: JSON-serializable values (resource name, tenant, version counters, query string, ...).
+
+    Returns:
+        A quoted weak entity tag, e.g. W/"3f2a...".
+    """
+    digest = hashlib.sha1(json.dumps(parts, default=str, separators=(",", ":")).encode("utf-8")).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_headers(etag: str) -> Dict[str, str]:
+    """Headers carrying the ETag and asking clients to revalidate cached copies before reuse."""
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def set_etag_headers(response: Response, etag: str) -> None:
+    """Sets the `etag_headers` on a response."""
+    response.headers.update(etag_headers(etag))
+
+
+def not_modified_response(etag: str) -> Response:
+    """Returns an empty 304 response carrying the current validator."""
+    response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    set_etag_headers(response, etag)
+    return response
+
+
+def if_none_match_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Checks an If-None-Match header against the current ETag using weak comparison (RFC 9110, 13.1.2).
+
+    Args:
+        if_none_match: Raw header value, possibly a comma-separated list or "*".
+        etag: Current entity tag, quoted (optionally with a W/ prefix).
+
+    Returns:
+        True if the client's copy is current and a 304 can be sent.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    current = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == current:
+            return True
+    return False
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends, Query, Response, status
+from typing import List
+
+from app.db import slow_queries
+from app.schemas.admin_schemas import SlowQueryResponse
+from app.api import deps
+
+router = APIRouter(dependencies=[Depends(deps.get_current_active_superuser)])
+
+@router.get("/slow-queries", response_model=List[SlowQueryResponse])
+def list_slow_queries(limit: int = Query(100, ge=1, le=1000)):
+    """
+    Most recent slow queries of this worker, newest first (Super Admin only).
+    Empty unless SLOW_QUERY_THRESHOLD_MS is set; parameters are redacted to their types.
+    """
+    return slow_queries.recent_slow_queries()[:limit]
+
+@router.delete("/slow-queries", status_code=status.HTTP_204_NO_CONTENT)
+def clear_slow_queries():
+    """Empties this worker's slow-query log, e.g. before measuring a change (Super Admin only)."""
+    slow_queries.clear_slow_queries()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
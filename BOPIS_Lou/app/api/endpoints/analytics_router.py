@@ -0,0 +1,83 @@
+"""
+API router for sales analytics.
+Reports and exports read the pre-aggregated sales rollups (see app/services/sales_analytics_service.py)
+from the read replica, if one is configured.
+"""
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from typing import Optional
+import datetime
+from app.db.session import get_read_db
+from app.models.sql_models import User
+from app.models.sql_models import UserRole as DBUserRoleEnum
+from app.schemas.analytics_schemas import SalesBucketGranularityEnum, SalesExportFormatEnum, SalesReportResponse
+from app.schemas.order_schemas import OrderTypeEnum, PaymentStatusEnum
+from app.services import sales_analytics_service
+from app.api import deps
+
+router = APIRouter()
+
+# Longest report per request; exports are streamed and not limited.
+MAX_REPORT_DAYS = {SalesBucketGranularityEnum.HOUR: 31, SalesBucketGranularityEnum.DAY: 366}
+
+def _resolve_tenant_id(current_user: User, tenant_id_query: Optional[int]) -> int:
+    if current_user.role == DBUserRoleEnum.super_admin:
+        if tenant_id_query is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Super admin must specify tenant_id via 'tenantId' query parameter.")
+        return tenant_id_query
+    if tenant_id_query and tenant_id_query != current_user.tenant_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Tenant admin can only view their own tenant's sales.")
+    return current_user.tenant_id # type: ignore
+
+def _check_date_range(start_date: datetime.date, end_date: datetime.date) -> None:
+    if end_date < start_date:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="end_date must not be before start_date.")
+
+@router.get("/sales", response_model=SalesReportResponse)
+def get_sales_report(
+    start_date: datetime.date,
+    end_date: datetime.date,
+    granularity: SalesBucketGranularityEnum = SalesBucketGranularityEnum.DAY,
+    product_id: Optional[int] = None,
+    order_type: Optional[OrderTypeEnum] = None,
+    payment_status: Optional[PaymentStatusEnum] = None,
+    tenant_id_query: Optional[int] = Query(None, alias="tenantId", description="Required for super_admin."),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(deps.get_current_active_tenant_admin)
+):
+    """
+    Sales of completed orders per hour or day (UTC), product, channel and payment status.
+    `complete_until` tells up to which completion time orders are included.
+    """
+    tenant_id = _resolve_tenant_id(current_user, tenant_id_query)
+    _check_date_range(start_date, end_date)
+    if (end_date - start_date).days >= MAX_REPORT_DAYS[granularity]:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Date range must not exceed {MAX_REPORT_DAYS[granularity]} days for {granularity.value} buckets; use the export instead.")
+    return sales_analytics_service.get_sales_report(
+        db, tenant_id=tenant_id, granularity=granularity, start_date=start_date, end_date=end_date, product_id=product_id,
+        order_type=order_type.value if order_type else None, payment_status=payment_status.value if payment_status else None
+    )
+
+@router.get("/sales/export")
+def export_sales(
+    start_date: datetime.date,
+    end_date: datetime.date,
+    granularity: SalesBucketGranularityEnum = SalesBucketGranularityEnum.DAY,
+    file_format: SalesExportFormatEnum = Query(SalesExportFormatEnum.CSV, alias="format"),
+    tenant_id_query: Optional[int] = Query(None, alias="tenantId", description="Required for super_admin."),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(deps.get_current_active_tenant_admin)
+):
+    """
+    Streams sales buckets of any date range as CSV or JSON Lines, with constant memory.
+    """
+    tenant_id = _resolve_tenant_id(current_user, tenant_id_query)
+    _check_date_range(start_date, end_date)
+    media_type = "text/csv" if file_format == SalesExportFormatEnum.CSV else "application/x-ndjson"
+    filename = f"sales_{granularity.value.lower()}_{start_date.isoformat()}_{end_date.isoformat()}.{file_format.value}"
+    return StreamingResponse(
+        sales_analytics_service.iter_sales_export(db, tenant_id=tenant_id, granularity=granularity, start_date=start_date, end_date=end_date, file_format=file_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -90,5 +90,4 @@ def counter_assigns_order_to_lane(
 
     # Return the updated order details, which should now reflect the assigned_lane_id
     # and potentially other related changes if the lane object in order response is populated.
-    updated_order = order_service.get_order_details(db, order_id=order_id, user_id_for_auth=counter_staff.id, user_role_for_auth=counter_staff.role, tenant_id_for_auth=tenant_id_context)
-    return updated_order
+    return order_service.get_order_with_details(db, order_id) # Access was checked above
@@ -0,0 +1,114 @@
+"""
+API router for inventory operations (receiving, cycle counts, write-offs).
+Endpoints are scoped to the tenant of the authenticated staff member.
+"""
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Query, Response
+from sqlalchemy.orm import Session
+from typing import List, Optional
+import datetime
+from app.db.session import get_db, get_read_db
+from app.models.sql_models import User
+from app.models.sql_models import UserRole as DBUserRoleEnum
+from app.schemas.inventory_schemas import (
+    StockAdjustmentRequest, StockAdjustmentResponse, InventoryReconciliationResponse, StockAlertResponse, StockAlertSettings
+)
+from app.services import inventory_service, idempotency_service, stock_alert_service
+from app.api import deps
+
+router = APIRouter()
+
+MAX_RECONCILIATION_DAYS = 366
+
+def get_inventory_staff_user(current_user: User = Depends(deps.get_current_user)) -> User:
+    if current_user.role not in [DBUserRoleEnum.tenant_admin, DBUserRoleEnum.counter]:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User does not have inventory privileges.")
+    if not current_user.tenant_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Staff must be associated with a tenant for inventory operations.")
+    return current_user
+
+@router.post("/adjustments", response_model=StockAdjustmentResponse)
+def adjust_stock(
+    adjustments_in: StockAdjustmentRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    db: Session = Depends(get_db),
+    staff_user: User = Depends(get_inventory_staff_user)
+):
+    """
+    Applies many stock adjustments (by SKU) in one transaction, e.g. a whole truck receipt.
+    Each record gives either a signed `delta` or an `absolute` counted quantity.
+    Every record is written to the inventory ledger. If any SKU is unknown or any
+    adjustment would make stock negative, nothing is applied (422).
+    Send an `Idempotency-Key` so that a retried upload is not applied twice.
+    """
+    fingerprint = idempotency_service.compute_request_fingerprint("inventory.adjustments", {
+        "staff_user_id": staff_user.id,
+        "body": adjustments_in.model_dump(mode="json")
+    })
+    result, replayed = idempotency_service.execute_idempotent(
+        db,
+        tenant_id=staff_user.tenant_id, # type: ignore
+        idempotency_key=idempotency_key,
+        request_fingerprint=fingerprint,
+        operation=lambda before_commit: inventory_service.apply_stock_adjustments(
+            db, tenant_id=staff_user.tenant_id, adjustments=adjustments_in.adjustments, user_id=staff_user.id, before_commit=before_commit # type: ignore
+        ),
+        serializer=lambda adjustment_result: adjustment_result.model_dump(mode="json")
+    )
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
+
+@router.get("/reconciliation", response_model=InventoryReconciliationResponse)
+def get_reconciliation_report(
+    start_date: datetime.date,
+    end_date: datetime.date,
+    product_id: Optional[int] = None,
+    tenant_id_query: Optional[int] = Query(None, alias="tenantId", description="Required for super_admin."),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(deps.get_current_active_tenant_admin)
+):
+    """
+    Reconciles EC (BOPIS) sales, POS sales, received stock, cancellations, adjustments and
+    handed-over quantities per product for a date range (UTC days, inclusive).
+    Reads pre-aggregated daily rollups from the read replica, if one is configured.
+    """
+    if current_user.role == DBUserRoleEnum.super_admin:
+        if tenant_id_query is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Super admin must specify tenant_id via 'tenantId' query parameter.")
+        tenant_id = tenant_id_query
+    else:
+        if tenant_id_query and tenant_id_query != current_user.tenant_id:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Tenant admin can only view their own tenant's inventory.")
+        tenant_id = current_user.tenant_id # type: ignore
+    if end_date < start_date:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="end_date must not be before start_date.")
+    if (end_date - start_date).days >= MAX_RECONCILIATION_DAYS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Date range must not exceed {MAX_RECONCILIATION_DAYS} days.")
+    return inventory_service.get_reconciliation_report(db, tenant_id=tenant_id, start_date=start_date, end_date=end_date, product_id=product_id)
+
+@router.get("/alerts", response_model=List[StockAlertResponse])
+def list_stock_alerts(
+    db: Session = Depends(get_db),
+    staff_user: User = Depends(get_inventory_staff_user)
+):
+    """
+    Active low-stock alerts of the staff member's tenant, most recent first.
+    Alerts are maintained as stock changes, so this only reads the active alert rows.
+    """
+    return stock_alert_service.list_active_alerts(db, tenant_id=staff_user.tenant_id) # type: ignore
+
+@router.put("/alert-settings", response_model=StockAlertSettings)
+def update_stock_alert_settings(
+    settings_in: StockAlertSettings,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(deps.get_current_active_tenant_admin)
+):
+    """
+    Sets the tenant's default reorder threshold, used by products without their own
+    `reorder_threshold`. All products of the tenant are re-evaluated.
+    """
+    if not current_user.tenant_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Tenant admin must be associated with a tenant.")
+    tenant = stock_alert_service.set_default_reorder_threshold(db, tenant_id=current_user.tenant_id, threshold=settings_in.default_reorder_threshold) # type: ignore
+    return StockAlertSettings(default_reorder_threshold=tenant.default_reorder_threshold)
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query # Added Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header, Request, Response # Added Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.db.session import get_db
@@ -9,8 +9,10 @@ from app.schemas.lane_schemas import (
     StaffAssignmentToLaneCreate, StaffAssignmentResponse,
     LaneStatusEnum as PydanticLaneStatusEnum # Import Pydantic enum
 )
-from app.services import lane_service
+from app.schemas.sync_schemas import SyncEntityTypeEnum
+from app.services import lane_service, sync_service
 from app.api import deps
+from app.api.conditional import if_none_match_matches, build_etag, set_etag_headers, not_modified_response
 
 router = APIRouter()
 
@@ -32,8 +34,11 @@ def create_new_lane_admin(
 
 @router.get("/", response_model=List[LaneResponse])
 def list_lanes_admin_or_staff(
+    request: Request,
+    response: Response,
     status_filter: Optional[PydanticLaneStatusEnum] = Query(None, alias="status"),
     target_tenant_id: Optional[int] = Query(None, description="Super_admin can use this to specify tenant context."), # Added for SA
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
     db: Session = Depends(get_db),
     current_user: User = Depends(deps.get_current_user) # Allow any authenticated staff to see lanes
 ):
@@ -49,6 +54,11 @@ def list_lanes_admin_or_staff(
     else: # Should not happen if user has role that requires tenant_id and dependency is correct
          raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User not associated with a tenant or invalid context.")
 
+    etag = build_etag("lanes", effective_tenant_id, *sync_service.get_collection_version(db, SyncEntityTypeEnum.lane, effective_tenant_id), str(request.url.query))
+    if if_none_match_matches(if_none_match, etag):
+        return not_modified_response(etag)
+    set_etag_headers(response, etag)
+
     lanes = lane_service.get_lanes_by_tenant(db, tenant_id=effective_tenant_id, status_filter=status_filter)
     return lanes
 
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Header, HTTPException, Response, status
+from typing import Optional
+import hmac
+
+from app.core.config import settings
+from app.core.metrics import REGISTRY, CONTENT_TYPE
+
+router = APIRouter()
+
+@router.get("/metrics", include_in_schema=False)
+def get_metrics(authorization: Optional[str] = Header(None)):
+    """
+    Prometheus scrape endpoint (text format 0.0.4), merged across workers when
+    METRICS_MULTIPROC_DIR is set. Requires `Authorization: Bearer <METRICS_BEARER_TOKEN>` if configured.
+    """
+    if settings.METRICS_BEARER_TOKEN:
+        expected = f"Bearer {settings.METRICS_BEARER_TOKEN}"
+        if authorization is None or not hmac.compare_digest(authorization, expected):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token.", headers={"WWW-Authenticate": "Bearer"})
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
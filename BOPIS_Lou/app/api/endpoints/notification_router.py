@@ -16,6 +16,7 @@ def list_my_notifications(
     status_filter: Optional[NotificationStatusEnum] = Query(None, alias="status"), # Use Pydantic enum from schemas
     skip: int = 0,
     limit: int = 100,
+    include_archived: bool = Query(False, description="Also return read notifications moved to the archive."),
     db: Session = Depends(get_db),
     current_user: User = Depends(deps.get_current_user)
 ):
@@ -23,7 +24,7 @@ def list_my_notifications(
     Retrieve notifications for the currently authenticated user.
     """
     notifications = notification_service.get_notifications_for_user(
-        db, user_id=current_user.id, skip=skip, limit=limit, status_filter=status_filter # type: ignore
+        db, user_id=current_user.id, skip=skip, limit=limit, status_filter=status_filter, include_archived=include_archived # type: ignore
     )
     # Pydantic's orm_mode in NotificationResponse should handle enum conversion for response.
     return notifications
@@ -1,22 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Path, Body, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Path, Body, Query, Header, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from pydantic import TypeAdapter
+from typing import List, Optional, Union
+import datetime
 
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.models.sql_models import User, Order as DBOrder, OrderItem as DBOrderItem
 from app.models.sql_models import UserRole as DBUserRoleEnum
 from app.models.sql_models import OrderStatus as DBOrderStatusEnum
 from app.schemas.order_schemas import (
     OrderResponse, OrderItemResponse,
     CartItemCreateRequest, CartItemUpdateRequest, CheckoutRequestSchema,
-    OrderPickupTokenVerificationRequest # Added for verify endpoint
+    OrderPickupTokenVerificationRequest, # Added for verify endpoint
+    OrderExportFormatEnum, OrderStatusEnum, OrderSummaryResponse
 )
+from app.schemas.common_schemas import ListViewEnum
 from app.schemas.counter_schemas import OrderVerificationDataResponse, CounterOrderCompleteRequest # Added for complete endpoint
-from app.services import order_service, product_service, lane_service # Added lane_service
+from app.services import order_service, product_service, lane_service, idempotency_service, order_export_service, archive_service # Added lane_service
 from app.api import deps
+from app.api.serialization import model_list_response, rows_response
 
 router = APIRouter()
 
+ORDER_LIST_ADAPTER = TypeAdapter(List[OrderResponse]) # Built once at import, reused by every list request
+
 # Helper function to get counter user (can be moved to deps if used elsewhere)
 def get_counter_user_for_order_ops(current_user: User = Depends(deps.get_current_user)) -> User:
     if current_user.role not in [DBUserRoleEnum.counter, DBUserRoleEnum.tenant_admin, DBUserRoleEnum.super_admin]:
@@ -105,49 +113,111 @@ def remove_cart_item_from_current_user_cart(
 def checkout_user_cart(
     cart_order_id: int,
     checkout_details: CheckoutRequestSchema,
+    response: Response,
+    # Idempotency key can also be passed as a header
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     db: Session = Depends(get_db),
     current_user: User = Depends(deps.get_current_user)
 ):
-    cart_order_to_checkout = db.query(DBOrder).filter(
-        DBOrder.id == cart_order_id,
-        DBOrder.user_id == current_user.id, # Ensure current user owns the cart
-        DBOrder.status == DBOrderStatusEnum.CART
-    ).first()
-
-    if not cart_order_to_checkout:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Cart not found, not owned by user, or not in 'CART' status.")
-
+    if idempotency_key: # Header takes precedence if provided
+        checkout_details.idempotency_key = idempotency_key
+    if checkout_details.idempotency_key and not current_user.tenant_id:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Idempotent checkout requires a tenant context.")
+
+    def _checkout(before_commit):
+        cart_order_to_checkout = db.query(DBOrder).filter(
+            DBOrder.id == cart_order_id,
+            DBOrder.user_id == current_user.id, # Ensure current user owns the cart
+            DBOrder.status == DBOrderStatusEnum.CART
+        ).first()
+
+        if not cart_order_to_checkout:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Cart not found, not owned by user, or not in 'CART' status.")
+
+        return order_service.checkout_cart(db, cart_order=cart_order_to_checkout, checkout_details=checkout_details, before_commit=before_commit)
+
+    # Retries with the same key replay the stored response without touching stock or slots.
+    fingerprint = idempotency_service.compute_request_fingerprint("orders.checkout", {
+        "user_id": current_user.id,
+        "cart_order_id": cart_order_id,
+        "body": checkout_details.model_dump(mode="json", exclude={"idempotency_key"})
+    })
     try:
-        confirmed_order = order_service.checkout_cart(db, cart_order=cart_order_to_checkout, checkout_details=checkout_details)
-        return confirmed_order
+        confirmed_order, replayed = idempotency_service.execute_idempotent(
+            db,
+            tenant_id=current_user.tenant_id, # type: ignore
+            idempotency_key=checkout_details.idempotency_key,
+            request_fingerprint=fingerprint,
+            operation=_checkout,
+            serializer=lambda order: OrderResponse.model_validate(order, from_attributes=True).model_dump(mode="json")
+        )
     except HTTPException as e:
         raise e
     except Exception as e:
         # Log error e
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Checkout failed due to an unexpected error.")
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return confirmed_order
 
 
 # --- Order Viewing ---
-@router.get("/", response_model=List[OrderResponse])
+@router.get("/", response_model=Union[List[OrderResponse], List[OrderSummaryResponse]])
 def list_orders( # Renamed from list_my_orders for clarity
     skip: int = 0,
     limit: int = 100,
+    view: ListViewEnum = Query(ListViewEnum.full, description="`summary` returns flat list-screen columns in a single query."),
     tenant_id_filter: Optional[int] = Query(None, alias="tenantId"), # For super_admin to filter by tenant
     status_filter: Optional[str] = Query(None, alias="status"), # Example filter
     db: Session = Depends(get_db),
     current_user: User = Depends(deps.get_current_user)
 ):
     # Service layer (list_orders_for_user) handles permission logic based on user role
+    # Both views serialize themselves instead of going through the Union response_model.
+    if view == ListViewEnum.summary:
+        return rows_response(order_service.list_order_summary_rows_for_user(db, user=current_user, skip=skip, limit=limit))
     orders = order_service.list_orders_for_user(db, user=current_user, skip=skip, limit=limit) # Pass filters to service if implemented
-    return orders
+    return model_list_response(ORDER_LIST_ADAPTER, orders)
+
+@router.get("/export")
+def export_orders(
+    file_format: OrderExportFormatEnum = Query(OrderExportFormatEnum.JSONL, alias="format"),
+    tenant_id_filter: Optional[int] = Query(None, alias="tenantId"), # For super_admin to filter by tenant
+    status_filter: Optional[OrderStatusEnum] = Query(None, alias="status"), # Carts are excluded unless requested
+    created_from: Optional[datetime.date] = None,
+    created_to: Optional[datetime.date] = None,
+    include_archived: bool = Query(False, description="Also export orders moved to the archive."),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(deps.get_current_user)
+):
+    """
+    Streams all orders visible to the user (same rules as `GET /orders/`) as NDJSON or CSV,
+    one line per order item. Unlike paging through `GET /orders/`, the export is one
+    flat SQL statement read through a server-side cursor, so it has no size limit.
+    """
+    media_type = "text/csv" if file_format == OrderExportFormatEnum.CSV else "application/x-ndjson"
+    return StreamingResponse(
+        order_export_service.iter_orders_export(
+            db, user=current_user, file_format=file_format, tenant_id=tenant_id_filter,
+            status_filter=status_filter.value if status_filter else None, created_from=created_from, created_to=created_to,
+            include_archived=include_archived
+        ),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="orders.{file_format.value}"'}
+    )
 
 @router.get("/{order_id}", response_model=OrderResponse)
 def get_order_details( # Renamed from get_my_order_details
     order_id: int,
+    include_archived: bool = Query(False, description="Also look the order up in the archive (finished orders past their retention)."),
     db: Session = Depends(get_db),
     current_user: User = Depends(deps.get_current_user)
 ):
     # Service layer handles permission logic
+    if include_archived: # Only explicit requests read the archive
+        archived_order = archive_service.get_archived_order_details(db, order_id=order_id, user_id_for_auth=current_user.id, user_role_for_auth=current_user.role, tenant_id_for_auth=current_user.tenant_id) # type: ignore
+        if archived_order is not None:
+            return archived_order
     order = order_service.get_order_details(db, order_id=order_id, user_id_for_auth=current_user.id, user_role_for_auth=current_user.role, tenant_id_for_auth=current_user.tenant_id) # type: ignore
     return order
 
@@ -210,3 +280,23 @@ def complete_order_pickup(
         lane_service_module=lane_service # Pass the imported module
     )
     return updated_order
+
+
+@router.post("/{order_id}/cancel", response_model=OrderResponse)
+def cancel_order(
+    order_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(deps.get_current_user)
+):
+    """
+    Cancel a confirmed BOPIS order and return its items to stock.
+    - Customers: their own orders, until picking starts (ORDER_CONFIRMED).
+    - Counter staff / Tenant Admin: orders of their tenant, until handed over.
+    """
+    if current_user.role == DBUserRoleEnum.picker:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Pickers cannot cancel orders.")
+    # Service layer handles permission logic for reading the order
+    order = order_service.get_order_details(db, order_id=order_id, user_id_for_auth=current_user.id, user_role_for_auth=current_user.role, tenant_id_for_auth=current_user.tenant_id) # type: ignore
+    if not order:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found or not accessible.")
+    return order_service.cancel_order(db, order=order, acting_user=current_user)
@@ -1,12 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Header
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Response
 from sqlalchemy.orm import Session
 from typing import Optional, List # Added List just in case for future extensions
 from app.db.session import get_db
 from app.models.sql_models import User
 from app.models.sql_models import UserRole as DBUserRoleEnum
-from app.schemas.pos_schemas import POSOrderCreateRequest
+from app.schemas.pos_schemas import POSOrderCreateRequest, POSOrderBatchRequest, POSOrderBatchResponse
 from app.schemas.order_schemas import OrderResponse # Re-use OrderResponse
-from app.services import order_service
+from app.services import order_service, idempotency_service
 from app.api import deps
 
 router = APIRouter()
@@ -23,6 +23,7 @@ def get_pos_staff_user(current_user: User = Depends(deps.get_current_user)) -> U
 @router.post("/orders", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
 def create_new_pos_order(
     pos_order_in: POSOrderCreateRequest,
+    response: Response,
     # Idempotency key can also be passed as a header
     idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"), # Use Header for idempotency key
     db: Session = Depends(get_db),
@@ -47,12 +48,47 @@ def create_new_pos_order(
     if not tenant_id_context: # Should be caught by dependency for counter/tenant_admin
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User not associated with a tenant for POS operation.")
 
-    # The service function `create_pos_order` will use staff_user.tenant_id
+    # The service function `create_pos_order` will use staff_user.tenant_id.
+    # Retries with the same key replay the stored response without decrementing stock again.
+    fingerprint = idempotency_service.compute_request_fingerprint("pos.orders", {
+        "staff_user_id": staff_user.id,
+        "body": pos_order_in.model_dump(mode="json", exclude={"idempotency_key"})
+    })
     try:
-        created_order = order_service.create_pos_order(db, pos_order_in=pos_order_in, staff_user=staff_user)
-        return created_order
+        created_order, replayed = idempotency_service.execute_idempotent(
+            db,
+            tenant_id=tenant_id_context,
+            idempotency_key=pos_order_in.idempotency_key,
+            request_fingerprint=fingerprint,
+            operation=lambda before_commit: order_service.create_pos_order(db, pos_order_in=pos_order_in, staff_user=staff_user, before_commit=before_commit),
+            serializer=lambda order: OrderResponse.model_validate(order, from_attributes=True).model_dump(mode="json"),
+            response_status_code=status.HTTP_201_CREATED
+        )
     except HTTPException as e:
         raise e
     except Exception as e_internal:
         # Log e_internal
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="An unexpected error occurred while creating the POS order.")
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return created_order
+
+@router.post("/orders:batch", response_model=POSOrderBatchResponse)
+def create_pos_orders_batch(
+    batch_in: POSOrderBatchRequest,
+    db: Session = Depends(get_db),
+    staff_user: User = Depends(get_pos_staff_user)
+):
+    """
+    Uploads sales captured offline by a POS terminal. Every sale carries its own idempotency key,
+    so the whole batch can be retried safely; per-sale results report partial success.
+    """
+    if not staff_user.tenant_id:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="POS batch uploads require the staff user to be associated with a tenant.")
+    try:
+        return order_service.create_pos_orders_batch(db, batch_in=batch_in, staff_user=staff_user)
+    except HTTPException as e:
+        raise e
+    except Exception as e_internal:
+        # Log e_internal
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="An unexpected error occurred while uploading the POS batch.")
@@ -6,19 +6,28 @@ Access control is based on user roles (tenant_admin, super_admin for write opera
 and flexible access for read operations including public if tenant is specified).
 Endpoints are typically scoped by tenant.
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header, Request, Response, UploadFile, File
+from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from pydantic import TypeAdapter
+from typing import List, Optional, Union
 import datetime
+import io
 from app.db.session import get_db
 from app.models.sql_models import User, Product
 from app.models.sql_models import UserRole as DBUserRoleEnum
-from app.schemas.product_schemas import ProductCreate, ProductResponse, ProductUpdate
-from app.services import product_service
+from app.schemas.product_schemas import ProductCreate, ProductResponse, ProductUpdate, ProductSearchResponse, ProductImportResponse, ProductSummaryResponse
+from app.schemas.common_schemas import ListViewEnum
+from app.schemas.sync_schemas import SyncEntityTypeEnum
+from app.services import product_service, catalog_snapshot_service, sync_service, product_search_service, product_import_service
 from app.api import deps
+from app.api.conditional import if_none_match_matches, build_etag, etag_headers, set_etag_headers, not_modified_response
+from app.api.serialization import model_list_response, rows_response
 
 router = APIRouter()
 
+PRODUCT_LIST_ADAPTER = TypeAdapter(List[ProductResponse]) # Built once at import, reused by every list request
+
 @router.post("/", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
 def create_new_product(
     product_create_data: ProductCreate, # Renamed
@@ -35,14 +44,53 @@ def create_new_product(
     if not current_user.tenant_id: # Should be guaranteed by get_current_active_tenant_admin if not super_admin
          raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Tenant admin must be associated with a tenant.")
 
-    return product_service.create_product(db=db, product_create_data=product_create_data, tenant_id=current_user.tenant_id) # Changed product_in to product_create_data
+    return product_service.create_product(db=db, product_create_data=product_create_data, tenant_id=current_user.tenant_id, user_id=current_user.id) # Changed product_in to product_create_data
+
+@router.post("/import", response_model=ProductImportResponse)
+def import_products(
+    file: UploadFile = File(..., description="CSV with a header row, or JSON Lines (one product object per line)."),
+    file_format: Optional[str] = Query(None, alias="format", pattern="^(csv|jsonl)$", description="`csv` or `jsonl`; inferred from the file name if omitted."),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(deps.get_current_active_tenant_admin)
+):
+    """
+    Bulk create or update products of the tenant admin's tenant, matched by SKU.
+    The file is streamed and upserted in chunks. Only columns present in the file are
+    updated, and `version` is bumped only for products that actually changed.
+    Invalid rows are skipped and reported; valid rows are imported regardless.
+    """
+    if current_user.role == DBUserRoleEnum.super_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Super Admins must use the import CLI to load products for a tenant.")
+    if not current_user.tenant_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Tenant admin must be associated with a tenant.")
+
+    if file_format is None:
+        filename = (file.filename or "").lower()
+        if filename.endswith(".csv"):
+            file_format = "csv"
+        elif filename.endswith((".jsonl", ".ndjson")):
+            file_format = "jsonl"
+        else:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cannot infer file format; pass 'format=csv' or 'format=jsonl'.")
 
-@router.get("/", response_model=List[ProductResponse])
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    parse_rows = product_import_service.parse_csv_rows if file_format == "csv" else product_import_service.parse_jsonl_rows
+    try:
+        return product_import_service.import_products(db, tenant_id=current_user.tenant_id, parsed_rows=parse_rows(stream), user_id=current_user.id) # type: ignore
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Import file must be UTF-8 encoded.")
+    finally:
+        stream.detach() # Leave closing the upload to FastAPI
+
+@router.get("/", response_model=Union[List[ProductResponse], List[ProductSummaryResponse]])
 def list_products( # Renamed for clarity
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     updated_since: Optional[datetime.datetime] = None,
+    view: ListViewEnum = Query(ListViewEnum.full, description="`summary` returns list-screen columns only."),
     tenant_id_query: Optional[int] = Query(None, alias="tenantId", description="Specify Tenant ID to view products (required for public/general users, or for super_admin)."),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
     db: Session = Depends(get_db),
     current_user: Optional[User] = Depends(deps.get_current_user) # Auth is optional for public listing
 ):
@@ -51,6 +99,8 @@ def list_products( # Renamed for clarity
     - Public/General Users: Must provide `tenantId` query parameter.
     - Tenant Admin: Sees products for their own tenant. Can optionally use `tenantId` if it matches their own.
     - Super Admin: Must provide `tenantId` query parameter to specify which tenant's products to view.
+    Responses carry an ETag; send it back in `If-None-Match` to get 304 when nothing changed.
+    `view=summary` returns `ProductSummaryResponse` items, selected column-wise in SQL.
     """
     effective_tenant_id: Optional[int] = None
 
@@ -76,15 +126,99 @@ def list_products( # Renamed for clarity
         # This case should ideally be prevented by the logic above.
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not determine tenant context for product listing.")
 
+    # Validator from (count, max change_seq) of the tenant's products; no rows are loaded for a 304.
+    etag = build_etag("products", effective_tenant_id, *sync_service.get_collection_version(db, SyncEntityTypeEnum.product, effective_tenant_id), str(request.url.query))
+    if if_none_match_matches(if_none_match, etag):
+        return not_modified_response(etag)
+    headers = etag_headers(etag) # The returned response replaces the injected one, so headers are passed along
+
+    if view == ListViewEnum.summary:
+        return rows_response(product_service.get_product_summary_rows_by_tenant(
+            db, tenant_id=effective_tenant_id, skip=skip, limit=limit, updated_since=updated_since
+        ), headers=headers)
     products = product_service.get_products_by_tenant(
         db, tenant_id=effective_tenant_id, skip=skip, limit=limit, updated_since=updated_since
     )
-    return products
+    return model_list_response(PRODUCT_LIST_ADAPTER, products, headers=headers)
+
+def _resolve_catalog_tenant_id(current_user: Optional[User], tenant_id_query: Optional[int]) -> int:
+    # Catalog reads: tenant admins are scoped to their tenant, everyone else names the tenant explicitly.
+    if current_user and current_user.role == DBUserRoleEnum.tenant_admin:
+        if tenant_id_query and tenant_id_query != current_user.tenant_id: # type: ignore
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Tenant admin can only view their own products.")
+        return current_user.tenant_id # type: ignore
+    if tenant_id_query is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Tenant ID must be specified via 'tenantId' query parameter.")
+    return tenant_id_query
+
+@router.get("/search", response_model=ProductSearchResponse)
+def search_products(
+    q: str = Query(..., min_length=1, max_length=100, description="Search text; each word is matched as a prefix of name or SKU words."),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="`next_cursor` from the previous page."),
+    tenant_id_query: Optional[int] = Query(None, alias="tenantId", description="Specify Tenant ID (required for public/general users, or for super_admin)."),
+    db: Session = Depends(get_db),
+    current_user: Optional[User] = Depends(deps.get_current_user)
+):
+    """
+    Full-text product search within a tenant, ranked by relevance with keyset pagination.
+    Suitable for autocomplete. Tenant scoping follows `GET /products/`.
+    """
+    effective_tenant_id = _resolve_catalog_tenant_id(current_user, tenant_id_query)
+    items, next_cursor = product_search_service.search_products(db, tenant_id=effective_tenant_id, query=q, limit=limit, cursor=cursor)
+    return {"items": items, "next_cursor": next_cursor}
+
+@router.get("/sku/{sku}", response_model=ProductResponse)
+def get_product_by_sku(
+    sku: str,
+    tenant_id_query: Optional[int] = Query(None, alias="tenantId", description="Specify Tenant ID (required for public/general users, or for super_admin)."),
+    db: Session = Depends(get_db),
+    current_user: Optional[User] = Depends(deps.get_current_user)
+):
+    """
+    Exact SKU lookup (e.g. POS barcode scan), served by the unique (sku, tenant_id) index.
+    """
+    effective_tenant_id = _resolve_catalog_tenant_id(current_user, tenant_id_query)
+    db_product = product_service.get_product_by_sku_and_tenant(db, sku=sku, tenant_id=effective_tenant_id)
+    if db_product is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found in the specified tenant context.")
+    return db_product
+
+@router.get("/snapshot", response_class=FileResponse)
+def download_catalog_snapshot(
+    tenant_id_query: Optional[int] = Query(None, alias="tenantId", description="Specify Tenant ID (required for public/general users, or for super_admin)."),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+    db: Session = Depends(get_db),
+    current_user: Optional[User] = Depends(deps.get_current_user)
+):
+    """
+    Download the full product catalog of a tenant as one gzip-compressed JSON Lines file.
+    The first line holds the snapshot meta data; `X-Change-Seq` tells the client where to
+    continue with `GET /sync/changes`. Supports `If-None-Match` (304) and `Range` requests.
+    Tenant scoping follows `GET /products/`.
+    """
+    effective_tenant_id = _resolve_catalog_tenant_id(current_user, tenant_id_query)
+    meta = catalog_snapshot_service.get_or_build_catalog_snapshot(db, tenant_id=effective_tenant_id) # type: ignore
+    headers = {
+        "ETag": meta["etag"],
+        "X-Change-Seq": str(meta["change_seq"]),
+        "Cache-Control": "no-cache", # Clients must revalidate; unchanged catalogs cost a 304
+    }
+    if if_none_match_matches(if_none_match, meta["etag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return FileResponse(
+        catalog_snapshot_service.get_snapshot_path(meta),
+        media_type="application/gzip",
+        filename=f"catalog-{effective_tenant_id}-{meta['change_seq']}.jsonl.gz",
+        headers=headers
+    )
 
 @router.get("/{product_id}", response_model=ProductResponse)
 def get_product_by_id_public_or_scoped( # Renamed for clarity
     product_id: int,
+    response: Response,
     tenant_id_query: Optional[int] = Query(None, alias="tenantId", description="Specify Tenant ID if accessing as public user, general staff, or super_admin."),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
     db: Session = Depends(get_db),
     current_user: Optional[User] = Depends(deps.get_current_user)
 ):
@@ -117,6 +251,14 @@ def get_product_by_id_public_or_scoped( # Renamed for clarity
     if effective_tenant_id is None:
          raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Could not determine tenant context for product retrieval.")
 
+    product_version = product_service.get_product_version(db, product_id=product_id, tenant_id=effective_tenant_id)
+    if product_version is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found in the specified tenant context.")
+    etag = build_etag("product", product_id, *product_version)
+    if if_none_match_matches(if_none_match, etag):
+        return not_modified_response(etag)
+    set_etag_headers(response, etag)
+
     db_product = product_service.get_product_by_id(db, product_id=product_id, tenant_id=effective_tenant_id)
 
     if db_product is None:
@@ -149,7 +291,7 @@ def update_existing_product(
     if db_product is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found in your tenant or you are not authorized.")
 
-    return product_service.update_product(db=db, db_product=db_product, product_update_data=product_update_data) # Pass renamed var
+    return product_service.update_product(db=db, db_product=db_product, product_update_data=product_update_data, user_id=current_user.id) # Pass renamed var
 
 @router.delete("/{product_id}", response_model=ProductResponse)
 def delete_existing_product(
@@ -0,0 +1,54 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.db.session import get_db
+from app.models.sql_models import User
+from app.models.sql_models import UserRole as DBUserRoleEnum
+from app.schemas.sync_schemas import SyncChangesResponse, SyncEntityTypeEnum
+from app.services import sync_service
+from app.api import deps
+
+router = APIRouter()
+
+@router.get("/changes", response_model=SyncChangesResponse)
+def get_sync_changes(
+    since: int = Query(0, ge=0, description="Highest change_seq already applied by the client (0 for a full sync)."),
+    limit: int = Query(500, ge=1, le=1000),
+    types: Optional[List[SyncEntityTypeEnum]] = Query(None, description="Entity types to include; all by default."),
+    target_tenant_id: Optional[int] = Query(None, description="Super_admin can use this to specify tenant context."),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(deps.get_current_user)
+):
+    """
+    Delta sync: returns products, orders, pickup slots and lanes changed after `since`,
+    plus deletions, in change-sequence order. Repeat with `since=next_since` while `has_more` is true.
+    """
+    effective_tenant_id: Optional[int] = None
+    if current_user.role == DBUserRoleEnum.super_admin:
+        if target_tenant_id is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Super admin must specify 'target_tenant_id' query parameter to sync.")
+        effective_tenant_id = target_tenant_id
+    elif current_user.tenant_id:
+        if target_tenant_id and target_tenant_id != current_user.tenant_id:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to sync the specified tenant.")
+        effective_tenant_id = current_user.tenant_id
+    else:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User not associated with a tenant.")
+
+    customer_user_id: Optional[int] = None
+    entity_types = types
+    if current_user.role == DBUserRoleEnum.customer:
+        # Customers sync the catalog, slots and their own orders; lanes are staff-only.
+        customer_user_id = current_user.id # type: ignore
+        entity_types = [t for t in (types or list(SyncEntityTypeEnum)) if t != SyncEntityTypeEnum.lane]
+        if not entity_types:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Customers cannot sync lanes.")
+
+    return sync_service.get_changes(
+        db,
+        tenant_id=effective_tenant_id,
+        since=since,
+        limit=limit,
+        entity_types=entity_types,
+        customer_user_id=customer_user_id
+    )
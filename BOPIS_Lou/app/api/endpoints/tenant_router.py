@@ -11,9 +11,9 @@ from typing import List, Optional # Added Optional
 from app.db.session import get_db
 from app.models.sql_models import User
 from app.models.sql_models import UserRole as DBUserRoleEnum
-from app.schemas.tenant_schemas import TenantCreate, TenantResponse
+from app.schemas.tenant_schemas import TenantCreate, TenantResponse, TenantDashboardResponse
 from app.schemas.user_schemas import StaffCreate, StaffResponse, UserRoleEnum as PydanticUserRoleEnum, StaffUpdate # Renamed UserRoleEnum to PydanticUserRoleEnum
-from app.services import tenant_service, user_service
+from app.services import tenant_service, user_service, tenant_metrics_service
 from app.api import deps
 
 router = APIRouter()
@@ -52,6 +52,22 @@ def read_tenant_by_id(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tenant not found")
     return db_tenant
 
+@router.get("/{tenant_id}/dashboard", response_model=TenantDashboardResponse)
+def read_tenant_dashboard(
+    tenant_id: int = Path(..., title="The ID of the tenant"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(deps.can_manage_tenant)
+):
+    """
+    Admin dashboard: orders by status, today's paid orders and revenue, today's slot
+    utilization and lane status. Served from counters maintained on every order change
+    (see app/services/tenant_metrics_service.py), so frequent refreshes stay cheap.
+    Requires super_admin or tenant_admin of the specified tenant.
+    """
+    if tenant_service.get_tenant_by_id(db, tenant_id=tenant_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tenant not found")
+    return tenant_metrics_service.get_dashboard(db, tenant_id=tenant_id)
+
 # --- Staff Management (Tenant Admin or Super Admin for any tenant) ---
 @router.post("/{tenant_id}/staff", response_model=StaffResponse, status_code=status.HTTP_201_CREATED)
 def create_staff_for_tenant(
@@ -5,20 +5,34 @@ Provides endpoints for:
 - Tenant admins to create, list, retrieve, update, and delete time slots for their tenant.
 - Public/Authenticated users to list available time slots for a specific tenant.
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Path
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Path, Header, Request, Response
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from pydantic import TypeAdapter
+from typing import List, Optional, Union
 import datetime
 
 from app.db.session import get_db
 from app.models.sql_models import User
 from app.models.sql_models import UserRole as DBUserRoleEnum
-from app.schemas.timeslot_schemas import PickupTimeSlotCreate, PickupTimeSlotResponse, PickupTimeSlotUpdate
-from app.services import timeslot_service
+from app.schemas.timeslot_schemas import PickupTimeSlotCreate, PickupTimeSlotResponse, PickupTimeSlotUpdate, PickupTimeSlotSummaryResponse
+from app.schemas.common_schemas import ListViewEnum
+from app.schemas.sync_schemas import SyncEntityTypeEnum
+from app.services import timeslot_service, sync_service
 from app.api import deps
+from app.api.conditional import if_none_match_matches, build_etag, etag_headers, set_etag_headers, not_modified_response
+from app.api.serialization import model_list_response, rows_response
 
 router = APIRouter()
 
+# Built once at import, reused by every list request.
+TIMESLOT_LIST_ADAPTER = TypeAdapter(List[PickupTimeSlotResponse])
+
+def _list_response(view: ListViewEnum, headers, db: Session, **filters) -> Response:
+    # Summaries are selected rows serialized once; full views validate ORM objects with the adapter.
+    if view == ListViewEnum.summary:
+        return rows_response(timeslot_service.get_timeslot_summary_rows_by_tenant(db, **filters), headers=headers)
+    return model_list_response(TIMESLOT_LIST_ADAPTER, timeslot_service.get_timeslots_by_tenant(db, **filters), headers=headers)
+
 @router.post("/", response_model=PickupTimeSlotResponse, status_code=status.HTTP_201_CREATED)
 def create_new_pickup_timeslot(
     timeslot_create_data: PickupTimeSlotCreate, # Renamed
@@ -40,13 +54,16 @@ def create_new_pickup_timeslot(
 
     return timeslot_service.create_timeslot(db=db, timeslot_create_data=timeslot_create_data, tenant_id=current_user.tenant_id)
 
-@router.get("/tenant/{tenant_id}/available", response_model=List[PickupTimeSlotResponse])
+@router.get("/tenant/{tenant_id}/available", response_model=Union[List[PickupTimeSlotResponse], List[PickupTimeSlotSummaryResponse]])
 def list_available_timeslots_for_tenant(
+    request: Request,
     tenant_id: int = Path(..., description="The ID of the tenant whose available time slots are to be retrieved."),
     date_from: Optional[datetime.date] = Query(None, description="Filter slots from this date (YYYY-MM-DD)"),
     date_to: Optional[datetime.date] = Query(None, description="Filter slots up to this date (YYYY-MM-DD)"),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=200), # Added sensible limits
+    view: ListViewEnum = Query(ListViewEnum.full, description="`summary` returns list-screen columns only."),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
     db: Session = Depends(get_db),
     # No specific authentication required for this, public or any authenticated user can view.
 ):
@@ -57,21 +74,26 @@ def list_available_timeslots_for_tenant(
     # Optional: Add a service call here to validate tenant_id exists and is active.
     # e.g., tenant = tenant_service.get_tenant_by_id(db, tenant_id); if not tenant: raise HTTPException(...)
 
-    slots = timeslot_service.get_timeslots_by_tenant(
-        db, tenant_id=tenant_id, skip=skip, limit=limit,
+    etag = build_etag("timeslots.available", tenant_id, *sync_service.get_collection_version(db, SyncEntityTypeEnum.timeslot, tenant_id), str(request.url.query))
+    if if_none_match_matches(if_none_match, etag):
+        return not_modified_response(etag)
+    return _list_response(
+        view, etag_headers(etag), db, tenant_id=tenant_id, skip=skip, limit=limit,
         date_from=date_from, date_to=date_to,
         only_available=True, is_active=True
     )
-    return slots
 
-@router.get("/", response_model=List[PickupTimeSlotResponse])
+@router.get("/", response_model=Union[List[PickupTimeSlotResponse], List[PickupTimeSlotSummaryResponse]])
 def read_all_timeslots_for_current_admin( # Renamed for clarity
+    request: Request,
     target_tenant_id_for_superadmin: Optional[int] = Query(None, description="Super_admin must use this to specify tenant."),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=200),
     date_from: Optional[datetime.date] = Query(None),
     date_to: Optional[datetime.date] = Query(None),
     is_active: Optional[bool] = Query(None),
+    view: ListViewEnum = Query(ListViewEnum.full, description="`summary` returns list-screen columns only."),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
     db: Session = Depends(get_db),
     current_user: User = Depends(deps.get_current_active_tenant_admin) # Ensures tenant_admin or super_admin
 ):
@@ -89,15 +111,19 @@ def read_all_timeslots_for_current_admin( # Renamed for clarity
              raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Tenant admin not associated with a tenant.")
         effective_tenant_id = current_user.tenant_id
 
-    slots = timeslot_service.get_timeslots_by_tenant(
-        db, tenant_id=effective_tenant_id, skip=skip, limit=limit,
+    etag = build_etag("timeslots", effective_tenant_id, *sync_service.get_collection_version(db, SyncEntityTypeEnum.timeslot, effective_tenant_id), str(request.url.query))
+    if if_none_match_matches(if_none_match, etag):
+        return not_modified_response(etag)
+    return _list_response(
+        view, etag_headers(etag), db, tenant_id=effective_tenant_id, skip=skip, limit=limit,
         date_from=date_from, date_to=date_to, is_active=is_active, only_available=False # Admin sees all
     )
-    return slots
 
 @router.get("/{timeslot_id}", response_model=PickupTimeSlotResponse)
 def read_timeslot_by_id_for_current_admin( # Renamed for clarity
     timeslot_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
     db: Session = Depends(get_db),
     current_user: User = Depends(deps.get_current_active_tenant_admin)
 ):
@@ -113,6 +139,14 @@ def read_timeslot_by_id_for_current_admin( # Renamed for clarity
          raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Tenant admin not associated with a tenant.")
     effective_tenant_id = current_user.tenant_id
 
+    timeslot_version = timeslot_service.get_timeslot_version(db, timeslot_id=timeslot_id, tenant_id=effective_tenant_id)
+    if timeslot_version is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Pickup time slot not found for your tenant.")
+    etag = build_etag("timeslot", timeslot_id, *timeslot_version)
+    if if_none_match_matches(if_none_match, etag):
+        return not_modified_response(etag)
+    set_etag_headers(response, etag)
+
     db_timeslot = timeslot_service.get_timeslot_by_id(db, timeslot_id=timeslot_id, tenant_id=effective_tenant_id)
     if db_timeslot is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Pickup time slot not found for your tenant.")
@@ -0,0 +1,114 @@
+"""
+Per-request query metrics.
+
+`QueryMetricsMiddleware` counts the SQL statements and database time of every request
+(see app/db/query_stats.py) and:
+- adds `X-Query-Count` and `Server-Timing: db;dur=<ms>` to the response, so query counts are
+  visible in browser dev tools and load-test output;
+- accumulates per-route totals (`route_query_totals`, and the `bopis_db_queries_total` /
+  `bopis_db_query_seconds_total` metrics served by `GET /metrics`);
+- logs a warning when one statement repeats QUERY_REPEAT_WARNING_THRESHOLD or more times
+  in a request, the usual sign of an N+1 lazy load;
+- names the request's route as the origin of its entries in the slow-query log.
+
+Headers reflect the queries run until the response starts; statements executed while a
+streaming body is sent are only counted in the route totals.
+"""
+from dataclasses import dataclass
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Dict, Tuple
+import logging
+import re
+
+from app.core.metrics import DB_QUERIES, DB_QUERY_SECONDS
+from app.db.query_stats import QueryStats, collect_queries
+from app.db.slow_queries import query_origin
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RouteQueryTotals:
+    requests: int = 0
+    queries: int = 0
+    db_seconds: float = 0.0
+
+
+# (method, route path template) -> totals since process start.
+_route_totals: Dict[Tuple[str, str], RouteQueryTotals] = {}
+
+
+def route_query_totals() -> Dict[Tuple[str, str], RouteQueryTotals]:
+    """Copy of the per-route query totals, keyed by (method, route path template)."""
+    return {key: RouteQueryTotals(totals.requests, totals.queries, totals.db_seconds) for key, totals in _route_totals.items()}
+
+
+_PATH_PARAM_PATTERN = re.compile(r"{(\w+)(?::\w+)?}")
+
+
+def route_template(scope: Scope) -> str:
+    """
+    Path template of the matched route (e.g. '/orders/{order_id}'), or '<unmatched>'.
+
+    Routes of included routers only know their path below the router prefix ('/{order_id}'),
+    so the prefix is taken from the request path in front of the rendered route path.
+    """
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if not template:
+        return "<unmatched>"
+    path_params = scope.get("path_params", {})
+    try:
+        rendered = _PATH_PARAM_PATTERN.sub(lambda match: str(path_params[match.group(1)]), template)
+    except KeyError:
+        return template
+    path = scope["path"]
+    if rendered and path.endswith(rendered):
+        return path[:len(path) - len(rendered)] + _PATH_PARAM_PATTERN.sub(r"{\1}", template)
+    return template
+
+
+class QueryMetricsMiddleware:
+    """
+    ASGI middleware recording per-request query counts (see module docstring).
+
+    Args:
+        app: The wrapped ASGI app.
+        add_headers: Whether to add `X-Query-Count` / `Server-Timing` to responses.
+        repeat_warning_threshold: Executions of one statement in a request that trigger a warning.
+    """
+
+    def __init__(self, app: ASGIApp, add_headers: bool = True, repeat_warning_threshold: int = 10) -> None:
+        self.app = app
+        self.add_headers = add_headers
+        self.repeat_warning_threshold = repeat_warning_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with collect_queries() as stats, query_origin(lambda: f"{scope['method']} {route_template(scope)}"):
+            async def send_with_query_headers(message: Message) -> None:
+                if message["type"] == "http.response.start" and self.add_headers:
+                    headers = MutableHeaders(scope=message)
+                    headers["X-Query-Count"] = str(stats.count)
+                    headers.append("Server-Timing", f"db;dur={stats.duration_ms:.1f};desc=\"{stats.count} queries\"")
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_query_headers)
+            finally:
+                self._record(scope, stats)
+
+    def _record(self, scope: Scope, stats: QueryStats) -> None:
+        key = (scope["method"], route_template(scope))
+        totals = _route_totals.setdefault(key, RouteQueryTotals())
+        totals.requests += 1
+        totals.queries += stats.count
+        totals.db_seconds += stats.duration
+        DB_QUERIES.inc(stats.count, method=key[0], route=key[1])
+        DB_QUERY_SECONDS.inc(stats.duration, method=key[0], route=key[1])
+        for statement, count in stats.repeated_statements(self.repeat_warning_threshold):
+            logger.warning("Possible N+1 in %s %s: statement executed %d times: %s", key[0], key[1], count, " ".join(statement.split())[:300])
@@ -0,0 +1,44 @@
+"""
+Request metrics middleware.
+
+`RequestMetricsMiddleware` records, for every HTTP request, the request count and latency by
+method, route template and status code, and the number of requests in flight
+(see app/core/metrics.py). Latency covers the whole exchange, until the last body chunk was
+sent, so slow streaming exports show up as slow. It should be the outermost middleware.
+"""
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import time
+
+from app.api.query_metrics import route_template
+from app.core.metrics import REGISTRY, HTTP_REQUESTS, HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_PROGRESS
+
+
+class RequestMetricsMiddleware:
+    """ASGI middleware recording HTTP request metrics (see module docstring)."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500 # Reported when the app fails before starting a response
+        started = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUESTS_IN_PROGRESS.dec()
+            labels = {"method": scope["method"], "route": route_template(scope), "status": str(status_code)}
+            HTTP_REQUESTS.inc(**labels)
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - started, **labels)
+            REGISTRY.maybe_flush()
@@ -0,0 +1,90 @@
+"""
+Fast JSON responses for hot endpoints.
+
+FastAPI validates whatever an endpoint returns against its `response_model` and serializes
+the validated value. For list endpoints declared as `Union[List[Full], List[Summary]]`
+every page is validated against the union, and handlers that already built response
+models pay for a second validation. The helpers below let an endpoint serialize itself
+while keeping `response_model` for the OpenAPI schema:
+
+- `model_list_response`: ORM objects are validated once by a precompiled `TypeAdapter`
+  (built at import time, not per request) and dumped to JSON bytes by pydantic-core.
+- `rows_response`: opt-in raw-row path for column-wise `view=summary` queries. Row mappings
+  are encoded directly with orjson, without building any pydantic models. Use it only
+  when the selected columns already have the JSON types of the response schema.
+
+`FastJSONResponse` is the app's default response class (see main.py); it renders with
+orjson, and falls back to the stdlib encoder when orjson is not installed.
+"""
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from typing import Any, Iterable, Mapping, Optional
+import decimal
+import enum
+import json
+
+try:
+    import orjson
+except ImportError: # pragma: no cover - orjson is listed in requirements.txt
+    orjson = None # type: ignore
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+def _default(value: Any) -> Any:
+    # Types orjson does not encode natively; matches pydantic's JSON output (Decimal as string, UTC as Z).
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, enum.Enum):
+        return value.value
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encodes `content` as compact UTF-8 JSON bytes (orjson if available)."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson. Used for responses without a `response_model`."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def model_list_response(adapter: TypeAdapter, items: Iterable[Any], headers: Optional[Mapping[str, str]] = None) -> Response:
+    """
+    Validates `items` (ORM objects or dicts) once with a precompiled adapter and returns them as JSON.
+
+    Args:
+        adapter: Module-level `TypeAdapter(List[SomeResponse])`; its models must allow `from_attributes`.
+        items: Objects to serialize.
+        headers: Extra response headers (e.g. ETag). Headers set on an injected `Response`
+            are not applied when an endpoint returns its own response.
+
+    Returns:
+        A 200 response with the JSON body.
+    """
+    value = adapter.validate_python(items, from_attributes=True)
+    return Response(content=adapter.dump_json(value), media_type=JSON_MEDIA_TYPE, headers=headers)
+
+
+def rows_response(rows: Iterable[Any], headers: Optional[Mapping[str, str]] = None) -> Response:
+    """
+    Returns SQL result rows as a JSON array of objects keyed by column label, without validation.
+    Enums are written as their values and Decimals as strings, as pydantic would.
+
+    Args:
+        rows: SQLAlchemy `Row` objects (or mappings) whose labels match the response schema fields.
+        headers: Extra response headers.
+
+    Returns:
+        A 200 response with the JSON body.
+    """
+    content = [dict(row._mapping) if hasattr(row, "_mapping") else dict(row) for row in rows]
+    return Response(content=dumps(content), media_type=JSON_MEDIA_TYPE, headers=headers)
@@ -0,0 +1,65 @@
+"""
+Static file serving for built (content-hashed, precompressed) front-end assets.
+
+`python -m app.cli.build_static` copies `frontend/` and `mockups/` into STATIC_BUILD_DIR:
+assets get content-hashed names (e.g. `api.3f2a9c1b7d4e.js`) with references rewritten,
+and every compressible file gets `.br` / `.zst` / `.gz` siblings compressed at maximum level.
+`PrecompressedStaticFiles` then:
+- serves the best precompressed sibling the client accepts, with `Content-Encoding`
+  (so the compression middleware leaves it alone and nothing is compressed per request);
+- marks content-hashed files `immutable` for a year, since a new version gets a new name;
+- asks clients to revalidate everything else (HTML entry points, unbuilt sources) via ETag.
+"""
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+from typing import Dict, List
+import mimetypes
+import os
+import re
+
+from app.api.compression import negotiate_encoding
+
+HASHED_NAME_PATTERN = re.compile(r"\.[0-9a-f]{12}\.[A-Za-z0-9]+$") # name.<12 hex digits>.ext
+# Content coding -> file suffix of the precompressed sibling, most preferred first.
+PRECOMPRESSED_SUFFIXES: Dict[str, str] = {"br": ".br", "zstd": ".zst", "gzip": ".gz"}
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+
+def cache_control_for(path: str) -> str:
+    """Long-lived caching for content-hashed file names, revalidation for everything else."""
+    return IMMUTABLE_CACHE_CONTROL if HASHED_NAME_PATTERN.search(os.path.basename(path)) else REVALIDATE_CACHE_CONTROL
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """`StaticFiles` serving precompressed siblings and setting cache headers (see module docstring)."""
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        full_path = str(full_path)
+        headers = {"Cache-Control": cache_control_for(full_path), "Vary": "Accept-Encoding"}
+        media_type = mimetypes.guess_type(full_path)[0] or "text/plain"
+
+        encoding = negotiate_encoding(request_headers.get("Accept-Encoding"), self._precompressed_encodings(full_path))
+        if encoding is not None:
+            encoded_path = full_path + PRECOMPRESSED_SUFFIXES[encoding]
+            response = FileResponse(encoded_path, status_code=status_code, stat_result=os.stat(encoded_path), media_type=media_type, headers=headers)
+            response.headers["Content-Encoding"] = encoding
+        else:
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result, media_type=media_type, headers=headers)
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    @staticmethod
+    def _precompressed_encodings(full_path: str) -> List[str]:
+        return [encoding for encoding, suffix in PRECOMPRESSED_SUFFIXES.items() if os.path.isfile(full_path + suffix)]
+
+
+def static_directory(name: str, build_dir: str) -> str:
+    """The built copy of a static directory if it was built, else the source directory."""
+    built = os.path.join(build_dir, name)
+    return built if os.path.isdir(built) else name
+
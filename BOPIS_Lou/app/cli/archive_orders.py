@@ -0,0 +1,49 @@
+"""
+Periodic archival of finished orders and read notifications, e.g. from cron every night.
+
+Usage:
+    python -m app.cli.archive_orders                                   # orders and notifications, all tenants
+    python -m app.cli.archive_orders --tenant-id 1 --retention-days 365 --max-batches 20
+    python -m app.cli.archive_orders --skip-notifications --batch-size 200
+
+Moves rows past their retention to the archive tables in committed batches
+(see app/services/archive_service.py). Run the sales rollup refresh first: completed
+orders are only archived once they are in the rollups.
+"""
+import argparse
+import json
+import sys
+
+from app.db.session import SessionLocal
+from app.services import archive_service
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Move finished orders and read notifications to the archive tables.")
+    parser.add_argument("--tenant-id", type=int, default=None, help="Archive the orders of one tenant (default: all tenants).")
+    parser.add_argument("--retention-days", type=int, default=None, help="Order retention in days (default: ARCHIVE_ORDER_RETENTION_DAYS).")
+    parser.add_argument("--notification-retention-days", type=int, default=None,
+                        help="Notification retention in days (default: ARCHIVE_NOTIFICATION_RETENTION_DAYS).")
+    parser.add_argument("--batch-size", type=int, default=None, help="Rows moved per transaction (default: ARCHIVE_BATCH_SIZE).")
+    parser.add_argument("--max-batches", type=int, default=None, help="Stop after this many batches per table (default: no limit).")
+    parser.add_argument("--skip-notifications", action="store_true", help="Archive orders only.")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        orders = archive_service.archive_orders(
+            db, retention_days=args.retention_days, batch_size=args.batch_size, tenant_id=args.tenant_id, max_batches=args.max_batches
+        )
+        print(json.dumps({"table": "orders", **orders.model_dump(mode="json")}))
+        if not args.skip_notifications:
+            notifications = archive_service.archive_notifications(
+                db, retention_days=args.notification_retention_days, batch_size=args.batch_size, max_batches=args.max_batches
+            )
+            print(json.dumps({"table": "notifications", **notifications.model_dump(mode="json")}))
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
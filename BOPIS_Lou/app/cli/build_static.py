@@ -0,0 +1,188 @@
+"""
+Builds the static front-end directories for production serving, e.g. during deployment.
+
+Usage:
+    python -m app.cli.build_static                       # frontend/ and mockups/ into STATIC_BUILD_DIR
+    python -m app.cli.build_static --output ./build/static
+
+For every file below the source directories:
+- JS, CSS and image assets also get a content-hashed copy (`api.js` -> `api.3f2a9c1b7d4e.js`).
+  References in HTML (`src`/`href`), CSS (`url()`) and JS modules (`import`/`from`) are
+  rewritten to the hashed names first, so a hash changes whenever a dependency changes.
+  Files keep their original name too (rewritten), for entry points and old links.
+- Compressible files of at least COMPRESSION_MINIMUM_SIZE bytes get `.gz` (and `.br` / `.zst`
+  when brotli / zstandard are installed) siblings at maximum compression.
+- `manifest.json` maps source paths to hashed paths.
+
+The output is written to a temporary directory and swapped in at the end, so a running
+server never sees a half-built tree. Serving: see app/api/static_files.py.
+"""
+from typing import Dict, Iterable, List, Optional, Set
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+import sys
+
+from app.api.compression import brotli, zstandard
+from app.core.config import settings
+
+SOURCE_DIRECTORIES = ("frontend", "mockups")
+HASHED_EXTENSIONS = {".js", ".css", ".svg", ".png", ".jpg", ".jpeg", ".gif", ".webp", ".ico", ".woff", ".woff2"}
+COMPRESSIBLE_EXTENSIONS = {".html", ".js", ".css", ".svg", ".json", ".txt", ".map", ".ico"}
+REFERENCE_PATTERNS = {
+    ".html": re.compile(r"""(?:src|href)\s*=\s*["']([^"'#?]+)"""),
+    ".css": re.compile(r"""url\(\s*["']?([^"')#?]+)"""),
+    ".js": re.compile(r"""(?:\bfrom\s*|\bimport\s*\(?\s*)["']([^"']+)["']"""),
+}
+
+
+class StaticBuilder:
+    """Computes the output content and name of each source file (see module docstring)."""
+
+    def __init__(self, source_root: str, directories: Iterable[str]):
+        self.source_root = source_root
+        self.sources: Set[str] = set() # POSIX paths relative to source_root, e.g. "frontend/js/api.js"
+        for directory in directories:
+            for dirpath, dirnames, filenames in os.walk(os.path.join(source_root, directory)):
+                dirnames[:] = sorted(name for name in dirnames if not name.startswith("."))
+                for filename in filenames:
+                    if not filename.startswith("."):
+                        self.sources.add(os.path.relpath(os.path.join(dirpath, filename), source_root).replace(os.sep, "/"))
+        self._contents: Dict[str, bytes] = {}
+        self._hashed_names: Dict[str, str] = {}
+        self._in_progress: Set[str] = set()
+
+    def content(self, path: str) -> bytes:
+        """Content of a source file with references to other assets rewritten to their hashed names."""
+        if path not in self._contents:
+            with open(os.path.join(self.source_root, path), "rb") as source:
+                data = source.read()
+            pattern = REFERENCE_PATTERNS.get(posixpath.splitext(path)[1].lower())
+            if pattern is not None:
+                self._in_progress.add(path)
+                text = data.decode("utf-8")
+                text = pattern.sub(lambda match: self._rewrite_reference(path, match), text)
+                data = text.encode("utf-8")
+                self._in_progress.discard(path)
+            self._contents[path] = data
+        return self._contents[path]
+
+    def hashed_name(self, path: str) -> Optional[str]:
+        """Content-hashed path of an asset, or None if it keeps only its name (HTML, import cycles)."""
+        if posixpath.splitext(path)[1].lower() not in HASHED_EXTENSIONS or path in self._in_progress:
+            return None
+        if path not in self._hashed_names:
+            digest = hashlib.sha256(self.content(path)).hexdigest()[:12]
+            stem, extension = posixpath.splitext(path)
+            self._hashed_names[path] = f"{stem}.{digest}{extension}"
+        return self._hashed_names[path]
+
+    def _rewrite_reference(self, path: str, match: "re.Match[str]") -> str:
+        reference = match.group(1)
+        if re.match(r"^([a-z][a-z0-9+.-]*:|/)", reference, re.IGNORECASE): # Absolute URLs, data: URIs, root paths
+            return match.group(0)
+        base = posixpath.dirname(path)
+        target = posixpath.normpath(posixpath.join(base, reference))
+        hashed = self.hashed_name(target) if target in self.sources else None
+        if hashed is None:
+            return match.group(0)
+        rewritten = posixpath.relpath(hashed, base or ".")
+        if reference.startswith("./") and not rewritten.startswith("."):
+            rewritten = "./" + rewritten # JS module specifiers must stay relative
+        offset = match.start(0)
+        whole = match.group(0)
+        return whole[:match.start(1) - offset] + rewritten + whole[match.end(1) - offset:]
+
+
+def _write(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as target:
+        target.write(data)
+
+
+def _precompress(path: str, data: bytes, minimum_size: int) -> Dict[str, int]:
+    """Writes compressed siblings that are smaller than the file; returns their sizes by suffix."""
+    if posixpath.splitext(path)[1].lower() not in COMPRESSIBLE_EXTENSIONS or len(data) < minimum_size:
+        return {}
+    variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(data, quality=11)
+    if zstandard is not None:
+        variants[".zst"] = zstandard.ZstdCompressor(level=19).compress(data)
+    sizes = {}
+    for suffix, compressed in variants.items():
+        if len(compressed) < len(data):
+            _write(path + suffix, compressed)
+            sizes[suffix] = len(compressed)
+    return sizes
+
+
+def build_static(source_root: str, output_dir: str, directories: Iterable[str] = SOURCE_DIRECTORIES, minimum_size: Optional[int] = None) -> Dict[str, int]:
+    """
+    Builds `directories` of `source_root` into `output_dir`, replacing its previous content.
+
+    Args:
+        source_root: Directory containing the source directories (the app root).
+        output_dir: Build directory (STATIC_BUILD_DIR); `<output_dir>/<directory>` is what gets mounted.
+        directories: Source directory names, which are also their URL prefixes.
+        minimum_size: Smallest file to precompress (defaults to COMPRESSION_MINIMUM_SIZE).
+
+    Returns:
+        Totals: files, hashed files, bytes, and bytes as served with each available coding
+        (`gz_bytes`, `br_bytes`, `zst_bytes`), counting files without a variant uncompressed.
+    """
+    minimum_size = settings.COMPRESSION_MINIMUM_SIZE if minimum_size is None else minimum_size
+    builder = StaticBuilder(source_root, directories)
+    staging_dir = output_dir.rstrip("/\\") + ".tmp"
+    shutil.rmtree(staging_dir, ignore_errors=True)
+
+    suffixes = [".gz"] + ([".br"] if brotli is not None else []) + ([".zst"] if zstandard is not None else [])
+    manifest: Dict[str, str] = {}
+    totals = {"files": 0, "hashed_files": 0, "bytes": 0, **{f"{suffix[1:]}_bytes": 0 for suffix in suffixes}}
+    for path in sorted(builder.sources):
+        data = builder.content(path)
+        outputs: List[str] = [path]
+        hashed = builder.hashed_name(path)
+        if hashed is not None:
+            manifest[path] = hashed
+            outputs.append(hashed)
+            totals["hashed_files"] += 1
+        for output in outputs:
+            target = os.path.join(staging_dir, *output.split("/"))
+            _write(target, data)
+            sizes = _precompress(target, data, minimum_size)
+            if output == path:
+                totals["files"] += 1
+                totals["bytes"] += len(data)
+                for suffix in suffixes:
+                    totals[f"{suffix[1:]}_bytes"] += sizes.get(suffix, len(data))
+    _write(os.path.join(staging_dir, "manifest.json"), json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8"))
+
+    previous_dir = output_dir.rstrip("/\\") + ".old"
+    shutil.rmtree(previous_dir, ignore_errors=True)
+    if os.path.isdir(output_dir):
+        os.rename(output_dir, previous_dir)
+    os.makedirs(os.path.dirname(os.path.abspath(output_dir)), exist_ok=True)
+    os.rename(staging_dir, output_dir)
+    shutil.rmtree(previous_dir, ignore_errors=True)
+    return totals
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Build content-hashed, precompressed static assets.")
+    parser.add_argument("--source-root", default=".", help="Directory containing frontend/ and mockups/ (default: current directory).")
+    parser.add_argument("--output", default=settings.STATIC_BUILD_DIR, help="Build directory (default: STATIC_BUILD_DIR).")
+    args = parser.parse_args(argv)
+
+    totals = build_static(args.source_root, args.output)
+    print(json.dumps(totals, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
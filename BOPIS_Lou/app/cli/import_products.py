@@ -0,0 +1,43 @@
+"""
+Command-line bulk product import, for large catalog loads and scheduled refreshes.
+
+Usage:
+    python -m app.cli.import_products --tenant-id 1 products.csv
+    python -m app.cli.import_products --tenant-id 1 --format jsonl products.jsonl
+
+Uses the same pipeline as `POST /products/import` (see app/services/product_import_service.py).
+"""
+import argparse
+import json
+import sys
+
+from app.db.session import SessionLocal
+from app.services import product_import_service
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk create or update products of a tenant from CSV or JSON Lines.")
+    parser.add_argument("path", help="File to import ('-' reads standard input).")
+    parser.add_argument("--tenant-id", type=int, required=True)
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="Inferred from the file extension if omitted.")
+    parser.add_argument("--chunk-size", type=int, default=None, help="Rows per upsert statement (default: PRODUCT_IMPORT_CHUNK_SIZE).")
+    args = parser.parse_args(argv)
+
+    file_format = args.format or ("csv" if args.path.lower().endswith(".csv") else "jsonl")
+    parse_rows = product_import_service.parse_csv_rows if file_format == "csv" else product_import_service.parse_jsonl_rows
+
+    stream = sys.stdin if args.path == "-" else open(args.path, encoding="utf-8-sig", newline="")
+    db = SessionLocal()
+    try:
+        result = product_import_service.import_products(db, tenant_id=args.tenant_id, parsed_rows=parse_rows(stream), chunk_size=args.chunk_size)
+    finally:
+        db.close()
+        if stream is not sys.stdin:
+            stream.close()
+
+    print(json.dumps(result.model_dump(), indent=2))
+    return 1 if result.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+"""
+Index audit: runs the hot service queries and checks that their plans use the expected index.
+
+Usage:
+    python -m app.cli.index_audit                                       # scratch in-memory SQLite schema
+    python -m app.cli.index_audit --database-url postgresql://.../scratch  # a disposable database
+
+Each case calls the real service function against a few seeded rows, captures the SELECT
+it sends for the audited table and EXPLAINs it (`EXPLAIN QUERY PLAN` on SQLite). On
+PostgreSQL sequential scans are disabled for the audit (`SET LOCAL enable_seqscan = off`):
+the tables hold a handful of rows, so the check is whether the index *can* serve the query,
+not whether the planner prefers it at production size.
+
+Missing tables are created; seeding and everything else run in one transaction that is
+rolled back. Prints one JSON line per case and exits 1 if any plan misses its index,
+e.g. in CI after a query or model change.
+"""
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import argparse
+import datetime
+import decimal
+import json
+import re
+import sys
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.models.sql_models import (
+    Tenant, User, Product, PickupTimeSlot, Order, Notification,
+    UserRole, OrderStatus, OrderType, PaymentStatus
+)
+from app.schemas.notification_schemas import NotificationStatusEnum
+from app.services import notification_service, order_service, product_service, sync_service, timeslot_service
+
+
+@dataclass
+class AuditFixture:
+    tenant_id: int
+    picker: User
+    counter: User
+    customer: User
+    pickup_token: str
+
+
+@dataclass
+class AuditCase:
+    name: str
+    table: str # The first SELECT from this table is explained
+    index: str # Expected to appear in the plan
+    run: Callable[[Session, AuditFixture], Any]
+
+
+AUDIT_CASES: List[AuditCase] = [
+    AuditCase("picker queue", "orders", "ix_orders_tenant_status_created_at",
+              lambda db, f: order_service.list_orders_for_picker(db, f.picker)),
+    AuditCase("counter queue", "orders", "ix_orders_ready_tenant_updated_at",
+              lambda db, f: order_service.list_orders_for_counter(db, f.counter)),
+    AuditCase("cart lookup", "orders", "ix_orders_cart_user_tenant",
+              lambda db, f: order_service.get_cart_by_user_id(db, user_id=f.customer.id, tenant_id=f.tenant_id)), # type: ignore
+    AuditCase("pickup token lookup", "orders", "ix_orders_pickup_token",
+              lambda db, f: order_service.get_order_by_pickup_token(db, f.pickup_token, tenant_id=f.tenant_id)),
+    AuditCase("unread notifications", "notifications", "ix_notifications_user_status_created_at",
+              lambda db, f: notification_service.get_notifications_for_user(db, user_id=f.counter.id, status_filter=NotificationStatusEnum.UNREAD)), # type: ignore
+    AuditCase("available pickup slots", "pickup_time_slots", "ix_pickup_time_slots_tenant_date_start_time",
+              lambda db, f: timeslot_service.get_timeslots_by_tenant(db, f.tenant_id, date_from=datetime.date.today(), only_available=True)),
+    AuditCase("products updated since", "products", "ix_products_tenant_updated_at",
+              lambda db, f: product_service.get_product_summary_rows_by_tenant(db, f.tenant_id, updated_since=datetime.datetime(2000, 1, 1))),
+    AuditCase("delta sync", "products", "ix_products_tenant_change_seq",
+              lambda db, f: sync_service.get_changes(db, tenant_id=f.tenant_id, since=0)),
+]
+
+
+def seed(db: Session) -> AuditFixture:
+    """A tenant with staff, a customer, a product, a slot, orders in each queue and a notification."""
+    tenant = Tenant(name="Index Audit Mart")
+    db.add(tenant)
+    db.flush()
+    users = {
+        role: User(username=f"index_audit_{role.value}", email=f"index_audit_{role.value}@example.com", password_hash="x", role=role, tenant_id=tenant.id)
+        for role in (UserRole.picker, UserRole.counter, UserRole.customer)
+    }
+    db.add_all(users.values())
+    db.add(Product(name="Audit Item", sku="INDEX-AUDIT-1", price=decimal.Decimal("1.00"), tenant_id=tenant.id, stock_quantity=1))
+    db.add(PickupTimeSlot(
+        tenant_id=tenant.id, date=datetime.datetime.combine(datetime.date.today(), datetime.time()),
+        start_time=datetime.time(10), end_time=datetime.time(11), capacity=5, current_orders=0, is_active=True
+    ))
+    db.flush()
+    for index, order_status in enumerate((OrderStatus.CART, OrderStatus.ORDER_CONFIRMED, OrderStatus.READY_FOR_PICKUP)):
+        db.add(Order(
+            user_id=users[UserRole.customer].id, tenant_id=tenant.id, order_type=OrderType.BOPIS, status=order_status,
+            payment_status=PaymentStatus.UNPAID, total_amount=decimal.Decimal("1.00"), pickup_token=f"index-audit-{index}"
+        ))
+    db.add(Notification(user_id=users[UserRole.counter].id, tenant_id=tenant.id, message="Index audit"))
+    db.flush()
+    return AuditFixture(
+        tenant_id=tenant.id, picker=users[UserRole.picker], counter=users[UserRole.counter], # type: ignore
+        customer=users[UserRole.customer], pickup_token="index-audit-2"
+    )
+
+
+@contextmanager
+def capture_statements(connection: Connection) -> Iterator[List[Tuple[str, Any]]]:
+    """Collects (statement, parameters) of everything executed on `connection` in the block."""
+    statements: List[Tuple[str, Any]] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(connection, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(connection, "before_cursor_execute", record)
+
+
+def explain(connection: Connection, statement: str, parameters: Any) -> List[str]:
+    """Plan lines of a captured statement."""
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        return [row[-1] for row in connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)]
+    if dialect == "postgresql":
+        connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        return [row[0] for row in connection.exec_driver_sql("EXPLAIN " + statement, parameters)]
+    return [" ".join(str(value) for value in row) for row in connection.exec_driver_sql("EXPLAIN " + statement, parameters)]
+
+
+def audit_case(db: Session, connection: Connection, fixture: AuditFixture, case: AuditCase) -> Dict[str, Any]:
+    """Runs one case; the result has `ok`, the explained statement and its plan."""
+    with capture_statements(connection) as statements:
+        case.run(db, fixture)
+    table_pattern = re.compile(rf"\bFROM\s+\"?{case.table}\b", re.IGNORECASE)
+    captured: Optional[Tuple[str, Any]] = next(
+        ((statement, parameters) for statement, parameters in statements
+         if statement.lstrip().upper().startswith("SELECT") and table_pattern.search(statement)),
+        None
+    )
+    result: Dict[str, Any] = {"case": case.name, "table": case.table, "expected_index": case.index}
+    if captured is None:
+        return {**result, "ok": False, "error": f"No SELECT from {case.table} was executed."}
+    plan = explain(connection, *captured)
+    return {**result, "ok": any(case.index in line for line in plan), "statement": " ".join(captured[0].split()), "plan": plan}
+
+
+def run_audit(database_url: str, cases: Optional[List[AuditCase]] = None) -> List[Dict[str, Any]]:
+    """Seeds `database_url`, audits `cases` (default: AUDIT_CASES) and rolls everything back."""
+    engine = create_engine(database_url)
+    try:
+        Base.metadata.create_all(bind=engine) # No-op for tables that exist (migrated databases)
+        with engine.connect() as connection:
+            transaction = connection.begin()
+            db = Session(bind=connection, autoflush=False)
+            try:
+                fixture = seed(db)
+                return [audit_case(db, connection, fixture, case) for case in (cases or AUDIT_CASES)]
+            finally:
+                db.close()
+                transaction.rollback()
+    finally:
+        engine.dispose()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Check that the hot service queries are served by their indexes.")
+    parser.add_argument("--database-url", default="sqlite://", help="Disposable database to audit (default: in-memory SQLite).")
+    parser.add_argument("--case", action="append", dest="cases", help="Audit only this case name (repeatable).")
+    args = parser.parse_args(argv)
+
+    cases = [case for case in AUDIT_CASES if args.cases is None or case.name in args.cases]
+    results = run_audit(args.database_url, cases)
+    for result in results:
+        print(json.dumps(result))
+    return 0 if all(result["ok"] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
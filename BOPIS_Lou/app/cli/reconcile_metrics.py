@@ -0,0 +1,38 @@
+"""
+Periodic reconciliation of the tenant dashboard counters, e.g. from cron every 15 minutes.
+
+Usage:
+    python -m app.cli.reconcile_metrics               # all tenants
+    python -m app.cli.reconcile_metrics --tenant-id 1 --days 7
+
+Recomputes the counters from the orders and overwrites drifted values
+(see app/services/tenant_metrics_service.py).
+"""
+import argparse
+import json
+import sys
+
+from app.db.session import SessionLocal
+from app.models.sql_models import Tenant
+from app.services import tenant_metrics_service
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Recompute tenant dashboard counters from orders.")
+    parser.add_argument("--tenant-id", type=int, default=None, help="Reconcile one tenant (default: all tenants).")
+    parser.add_argument("--days", type=int, default=35, help="Days of daily sales to recompute, including today.")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        tenant_ids = [args.tenant_id] if args.tenant_id else [tenant_id for (tenant_id,) in db.query(Tenant.id).order_by(Tenant.id).all()]
+        for tenant_id in tenant_ids:
+            result = tenant_metrics_service.reconcile_tenant_metrics(db, tenant_id=tenant_id, days=args.days)
+            print(json.dumps(result.model_dump()))
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,37 @@
+"""
+Incremental sales rollup refresh, e.g. from cron every 5 minutes.
+
+Usage:
+    python -m app.cli.refresh_sales_rollups               # all tenants
+    python -m app.cli.refresh_sales_rollups --tenant-id 1
+
+Each run only aggregates orders completed since the tenant's watermark
+(see app/services/sales_analytics_service.py).
+"""
+import argparse
+import json
+import sys
+
+from app.db.session import SessionLocal
+from app.models.sql_models import Tenant
+from app.services import sales_analytics_service
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Aggregate newly completed orders into the sales rollups.")
+    parser.add_argument("--tenant-id", type=int, default=None, help="Refresh one tenant (default: all tenants).")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        tenant_ids = [args.tenant_id] if args.tenant_id else [tenant_id for (tenant_id,) in db.query(Tenant.id).order_by(Tenant.id).all()]
+        for tenant_id in tenant_ids:
+            result = sales_analytics_service.refresh_sales_rollups(db, tenant_id=tenant_id)
+            print(json.dumps(result.model_dump(mode="json")))
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,317 @@
+"""
+Prometheus-compatible application metrics.
+
+Metrics are defined at module level below and updated in place (`CHECKOUTS.inc()`,
+`HTTP_REQUEST_DURATION.observe(0.12, method="GET", route="/orders/{order_id}", status="200")`).
+`GET /metrics` (app/api/endpoints/metrics_router.py) renders them in the Prometheus text
+format (version 0.0.4), so no client library is needed.
+
+Multiprocess mode: with several uvicorn/gunicorn workers, a scrape reaches one worker only.
+When METRICS_MULTIPROC_DIR is set, every worker writes a snapshot of its metrics to
+`<dir>/metrics-<pid>.json` (at most every METRICS_FLUSH_INTERVAL_SECONDS, after requests,
+and at exit), and a scrape merges the snapshots of all workers:
+- counters and histograms are summed over all snapshots, including those of exited workers,
+  so totals never go backwards when a worker is replaced;
+- "livesum" gauges (in-flight requests) are summed over running workers only;
+- "all" gauges (connection pool stats) are reported per running worker with a `pid` label.
+Empty the directory before starting the workers; it must not be shared between hosts.
+"""
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import atexit
+import json
+import math
+import os
+import threading
+import time
+
+from app.core.config import settings
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_sample(name: str, labelnames: Sequence[str], labelvalues: Sequence[str], value: float) -> str:
+    labels = ",".join(f'{key}="{_escape_label_value(val)}"' for key, val in zip(labelnames, labelvalues))
+    if math.isinf(value):
+        formatted = "+Inf" if value > 0 else "-Inf"
+    else:
+        formatted = repr(float(value))
+    return f"{name}{{{labels}}} {formatted}" if labels else f"{name} {formatted}"
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError: # Exists, owned by another user
+        return True
+    return True
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry: Optional["Registry"] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._registry = registry if registry is not None else REGISTRY
+        self._lock = self._registry.lock
+        self._values: Dict[LabelValues, object] = {}
+        self._registry.register(self)
+
+    def _key(self, labels: Dict[str, object]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def snapshot(self) -> List[list]:
+        """[[label values, value], ...] for the process snapshot; values must be JSON-serializable."""
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def samples(self, entries: Iterable[Tuple[Sequence[str], object]], labelnames: Sequence[str]) -> List[str]:
+        return [_format_sample(self.name, labelnames, key, value) for key, value in entries] # type: ignore
+
+
+class Counter(_Metric):
+    """Monotonically increasing value, e.g. requests served. Name it `*_total`."""
+
+    type_name = "counter"
+
+    def inc(self, amount: float = 1, **labels: object) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only be incremented.")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount # type: ignore
+
+    def value(self, **labels: object) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0) # type: ignore
+
+
+class Gauge(_Metric):
+    """
+    Value that goes up and down.
+
+    Args:
+        multiprocess_mode: How snapshots of several workers are merged: "livesum" (sum over
+            running workers) or "all" (one series per running worker, labelled with `pid`).
+    """
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry: Optional["Registry"] = None, multiprocess_mode: str = "livesum"):
+        if multiprocess_mode not in ("livesum", "all"):
+            raise ValueError(f"Unsupported multiprocess_mode {multiprocess_mode!r}")
+        self.multiprocess_mode = multiprocess_mode
+        super().__init__(name, documentation, labelnames, registry)
+
+    def set(self, value: float, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount # type: ignore
+
+    def dec(self, amount: float = 1, **labels: object) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: object) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0) # type: ignore
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (e.g. latencies in seconds) in cumulative buckets."""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry: Optional["Registry"] = None, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(float(bound) for bound in buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value: float, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0] # Per-bucket counts (last: +Inf), sum
+            index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+            state[0][index] += 1 # type: ignore
+            state[1] += value # type: ignore
+
+    def samples(self, entries: Iterable[Tuple[Sequence[str], object]], labelnames: Sequence[str]) -> List[str]:
+        lines = []
+        bucket_labelnames = tuple(labelnames) + ("le",)
+        for key, (bucket_counts, total) in entries: # type: ignore
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), bucket_counts):
+                cumulative += count
+                le = "+Inf" if math.isinf(bound) else repr(bound)
+                lines.append(_format_sample(f"{self.name}_bucket", bucket_labelnames, tuple(key) + (le,), cumulative))
+            lines.append(_format_sample(f"{self.name}_count", labelnames, key, cumulative))
+            lines.append(_format_sample(f"{self.name}_sum", labelnames, key, total))
+        return lines
+
+
+class Registry:
+    """
+    Set of metrics rendered together, optionally merged across worker processes.
+
+    Args:
+        multiprocess_dir: Directory for per-process snapshots (see module docstring), or None.
+        flush_interval: Minimum seconds between snapshot writes triggered by `maybe_flush`.
+    """
+
+    def __init__(self, multiprocess_dir: Optional[str] = None, flush_interval: float = 1.0):
+        self.lock = threading.RLock()
+        self.multiprocess_dir = multiprocess_dir
+        self.flush_interval = flush_interval
+        self._metrics: Dict[str, _Metric] = {}
+        self._collect_callbacks: List[Callable[[], None]] = []
+        self._last_flush = 0.0
+
+    def register(self, metric: _Metric) -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered.")
+        self._metrics[metric.name] = metric
+
+    def add_collect_callback(self, callback: Callable[[], None]) -> None:
+        """Registers a function updating gauges (e.g. pool stats) right before they are read."""
+        self._collect_callbacks.append(callback)
+
+    def _collect(self) -> None:
+        for callback in self._collect_callbacks:
+            callback()
+
+    def snapshot(self) -> Dict[str, object]:
+        """This process' metric values, as written to its multiprocess snapshot file."""
+        self._collect()
+        return {"pid": os.getpid(), "metrics": {name: metric.snapshot() for name, metric in self._metrics.items()}}
+
+    def flush(self) -> None:
+        """Writes this process' snapshot (multiprocess mode only); atomic for concurrent readers."""
+        if not self.multiprocess_dir:
+            return
+        os.makedirs(self.multiprocess_dir, exist_ok=True)
+        path = os.path.join(self.multiprocess_dir, f"metrics-{os.getpid()}.json")
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "w") as snapshot_file:
+            json.dump(self.snapshot(), snapshot_file)
+        os.replace(temporary_path, path)
+        self._last_flush = time.monotonic()
+
+    def maybe_flush(self) -> None:
+        """Flushes if the last snapshot is older than `flush_interval` (called after each request)."""
+        if self.multiprocess_dir and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def _load_snapshots(self) -> List[Dict[str, object]]:
+        self.flush() # The scraped worker's own values are always current
+        snapshots = []
+        for filename in sorted(os.listdir(self.multiprocess_dir)): # type: ignore
+            if not (filename.startswith("metrics-") and filename.endswith(".json")):
+                continue
+            try:
+                with open(os.path.join(self.multiprocess_dir, filename)) as snapshot_file: # type: ignore
+                    snapshots.append(json.load(snapshot_file))
+            except (OSError, ValueError): # Removed or replaced while listing
+                continue
+        return snapshots
+
+    def _merged_entries(self, metric: _Metric, snapshots: List[Dict[str, object]]) -> Tuple[Sequence[str], List[Tuple[LabelValues, object]]]:
+        labelnames: Sequence[str] = metric.labelnames
+        merged: Dict[LabelValues, object] = {}
+        for snapshot in snapshots:
+            pid = int(snapshot["pid"]) # type: ignore
+            entries = snapshot["metrics"].get(metric.name, []) # type: ignore
+            if isinstance(metric, Gauge):
+                if not _pid_alive(pid):
+                    continue
+                if metric.multiprocess_mode == "all":
+                    labelnames = metric.labelnames + ("pid",)
+                    for key, value in entries:
+                        merged[tuple(key) + (str(pid),)] = value
+                    continue
+            for key, value in entries:
+                key = tuple(key)
+                if isinstance(metric, Histogram):
+                    current = merged.get(key)
+                    if current is None:
+                        merged[key] = [list(value[0]), value[1]]
+                    else:
+                        current[0] = [a + b for a, b in zip(current[0], value[0])] # type: ignore
+                        current[1] += value[1] # type: ignore
+                else:
+                    merged[key] = merged.get(key, 0) + value # type: ignore
+        return labelnames, sorted(merged.items())
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format, merged across workers if configured."""
+        snapshots = self._load_snapshots() if self.multiprocess_dir else None
+        if snapshots is None:
+            self._collect()
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            if snapshots is None:
+                with self.lock:
+                    entries = sorted(metric._values.items())
+                    lines.extend(metric.samples(entries, metric.labelnames))
+            else:
+                labelnames, entries = self._merged_entries(metric, snapshots)
+                lines.extend(metric.samples(entries, labelnames))
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry(multiprocess_dir=settings.METRICS_MULTIPROC_DIR, flush_interval=settings.METRICS_FLUSH_INTERVAL_SECONDS)
+atexit.register(REGISTRY.flush)
+
+
+# HTTP (app/api/request_metrics.py). Routes are path templates, so label values stay bounded.
+HTTP_REQUESTS = Counter("bopis_http_requests_total", "HTTP requests by method, route template and status code.", ("method", "route", "status"))
+HTTP_REQUEST_DURATION = Histogram("bopis_http_request_duration_seconds", "HTTP request latency until the response body was sent.", ("method", "route", "status"))
+HTTP_REQUESTS_IN_PROGRESS = Gauge("bopis_http_requests_in_progress", "HTTP requests currently being served.")
+
+# Database (app/api/query_metrics.py and app/db/session.py)
+DB_QUERIES = Counter("bopis_db_queries_total", "SQL statements executed by requests, by method and route template.", ("method", "route"))
+DB_QUERY_SECONDS = Counter("bopis_db_query_seconds_total", "Time spent executing SQL statements for requests.", ("method", "route"))
+DB_POOL_SIZE = Gauge("bopis_db_pool_size", "Configured connection pool size.", ("engine",), multiprocess_mode="all")
+DB_POOL_CHECKED_OUT = Gauge("bopis_db_pool_checked_out", "Connections currently checked out of the pool.", ("engine",), multiprocess_mode="all")
+DB_POOL_CHECKED_IN = Gauge("bopis_db_pool_checked_in", "Idle connections in the pool.", ("engine",), multiprocess_mode="all")
+DB_POOL_OVERFLOW = Gauge("bopis_db_pool_overflow", "Connections open beyond the pool size (negative while the pool is not full).", ("engine",), multiprocess_mode="all")
+
+# Business events, counted once their transaction committed (conflicts and notifications when raised / added).
+CHECKOUTS = Counter("bopis_checkouts_total", "BOPIS carts checked out.")
+POS_SALES = Counter("bopis_pos_sales_total", "POS sales recorded, by source (online: POST /pos/orders, offline: batch upload).", ("source",))
+SLOT_BOOKINGS = Counter("bopis_slot_bookings_total", "Pickup time slot bookings.")
+STOCK_CONFLICTS = Counter("bopis_stock_conflicts_total", "409 conflicts raised by stock decrements, by operation.", ("operation",))
+NOTIFICATIONS_CREATED = Counter("bopis_notifications_created_total", "Notifications added for users.")
+
+
+def observe_pool(engine, name: str) -> None:
+    """Reports the connection pool of `engine` under `engine="<name>"` (pools without stats are skipped)."""
+    pool = engine.pool
+
+    def collect() -> None:
+        if not hasattr(pool, "checkedout"): # e.g. NullPool / StaticPool
+            return
+        DB_POOL_SIZE.set(pool.size(), engine=name)
+        DB_POOL_CHECKED_OUT.set(pool.checkedout(), engine=name)
+        DB_POOL_CHECKED_IN.set(pool.checkedin(), engine=name)
+        DB_POOL_OVERFLOW.set(pool.overflow(), engine=name)
+
+    REGISTRY.add_collect_callback(collect)
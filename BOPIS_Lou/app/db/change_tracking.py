@@ -0,0 +1,134 @@
+"""
+Per-tenant change sequence for delta sync.
+
+Every insert or update of a tracked row (products, orders, pickup slots, lanes) is stamped
+with `change_seq`, a number taken from a per-tenant counter in `tenant_change_counters`.
+Deletes leave a `SyncTombstone` carrying a sequence number instead. Clients remember the
+highest sequence they have seen and ask for everything after it (`GET /sync/changes`).
+
+Incrementing the counter row locks it until commit, so writers of one tenant commit their
+sequence numbers in order and a client never skips a number that becomes visible later.
+Carts (orders in CART status) are not tracked: they are private to their customer and change
+on every item added, so stamping them would make all shoppers of a tenant queue on the
+counter. A cart gets its first `change_seq` when it is checked out; deleted carts leave no
+tombstone since no client ever saw them.
+
+The hook runs for ORM flushes only. Bulk UPDATEs of tracked tables go through
+`stamped_update`, which stamps `change_seq` itself; other Core statements (upserts, deletes)
+use `allocate_change_seqs` directly.
+"""
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import case, event, insert, select, update, inspect
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Query, Session
+
+from app.models.sql_models import Product, Order, OrderStatus, PickupTimeSlot, Lane, TenantChangeCounter, SyncTombstone
+
+# Entity type names exposed in the change feed and stored on tombstones.
+TRACKED_ENTITY_TYPES = {
+    Product: "product",
+    Order: "order",
+    PickupTimeSlot: "timeslot",
+    Lane: "lane",
+}
+
+
+def _is_tracked(obj: object) -> bool:
+    if type(obj) not in TRACKED_ENTITY_TYPES:
+        return False
+    return not (type(obj) is Order and obj.status == OrderStatus.CART) # type: ignore
+
+
+def allocate_change_seqs(connection: Connection, tenant_id: int, count: int) -> int:
+    """
+    Reserves `count` consecutive change sequence numbers for a tenant.
+
+    Args:
+        connection: Connection of the current transaction.
+        tenant_id: ID of the tenant.
+        count: Number of sequence numbers to reserve (> 0).
+
+    Returns:
+        The first reserved number; the block is [first, first + count - 1].
+    """
+    counters = TenantChangeCounter.__table__
+    while True:
+        result = connection.execute(
+            update(counters).where(counters.c.tenant_id == tenant_id).values(last_seq=counters.c.last_seq + count)
+        )
+        if result.rowcount == 1:
+            last_seq = connection.execute(select(counters.c.last_seq).where(counters.c.tenant_id == tenant_id)).scalar_one()
+            return last_seq - count + 1
+        try:
+            with connection.begin_nested(): # Savepoint: a concurrent first insert only rolls back this statement
+                connection.execute(insert(counters).values(tenant_id=tenant_id, last_seq=count))
+            return 1
+        except IntegrityError:
+            continue # Another transaction created the counter; increment it instead
+
+
+def stamped_update(db: Session, query: Query, values: Dict[Any, Any], tenant_id: int, row_ids: Optional[Sequence[int]] = None) -> int:
+    """
+    Runs `query.update(values)` on a tracked model with `change_seq` stamped, since bulk
+    UPDATEs bypass the flush hook. Loaded instances are not synchronized (expire or reload them).
+
+    Args:
+        db: SQLAlchemy database session.
+        query: Query of one tracked model, filtered to the rows to update.
+        values: Column -> new value, as for `Query.update`.
+        tenant_id: ID of the tenant owning the rows.
+        row_ids: IDs of the rows the query may match, each stamped with its own sequence
+            number; omit for a single-row update.
+
+    Returns:
+        Number of rows updated.
+    """
+    model = query.column_descriptions[0]["entity"]
+    first_seq = allocate_change_seqs(db.connection(), tenant_id=tenant_id, count=len(row_ids) if row_ids else 1)
+    if row_ids:
+        change_seq = case({row_id: first_seq + offset for offset, row_id in enumerate(row_ids)}, value=model.id)
+    else:
+        change_seq = first_seq
+    return query.update({**values, model.change_seq: change_seq}, synchronize_session=False)
+
+
+@event.listens_for(Session, "before_flush")
+def _stamp_change_seqs(session: Session, flush_context, instances) -> None:
+    changed_by_tenant: Dict[int, List[object]] = defaultdict(list)
+    deleted_by_tenant: Dict[int, List[object]] = defaultdict(list)
+
+    for obj in session.new:
+        if _is_tracked(obj) and obj.tenant_id is not None: # type: ignore
+            changed_by_tenant[obj.tenant_id].append(obj) # type: ignore
+    for obj in session.dirty:
+        if not _is_tracked(obj) or not session.is_modified(obj, include_collections=False):
+            continue
+        if inspect(obj).attrs.change_seq.history.has_changes():
+            continue # Already stamped by the caller
+        changed_by_tenant[obj.tenant_id].append(obj) # type: ignore
+    for obj in session.deleted:
+        if _is_tracked(obj) and obj.id is not None: # type: ignore
+            deleted_by_tenant[obj.tenant_id].append(obj) # type: ignore
+
+    if not changed_by_tenant and not deleted_by_tenant:
+        return
+
+    connection = session.connection()
+    for tenant_id in set(changed_by_tenant) | set(deleted_by_tenant):
+        changed = changed_by_tenant.get(tenant_id, [])
+        deleted = deleted_by_tenant.get(tenant_id, [])
+        seq = allocate_change_seqs(connection, tenant_id=tenant_id, count=len(changed) + len(deleted))
+        for obj in changed:
+            obj.change_seq = seq # type: ignore
+            seq += 1
+        for obj in deleted:
+            session.add(SyncTombstone(
+                tenant_id=tenant_id,
+                entity_type=TRACKED_ENTITY_TYPES[type(obj)],
+                entity_id=obj.id, # type: ignore
+                change_seq=seq
+            ))
+            seq += 1
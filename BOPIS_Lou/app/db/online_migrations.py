@@ -0,0 +1,132 @@
+"""
+Helpers for Alembic migrations that must not block a live database.
+
+- `create_index_concurrently` / `drop_index_concurrently`: on PostgreSQL, `CREATE INDEX
+  CONCURRENTLY` run outside the migration transaction, so reads and writes continue while
+  the index is built. An INVALID index left behind by an interrupted build is dropped and
+  rebuilt; a valid existing one is kept (IF NOT EXISTS). Other dialects build it normally.
+- `backfill_in_batches`: an UPDATE split into primary-key ranges, each committed on its own,
+  so row locks are held for one batch only and progress is logged. `where` must exclude rows
+  already done (e.g. `new_column IS NULL`), which makes an interrupted backfill resumable.
+
+Usage, inside a migration's upgrade():
+
+    from app.db import online_migrations
+
+    op.add_column('orders', sa.Column('pickup_day', sa.Date(), nullable=True)) # Nullable: no table rewrite
+    online_migrations.backfill_in_batches('orders', "pickup_day = DATE(created_at)", where="pickup_day IS NULL")
+    online_migrations.create_index_concurrently('ix_orders_tenant_pickup_day', 'orders', ['tenant_id', 'pickup_day'])
+
+Backfills write with plain SQL and do not stamp `change_seq`: use them for derived columns
+that offline clients do not need to re-download. In offline mode (`alembic upgrade --sql`)
+the backfill is emitted as a single UPDATE.
+"""
+from typing import Any, Callable, List, Optional, Union
+import logging
+import time
+
+from alembic import op
+import sqlalchemy as sa
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKFILL_BATCH_SIZE = 5000
+
+
+def _is_postgresql() -> bool:
+    return op.get_context().dialect.name == "postgresql"
+
+
+def _drop_invalid_index(index_name: str) -> None:
+    """Drops `index_name` if an earlier concurrent build left it INVALID (PostgreSQL)."""
+    invalid = op.get_bind().execute(sa.text(
+        "SELECT 1 FROM pg_index JOIN pg_class ON pg_class.oid = pg_index.indexrelid "
+        "WHERE pg_class.relname = :name AND NOT pg_index.indisvalid"
+    ), {"name": index_name}).first()
+    if invalid:
+        logger.warning("Dropping invalid index %s left by an interrupted build", index_name)
+        op.drop_index(index_name, if_exists=True, postgresql_concurrently=True)
+
+
+def create_index_concurrently(
+    index_name: str, table_name: str, columns: List[Union[str, sa.TextClause]], unique: bool = False, where: Optional[str] = None, **dialect_kw: Any
+) -> None:
+    """
+    Creates an index without locking `table_name` against writes (PostgreSQL).
+
+    Args:
+        index_name: Name of the index; an existing valid index of that name is kept.
+        table_name: Table to index.
+        columns: Indexed column names (or `sa.text` expressions), in order.
+        unique: Create a unique index.
+        where: SQL condition for a partial index, e.g. "status = 'CART'".
+        **dialect_kw: Further dialect options for `op.create_index`, e.g. postgresql_using='gin'.
+    """
+    condition = sa.text(where) if where else None
+    with op.get_context().autocommit_block():
+        if _is_postgresql() and not op.get_context().as_sql:
+            _drop_invalid_index(index_name)
+        op.create_index(
+            index_name, table_name, columns, unique=unique, if_not_exists=True,
+            postgresql_concurrently=True, postgresql_where=condition, sqlite_where=condition, **dialect_kw
+        )
+
+
+def drop_index_concurrently(index_name: str, table_name: str) -> None:
+    """Drops an index without locking `table_name` against writes (PostgreSQL)."""
+    with op.get_context().autocommit_block():
+        op.drop_index(index_name, table_name=table_name, if_exists=True, postgresql_concurrently=True)
+
+
+def _log_progress(table_name: str, updated: int, done_up_to: int, highest_key: int, elapsed: float) -> None:
+    logger.info("Backfill %s: %d rows updated, keys up to %d of %d, %.0f rows/s",
+                table_name, updated, done_up_to, highest_key, updated / elapsed if elapsed > 0 else 0)
+
+
+def backfill_in_batches(
+    table_name: str,
+    set_clause: str,
+    where: str = "1 = 1",
+    batch_size: int = DEFAULT_BACKFILL_BATCH_SIZE,
+    key: str = "id",
+    pause_seconds: float = 0.0,
+    progress: Optional[Callable[[str, int, int, int, float], None]] = None
+) -> int:
+    """
+    Runs `UPDATE table_name SET set_clause WHERE where` in committed batches of `batch_size` keys.
+
+    Args:
+        table_name: Table to update.
+        set_clause: SQL after SET, e.g. "pickup_day = DATE(created_at)".
+        where: SQL condition selecting the rows still to update.
+        batch_size: Width of each primary-key range (one transaction each).
+        key: Integer primary key column to batch on.
+        pause_seconds: Sleep between batches, to leave I/O headroom for live traffic.
+        progress: Called after each batch with (table_name, rows updated so far, last key done,
+            highest key, seconds elapsed); logs at INFO by default.
+
+    Returns:
+        Number of rows updated (0 in offline mode).
+    """
+    statement = f"UPDATE {table_name} SET {set_clause} WHERE ({where})"
+    if op.get_context().as_sql: # Offline mode: no rows to count or batch
+        op.execute(statement)
+        return 0
+
+    report = progress or _log_progress
+    lowest_key, highest_key = op.get_bind().execute(sa.text(f"SELECT MIN({key}), MAX({key}) FROM {table_name}")).one()
+    if lowest_key is None:
+        return 0
+
+    batch_statement = sa.text(f"{statement} AND {key} >= :low AND {key} < :high")
+    updated = 0
+    started = time.perf_counter()
+    with op.get_context().autocommit_block():
+        bind = op.get_bind() # The AUTOCOMMIT connection: each batch commits on its own
+        for low in range(lowest_key, highest_key + 1, batch_size):
+            high = low + batch_size
+            updated += bind.execute(batch_statement, {"low": low, "high": high}).rowcount
+            report(table_name, updated, min(high - 1, highest_key), highest_key, time.perf_counter() - started)
+            if pause_seconds:
+                time.sleep(pause_seconds)
+    return updated
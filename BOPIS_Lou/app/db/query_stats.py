@@ -0,0 +1,98 @@
+"""
+Per-request SQL query counting.
+
+Listeners on every `Engine` (`before_cursor_execute` / `after_cursor_execute`) add each
+statement and its execution time to the `QueryStats` collectors active in the current
+context. Collectors nest: the request middleware (app/api/query_metrics.py) opens one
+per request, and tests can open their own around a single call (`assert_max_queries`),
+both counting the same statements. Sync endpoints run in a worker thread with a copy of the
+request's context, so their queries are attributed to the right request.
+
+Statements are also counted by SQL text, so one statement executed many times with
+different parameters (the N+1 pattern) can be reported.
+"""
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Tuple
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_active_collectors: ContextVar[Tuple["QueryStats", ...]] = ContextVar("query_stats_collectors", default=())
+
+
+class QueryStats:
+    """Queries and database time observed while the collector was active."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration = 0.0 # Seconds spent executing statements
+        self.statements: Counter = Counter() # SQL text -> executions
+
+    @property
+    def duration_ms(self) -> float:
+        return self.duration * 1000
+
+    def repeated_statements(self, threshold: int) -> List[Tuple[str, int]]:
+        """Statements executed at least `threshold` times, most repeated first (likely N+1 loads)."""
+        return [(statement, count) for statement, count in self.statements.most_common() if count >= threshold]
+
+
+@contextmanager
+def collect_queries() -> Iterator[QueryStats]:
+    """Counts the queries executed in the current context (and nested ones) until exit."""
+    stats = QueryStats()
+    token = _active_collectors.set(_active_collectors.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _active_collectors.reset(token)
+
+
+@contextmanager
+def assert_max_queries(max_queries: int) -> Iterator[QueryStats]:
+    """
+    Test helper: fails if the block executes more than `max_queries` statements.
+
+    Usage:
+        with assert_max_queries(4):
+            response = await async_client.get(f"/orders/{order_id}", headers=headers)
+
+    Raises:
+        AssertionError: Listing the executed statements when the budget is exceeded.
+    """
+    with collect_queries() as stats:
+        yield stats
+    if stats.count > max_queries:
+        executed = "\n".join(f"  {count}x {statement}" for statement, count in stats.statements.most_common())
+        raise AssertionError(f"Expected at most {max_queries} queries, got {stats.count}:\n{executed}")
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active_collectors.get():
+        conn.info.setdefault("query_stats_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    collectors = _active_collectors.get()
+    started = conn.info.get("query_stats_started")
+    if not collectors or not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    for stats in collectors:
+        stats.count += 1
+        stats.duration += elapsed
+        stats.statements[statement] += 1
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # Failed statements never reach after_cursor_execute; drop their start time.
+    connection = exception_context.connection
+    started = connection.info.get("query_stats_started") if connection is not None else None
+    if started:
+        started.pop()
@@ -1,6 +1,9 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.metrics import observe_pool
+from app.db import change_tracking # noqa: F401 # Registers the change-sequence flush hook for delta sync
+from app.db import slow_queries # noqa: F401 # Registers the slow-query log listeners (opt-in)
 
 engine = create_engine(
     settings.SQLALCHEMY_DATABASE_URL,
@@ -8,9 +11,24 @@ engine = create_engine(
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Reports and exports read from a replica when one is configured, keeping load off the primary.
+read_engine = create_engine(settings.SQLALCHEMY_READ_REPLICA_URL) if settings.SQLALCHEMY_READ_REPLICA_URL else engine
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+observe_pool(engine, "primary")
+if read_engine is not engine:
+    observe_pool(read_engine, "read_replica")
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
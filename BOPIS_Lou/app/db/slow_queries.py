@@ -0,0 +1,138 @@
+"""
+Opt-in slow-query log.
+
+With SLOW_QUERY_THRESHOLD_MS set, every statement taking at least that long is logged
+(warning on this module's logger) and kept in an in-memory ring buffer of the last
+SLOW_QUERY_LOG_SIZE entries, served by `GET /admin/slow-queries`. Each entry has:
+- the SQL and its parameters, redacted to their types (`<str>`, `<int>`, ...), so no customer
+  data, tokens or password hashes reach the log;
+- the duration and the originating route ("GET /orders/{order_id}", set per request by
+  QueryMetricsMiddleware via `query_origin`; "<background>" for CLI jobs);
+- with SLOW_QUERY_EXPLAIN, the plan of SELECT statements (never of writes): `EXPLAIN (ANALYZE, BUFFERS)` on
+  PostgreSQL (runs the query a second time, inside a savepoint), `EXPLAIN QUERY PLAN` on SQLite.
+
+Sequential scans (`Seq Scan` / `SCAN <table>`) of large tables in these plans are the usual
+sign of a missing index. The buffer is per process; with several workers, each keeps its own.
+"""
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+import datetime
+import logging
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_current_origin: ContextVar[Optional[Callable[[], str]]] = ContextVar("slow_query_origin", default=None)
+_entries: Deque[Dict[str, Any]] = deque(maxlen=settings.SLOW_QUERY_LOG_SIZE)
+_lock = threading.Lock()
+
+
+@contextmanager
+def query_origin(resolve: Callable[[], str]) -> Iterator[None]:
+    """Attributes slow queries of the current context to `resolve()` (evaluated when one is recorded)."""
+    token = _current_origin.set(resolve)
+    try:
+        yield
+    finally:
+        _current_origin.reset(token)
+
+
+def recent_slow_queries() -> List[Dict[str, Any]]:
+    """Recorded slow queries, newest first."""
+    with _lock:
+        return list(reversed(_entries))
+
+
+def clear_slow_queries() -> None:
+    with _lock:
+        _entries.clear()
+
+
+def redact_parameters(parameters: Any) -> Any:
+    """Replaces parameter values by their type names, keeping the shape (dict / sequence / executemany)."""
+    if isinstance(parameters, dict):
+        return {key: redact_parameters(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [redact_parameters(value) for value in parameters]
+    if parameters is None or isinstance(parameters, bool):
+        return parameters
+    return f"<{type(parameters).__name__}>"
+
+
+def _explain(connection, cursor, statement: str, parameters: Any) -> Optional[List[str]]:
+    if not statement.lstrip().upper().startswith("SELECT"):
+        return None # EXPLAIN ANALYZE would execute writes a second time
+    dialect = connection.dialect.name
+    explain_cursor = cursor.connection.cursor()
+    try:
+        if dialect == "postgresql":
+            # A failing EXPLAIN must not abort the request's transaction.
+            explain_cursor.execute("SAVEPOINT slow_query_explain")
+            try:
+                explain_cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + statement, parameters)
+                plan = [row[0] for row in explain_cursor.fetchall()]
+            finally:
+                explain_cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                explain_cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+            return plan
+        if dialect == "sqlite":
+            explain_cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+            return [row[-1] for row in explain_cursor.fetchall()]
+        explain_cursor.execute("EXPLAIN " + statement, parameters)
+        return [" ".join(str(value) for value in row) for row in explain_cursor.fetchall()]
+    except Exception as e: # The plan is diagnostic only
+        return [f"EXPLAIN failed: {e}"]
+    finally:
+        explain_cursor.close()
+
+
+def _record(connection, cursor, statement: str, parameters: Any, executemany: bool, duration: float) -> None:
+    resolve = _current_origin.get()
+    entry: Dict[str, Any] = {
+        "recorded_at": datetime.datetime.now(datetime.timezone.utc),
+        "duration_ms": round(duration * 1000, 3),
+        "origin": resolve() if resolve is not None else "<background>",
+        "statement": statement,
+        "parameters": redact_parameters(parameters),
+        "executemany": executemany,
+        "plan": None,
+    }
+    if settings.SLOW_QUERY_EXPLAIN and not executemany:
+        entry["plan"] = _explain(connection, cursor, statement, parameters)
+    with _lock:
+        _entries.append(entry)
+    logger.warning("Slow query (%.1f ms) in %s: %s parameters=%s", entry["duration_ms"], entry["origin"], " ".join(statement.split())[:1000], entry["parameters"])
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if settings.SLOW_QUERY_THRESHOLD_MS is not None:
+        conn.info.setdefault("slow_query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("slow_query_started")
+    if not started:
+        return
+    duration = time.perf_counter() - started.pop()
+    threshold_ms = settings.SLOW_QUERY_THRESHOLD_MS
+    if threshold_ms is not None and duration * 1000 >= threshold_ms:
+        _record(conn, cursor, statement, parameters, executemany, duration)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # Failed statements never reach after_cursor_execute; drop their start time.
+    connection = exception_context.connection
+    started = connection.info.get("slow_query_started") if connection is not None else None
+    if started:
+        started.pop()
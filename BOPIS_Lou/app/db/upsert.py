@@ -0,0 +1,57 @@
+"""
+Dialect-specific `INSERT ... ON CONFLICT` constructs.
+
+PostgreSQL and SQLite share the `on_conflict_do_update` / `excluded` API, so callers can build
+one upsert statement for both. Other backends get None and must fall back to read-then-write (as `upsert_increment` does).
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+_INSERT_BY_DIALECT = {
+    "postgresql": postgresql_insert,
+    "sqlite": sqlite_insert,
+}
+
+
+def get_upsert_insert(db: Session) -> Optional[Callable[..., Any]]:
+    """Returns the `insert()` supporting ON CONFLICT for the session's database, or None."""
+    return _INSERT_BY_DIALECT.get(db.get_bind().dialect.name)
+
+
+def upsert_increment(db: Session, model: Any, key_columns: Sequence[str], value_columns: Sequence[str], rows: List[Dict[str, Any]], chunk_size: int = 500) -> None:
+    """
+    Adds counter values to rows identified by a unique key, creating missing rows.
+    The addition happens in SQL, so concurrent increments never overwrite each other.
+    Does NOT commit.
+
+    Args:
+        db: SQLAlchemy database session.
+        model: Mapped class of the counter table.
+        key_columns: Columns of a unique constraint identifying a row.
+        value_columns: Numeric columns to increment.
+        rows: Key and increment values; keys must be unique within the list.
+        chunk_size: Rows per statement.
+    """
+    # Fixed order avoids deadlocks; enum keys are ordered by value.
+    rows = sorted(rows, key=lambda row: tuple(getattr(row[column], "value", row[column]) for column in key_columns))
+    table = model.__table__
+    insert_with_upsert = get_upsert_insert(db)
+    if insert_with_upsert is not None:
+        for start in range(0, len(rows), chunk_size):
+            statement = insert_with_upsert(table).values(rows[start:start + chunk_size])
+            statement = statement.on_conflict_do_update(
+                index_elements=[table.c[column] for column in key_columns],
+                set_={column: table.c[column] + statement.excluded[column] for column in value_columns}
+            )
+            db.execute(statement)
+        return
+
+    for row in rows: # No ON CONFLICT support: update, then insert the rows that did not exist
+        updated = db.query(model).filter(*[getattr(model, column) == row[column] for column in key_columns]).update(
+            {getattr(model, column): getattr(model, column) + row[column] for column in value_columns}, synchronize_session=False
+        )
+        if not updated:
+            db.execute(insert(model), [row])
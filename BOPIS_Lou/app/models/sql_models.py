@@ -1,5 +1,6 @@
 import enum
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Boolean, Numeric, ForeignKey, Text, Enum as SAEnum, Time, UniqueConstraint # Keep other sqlalchemy imports
+from sqlalchemy import create_engine, Column, Integer, BigInteger, String, DateTime, Boolean, Numeric, ForeignKey, Text, Enum as SAEnum, Time, Date, UniqueConstraint, Index # Keep other sqlalchemy imports
+from sqlalchemy import DDL, event, literal_column, text
 from sqlalchemy.orm import relationship # Keep other sqlalchemy imports
 from sqlalchemy.sql import func
 
@@ -44,11 +45,29 @@ class NotificationStatus(enum.Enum):
     READ = "READ"
     ARCHIVED = "ARCHIVED"
 
+class IdempotencyStatus(enum.Enum):
+    IN_PROGRESS = "IN_PROGRESS"
+    COMPLETED = "COMPLETED"
+
+class InventoryMovementType(enum.Enum):
+    SALE = "SALE" # BOPIS checkout
+    POS_SALE = "POS_SALE"
+    CANCELLATION = "CANCELLATION" # Stock returned by a cancelled order
+    RECEIPT = "RECEIPT" # Incoming stock (入荷)
+    STOCK_COUNT = "STOCK_COUNT" # Cycle count setting an absolute quantity
+    DAMAGE = "DAMAGE" # Write-off of damaged or lost stock
+    CORRECTION = "CORRECTION" # Manual correction
+
+class SalesBucketGranularity(enum.Enum):
+    HOUR = "HOUR"
+    DAY = "DAY"
+
 # --- Models ---
 class Tenant(Base): # From existing TSD
     __tablename__ = 'tenants'
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, index=True, nullable=False)
+    default_reorder_threshold = Column(Integer, nullable=True) # Low-stock threshold for products without their own
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     users = relationship("User", back_populates="tenant")
@@ -77,6 +96,14 @@ class User(Base): # From existing TSD, updated
     notifications = relationship("Notification", back_populates="user")
 
 
+def product_search_document(name_column, sku_column):
+    """
+    tsvector expression indexed by `ix_products_search_tsv` (PostgreSQL only).
+    Search queries must build the vector with this same function so the planner can use the index.
+    """
+    return func.to_tsvector(literal_column("'simple'"), name_column + literal_column("' '") + sku_column)
+
+
 class Product(Base): # From existing TSD, updated
     __tablename__ = 'products'
     id = Column(Integer, primary_key=True, index=True)
@@ -87,12 +114,21 @@ class Product(Base): # From existing TSD, updated
     tenant_id = Column(Integer, ForeignKey('tenants.id'), nullable=False)
     stock_quantity = Column(Integer, default=0, nullable=False)
     image_url = Column(String, nullable=True)
+    reorder_threshold = Column(Integer, nullable=True) # Low-stock alert at or below this; None uses the tenant default
     version = Column(Integer, nullable=False, server_default='1', default=1) # For optimistic locking
     last_synced_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now()) # For offline sync
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    change_seq = Column(BigInteger, nullable=True) # Per-tenant change sequence for delta sync (see app.db.change_tracking)
 
-    __table_args__ = (UniqueConstraint('sku', 'tenant_id', name='_sku_tenant_uc'),)
+    __table_args__ = (
+        UniqueConstraint('sku', 'tenant_id', name='_sku_tenant_uc'),
+        Index('ix_products_tenant_change_seq', 'tenant_id', 'change_seq'),
+        Index('ix_products_tenant_updated_at', 'tenant_id', 'updated_at'), # Listing with updated_since
+        # Product search (see app/services/product_search_service.py); SQLite uses the products_fts table below
+        Index('ix_products_search_tsv', product_search_document(name, sku), postgresql_using='gin').ddl_if(dialect='postgresql'),
+        Index('ix_products_tenant_sku_prefix', 'tenant_id', 'sku', postgresql_ops={'sku': 'text_pattern_ops'}).ddl_if(dialect='postgresql'),
+    )
 
     tenant = relationship("Tenant", back_populates="products")
     order_items = relationship("OrderItem", back_populates="product")
@@ -108,6 +144,8 @@ class Order(Base): # From existing TSD, updated
     payment_status = Column(SAEnum(PaymentStatus), nullable=False, default=PaymentStatus.UNPAID)
     total_amount = Column(Numeric(10, 2), nullable=False)
     pickup_token = Column(String, unique=True, index=True, nullable=True)
+    paid_at = Column(DateTime(timezone=True), nullable=True) # Day of payment drives the revenue counters
+    completed_at = Column(DateTime(timezone=True), nullable=True) # Server time of completion; sales rollup watermark
 
     pickup_slot_id = Column(Integer, ForeignKey('pickup_time_slots.id'), nullable=True)
     assigned_lane_id = Column(Integer, ForeignKey('lanes.id'), nullable=True)
@@ -117,6 +155,18 @@ class Order(Base): # From existing TSD, updated
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    change_seq = Column(BigInteger, nullable=True) # Per-tenant change sequence for delta sync
+
+    __table_args__ = (
+        Index('ix_orders_tenant_change_seq', 'tenant_id', 'change_seq'),
+        Index('ix_orders_tenant_completed_at', 'tenant_id', 'completed_at'),
+        # Hot queues (audited by app/cli/index_audit.py): picker queue, counter queue, customer cart
+        Index('ix_orders_tenant_status_created_at', 'tenant_id', 'status', 'created_at'),
+        Index('ix_orders_ready_tenant_updated_at', 'tenant_id', 'updated_at',
+              postgresql_where=text("status = 'READY_FOR_PICKUP'"), sqlite_where=text("status = 'READY_FOR_PICKUP'")),
+        Index('ix_orders_cart_user_tenant', 'user_id', 'tenant_id',
+              postgresql_where=text("status = 'CART'"), sqlite_where=text("status = 'CART'")),
+    )
 
     customer = relationship("User", back_populates="orders")
     tenant = relationship("Tenant", back_populates="orders")
@@ -152,6 +202,12 @@ class PickupTimeSlot(Base):
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    change_seq = Column(BigInteger, nullable=True) # Per-tenant change sequence for delta sync
+
+    __table_args__ = (
+        Index('ix_pickup_time_slots_tenant_change_seq', 'tenant_id', 'change_seq'),
+        Index('ix_pickup_time_slots_tenant_date_start_time', 'tenant_id', 'date', 'start_time'), # Slot listings
+    )
 
     tenant = relationship("Tenant", back_populates="pickup_time_slots")
     orders = relationship("Order", back_populates="pickup_slot")
@@ -165,6 +221,9 @@ class Lane(Base):
     current_order_id = Column(Integer, ForeignKey('orders.id'), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    change_seq = Column(BigInteger, nullable=True) # Per-tenant change sequence for delta sync
+
+    __table_args__ = (Index('ix_lanes_tenant_change_seq', 'tenant_id', 'change_seq'),)
 
     tenant = relationship("Tenant", back_populates="lanes")
     current_order = relationship("Order", foreign_keys=[current_order_id], post_update=True) # post_update for self-referential FK
@@ -198,6 +257,210 @@ class Notification(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     read_at = Column(DateTime(timezone=True), nullable=True)
 
+    __table_args__ = (Index('ix_notifications_user_status_created_at', 'user_id', 'status', 'created_at'),)
+
     user = relationship("User", back_populates="notifications")
     tenant = relationship("Tenant", back_populates="notifications") # Added tenant relationship
     related_order = relationship("Order", back_populates="notifications")
+
+class IdempotencyRecord(Base):
+    __tablename__ = 'idempotency_records'
+    id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(Integer, ForeignKey('tenants.id'), nullable=False)
+    key = Column(String, nullable=False) # Client-supplied Idempotency-Key
+    request_fingerprint = Column(String(64), nullable=False) # SHA-256 of the canonical request
+    status = Column(SAEnum(IdempotencyStatus), nullable=False, default=IdempotencyStatus.IN_PROGRESS)
+    response_status_code = Column(Integer, nullable=True)
+    response_body = Column(Text, nullable=True) # Serialized JSON response replayed to retries
+    locked_until = Column(DateTime(timezone=True), nullable=True) # In-progress claims past this are considered abandoned
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (UniqueConstraint('tenant_id', 'key', name='_idempotency_tenant_key_uc'),)
+
+class TenantChangeCounter(Base):
+    __tablename__ = 'tenant_change_counters'
+    tenant_id = Column(Integer, ForeignKey('tenants.id'), primary_key=True)
+    last_seq = Column(BigInteger, nullable=False, default=0) # Last change sequence handed out for this tenant
+
+class SyncTombstone(Base):
+    __tablename__ = 'sync_tombstones'
+    id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(Integer, ForeignKey('tenants.id'), nullable=False)
+    entity_type = Column(String, nullable=False) # "product", "order", "timeslot", "lane"
+    entity_id = Column(Integer, nullable=False) # ID of the deleted row (no FK: the row is gone)
+    change_seq = Column(BigInteger, nullable=False)
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (Index('ix_sync_tombstones_tenant_change_seq', 'tenant_id', 'change_seq'),)
+
+class InventoryMovement(Base):
+    __tablename__ = 'inventory_movements' # Append-only stock ledger
+    id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(Integer, ForeignKey('tenants.id'), nullable=False)
+    product_id = Column(Integer, ForeignKey('products.id', ondelete='SET NULL'), nullable=True) # NULL once the product is deleted
+    sku = Column(String, nullable=False) # SKU at the time of the movement; identifies the rows of deleted products
+    movement_type = Column(SAEnum(InventoryMovementType), nullable=False)
+    quantity_delta = Column(Integer, nullable=False) # Signed change applied to stock_quantity
+    quantity_after = Column(Integer, nullable=False) # stock_quantity right after this movement
+    order_id = Column(Integer, nullable=True) # No FK: the order may have moved to orders_archive
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=True) # User who caused it (customer, cashier, staff)
+    note = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index('ix_inventory_movements_tenant_product_id', 'tenant_id', 'product_id', 'id'),
+        Index('ix_inventory_movements_tenant_created_at', 'tenant_id', 'created_at'),
+    )
+
+class InventoryDailyRollup(Base):
+    __tablename__ = 'inventory_daily_rollups' # Per-product, per-day totals maintained with every ledger write
+    id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(Integer, ForeignKey('tenants.id'), nullable=False)
+    product_id = Column(Integer, ForeignKey('products.id', ondelete='SET NULL'), nullable=True) # NULL once the product is deleted
+    day = Column(Date, nullable=False) # UTC day of the movements
+    received = Column(Integer, nullable=False, default=0)
+    sold_bopis = Column(Integer, nullable=False, default=0)
+    sold_pos = Column(Integer, nullable=False, default=0)
+    cancelled = Column(Integer, nullable=False, default=0) # Returned to stock by cancellations
+    adjusted = Column(Integer, nullable=False, default=0) # Signed sum of counts, damages and corrections
+    handed_over = Column(Integer, nullable=False, default=0) # BOPIS quantity handed to customers (no stock movement)
+    net_change = Column(Integer, nullable=False, default=0) # Signed sum of all stock movements
+
+    __table_args__ = (
+        UniqueConstraint('tenant_id', 'product_id', 'day', name='_inventory_rollup_tenant_product_day_uc'),
+        Index('ix_inventory_daily_rollups_tenant_day', 'tenant_id', 'day'),
+    )
+
+class StockAlert(Base):
+    __tablename__ = 'stock_alerts' # At most one row per product; the dashboard reads the active ones
+    id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(Integer, ForeignKey('tenants.id'), nullable=False)
+    product_id = Column(Integer, ForeignKey('products.id', ondelete='CASCADE'), nullable=False, unique=True)
+    is_active = Column(Boolean, nullable=False, default=True)
+    threshold = Column(Integer, nullable=False) # Threshold in effect when the alert was raised
+    triggered_stock_quantity = Column(Integer, nullable=False) # Stock that raised the alert
+    triggered_at = Column(DateTime(timezone=True), nullable=False)
+    resolved_at = Column(DateTime(timezone=True), nullable=True)
+    last_notified_at = Column(DateTime(timezone=True), nullable=True) # Rate-limits notifications for flapping stock
+
+    __table_args__ = (Index('ix_stock_alerts_tenant_active', 'tenant_id', 'is_active'),)
+
+class TenantOrderStatusCount(Base):
+    __tablename__ = 'tenant_order_status_counts' # Dashboard counters, updated on every order status transition
+    id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(Integer, ForeignKey('tenants.id'), nullable=False)
+    status = Column(SAEnum(OrderStatus), nullable=False) # Carts are not counted
+    slot = Column(Integer, nullable=False, default=0) # order_id % DASHBOARD_COUNTER_SLOTS; readers sum the slots
+    order_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (UniqueConstraint('tenant_id', 'status', 'slot', name='_tenant_order_status_count_uc'),)
+
+class TenantDailySales(Base):
+    __tablename__ = 'tenant_daily_sales' # Dashboard counters, updated on payment and refund
+    id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(Integer, ForeignKey('tenants.id'), nullable=False)
+    day = Column(Date, nullable=False) # UTC day the orders were paid
+    slot = Column(Integer, nullable=False, default=0) # order_id % DASHBOARD_COUNTER_SLOTS; readers sum the slots
+    paid_orders = Column(Integer, nullable=False, default=0) # Net of refunds
+    revenue = Column(Numeric(12, 2), nullable=False, default=0) # Net of refunds
+
+    __table_args__ = (UniqueConstraint('tenant_id', 'day', 'slot', name='_tenant_daily_sales_tenant_day_uc'),)
+
+class SalesRollup(Base):
+    __tablename__ = 'sales_rollups' # Completed-order sales per time bucket, product, channel and payment status
+    id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(Integer, ForeignKey('tenants.id'), nullable=False)
+    granularity = Column(SAEnum(SalesBucketGranularity), nullable=False)
+    bucket_start = Column(DateTime(timezone=True), nullable=False) # UTC start of the hour or day of sale
+    product_id = Column(Integer, ForeignKey('products.id', ondelete='SET NULL'), nullable=True) # NULL once the product is deleted
+    sku = Column(String, nullable=False) # SKU and name when the bucket was created; reported for deleted products
+    product_name = Column(String, nullable=False)
+    order_type = Column(SAEnum(OrderType), nullable=False) # Channel: BOPIS or POS_SALE
+    payment_status = Column(SAEnum(PaymentStatus), nullable=False)
+    order_count = Column(Integer, nullable=False, default=0) # Orders containing the product
+    quantity = Column(Integer, nullable=False, default=0)
+    revenue = Column(Numeric(14, 2), nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint('tenant_id', 'granularity', 'bucket_start', 'product_id', 'order_type', 'payment_status', name='_sales_rollup_bucket_uc'),
+        Index('ix_sales_rollups_tenant_granularity_bucket', 'tenant_id', 'granularity', 'bucket_start'),
+    )
+
+class SalesRollupWatermark(Base):
+    __tablename__ = 'sales_rollup_watermarks' # Per tenant: orders completed up to this time are in sales_rollups
+    tenant_id = Column(Integer, ForeignKey('tenants.id'), primary_key=True)
+    completed_until = Column(DateTime(timezone=True), nullable=False)
+    refreshed_at = Column(DateTime(timezone=True), nullable=False)
+
+# --- Archive (app/services/archive_service.py) ---
+# Finished orders and old notifications are moved here in batches, keeping their IDs, so the hot
+# tables only hold live rows. Only explicit archive reads query these tables. No FKs to hot
+# tables other than tenants: referenced users, products, slots and lanes may change later.
+class ArchivedOrder(Base):
+    __tablename__ = 'orders_archive'
+    id = Column(Integer, primary_key=True, autoincrement=False) # ID of the order in `orders`
+    user_id = Column(Integer, nullable=False)
+    tenant_id = Column(Integer, ForeignKey('tenants.id'), nullable=False)
+    order_type = Column(SAEnum(OrderType), nullable=False)
+    status = Column(SAEnum(OrderStatus), nullable=False) # COMPLETED or CANCELLED
+    payment_status = Column(SAEnum(PaymentStatus), nullable=False)
+    total_amount = Column(Numeric(10, 2), nullable=False)
+    pickup_token = Column(String, nullable=True)
+    paid_at = Column(DateTime(timezone=True), nullable=True)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+    pickup_slot_id = Column(Integer, nullable=True)
+    assigned_lane_id = Column(Integer, nullable=True)
+    identity_verification_product_id = Column(Integer, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), nullable=True)
+    change_seq = Column(BigInteger, nullable=True) # Last change sequence before archiving
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index('ix_orders_archive_tenant_completed_at', 'tenant_id', 'completed_at'),
+        Index('ix_orders_archive_user_created_at', 'user_id', 'created_at'),
+    )
+
+    order_items = relationship("ArchivedOrderItem", back_populates="order")
+
+class ArchivedOrderItem(Base):
+    __tablename__ = 'order_items_archive'
+    id = Column(Integer, primary_key=True, autoincrement=False) # ID of the item in `order_items`
+    order_id = Column(Integer, ForeignKey('orders_archive.id'), nullable=False, index=True)
+    product_id = Column(Integer, nullable=False)
+    quantity = Column(Integer, nullable=False)
+    price_at_purchase = Column(Numeric(10, 2), nullable=False)
+
+    order = relationship("ArchivedOrder", back_populates="order_items")
+    product = relationship("Product", primaryjoin="foreign(ArchivedOrderItem.product_id) == Product.id", viewonly=True)
+
+class ArchivedNotification(Base):
+    __tablename__ = 'notifications_archive'
+    id = Column(Integer, primary_key=True, autoincrement=False) # ID of the notification in `notifications`
+    user_id = Column(Integer, nullable=False)
+    tenant_id = Column(Integer, ForeignKey('tenants.id'), nullable=False)
+    message = Column(Text, nullable=False)
+    related_order_id = Column(Integer, nullable=True) # In `orders` or `orders_archive`
+    status = Column(SAEnum(NotificationStatus), nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=True)
+    read_at = Column(DateTime(timezone=True), nullable=True)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (Index('ix_notifications_archive_user_created_at', 'user_id', 'created_at'),)
+
+# --- SQLite full-text index for product search ---
+# External-content FTS5 table kept in sync with `products` by triggers. Created with the
+# products table (create_all / tests); PostgreSQL uses ix_products_search_tsv instead.
+for _statement in (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(name, sku, content='products', content_rowid='id', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN "
+    "INSERT INTO products_fts(rowid, name, sku) VALUES (new.id, new.name, new.sku); END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name, sku) VALUES ('delete', old.id, old.name, old.sku); END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, sku ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name, sku) VALUES ('delete', old.id, old.name, old.sku); "
+    "INSERT INTO products_fts(rowid, name, sku) VALUES (new.id, new.name, new.sku); END",
+):
+    event.listen(Product.__table__, "after_create", DDL(_statement).execute_if(dialect='sqlite'))
+event.listen(Product.__table__, "before_drop", DDL("DROP TABLE IF EXISTS products_fts").execute_if(dialect='sqlite'))
@@ -0,0 +1,24 @@
+from pydantic import BaseModel
+from typing import Any, List, Optional
+import datetime
+
+class SlowQueryResponse(BaseModel):
+    recorded_at: datetime.datetime
+    duration_ms: float
+    origin: str # "METHOD /route/{template}", or "<background>" outside requests
+    statement: str
+    parameters: Any = None # Values replaced by their type names ("<str>", "<int>", ...)
+    executemany: bool
+    plan: Optional[List[str]] = None # EXPLAIN output, SELECTs only (SLOW_QUERY_EXPLAIN)
+
+class OrderArchiveResult(BaseModel):
+    archived_before: datetime.datetime # Orders last updated before this were eligible
+    orders_archived: int
+    order_items_archived: int
+    notifications_archived: int # Notifications of the archived orders, whatever their status
+    batches: int
+
+class NotificationArchiveResult(BaseModel):
+    archived_before: datetime.datetime # Read/archived notifications created before this were eligible
+    notifications_archived: int
+    batches: int
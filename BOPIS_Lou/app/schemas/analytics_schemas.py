@@ -0,0 +1,39 @@
+from pydantic import BaseModel
+from typing import List, Optional
+import datetime
+import decimal
+import enum
+
+from app.schemas.order_schemas import OrderTypeEnum, PaymentStatusEnum
+
+class SalesBucketGranularityEnum(str, enum.Enum):
+    HOUR = "HOUR"
+    DAY = "DAY"
+
+class SalesExportFormatEnum(str, enum.Enum):
+    CSV = "csv"
+    JSONL = "jsonl"
+
+class SalesBucket(BaseModel):
+    bucket_start: datetime.datetime # UTC
+    product_id: Optional[int] = None # None once the product is deleted
+    sku: str
+    product_name: str
+    order_type: OrderTypeEnum # Channel
+    payment_status: PaymentStatusEnum
+    order_count: int
+    quantity: int
+    revenue: decimal.Decimal
+
+class SalesReportResponse(BaseModel):
+    granularity: SalesBucketGranularityEnum
+    start_date: datetime.date
+    end_date: datetime.date
+    complete_until: Optional[datetime.datetime] = None # Orders completed after this are not included yet
+    buckets: List[SalesBucket]
+
+class SalesRollupRefreshResult(BaseModel):
+    tenant_id: int
+    orders_processed: int
+    buckets_updated: int
+    complete_until: datetime.datetime
@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+import enum
+
+class ListViewEnum(str, enum.Enum):
+    """Representation returned by list endpoints (`view` query parameter)."""
+    summary = "summary" # Flat, list-screen columns selected in SQL; no nested objects
+    full = "full" # Complete response models, as before
@@ -0,0 +1,72 @@
+from pydantic import BaseModel, Field, computed_field, model_validator
+from typing import List, Optional
+import enum
+import datetime
+
+class InventoryAdjustmentReasonEnum(str, enum.Enum): # Matches the manual InventoryMovementType values
+    RECEIPT = "RECEIPT"
+    STOCK_COUNT = "STOCK_COUNT"
+    DAMAGE = "DAMAGE"
+    CORRECTION = "CORRECTION"
+
+class StockAdjustment(BaseModel):
+    sku: str
+    delta: Optional[int] = None # Signed change, e.g. +24 for a received case
+    absolute: Optional[int] = Field(None, ge=0) # Counted quantity (cycle count)
+    reason: InventoryAdjustmentReasonEnum
+    note: Optional[str] = Field(None, max_length=255)
+
+    @model_validator(mode="after")
+    def check_delta_or_absolute(self):
+        if (self.delta is None) == (self.absolute is None):
+            raise ValueError("Exactly one of 'delta' or 'absolute' must be given.")
+        return self
+
+class StockAdjustmentRequest(BaseModel):
+    adjustments: List[StockAdjustment] = Field(..., min_length=1, max_length=5000) # Applied in list order
+
+class StockAdjustmentResult(BaseModel):
+    product_id: int
+    sku: str
+    previous_quantity: int
+    new_quantity: int
+    version: int
+
+class StockAdjustmentResponse(BaseModel):
+    products: List[StockAdjustmentResult] # One entry per adjusted SKU
+    movements_recorded: int # One ledger row per adjustment
+
+class InventoryReconciliationLine(BaseModel):
+    product_id: Optional[int] = None # None on the totals line
+    sku: Optional[str] = None
+    name: Optional[str] = None
+    received: int = 0
+    sold_bopis: int = 0 # EC (BOPIS) quantity sold at checkout
+    sold_pos: int = 0
+    cancelled: int = 0 # Returned to stock by cancelled orders
+    adjusted: int = 0 # Signed: cycle counts, damages, corrections
+    handed_over: int = 0 # BOPIS quantity handed to customers at the counter
+    net_change: int = 0 # received - sold_bopis - sold_pos + cancelled + adjusted
+
+    @computed_field
+    @property
+    def awaiting_handover(self) -> int: # BOPIS quantity sold in the period but not (yet) handed over or cancelled
+        return self.sold_bopis - self.cancelled - self.handed_over
+
+class InventoryReconciliationResponse(BaseModel):
+    start_date: datetime.date
+    end_date: datetime.date
+    lines: List[InventoryReconciliationLine] # One per product with activity, ordered by SKU
+    totals: InventoryReconciliationLine
+
+class StockAlertResponse(BaseModel):
+    product_id: int
+    sku: str
+    name: str
+    stock_quantity: int # Current stock
+    threshold: int
+    triggered_stock_quantity: int # Stock when the alert was raised
+    triggered_at: datetime.datetime
+
+class StockAlertSettings(BaseModel):
+    default_reorder_threshold: Optional[int] = Field(None, ge=0) # None disables alerts for products without their own threshold
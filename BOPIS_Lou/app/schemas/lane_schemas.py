@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ConfigDict
 from typing import Optional, List
 import datetime
 import enum # Required for LaneStatusEnum
@@ -22,8 +22,7 @@ class StaffAssignmentBasicInfo(BaseModel): # For brief info on LaneResponse (cur
     username: str
     assigned_role: UserRoleEnum
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class LaneResponse(LaneBase):
     id: int
@@ -34,8 +33,7 @@ class LaneResponse(LaneBase):
     created_at: datetime.datetime
     updated_at: datetime.datetime
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class LaneUpdate(BaseModel):
     name: Optional[str] = None
@@ -60,5 +58,4 @@ class StaffAssignmentResponse(BaseModel): # Full response for a staff assignment
     end_time: Optional[datetime.datetime] = None
     user: UserResponse # Include full user details
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional, List
 import datetime
 import enum # Required for Pydantic enum definition
@@ -24,8 +24,7 @@ class NotificationResponse(BaseModel):
     # related_order: Optional[OrderResponse] = None
     # user: Optional[UserResponse] = None
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class NotificationUpdate(BaseModel):
     status: NotificationStatusEnum # e.g., mark as READ or ARCHIVED
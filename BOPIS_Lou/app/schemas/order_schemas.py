@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ConfigDict
 from typing import List, Optional
 import datetime
 import decimal # For Numeric/Decimal type
@@ -50,8 +50,7 @@ class OrderItemResponse(OrderItemBase):
     price_at_purchase: decimal.Decimal
     product: Optional[ProductResponse] = None # Optionally populated
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Order Schemas
 class OrderBase(BaseModel):
@@ -83,8 +82,18 @@ class OrderResponse(OrderBase):
     pickup_slot: Optional[PickupTimeSlotResponse] = None
     assigned_lane: Optional[LaneResponse] = None
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+class OrderSummaryResponse(BaseModel): # `view=summary` list item; built from selected columns, not ORM objects
+    id: int
+    order_type: OrderTypeEnum
+    status: OrderStatusEnum
+    payment_status: PaymentStatusEnum
+    total_amount: decimal.Decimal
+    item_count: int # Sum of item quantities
+    pickup_slot_id: Optional[int] = None
+    assigned_lane_id: Optional[int] = None
+    created_at: datetime.datetime
 
 # Cart specific schemas (request bodies for API endpoints)
 class CartItemCreateRequest(BaseModel):
@@ -104,3 +113,7 @@ class CheckoutRequestSchema(BaseModel):
 
 class OrderPickupTokenVerificationRequest(BaseModel): # Added this schema
     pickup_token: str
+
+class OrderExportFormatEnum(str, enum.Enum):
+    CSV = "csv"
+    JSONL = "jsonl" # NDJSON
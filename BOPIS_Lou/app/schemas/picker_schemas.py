@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import List, Optional
 import datetime
 from app.schemas.order_schemas import OrderResponse, OrderItemResponse, OrderStatusEnum # For base and item details
@@ -13,8 +13,7 @@ class PickerOrderSummaryResponse(BaseModel):
     created_at: datetime.datetime # Order confirmation time
     updated_at: datetime.datetime # Last status update
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Detailed view for a specific order for picker
 class PickerOrderDetailsResponse(OrderResponse): # Inherit from full OrderResponse
@@ -1,6 +1,10 @@
 from pydantic import BaseModel, Field
 from typing import List, Optional
+import datetime
 import decimal
+import enum
+
+from app.schemas.order_schemas import OrderResponse
 
 class POSOrderItemSchema(BaseModel):
     product_id: int
@@ -13,3 +17,31 @@ class POSOrderCreateRequest(BaseModel):
     # tenant_id is derived from authenticated staff user
     # staff_id (user_id of staff processing sale) is also from authenticated user
     idempotency_key: Optional[str] = None # For client-side idempotency
+
+# Offline batch upload: sales captured by a terminal while disconnected, replayed after the outage
+class POSOfflineSaleSchema(BaseModel):
+    items: List[POSOrderItemSchema] = Field(..., min_length=1)
+    payment_method: str = "cash"
+    idempotency_key: str = Field(..., min_length=1) # Required: batches are retried as a whole after outages
+    client_created_at: datetime.datetime # When the sale happened on the terminal
+
+class POSOrderBatchRequest(BaseModel):
+    sales: List[POSOfflineSaleSchema] = Field(..., min_length=1, max_length=500)
+
+class POSBatchSaleStatusEnum(str, enum.Enum):
+    CREATED = "CREATED" # Sale recorded by this request
+    REPLAYED = "REPLAYED" # Sale was already recorded under the same idempotency key
+    FAILED = "FAILED" # Sale rejected (e.g. unknown product, insufficient stock); see `error`
+
+class POSBatchSaleResult(BaseModel):
+    index: int # Position of the sale in the request
+    idempotency_key: str
+    status: POSBatchSaleStatusEnum
+    order: Optional[OrderResponse] = None
+    error: Optional[str] = None
+
+class POSOrderBatchResponse(BaseModel):
+    created: int
+    replayed: int
+    failed: int
+    results: List[POSBatchSaleResult] # In request order
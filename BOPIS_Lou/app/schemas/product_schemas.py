@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, ConfigDict
 from typing import Optional, List
 import datetime
 import decimal # For Numeric/Decimal type from SQLAlchemy
@@ -10,6 +10,7 @@ class ProductBase(BaseModel):
     sku: str
     stock_quantity: int = 0
     image_url: Optional[str] = None
+    reorder_threshold: Optional[int] = Field(None, ge=0) # Low-stock alert at or below; None uses the tenant default
 
 class ProductCreate(ProductBase):
     pass # tenant_id will be derived from the authenticated user
@@ -21,6 +22,7 @@ class ProductUpdate(BaseModel):
     sku: Optional[str] = None # SKU might be updatable by admin, ensure uniqueness per tenant
     stock_quantity: Optional[int] = None
     image_url: Optional[str] = None
+    reorder_threshold: Optional[int] = Field(None, ge=0)
     version: Optional[int] = None # Required for optimistic lock check when updating critical fields
 
 class ProductResponse(ProductBase):
@@ -31,5 +33,30 @@ class ProductResponse(ProductBase):
     created_at: datetime.datetime
     updated_at: datetime.datetime
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+class ProductSummaryResponse(BaseModel): # `view=summary` list item; built from selected columns, not ORM objects
+    id: int
+    name: str
+    sku: str
+    price: decimal.Decimal
+    stock_quantity: int
+    image_url: Optional[str] = None
+    version: int
+
+class ProductSearchResponse(BaseModel):
+    items: List[ProductResponse] # Best matches first
+    next_cursor: Optional[str] = None # Pass as `cursor` to get the next page; None on the last page
+
+class ProductImportRowError(BaseModel):
+    row: int # Line number in the uploaded file (the CSV header is line 1)
+    sku: Optional[str] = None
+    error: str
+
+class ProductImportResponse(BaseModel):
+    inserted: int = 0
+    updated: int = 0 # Existing products with at least one changed column (version bumped)
+    unchanged: int = 0 # Existing products identical to the input (version kept)
+    failed: int = 0
+    errors: List[ProductImportRowError] = []
+    errors_truncated: bool = False # True if more errors occurred than are listed
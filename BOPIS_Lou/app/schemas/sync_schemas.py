@@ -0,0 +1,51 @@
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+import datetime
+import decimal
+import enum
+
+from app.schemas.order_schemas import OrderTypeEnum, OrderStatusEnum, PaymentStatusEnum
+
+class SyncEntityTypeEnum(str, enum.Enum): # Matches app.db.change_tracking.TRACKED_ENTITY_TYPES
+    product = "product"
+    order = "order"
+    timeslot = "timeslot"
+    lane = "lane"
+
+class SyncOperationEnum(str, enum.Enum):
+    upsert = "upsert" # Row was created or changed; `data` holds its current state
+    delete = "delete" # Row was deleted; `data` is null
+
+class SyncOrderItemData(BaseModel):
+    id: int
+    product_id: int
+    quantity: int
+    price_at_purchase: decimal.Decimal
+
+class SyncOrderData(BaseModel): # Compact order payload: columns and item lines, no nested customer, products, slot or lane
+    id: int
+    user_id: int
+    tenant_id: int
+    order_type: OrderTypeEnum
+    status: OrderStatusEnum
+    payment_status: PaymentStatusEnum
+    total_amount: decimal.Decimal
+    pickup_token: Optional[str] = None
+    pickup_slot_id: Optional[int] = None
+    assigned_lane_id: Optional[int] = None
+    created_at: datetime.datetime
+    updated_at: datetime.datetime
+    items: List[SyncOrderItemData] = []
+
+class SyncChange(BaseModel):
+    entity_type: SyncEntityTypeEnum
+    entity_id: int
+    op: SyncOperationEnum
+    change_seq: int
+    data: Optional[Dict[str, Any]] = None # The entity's columns; orders use SyncOrderData
+
+class SyncChangesResponse(BaseModel):
+    since: int # The `since` the client sent
+    next_since: int # Pass as `since` on the next call
+    has_more: bool # True if more changes are waiting; call again right away
+    changes: List[SyncChange] # Ordered by change_seq
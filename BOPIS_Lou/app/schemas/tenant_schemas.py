@@ -1,6 +1,10 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 import datetime
-from typing import List # For future use if embedding users/products
+from typing import Dict, List, Optional # For future use if embedding users/products
+from decimal import Decimal
+
+from app.schemas.order_schemas import OrderStatusEnum
+from app.schemas.lane_schemas import LaneStatusEnum
 
 class TenantBase(BaseModel):
     name: str
@@ -13,5 +17,37 @@ class TenantResponse(TenantBase):
     created_at: datetime.datetime
     # Add other fields if needed, e.g., lists of users, products (consider pagination)
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+class TenantDashboardSales(BaseModel):
+    paid_orders: int # Net of refunds
+    revenue: Decimal # Net of refunds
+
+class TenantDashboardSlot(BaseModel):
+    id: int
+    start_time: datetime.time
+    end_time: datetime.time
+    capacity: int
+    current_orders: int
+
+class TenantDashboardLane(BaseModel):
+    id: int
+    name: str
+    status: LaneStatusEnum
+    current_order_id: Optional[int] = None
+
+class TenantDashboardResponse(BaseModel):
+    tenant_id: int
+    day: datetime.date # UTC day of the sales and slot figures
+    orders_by_status: Dict[OrderStatusEnum, int] # Statuses without orders are omitted
+    sales: TenantDashboardSales
+    slot_capacity: int
+    slot_booked: int
+    slot_utilization: float # slot_booked / slot_capacity
+    slots: List[TenantDashboardSlot]
+    lanes: List[TenantDashboardLane]
+
+class TenantReconcileResponse(BaseModel):
+    tenant_id: int
+    status_counters_corrected: int
+    daily_sales_corrected: int
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional, List
 import datetime
 
@@ -19,8 +19,16 @@ class PickupTimeSlotResponse(PickupTimeSlotBase):
     created_at: datetime.datetime
     updated_at: datetime.datetime
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+class PickupTimeSlotSummaryResponse(BaseModel): # `view=summary` list item; built from selected columns, not ORM objects
+    id: int
+    date: datetime.date
+    start_time: datetime.time
+    end_time: datetime.time
+    capacity: int
+    current_orders: int
+    is_active: bool
 
 class PickupTimeSlotUpdate(BaseModel):
     date: Optional[datetime.date] = None
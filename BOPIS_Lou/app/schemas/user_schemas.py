@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, ConfigDict
 from typing import Optional
 import datetime
 import enum # Required for UserRoleEnum definition
@@ -33,8 +33,7 @@ class UserResponse(UserBase):
     created_at: datetime.datetime
     tenant_id: Optional[int] = None # Explicitly make it optional for super_admin, etc.
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 # New Schemas to add
 class UserUpdate(BaseModel):
@@ -0,0 +1,206 @@
+"""
+Service layer for archiving finished orders and old notifications.
+
+Hot queries (queues, carts, inboxes, delta sync) only need live rows, but `orders`,
+`order_items` and `notifications` grow forever. Rows past their retention are moved, with
+their IDs, to `orders_archive`, `order_items_archive` and `notifications_archive`:
+- Orders: COMPLETED or CANCELLED, not updated for ARCHIVE_ORDER_RETENTION_DAYS, not the current
+  order of a lane, and (COMPLETED) already aggregated into the sales rollups (at or before
+  the tenant's `SalesRollupWatermark`). Their items and notifications move with them, and a
+  `SyncTombstone` tells offline clients to drop them.
+- Notifications: READ or ARCHIVED, created more than ARCHIVE_NOTIFICATION_RETENTION_DAYS ago.
+
+Each batch of ARCHIVE_BATCH_SIZE rows is copied (INSERT ... SELECT) and deleted in its own
+transaction, so locks are short and an interrupted run loses nothing; the next run continues
+where it stopped. Run it periodically (see app/cli/archive_orders.py).
+
+Archived rows are only read when asked for: `get_archived_order_details`, order exports and
+notification listings with `include_archived`. The dashboard counters keep counting archived
+orders; `tenant_metrics_service.reconcile_tenant_metrics` reads both tables.
+"""
+from collections import defaultdict
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import delete, exists, insert, or_, select
+from typing import Dict, List, Optional, Tuple
+import datetime
+
+from app.core.config import settings
+from app.db.change_tracking import TRACKED_ENTITY_TYPES, allocate_change_seqs
+from app.models.sql_models import (
+    Order, OrderItem, Notification, Lane, SalesRollupWatermark, SyncTombstone,
+    ArchivedOrder, ArchivedOrderItem, ArchivedNotification,
+    OrderStatus as DBOrderStatusEnum,
+    NotificationStatus as DBNotificationStatusEnum,
+    UserRole as DBUserRoleEnum
+)
+from app.schemas.admin_schemas import OrderArchiveResult, NotificationArchiveResult
+from app.services import order_service
+
+ARCHIVABLE_ORDER_STATUSES = (DBOrderStatusEnum.COMPLETED, DBOrderStatusEnum.CANCELLED)
+ARCHIVABLE_NOTIFICATION_STATUSES = (DBNotificationStatusEnum.READ, DBNotificationStatusEnum.ARCHIVED)
+
+
+def _copy_rows(db: Session, source_model, archive_model, where) -> int:
+    """INSERT INTO archive SELECT ... FROM source WHERE `where`; returns the number of rows copied."""
+    columns = [column.name for column in archive_model.__table__.columns if column.name != "archived_at"]
+    source = source_model.__table__
+    return db.execute(
+        insert(archive_model.__table__).from_select(columns, select(*[source.c[name] for name in columns]).where(where))
+    ).rowcount
+
+
+def _order_candidates(db: Session, cutoff: datetime.datetime, batch_size: int, tenant_id: Optional[int]) -> List[Tuple[int, int]]:
+    on_lane = exists().where(Lane.current_order_id == Order.id)
+    rolled_up = exists().where(
+        SalesRollupWatermark.tenant_id == Order.tenant_id,
+        or_(Order.completed_at.is_(None), Order.completed_at <= SalesRollupWatermark.completed_until)
+    )
+    statement = select(Order.id, Order.tenant_id).where(
+        Order.status.in_(ARCHIVABLE_ORDER_STATUSES),
+        Order.updated_at < cutoff,
+        ~on_lane,
+        or_(Order.status == DBOrderStatusEnum.CANCELLED, rolled_up)
+    )
+    if tenant_id is not None:
+        statement = statement.where(Order.tenant_id == tenant_id)
+    # Locked until the batch commits; rows locked by a concurrent transition (e.g. a refund) are left for the next run
+    statement = statement.order_by(Order.id).limit(batch_size).with_for_update(of=Order, skip_locked=True)
+    return [(row.id, row.tenant_id) for row in db.execute(statement)]
+
+
+def _archive_order_batch(db: Session, candidates: List[Tuple[int, int]]) -> Tuple[int, int]:
+    """Moves one batch of orders with their items and notifications; returns (items, notifications) moved."""
+    order_ids = [order_id for order_id, _ in candidates]
+    _copy_rows(db, Order, ArchivedOrder, Order.id.in_(order_ids))
+    items = _copy_rows(db, OrderItem, ArchivedOrderItem, OrderItem.order_id.in_(order_ids))
+    notifications = _copy_rows(db, Notification, ArchivedNotification, Notification.related_order_id.in_(order_ids))
+
+    db.execute(delete(Notification.__table__).where(Notification.related_order_id.in_(order_ids)))
+    db.execute(delete(OrderItem.__table__).where(OrderItem.order_id.in_(order_ids)))
+    db.execute(delete(Order.__table__).where(Order.id.in_(order_ids)))
+
+    # Core deletes skip the change tracking hook; leave the tombstones delta sync expects
+    ids_by_tenant: Dict[int, List[int]] = defaultdict(list)
+    for order_id, tenant_id in candidates:
+        ids_by_tenant[tenant_id].append(order_id)
+    tombstones = []
+    for tenant_id, tenant_order_ids in ids_by_tenant.items():
+        seq = allocate_change_seqs(db.connection(), tenant_id=tenant_id, count=len(tenant_order_ids))
+        tombstones.extend(
+            {"tenant_id": tenant_id, "entity_type": TRACKED_ENTITY_TYPES[Order], "entity_id": order_id, "change_seq": seq + offset}
+            for offset, order_id in enumerate(tenant_order_ids)
+        )
+    db.execute(insert(SyncTombstone.__table__), tombstones)
+    return items, notifications
+
+
+def archive_orders(
+    db: Session,
+    retention_days: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    tenant_id: Optional[int] = None,
+    max_batches: Optional[int] = None,
+    now: Optional[datetime.datetime] = None
+) -> OrderArchiveResult:
+    """
+    Moves finished orders past their retention to the archive tables, committing after each batch.
+
+    Args:
+        db: SQLAlchemy database session.
+        retention_days: Days since the last update before an order is archived (default: ARCHIVE_ORDER_RETENTION_DAYS).
+        batch_size: Orders moved per transaction (default: ARCHIVE_BATCH_SIZE).
+        tenant_id: Archive one tenant only (default: all tenants).
+        max_batches: Stop after this many batches (default: until no order is eligible).
+        now: Reference time (UTC) for the retention window.
+
+    Returns:
+        OrderArchiveResult with the number of rows moved.
+    """
+    retention_days = settings.ARCHIVE_ORDER_RETENTION_DAYS if retention_days is None else retention_days
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    cutoff = (now or datetime.datetime.utcnow()) - datetime.timedelta(days=retention_days)
+
+    orders = items = notifications = batches = 0
+    while max_batches is None or batches < max_batches:
+        candidates = _order_candidates(db, cutoff, batch_size, tenant_id)
+        if not candidates:
+            db.commit() # Release the (empty) read transaction
+            break
+        batch_items, batch_notifications = _archive_order_batch(db, candidates)
+        db.commit()
+        orders += len(candidates)
+        items += batch_items
+        notifications += batch_notifications
+        batches += 1
+        if len(candidates) < batch_size:
+            break
+    return OrderArchiveResult(
+        archived_before=cutoff, orders_archived=orders, order_items_archived=items, notifications_archived=notifications, batches=batches
+    )
+
+
+def archive_notifications(
+    db: Session,
+    retention_days: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    max_batches: Optional[int] = None,
+    now: Optional[datetime.datetime] = None
+) -> NotificationArchiveResult:
+    """
+    Moves read and archived notifications past their retention to `notifications_archive`,
+    committing after each batch. Unread notifications stay in place, however old.
+
+    Args:
+        db: SQLAlchemy database session.
+        retention_days: Age in days before a notification is archived (default: ARCHIVE_NOTIFICATION_RETENTION_DAYS).
+        batch_size: Notifications moved per transaction (default: ARCHIVE_BATCH_SIZE).
+        max_batches: Stop after this many batches (default: until no notification is eligible).
+        now: Reference time (UTC) for the retention window.
+
+    Returns:
+        NotificationArchiveResult with the number of notifications moved.
+    """
+    retention_days = settings.ARCHIVE_NOTIFICATION_RETENTION_DAYS if retention_days is None else retention_days
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    cutoff = (now or datetime.datetime.utcnow()) - datetime.timedelta(days=retention_days)
+
+    moved = batches = 0
+    while max_batches is None or batches < max_batches:
+        notification_ids = list(db.execute(
+            select(Notification.id).where(
+                Notification.status.in_(ARCHIVABLE_NOTIFICATION_STATUSES), Notification.created_at < cutoff
+            ).order_by(Notification.id).limit(batch_size).with_for_update(skip_locked=True)
+        ).scalars())
+        if not notification_ids:
+            db.commit()
+            break
+        _copy_rows(db, Notification, ArchivedNotification, Notification.id.in_(notification_ids))
+        db.execute(delete(Notification.__table__).where(Notification.id.in_(notification_ids)))
+        db.commit()
+        moved += len(notification_ids)
+        batches += 1
+        if len(notification_ids) < batch_size:
+            break
+    return NotificationArchiveResult(archived_before=cutoff, notifications_archived=moved, batches=batches)
+
+
+def get_archived_order_details(
+    db: Session, order_id: int, user_id_for_auth: int, user_role_for_auth: DBUserRoleEnum, tenant_id_for_auth: Optional[int]
+) -> Optional[ArchivedOrder]:
+    """
+    Loads an archived order with its items and their products, with the access rules of
+    `order_service.get_order_details`.
+
+    Returns:
+        The ArchivedOrder, or None if the order is not archived.
+
+    Raises:
+        HTTPException (403): If the user may not see the order.
+    """
+    order = db.query(ArchivedOrder).options(
+        selectinload(ArchivedOrder.order_items).selectinload(ArchivedOrderItem.product)
+    ).filter(ArchivedOrder.id == order_id).first()
+    if order is None:
+        return None
+    order_service.check_order_access(order, user_id_for_auth, user_role_for_auth, tenant_id_for_auth)
+    return order
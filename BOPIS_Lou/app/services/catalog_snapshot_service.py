@@ -0,0 +1,181 @@
+"""
+Service layer for per-tenant catalog snapshots.
+
+A snapshot is a gzip-compressed JSON Lines file holding every product of a tenant, so a new
+device can bootstrap its catalog with one download instead of paging `GET /products/`.
+The first line is a header object (`{"meta": {...}}`) with the change sequence the snapshot
+covers; the client continues with `GET /sync/changes?since=<change_seq>` afterwards.
+
+Snapshots are rebuilt lazily when products have changed since the last build. The rebuild is
+incremental: the previous file is read back and only products (and product tombstones) with a
+newer change sequence are applied. Files are versioned by sequence and published by atomically
+replacing a small sidecar meta file, so downloads in progress are never cut short.
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from typing import Any, Dict, Optional
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+from app.core.config import settings
+from app.models.sql_models import Product, SyncTombstone
+from app.schemas.product_schemas import ProductResponse
+
+SNAPSHOT_FORMAT = "bopis-catalog-jsonl/1"
+
+_build_locks: Dict[int, threading.Lock] = {}
+_build_locks_guard = threading.Lock()
+
+
+def _tenant_lock(tenant_id: int) -> threading.Lock:
+    with _build_locks_guard:
+        return _build_locks.setdefault(tenant_id, threading.Lock())
+
+
+def _meta_path(tenant_id: int) -> str:
+    return os.path.join(settings.CATALOG_SNAPSHOT_DIR, f"catalog-{tenant_id}.meta.json")
+
+
+def get_snapshot_path(meta: Dict[str, Any]) -> str:
+    """Returns the path of the snapshot file described by `meta`."""
+    return os.path.join(settings.CATALOG_SNAPSHOT_DIR, meta["file"])
+
+
+def read_snapshot_meta(tenant_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Reads the meta data of the current snapshot of a tenant.
+
+    Returns:
+        Dict with `tenant_id`, `change_seq`, `product_count`, `etag`, `size` and `file`,
+        or None if no usable snapshot exists.
+    """
+    try:
+        with open(_meta_path(tenant_id), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("format") != SNAPSHOT_FORMAT or not os.path.exists(get_snapshot_path(meta)):
+        return None
+    return meta
+
+
+def get_catalog_change_seq(db: Session, tenant_id: int) -> int:
+    """
+    Returns the highest change sequence of any product change (including deletes) of a tenant.
+    Both lookups are MAX queries on the (tenant_id, change_seq) indexes.
+    """
+    product_seq = db.query(func.max(Product.change_seq)).filter(Product.tenant_id == tenant_id).scalar()
+    tombstone_seq = db.query(func.max(SyncTombstone.change_seq)).filter(
+        SyncTombstone.tenant_id == tenant_id,
+        SyncTombstone.entity_type == "product"
+    ).scalar()
+    return max(product_seq or 0, tombstone_seq or 0)
+
+
+def _serialize_product(product: Product) -> Dict[str, Any]:
+    return ProductResponse.model_validate(product, from_attributes=True).model_dump(mode="json")
+
+
+def _load_snapshot_rows(meta: Dict[str, Any]) -> Dict[int, Dict[str, Any]]:
+    rows: Dict[int, Dict[str, Any]] = {}
+    with gzip.open(get_snapshot_path(meta), "rt", encoding="utf-8") as f:
+        next(f) # Header line
+        for line in f:
+            row = json.loads(line)
+            rows[row["id"]] = row
+    return rows
+
+
+def _write_snapshot(tenant_id: int, change_seq: int, rows: Dict[int, Dict[str, Any]]) -> Dict[str, Any]:
+    os.makedirs(settings.CATALOG_SNAPSHOT_DIR, exist_ok=True)
+    file_name = f"catalog-{tenant_id}-{change_seq}.jsonl.gz"
+    header = {"meta": {"format": SNAPSHOT_FORMAT, "tenant_id": tenant_id, "change_seq": change_seq, "product_count": len(rows)}}
+
+    fd, tmp_path = tempfile.mkstemp(dir=settings.CATALOG_SNAPSHOT_DIR, prefix=f".catalog-{tenant_id}-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as raw, gzip.GzipFile(filename="", mode="wb", fileobj=raw, compresslevel=settings.CATALOG_SNAPSHOT_COMPRESSION_LEVEL, mtime=0) as gz:
+            gz.write((json.dumps(header, separators=(",", ":")) + "\n").encode("utf-8"))
+            for product_id in sorted(rows):
+                gz.write((json.dumps(rows[product_id], separators=(",", ":")) + "\n").encode("utf-8"))
+        digest = hashlib.sha256()
+        with open(tmp_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        os.replace(tmp_path, os.path.join(settings.CATALOG_SNAPSHOT_DIR, file_name))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    meta = {
+        "format": SNAPSHOT_FORMAT,
+        "tenant_id": tenant_id,
+        "change_seq": change_seq,
+        "product_count": len(rows),
+        "etag": f'"{digest.hexdigest()[:32]}"',
+        "size": os.path.getsize(os.path.join(settings.CATALOG_SNAPSHOT_DIR, file_name)),
+        "file": file_name,
+    }
+    fd, tmp_meta_path = tempfile.mkstemp(dir=settings.CATALOG_SNAPSHOT_DIR, prefix=f".catalog-{tenant_id}-", suffix=".meta.tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp_meta_path, _meta_path(tenant_id)) # Publish
+    return meta
+
+
+def _remove_old_snapshot_files(tenant_id: int, keep: set) -> None:
+    prefix = f"catalog-{tenant_id}-"
+    for name in os.listdir(settings.CATALOG_SNAPSHOT_DIR):
+        if name.startswith(prefix) and name.endswith(".jsonl.gz") and name not in keep:
+            try:
+                os.remove(os.path.join(settings.CATALOG_SNAPSHOT_DIR, name))
+            except OSError:
+                pass # Already removed by another worker
+
+
+def get_or_build_catalog_snapshot(db: Session, tenant_id: int) -> Dict[str, Any]:
+    """
+    Returns the meta data of an up-to-date catalog snapshot for a tenant, building it if needed.
+
+    Args:
+        db: SQLAlchemy database session.
+        tenant_id: ID of the tenant.
+
+    Returns:
+        Snapshot meta data (see `read_snapshot_meta`).
+    """
+    current_seq = get_catalog_change_seq(db, tenant_id)
+    meta = read_snapshot_meta(tenant_id)
+    if meta is not None and meta["change_seq"] >= current_seq:
+        return meta
+
+    with _tenant_lock(tenant_id):
+        meta = read_snapshot_meta(tenant_id) # Another request may have rebuilt it meanwhile
+        if meta is not None and meta["change_seq"] >= current_seq:
+            return meta
+
+        if meta is not None:
+            rows = _load_snapshot_rows(meta)
+            for product in db.query(Product).filter(Product.tenant_id == tenant_id, Product.change_seq > meta["change_seq"]).yield_per(1000):
+                rows[product.id] = _serialize_product(product) # type: ignore
+            for tombstone in db.query(SyncTombstone).filter(
+                SyncTombstone.tenant_id == tenant_id,
+                SyncTombstone.entity_type == "product",
+                SyncTombstone.change_seq > meta["change_seq"]
+            ).all():
+                rows.pop(tombstone.entity_id, None) # type: ignore
+        else:
+            rows = {
+                product.id: _serialize_product(product) # type: ignore
+                for product in db.query(Product).filter(Product.tenant_id == tenant_id).yield_per(1000)
+            }
+
+        previous_file = meta["file"] if meta is not None else None
+        new_meta = _write_snapshot(tenant_id, change_seq=current_seq, rows=rows)
+        # Keep the previous file so downloads that already started can finish.
+        _remove_old_snapshot_files(tenant_id, keep={new_meta["file"], previous_file})
+        return new_meta
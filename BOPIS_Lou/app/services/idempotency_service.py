@@ -0,0 +1,306 @@
+"""
+Service layer for idempotent write requests.
+
+Clients on unreliable networks (mobile checkout, POS terminals) may retry a request
+whose response they never received. When such a request carries an `Idempotency-Key`,
+the first attempt claims the key for its tenant and stores its serialized response;
+retries with the same key replay that response without touching stock or slots again.
+Concurrent duplicates wait for the first attempt to finish.
+
+The claim is committed on its own so that concurrent duplicates see it; the completed
+record and its response are committed in the operation's own transaction, so a crash
+can never leave the operation applied with the key still claimable.
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import inspect, or_, and_
+from typing import Any, Callable, Iterable, Optional, Tuple, TypeVar
+import datetime
+import hashlib
+import json
+import time
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.models.sql_models import IdempotencyRecord, IdempotencyStatus
+
+T = TypeVar("T")
+
+
+def _utcnow() -> datetime.datetime:
+    return datetime.datetime.utcnow()
+
+
+def _record_id(record: IdempotencyRecord) -> int:
+    """Primary key of a claimed record, without reloading it (it may have been discarded since the claim)."""
+    return inspect(record).identity[0]
+
+
+def compute_request_fingerprint(scope: str, payload: Any) -> str:
+    """
+    Computes a stable fingerprint for a request so that a reused key with a
+    different payload can be detected.
+
+    Args:
+        scope: Name of the operation (e.g. "orders.checkout"), so keys reused across endpoints never match.
+        payload: JSON-serializable request data (including the acting user and path parameters).
+
+    Returns:
+        Hex-encoded SHA-256 digest of the canonical JSON form of the request.
+    """
+    canonical = json.dumps({"scope": scope, "payload": payload}, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def get_idempotency_record(db: Session, tenant_id: int, idempotency_key: str) -> Optional[IdempotencyRecord]:
+    """
+    Retrieves the record for a key within a tenant, bypassing any stale identity-map state.
+
+    Args:
+        db: SQLAlchemy database session.
+        tenant_id: ID of the tenant the key is scoped to.
+        idempotency_key: Client-supplied key.
+
+    Returns:
+        The IdempotencyRecord if one exists (expired or not), else None.
+    """
+    return db.query(IdempotencyRecord).populate_existing().filter(
+        IdempotencyRecord.tenant_id == tenant_id,
+        IdempotencyRecord.key == idempotency_key
+    ).first()
+
+
+def _is_stale(now: datetime.datetime):
+    """SQL condition: the record has expired, or its in-progress claim was abandoned."""
+    return or_(
+        IdempotencyRecord.expires_at <= now,
+        and_(
+            IdempotencyRecord.status == IdempotencyStatus.IN_PROGRESS,
+            IdempotencyRecord.locked_until <= now
+        )
+    )
+
+
+def _discard_if_stale(db: Session, record: IdempotencyRecord) -> bool:
+    """
+    Deletes a record that has expired or whose in-progress claim was abandoned.
+    The staleness condition is re-checked in SQL so that a concurrent completion wins.
+
+    Returns:
+        True if the record was deleted.
+    """
+    deleted = db.query(IdempotencyRecord).filter(
+        IdempotencyRecord.id == _record_id(record),
+        _is_stale(_utcnow())
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted > 0
+
+
+def discard_stale_records(db: Session, tenant_id: int, keys: Iterable[str]) -> int:
+    """
+    Deletes the expired records and abandoned claims (IN_PROGRESS past IDEMPOTENCY_LOCK_TIMEOUT_SECONDS)
+    among the given keys of a tenant, with one statement, then commits. Live claims and
+    completed records are kept.
+
+    Args:
+        db: SQLAlchemy database session.
+        tenant_id: ID of the tenant the keys are scoped to.
+        keys: Client-supplied keys.
+
+    Returns:
+        The number of records deleted.
+    """
+    keys = list(keys)
+    if not keys:
+        return 0
+    deleted = db.query(IdempotencyRecord).filter(
+        IdempotencyRecord.tenant_id == tenant_id,
+        IdempotencyRecord.key.in_(keys),
+        _is_stale(_utcnow())
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+
+def claim_idempotency_key(db: Session, tenant_id: int, idempotency_key: str, request_fingerprint: str) -> Tuple[IdempotencyRecord, bool]:
+    """
+    Claims an idempotency key for the current request, or returns the completed record of a previous one.
+    The claim is committed immediately so that concurrent duplicates can see it.
+
+    Args:
+        db: SQLAlchemy database session.
+        tenant_id: ID of the tenant the key is scoped to.
+        idempotency_key: Client-supplied key.
+        request_fingerprint: Fingerprint of the current request (see `compute_request_fingerprint`).
+
+    Raises:
+        HTTPException (422): If the key was already used with a different request.
+        HTTPException (409): If a concurrent request with the same key did not finish in time.
+
+    Returns:
+        A tuple (record, claimed). If `claimed` is True the caller owns the key and must perform the
+        operation, calling `complete_idempotent_request` before its commit, or `release_idempotency_key`.
+        If False, `record` is COMPLETED and holds the response to replay.
+    """
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_TIMEOUT_SECONDS
+    while True:
+        now = _utcnow()
+        record = get_idempotency_record(db, tenant_id=tenant_id, idempotency_key=idempotency_key)
+
+        if record is None:
+            new_record = IdempotencyRecord(
+                tenant_id=tenant_id,
+                key=idempotency_key,
+                request_fingerprint=request_fingerprint,
+                status=IdempotencyStatus.IN_PROGRESS,
+                locked_until=now + datetime.timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT_SECONDS),
+                expires_at=now + datetime.timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+            )
+            try:
+                with db.begin_nested(): # Savepoint: a lost race only rolls back this insert
+                    db.add(new_record)
+            except IntegrityError:
+                continue # Another request claimed the key first; re-read it
+            db.commit()
+            return new_record, True
+
+        if _discard_if_stale(db, record):
+            continue
+        record = get_idempotency_record(db, tenant_id=tenant_id, idempotency_key=idempotency_key) # Current state after the commit
+        if record is None:
+            continue
+
+        if record.request_fingerprint != request_fingerprint:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Idempotency-Key has already been used with a different request.")
+
+        if record.status == IdempotencyStatus.COMPLETED:
+            return record, False
+
+        # Another request holds the key and is still running; wait for it to finish.
+        if time.monotonic() >= deadline:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A request with this Idempotency-Key is still being processed. Retry later.")
+        db.commit() # End the read transaction so the holder's commit becomes visible
+        time.sleep(settings.IDEMPOTENCY_POLL_INTERVAL_SECONDS)
+
+
+def complete_idempotent_request(db: Session, record: IdempotencyRecord, response_status_code: int, response_body: Any) -> None:
+    """
+    Stores the response of a claimed request and marks the key as completed.
+    Does NOT commit; call it in the transaction of the operation the response belongs to.
+
+    Args:
+        db: SQLAlchemy database session.
+        record: The record returned by `claim_idempotency_key`.
+        response_status_code: HTTP status code of the original response.
+        response_body: JSON-serializable response body.
+
+    Raises:
+        HTTPException (409): If the claim was discarded as stale meanwhile (another request may
+            hold the key now); the caller must roll the operation back.
+    """
+    completed = db.query(IdempotencyRecord).filter(
+        IdempotencyRecord.id == _record_id(record),
+        IdempotencyRecord.status == IdempotencyStatus.IN_PROGRESS
+    ).update({
+        IdempotencyRecord.status: IdempotencyStatus.COMPLETED,
+        IdempotencyRecord.response_status_code: response_status_code,
+        IdempotencyRecord.response_body: json.dumps(response_body, default=str),
+        IdempotencyRecord.locked_until: None
+    }, synchronize_session=False)
+    if not completed:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="The claim on this Idempotency-Key expired before the request finished. Retry later.")
+
+
+def release_idempotency_key(db: Session, record: IdempotencyRecord) -> None:
+    """
+    Releases a claimed key after the operation failed, so the client can retry with the same key.
+    Any uncommitted work of the failed operation is rolled back first.
+
+    Args:
+        db: SQLAlchemy database session.
+        record: The record returned by `claim_idempotency_key`.
+    """
+    db.rollback()
+    db.query(IdempotencyRecord).filter(
+        IdempotencyRecord.id == _record_id(record),
+        IdempotencyRecord.status == IdempotencyStatus.IN_PROGRESS
+    ).delete(synchronize_session=False)
+    db.commit()
+
+
+def get_stored_response(record: IdempotencyRecord) -> Any:
+    """Deserializes the response body stored on a completed record."""
+    return json.loads(record.response_body) if record.response_body is not None else None # type: ignore
+
+
+def execute_idempotent(
+    db: Session,
+    tenant_id: int,
+    idempotency_key: Optional[str],
+    request_fingerprint: str,
+    operation: Callable[[Optional[Callable[[T], None]]], T],
+    serializer: Callable[[T], Any],
+    response_status_code: int = status.HTTP_200_OK
+) -> Tuple[Any, bool]:
+    """
+    Runs `operation` at most once per (tenant, key) and returns its serialized result.
+    Without a key the operation simply runs and its result is returned unserialized.
+
+    Args:
+        db: SQLAlchemy database session.
+        tenant_id: ID of the tenant the key is scoped to.
+        idempotency_key: Client-supplied key, or None.
+        request_fingerprint: Fingerprint of the current request.
+        operation: Callable performing the write and committing it. It is passed a `before_commit`
+            hook (None without a key) that it must call with its result right before its commit,
+            so that the completed record is stored in the same transaction.
+        serializer: Converts the operation's result into a JSON-serializable response body.
+        response_status_code: Status code of a successful response, stored for replays.
+
+    Returns:
+        A tuple (response, replayed). `replayed` is True when the response comes from the store.
+    """
+    if not idempotency_key:
+        return operation(None), False
+
+    record, claimed = claim_idempotency_key(db, tenant_id=tenant_id, idempotency_key=idempotency_key, request_fingerprint=request_fingerprint)
+    if not claimed:
+        return get_stored_response(record), True
+
+    response_bodies = []
+
+    def store_response(result: T) -> None:
+        response_bodies.append(serializer(result))
+        complete_idempotent_request(db, record, response_status_code=response_status_code, response_body=response_bodies[-1])
+
+    try:
+        operation(store_response)
+        if not response_bodies:
+            raise RuntimeError("Idempotent operation committed without calling its before_commit hook.")
+    except Exception:
+        release_idempotency_key(db, record)
+        raise
+    return response_bodies[-1], False
+
+
+def purge_expired_idempotency_records(db: Session, batch_size: int = 1000) -> int:
+    """
+    Deletes expired idempotency records in bounded batches.
+
+    Args:
+        db: SQLAlchemy database session.
+        batch_size: Maximum number of rows deleted per transaction.
+
+    Returns:
+        The total number of deleted records.
+    """
+    total_deleted = 0
+    while True:
+        expired_ids = [row.id for row in db.query(IdempotencyRecord.id).filter(
+            IdempotencyRecord.expires_at <= _utcnow()
+        ).limit(batch_size).all()]
+        if not expired_ids:
+            return total_deleted
+        total_deleted += db.query(IdempotencyRecord).filter(IdempotencyRecord.id.in_(expired_ids)).delete(synchronize_session=False)
+        db.commit()
@@ -0,0 +1,258 @@
+"""
+Service layer for inventory adjustments, the stock ledger and reconciliation.
+
+Every stock change (checkout, POS sale, cancellation, adjustment, and stock set by product
+creation, edits and imports) writes an append-only `InventoryMovement` row with the SKU, the
+signed delta and the resulting quantity. Ledger rows outlive their product: deleting a product
+sets their `product_id` to NULL and keeps the SKU. In the same
+transaction the per-product, per-day `InventoryDailyRollup` row is incremented, so the
+reconciliation report reads a few rollup rows instead of scanning orders or the ledger.
+
+Bulk adjustments (receiving, cycle counts) are applied with set-based SQL: one SELECT for the
+affected products, then one UPDATE per chunk of products that sets the new quantities through
+CASE expressions.
+"""
+from collections import defaultdict
+from sqlalchemy.orm import Session
+from sqlalchemy import case, func, insert
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import datetime
+from fastapi import HTTPException, status
+
+from app.db import change_tracking
+from app.db.upsert import upsert_increment
+from app.models.sql_models import Product, InventoryMovement, InventoryMovementType, InventoryDailyRollup
+from app.schemas.inventory_schemas import (
+    StockAdjustment, StockAdjustmentResponse, StockAdjustmentResult,
+    InventoryReconciliationLine, InventoryReconciliationResponse
+)
+from app.services import stock_alert_service
+
+_CHUNK_SIZE = 500 # Products per IN list / CASE expression, well below bind parameter limits
+
+
+def _chunks(values: List[Any], size: int = _CHUNK_SIZE) -> Iterable[List[Any]]:
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+# Rollup column fed by each movement type, and the sign applied to the movement's delta.
+# Sales are stored as positive quantities; `adjusted` keeps the sign.
+_ROLLUP_COLUMN_BY_TYPE = {
+    InventoryMovementType.SALE: ("sold_bopis", -1),
+    InventoryMovementType.POS_SALE: ("sold_pos", -1),
+    InventoryMovementType.CANCELLATION: ("cancelled", 1),
+    InventoryMovementType.RECEIPT: ("received", 1),
+    InventoryMovementType.STOCK_COUNT: ("adjusted", 1),
+    InventoryMovementType.DAMAGE: ("adjusted", 1),
+    InventoryMovementType.CORRECTION: ("adjusted", 1),
+}
+ROLLUP_COLUMNS = ("received", "sold_bopis", "sold_pos", "cancelled", "adjusted", "handed_over", "net_change")
+
+RollupKey = Tuple[int, int, datetime.date] # (tenant_id, product_id, day)
+
+
+def _apply_rollup_increments(db: Session, increments: Dict[RollupKey, Dict[str, int]]) -> None:
+    """Adds counts to daily rollup rows, creating missing rows. Does NOT commit."""
+    rows = [
+        {"tenant_id": tenant_id, "product_id": product_id, "day": day, **{column: counts.get(column, 0) for column in ROLLUP_COLUMNS}}
+        for (tenant_id, product_id, day), counts in increments.items()
+    ]
+    upsert_increment(db, InventoryDailyRollup, key_columns=("tenant_id", "product_id", "day"), value_columns=ROLLUP_COLUMNS, rows=rows)
+
+
+def record_movements(db: Session, movements: List[Dict[str, Any]]) -> None:
+    """
+    Appends rows to the inventory ledger with one multi-row INSERT and updates the daily
+    rollups accordingly. Does NOT commit; call it in the transaction changing the stock.
+
+    Args:
+        db: SQLAlchemy database session.
+        movements: Column values of `InventoryMovement` rows (tenant_id, product_id, sku,
+            movement_type, quantity_delta, quantity_after, and optionally order_id, user_id,
+            note and created_at as naive UTC; created_at decides the rollup day).
+    """
+    if not movements:
+        return
+    now = datetime.datetime.utcnow()
+    rows = [{"order_id": None, "user_id": None, "note": None, **movement, "created_at": movement.get("created_at") or now} for movement in movements]
+    db.execute(insert(InventoryMovement), rows)
+
+    increments: Dict[RollupKey, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    stock_levels: Dict[int, Dict[int, int]] = defaultdict(dict) # tenant_id -> product_id -> latest quantity
+    for row in rows:
+        column, sign = _ROLLUP_COLUMN_BY_TYPE[row["movement_type"]]
+        counts = increments[(row["tenant_id"], row["product_id"], row["created_at"].date())]
+        counts[column] += sign * row["quantity_delta"]
+        counts["net_change"] += row["quantity_delta"]
+        stock_levels[row["tenant_id"]][row["product_id"]] = row["quantity_after"]
+    _apply_rollup_increments(db, increments)
+    for tenant_id, levels in stock_levels.items():
+        stock_alert_service.evaluate_stock_levels(db, tenant_id, levels)
+
+
+def record_handovers(db: Session, tenant_id: int, quantities: Dict[int, int], handed_over_at: Optional[datetime.datetime] = None) -> None:
+    """
+    Counts BOPIS quantities handed over to customers in the daily rollups.
+    Handover does not move stock (it left stock at checkout), so no ledger row is written.
+    Does NOT commit.
+
+    Args:
+        db: SQLAlchemy database session.
+        tenant_id: ID of the tenant.
+        quantities: Mapping of product ID to the quantity handed over.
+        handed_over_at: Time of the handover as naive UTC (defaults to now).
+    """
+    day = (handed_over_at or datetime.datetime.utcnow()).date()
+    _apply_rollup_increments(db, {(tenant_id, product_id, day): {"handed_over": quantity} for product_id, quantity in quantities.items() if quantity})
+
+
+def get_reconciliation_report(
+    db: Session,
+    tenant_id: int,
+    start_date: datetime.date,
+    end_date: datetime.date,
+    product_id: Optional[int] = None
+) -> InventoryReconciliationResponse:
+    """
+    Summarizes received, sold (EC and POS), cancelled, adjusted and handed-over quantities
+    per product over a date range, from the daily rollups only. Rollups of deleted products
+    are reported last, without SKU and name, so the totals still add up.
+    Meant to run on a read replica session (see `get_read_db`).
+
+    Args:
+        db: SQLAlchemy database session.
+        tenant_id: ID of the tenant.
+        start_date: First UTC day included.
+        end_date: Last UTC day included.
+        product_id: Optional product to restrict the report to.
+
+    Returns:
+        InventoryReconciliationResponse with one line per product that had activity, plus totals.
+    """
+    sums = [func.coalesce(func.sum(getattr(InventoryDailyRollup, column)), 0).label(column) for column in ROLLUP_COLUMNS]
+    query = db.query(InventoryDailyRollup.product_id, Product.sku, Product.name, *sums).outerjoin(
+        Product, Product.id == InventoryDailyRollup.product_id
+    ).filter(
+        InventoryDailyRollup.tenant_id == tenant_id,
+        InventoryDailyRollup.day >= start_date,
+        InventoryDailyRollup.day <= end_date
+    )
+    if product_id is not None:
+        query = query.filter(InventoryDailyRollup.product_id == product_id)
+    rows = query.group_by(InventoryDailyRollup.product_id, Product.sku, Product.name).order_by(
+        Product.id.is_(None), Product.sku
+    ).all()
+
+    lines = [
+        InventoryReconciliationLine(product_id=row.product_id, sku=row.sku, name=row.name, **{column: int(getattr(row, column)) for column in ROLLUP_COLUMNS})
+        for row in rows
+    ]
+    totals = InventoryReconciliationLine(**{column: sum(getattr(line, column) for line in lines) for column in ROLLUP_COLUMNS})
+    return InventoryReconciliationResponse(start_date=start_date, end_date=end_date, lines=lines, totals=totals)
+
+
+def apply_stock_adjustments(
+    db: Session,
+    tenant_id: int,
+    adjustments: List[StockAdjustment],
+    user_id: Optional[int] = None,
+    before_commit: Optional[Callable[[StockAdjustmentResponse], None]] = None
+) -> StockAdjustmentResponse:
+    """
+    Applies a list of stock adjustments in one transaction, all or nothing.
+    Adjustments are applied in list order, so several records for one SKU accumulate
+    (an `absolute` record resets the running quantity). Each product is updated once.
+
+    Args:
+        db: SQLAlchemy database session.
+        tenant_id: ID of the tenant the SKUs belong to.
+        adjustments: The adjustments to apply.
+        user_id: ID of the staff member recording them.
+        before_commit: Called with the response right before the commit
+            (see `idempotency_service.execute_idempotent`).
+
+    Raises:
+        HTTPException (422): If a SKU is unknown or an adjustment would make stock negative.
+        HTTPException (409): If a product was changed concurrently; nothing is applied.
+
+    Returns:
+        StockAdjustmentResponse with the new quantity of every adjusted product.
+    """
+    skus = list(dict.fromkeys(adjustment.sku for adjustment in adjustments))
+    current = {}
+    for sku_chunk in _chunks(skus):
+        rows = db.query(Product.id, Product.sku, Product.stock_quantity, Product.version).filter(
+            Product.tenant_id == tenant_id,
+            Product.sku.in_(sku_chunk)
+        ).with_for_update().all()
+        current.update({row.sku: row for row in rows})
+
+    unknown_skus = [sku for sku in skus if sku not in current]
+    if unknown_skus:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={"message": "Unknown SKUs; no adjustments were applied.", "unknown_skus": unknown_skus[:100]}
+        )
+
+    quantities = {sku: row.stock_quantity for sku, row in current.items()}
+    movements = []
+    errors = []
+    for index, adjustment in enumerate(adjustments):
+        before = quantities[adjustment.sku]
+        after = adjustment.absolute if adjustment.absolute is not None else before + adjustment.delta # type: ignore
+        if after < 0:
+            errors.append({"index": index, "sku": adjustment.sku, "error": f"Stock would become {after} (currently {before})."})
+            continue
+        quantities[adjustment.sku] = after
+        movements.append({
+            "tenant_id": tenant_id,
+            "product_id": current[adjustment.sku].id,
+            "sku": adjustment.sku,
+            "movement_type": InventoryMovementType(adjustment.reason.value),
+            "quantity_delta": after - before,
+            "quantity_after": after,
+            "user_id": user_id,
+            "note": adjustment.note,
+        })
+    if errors:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={"message": "Adjustments would make stock negative; no adjustments were applied.", "errors": errors[:100]}
+        )
+
+    changed = [current[sku] for sku in skus if quantities[sku] != current[sku].stock_quantity]
+    if changed:
+        for row_chunk in _chunks(changed):
+            ids = [row.id for row in row_chunk]
+            updated = change_tracking.stamped_update(db, db.query(Product).filter(
+                Product.tenant_id == tenant_id,
+                Product.id.in_(ids),
+                Product.version == case({row.id: row.version for row in row_chunk}, value=Product.id)
+            ), {
+                Product.stock_quantity: case({row.id: quantities[row.sku] for row in row_chunk}, value=Product.id),
+                Product.version: Product.version + 1
+            }, tenant_id=tenant_id, row_ids=ids)
+            if updated != len(ids):
+                db.rollback()
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Products were modified concurrently. No adjustments were applied; retry the request.")
+
+    record_movements(db, movements)
+    changed_ids = {row.id for row in changed}
+    response = StockAdjustmentResponse(
+        products=[
+            StockAdjustmentResult(
+                product_id=current[sku].id,
+                sku=sku,
+                previous_quantity=current[sku].stock_quantity,
+                new_quantity=quantities[sku],
+                version=current[sku].version + (1 if current[sku].id in changed_ids else 0)
+            )
+            for sku in skus
+        ],
+        movements_recorded=len(movements)
+    )
+    if before_commit is not None:
+        before_commit(response)
+    db.commit()
+    return response
@@ -6,6 +6,7 @@ deleting lanes, managing their status, and assigning/unassigning staff.
 """
 from sqlalchemy.orm import Session, selectinload # Added selectinload
 from typing import List, Optional
+from app.db import change_tracking
 from app.models.sql_models import Lane, StaffAssignment, User, Order
 from app.models.sql_models import UserRole as DBUserRole
 from app.models.sql_models import LaneStatus as DBLaneStatus
@@ -153,6 +154,8 @@ def delete_lane(db: Session, db_lane: Lane) -> Lane:
 def assign_order_to_lane(db: Session, lane: Lane, order: Order, counter_user: User) -> Lane:
     """
     Assigns an order to a lane, setting lane status to BUSY.
+    The lane and the order are claimed with conditional UPDATEs (lane still OPEN and free, order
+    still unassigned), so of several concurrent assignments to one lane only one succeeds.
 
     Args:
         db: SQLAlchemy database session.
@@ -162,6 +165,7 @@ def assign_order_to_lane(db: Session, lane: Lane, order: Order, counter_user: Us
 
     Raises:
         HTTPException: If lane/order not in user's tenant, lane not OPEN, or already busy/assigned.
+        HTTPException (409): If the lane or order was assigned concurrently; nothing is changed.
 
     Returns:
         The updated Lane object.
@@ -175,37 +179,45 @@ def assign_order_to_lane(db: Session, lane: Lane, order: Order, counter_user: Us
     if order.assigned_lane_id is not None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Order {order.id} is already assigned to lane {order.assigned_lane_id}.")
 
-    lane.current_order_id = order.id # type: ignore
-    lane.status = DBLaneStatus.BUSY # type: ignore
-    order.assigned_lane_id = lane.id # type: ignore
+    lane_id, order_id, tenant_id = lane.id, order.id, counter_user.tenant_id
+    lane_claimed = change_tracking.stamped_update(db, db.query(Lane).filter(
+        Lane.id == lane_id,
+        Lane.status == DBLaneStatus.OPEN,
+        Lane.current_order_id.is_(None)
+    ), {Lane.current_order_id: order_id, Lane.status: DBLaneStatus.BUSY}, tenant_id=tenant_id) # type: ignore
+    order_claimed = lane_claimed and change_tracking.stamped_update(db, db.query(Order).filter(
+        Order.id == order_id,
+        Order.assigned_lane_id.is_(None)
+    ), {Order.assigned_lane_id: lane_id}, tenant_id=tenant_id) # type: ignore
+    if not (lane_claimed and order_claimed):
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Lane or order was assigned concurrently. Reload and retry.")
 
-    db.add(lane)
-    db.add(order)
     db.commit()
     db.refresh(lane)
     return lane
 
-def clear_lane_and_set_open(db: Session, lane_id: int, tenant_id: int) -> Optional[Lane]:
+def release_lane_for_order(db: Session, lane_id: int, order_id: int, tenant_id: int) -> bool:
     """
-    Clears the current order from a lane and sets its status to OPEN.
+    Clears an order from a lane and sets the lane OPEN, with a conditional UPDATE that only
+    matches while the lane is still serving that order. A lane that was meanwhile reset or
+    assigned to another order is left alone.
+    This function does NOT commit; call it in the transaction that completes or cancels the order.
 
     Args:
         db: SQLAlchemy database session.
-        lane_id: ID of the lane to clear.
+        lane_id: ID of the lane to release.
+        order_id: ID of the order the lane must still be serving.
         tenant_id: ID of the tenant owning the lane.
 
     Returns:
-        The updated Lane object if found, else None.
+        True if the lane was released, False if it was not serving the order.
     """
-    lane = get_lane_by_id(db, lane_id=lane_id, tenant_id=tenant_id)
-    if lane:
-        lane.current_order_id = None # type: ignore
-        lane.status = DBLaneStatus.OPEN # type: ignore
-        db.add(lane)
-        db.commit()
-        db.refresh(lane)
-        return lane
-    return None
+    return change_tracking.stamped_update(db, db.query(Lane).filter(
+        Lane.id == lane_id,
+        Lane.tenant_id == tenant_id,
+        Lane.current_order_id == order_id
+    ), {Lane.current_order_id: None, Lane.status: DBLaneStatus.OPEN}, tenant_id=tenant_id) == 1
 
 def assign_staff_to_lane(db: Session, lane: Lane, user_id: int, tenant_id: int) -> StaffAssignment:
     """
@@ -2,13 +2,14 @@
 Service layer for managing user notifications.
 
 This module provides functions for retrieving and updating notifications
-for users. Notification creation is typically handled by other services
-based on business events.
+for users. Other services create notifications for business events through
+`create_notification`, as part of their own transaction.
 """
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, List, Optional, Union
 import datetime
-from app.models.sql_models import Notification
+from app.core import metrics
+from app.models.sql_models import Notification, ArchivedNotification
 from app.models.sql_models import NotificationStatus as DBNotificationStatusEnum
 from app.schemas.notification_schemas import NotificationUpdate, NotificationStatusEnum as PydanticNotificationStatusEnum
 # from fastapi import HTTPException, status # status not currently used
@@ -18,10 +19,13 @@ def get_notifications_for_user(
     user_id: int,
     skip: int = 0,
     limit: int = 100,
-    status_filter: Optional[PydanticNotificationStatusEnum] = None
-) -> List[Notification]:
+    status_filter: Optional[PydanticNotificationStatusEnum] = None,
+    include_archived: bool = False
+) -> List[Union[Notification, ArchivedNotification]]:
     """
     Retrieves a list of notifications for a specific user, with optional filtering by status.
+    With `include_archived`, notifications moved to `notifications_archive` are merged in
+    (newest first); each table is read up to `skip + limit` rows.
 
     Args:
         db: SQLAlchemy database session.
@@ -29,15 +33,26 @@ def get_notifications_for_user(
         skip: Number of records to skip (for pagination).
         limit: Maximum number of records to return (for pagination).
         status_filter: Pydantic enum to filter notifications by their status.
+        include_archived: Also return archived notifications (see archive_service).
 
     Returns:
-        A list of Notification objects.
+        A list of Notification (and ArchivedNotification) objects.
     """
-    query = db.query(Notification).filter(Notification.user_id == user_id)
-    if status_filter:
-        query = query.filter(Notification.status == DBNotificationStatusEnum[status_filter.value])
+    if not include_archived:
+        return _notifications_query(db, Notification, user_id, status_filter).offset(skip).limit(limit).all()
+
+    notifications: List[Union[Notification, ArchivedNotification]] = [
+        *_notifications_query(db, Notification, user_id, status_filter).limit(skip + limit).all(),
+        *_notifications_query(db, ArchivedNotification, user_id, status_filter).limit(skip + limit).all()
+    ]
+    notifications.sort(key=lambda notification: (notification.created_at, notification.id), reverse=True)
+    return notifications[skip:skip + limit]
 
-    return query.order_by(Notification.created_at.desc()).offset(skip).limit(limit).all()
+def _notifications_query(db: Session, model: Any, user_id: int, status_filter: Optional[PydanticNotificationStatusEnum]):
+    query = db.query(model).filter(model.user_id == user_id)
+    if status_filter:
+        query = query.filter(model.status == DBNotificationStatusEnum[status_filter.value])
+    return query.order_by(model.created_at.desc())
 
 def get_notification_by_id(db: Session, notification_id: int, user_id: int) -> Optional[Notification]:
     """
@@ -80,17 +95,27 @@ def update_notification_status(
     db.refresh(db_notification)
     return db_notification
 
-# TODO: Refactor notification creation logic from other services (like order_service)
-# into a centralized `create_notification` function here. Example:
-# def create_notification(db: Session, user_id: int, tenant_id: int, message: str, related_order_id: Optional[int] = None) -> Notification:
-#     db_notification = Notification(
-#         user_id=user_id,
-#         tenant_id=tenant_id,
-#         message=message,
-#         related_order_id=related_order_id
-#         # status defaults to UNREAD via model definition
-#     )
-#     db.add(db_notification)
-#     db.commit()
-#     db.refresh(db_notification)
-#     return db_notification
+def create_notification(db: Session, user_id: int, tenant_id: int, message: str, related_order_id: Optional[int] = None) -> Notification:
+    """
+    Adds a notification for a user (status UNREAD).
+    Does NOT commit; the notification is saved with the caller's transaction.
+
+    Args:
+        db: SQLAlchemy database session.
+        user_id: ID of the user to notify.
+        tenant_id: ID of the associated tenant.
+        message: Notification text.
+        related_order_id: Optional ID of the related order.
+
+    Returns:
+        The new (pending) Notification object.
+    """
+    db_notification = Notification(
+        user_id=user_id,
+        tenant_id=tenant_id,
+        message=message,
+        related_order_id=related_order_id
+    )
+    db.add(db_notification)
+    metrics.NOTIFICATIONS_CREATED.inc()
+    return db_notification
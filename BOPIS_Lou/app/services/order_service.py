@@ -6,32 +6,43 @@ This module handles the business logic for:
 - BOPIS order checkout process (stock validation, slot booking, payment (mocked)).
 - POS order creation and stock management.
 - Order viewing and status updates for different user roles (customer, picker, counter).
+- Order cancellation (stock and slot release).
 - Basic notification generation for order status changes.
+Every stock movement is recorded in the inventory ledger through `inventory_service`, and every
+status change and payment updates the dashboard counters through `tenant_metrics_service`.
 """
 from sqlalchemy.orm import Session, joinedload, selectinload
-from sqlalchemy import func as sql_func, or_
-from typing import List, Optional, Any
+from sqlalchemy import func as sql_func, or_, select
+from sqlalchemy.exc import IntegrityError
+from typing import Callable, Dict, List, Optional, Any
+import datetime
+import json
 import uuid
 import random
 import decimal
 from fastapi import HTTPException, status
 
 from app.models.sql_models import (
-    Order, OrderItem, Product, PickupTimeSlot, User, Notification, Lane, StaffAssignment,
+    Order, OrderItem, Product, PickupTimeSlot, User, Notification, Lane,
+    IdempotencyRecord, IdempotencyStatus, InventoryMovementType,
     OrderStatus as DBOrderStatusEnum,
     OrderType as DBOrderTypeEnum,
     PaymentStatus as DBPaymentStatusEnum,
     UserRole as DBUserRoleEnum
 )
 from app.schemas.order_schemas import (
-    OrderItemCreate, OrderItemUpdate, CheckoutRequestSchema, OrderCreate, OrderStatusEnum, OrderTypeEnum
+    OrderItemCreate, OrderItemUpdate, CheckoutRequestSchema, OrderCreate, OrderStatusEnum, OrderTypeEnum, OrderResponse
 )
 from app.schemas.picker_schemas import PickerReadyForPickupRequest
 from app.schemas.counter_schemas import OrderVerificationDataResponse, CounterOrderCompleteRequest
-from app.schemas.pos_schemas import POSOrderCreateRequest
+from app.schemas.pos_schemas import (
+    POSOrderCreateRequest, POSOrderBatchRequest, POSOrderBatchResponse, POSBatchSaleResult, POSBatchSaleStatusEnum
+)
+from app.core import metrics
+from app.core.config import settings
 
-from app.services import product_service, timeslot_service
-# from app.services import lane_service # Imported dynamically in counter_complete_order_pickup
+from app.db import change_tracking
+from app.services import product_service, timeslot_service, lane_service, idempotency_service, inventory_service, tenant_metrics_service
 
 def _recalculate_cart_total(db: Session, cart_order: Order) -> None:
     """
@@ -222,7 +233,9 @@ def remove_cart_item(db: Session, cart_order: Order, order_item_id: int) -> Orde
     refreshed_cart = db.query(Order).options(selectinload(Order.order_items).selectinload(OrderItem.product)).filter(Order.id == cart_order.id).first()
     return refreshed_cart # type: ignore
 
-def checkout_cart(db: Session, cart_order: Order, checkout_details: CheckoutRequestSchema) -> Order:
+def checkout_cart(
+    db: Session, cart_order: Order, checkout_details: CheckoutRequestSchema, before_commit: Optional[Callable[[Order], None]] = None
+) -> Order:
     """
     Processes the checkout for a given cart.
     This involves:
@@ -238,6 +251,8 @@ def checkout_cart(db: Session, cart_order: Order, checkout_details: CheckoutRequ
         db: SQLAlchemy database session.
         cart_order: The cart (Order object with status CART).
         checkout_details: Pydantic schema with checkout information (pickup_slot_id).
+        before_commit: Called with the loaded confirmed order right before the commit
+            (see `idempotency_service.execute_idempotent`).
 
     Raises:
         HTTPException: If cart is invalid, items out of stock, slot unavailable, or version conflicts.
@@ -252,8 +267,9 @@ def checkout_cart(db: Session, cart_order: Order, checkout_details: CheckoutRequ
 
     # Fetch products with their current versions and check initial stock
     products_to_update_details = []
+    products_by_id = product_service.get_products_by_ids(db, [item.product_id for item in cart_order.order_items], tenant_id=cart_order.tenant_id) # type: ignore
     for item in cart_order.order_items:
-        product = product_service.get_product_by_id(db, product_id=item.product_id, tenant_id=cart_order.tenant_id) # type: ignore
+        product = products_by_id.get(item.product_id) # type: ignore
         if not product or product.stock_quantity < item.quantity: # type: ignore
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Product '{product.name if product else item.product_id}' is out of stock or has insufficient quantity for checkout.") # type: ignore
         products_to_update_details.append({
@@ -268,9 +284,10 @@ def checkout_cart(db: Session, cart_order: Order, checkout_details: CheckoutRequ
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Selected pickup slot is not available or full.")
 
     # All pre-checks passed, attempt to decrement stock for all items
+    sale_movements = []
     for prod_detail in products_to_update_details:
         try:
-            product_service.decrement_stock(
+            updated_product = product_service.decrement_stock(
                 db,
                 product_id=prod_detail["product_id"],
                 quantity=prod_detail["quantity_ordered"],
@@ -280,6 +297,16 @@ def checkout_cart(db: Session, cart_order: Order, checkout_details: CheckoutRequ
         except HTTPException as e: # Catch issues from decrement_stock (e.g., 409 Conflict, 400 Insufficient)
             # Add more context to the error if needed
             raise HTTPException(status_code=e.status_code, detail=f"Checkout failed for product '{prod_detail['name']}': {e.detail}")
+        sale_movements.append({
+            "tenant_id": cart_order.tenant_id,
+            "product_id": prod_detail["product_id"],
+            "sku": updated_product.sku,
+            "movement_type": InventoryMovementType.SALE,
+            "quantity_delta": -prod_detail["quantity_ordered"],
+            "quantity_after": updated_product.stock_quantity,
+            "order_id": cart_order.id,
+            "user_id": cart_order.user_id
+        })
 
     # Update order status and details
     cart_order.status = DBOrderStatusEnum.ORDER_CONFIRMED # type: ignore
@@ -295,72 +322,106 @@ def checkout_cart(db: Session, cart_order: Order, checkout_details: CheckoutRequ
 
     _recalculate_cart_total(db, cart_order) # Final total calculation
     db.add(cart_order)
+    inventory_service.record_movements(db, sale_movements)
+    tenant_metrics_service.record_status_transition(db, cart_order, old_status=DBOrderStatusEnum.CART)
+    tenant_metrics_service.record_payment(db, cart_order)
 
+    order_id = cart_order.id
+    if before_commit is not None:
+        before_commit(get_order_with_details(db, order_id)) # type: ignore
     db.commit() # Single commit for the entire checkout operation
-    db.refresh(cart_order)
+    metrics.CHECKOUTS.inc()
+    metrics.SLOT_BOOKINGS.inc()
 
     # Eager load details for the response
-    refreshed_order = db.query(Order).options(
-        selectinload(Order.order_items).selectinload(OrderItem.product),
-        selectinload(Order.customer),
-        selectinload(Order.pickup_slot)
-    ).filter(Order.id == cart_order.id).first()
-    return refreshed_order # type: ignore
+    return get_order_with_details(db, order_id) # type: ignore
+
+def get_order_with_details(db: Session, order_id: int) -> Optional[Order]:
+    """
+    Loads an order with everything `OrderResponse` shows, without access checks, in two statements:
+    the order joined with its customer, pickup slot and lane, then its items joined with their products.
+    Also refreshes an order already in the session (e.g. after a commit expired it).
+    """
+    return db.query(Order).options(
+        selectinload(Order.order_items).joinedload(OrderItem.product),
+        joinedload(Order.customer),
+        joinedload(Order.pickup_slot),
+        joinedload(Order.assigned_lane)
+    ).filter(Order.id == order_id).populate_existing().first()
 
 def get_order_details(db: Session, order_id: int, user_id_for_auth: int, user_role_for_auth: DBUserRoleEnum, tenant_id_for_auth: Optional[int]) -> Optional[Order]:
     """
     Retrieves detailed information for a specific order, including related entities.
     Enforces access permissions based on the user's role and ownership.
     """
-    # Fetch minimal data for permission check first
-    order_owner_info = db.query(Order.user_id, Order.tenant_id, Order.status).filter(Order.id == order_id).first() # type: ignore
-    if not order_owner_info:
+    # Load once and check access on the loaded row; denied requests are rare enough not to warrant a separate probe.
+    order = get_order_with_details(db, order_id)
+    if not order:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found.")
+    check_order_access(order, user_id_for_auth, user_role_for_auth, tenant_id_for_auth)
+    return order
 
-    # Permission check logic
+def check_order_access(order: Any, user_id_for_auth: int, user_role_for_auth: DBUserRoleEnum, tenant_id_for_auth: Optional[int]) -> None:
+    """
+    Raises HTTPException (403) unless the user may see the order (an `Order` or `ArchivedOrder`):
+    super admins any order, staff the orders of their tenant, customers their own.
+    """
     if user_role_for_auth == DBUserRoleEnum.super_admin:
         pass # Super admin can access any order
     elif user_role_for_auth in [DBUserRoleEnum.tenant_admin, DBUserRoleEnum.picker, DBUserRoleEnum.counter]:
-        if tenant_id_for_auth is None or order_owner_info.tenant_id != tenant_id_for_auth:
+        if tenant_id_for_auth is None or order.tenant_id != tenant_id_for_auth:
              raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to access this order's tenant resources.")
     else: # Customer role
-        if order_owner_info.user_id != user_id_for_auth:
+        if order.user_id != user_id_for_auth:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to access this order.")
 
-    # If authorized, fetch the full order with eager loading
-    query = db.query(Order).options(
-        selectinload(Order.order_items).selectinload(OrderItem.product).joinedload(Product.tenant),
-        selectinload(Order.customer),
-        selectinload(Order.pickup_slot),
-        selectinload(Order.assigned_lane).selectinload(Lane.staff_assignments).selectinload(StaffAssignment.user)
-    ).filter(Order.id == order_id)
-    return query.first()
-
 
-def list_orders_for_user(db: Session, user: User, skip: int = 0, limit: int = 100) -> List[Order]:
+def order_visibility_filters(user: User, model: Any = Order) -> List[Any]:
     """
-    Lists orders with basic details, applying visibility rules based on user role.
+    Returns the filters limiting `Order` rows (or `ArchivedOrder` rows, via `model`) to those the user may see.
     - Customers see their own orders.
     - Staff (picker, counter, tenant_admin) see orders for their tenant.
     - Super_admin sees all orders.
+
+    Raises:
+        HTTPException (403): If a staff user has no tenant.
     """
-    query = db.query(Order).options(
-        selectinload(Order.order_items).selectinload(OrderItem.product), # Eager load for potential item counts or brief summaries
-        selectinload(Order.pickup_slot),
-        selectinload(Order.customer) # For identifying customer if admin/staff view
-    )
     if user.role == DBUserRoleEnum.super_admin:
         # No specific filter for super_admin, they see all. Consider pagination carefully.
-        pass
-    elif user.role in [DBUserRoleEnum.tenant_admin, DBUserRoleEnum.picker, DBUserRoleEnum.counter]:
+        return []
+    if user.role in [DBUserRoleEnum.tenant_admin, DBUserRoleEnum.picker, DBUserRoleEnum.counter]:
         if not user.tenant_id: # Should be caught by dependency or earlier checks
              raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Tenant context required for staff/admin.")
-        query = query.filter(Order.tenant_id == user.tenant_id)
-    else: # Customer
-        query = query.filter(Order.user_id == user.id)
+        return [model.tenant_id == user.tenant_id]
+    return [model.user_id == user.id] # Customer
+
+def list_orders_for_user(db: Session, user: User, skip: int = 0, limit: int = 100) -> List[Order]:
+    """
+    Lists orders with basic details, applying visibility rules based on user role
+    (see `order_visibility_filters`).
+    """
+    query = db.query(Order).options(
+        selectinload(Order.order_items).selectinload(OrderItem.product), # Eager load for potential item counts or brief summaries
+        selectinload(Order.pickup_slot),
+        selectinload(Order.customer) # For identifying customer if admin/staff view
+    ).filter(*order_visibility_filters(user))
 
     return query.order_by(Order.created_at.desc()).offset(skip).limit(limit).all() # type: ignore
 
+def list_order_summary_rows_for_user(db: Session, user: User, skip: int = 0, limit: int = 100) -> List[Any]:
+    """
+    Same listing as `list_orders_for_user`, but as one statement selecting only the
+    `OrderSummaryResponse` columns; the item count is a correlated subquery instead of loaded items.
+    Returns result rows labelled like the schema fields, for `serialization.rows_response`.
+    """
+    item_count = sql_func.coalesce(
+        select(sql_func.sum(OrderItem.quantity)).where(OrderItem.order_id == Order.id).correlate(Order).scalar_subquery(), 0
+    ).label("item_count")
+    return db.query(
+        Order.id, Order.order_type, Order.status, Order.payment_status, Order.total_amount, item_count,
+        Order.pickup_slot_id, Order.assigned_lane_id, Order.created_at
+    ).filter(*order_visibility_filters(user)).order_by(Order.created_at.desc()).offset(skip).limit(limit).all()
+
 # --- Picker Service Functions ---
 def list_orders_for_picker(db: Session, picker_user: User, skip: int = 0, limit: int = 100) -> List[Order]:
     """Lists orders relevant to a picker (ORDER_CONFIRMED or PROCESSING in their tenant)."""
@@ -384,9 +445,10 @@ def picker_start_order_processing(db: Session, order: Order, picker_user: User)
     order.status = DBOrderStatusEnum.PROCESSING # type: ignore
     # order.assigned_picker_id = picker_user.id # Optional: if tracking picker assignment
     db.add(order)
+    tenant_metrics_service.record_status_transition(db, order, old_status=DBOrderStatusEnum.ORDER_CONFIRMED)
+    order_id = order.id
     db.commit()
-    db.refresh(order)
-    return order
+    return get_order_with_details(db, order_id) # type: ignore # Items and products in two queries, not one per item
 
 def picker_mark_order_ready(db: Session, order: Order, picker_user: User, request_data: PickerReadyForPickupRequest) -> Order:
     """Marks an order as READY_FOR_PICKUP by a picker and creates notifications."""
@@ -398,6 +460,7 @@ def picker_mark_order_ready(db: Session, order: Order, picker_user: User, reques
     order.status = DBOrderStatusEnum.READY_FOR_PICKUP # type: ignore
     # if request_data.notes: order.picker_notes = request_data.notes # Add field if needed
     db.add(order)
+    tenant_metrics_service.record_status_transition(db, order, old_status=DBOrderStatusEnum.PROCESSING)
 
     # TODO: Refactor notification creation to a dedicated notification_service for more complex scenarios and targeting.
     users_to_notify = db.query(User).filter(
@@ -419,9 +482,10 @@ def picker_mark_order_ready(db: Session, order: Order, picker_user: User, reques
         )
         db.add(db_notification)
 
+    order_id = order.id
     db.commit()
-    db.refresh(order)
-    return order
+    metrics.NOTIFICATIONS_CREATED.inc(len(users_to_notify))
+    return get_order_with_details(db, order_id) # type: ignore
 
 # --- Counter Service Functions ---
 def get_order_by_pickup_token(db: Session, pickup_token: str, tenant_id: int) -> Optional[Order]:
@@ -430,8 +494,8 @@ def get_order_by_pickup_token(db: Session, pickup_token: str, tenant_id: int) ->
         Order.pickup_token == pickup_token,
         Order.tenant_id == tenant_id
     ).options(
-        selectinload(Order.order_items).selectinload(OrderItem.product),
-        selectinload(Order.customer)
+        selectinload(Order.order_items).joinedload(OrderItem.product),
+        joinedload(Order.customer)
     ).first()
 
 def list_orders_for_counter(db: Session, counter_user: User, skip: int = 0, limit: int = 100,
@@ -464,8 +528,12 @@ def prepare_order_verification_data(db: Session, order: Order) -> OrderVerificat
             verification_product_name = chosen_item.product.name # type: ignore
             verification_product_description = chosen_item.product.description # type: ignore
     elif order.identity_verification_product_id:
-        # If it was set, fetch that product's details
-        verification_product = db.query(Product).filter(Product.id == order.identity_verification_product_id).first()
+        # If it was set, use that product's details; it is one of the order's (already loaded) items
+        # unless it was removed, in which case the session's identity map or one query provides it.
+        verification_product = next(
+            (item.product for item in order.order_items if item.product_id == order.identity_verification_product_id and item.product),
+            None
+        ) or db.get(Product, order.identity_verification_product_id)
         if verification_product:
             verification_product_name = verification_product.name # type: ignore
             verification_product_description = verification_product.description # type: ignore
@@ -486,35 +554,156 @@ def prepare_order_verification_data(db: Session, order: Order) -> OrderVerificat
         other_item_hints=other_hints
     )
 
+def _claim_order_transition(db: Session, order: Order, values: Dict[Any, Any]) -> DBOrderStatusEnum:
+    """
+    Applies a status transition (`values`, keyed by Order columns) with a conditional UPDATE that
+    only matches while the order is still in the status it was read and checked in. Of concurrent
+    transitions of one order (e.g. a cancellation and a pickup) only the first one succeeds.
+    The order is reloaded afterwards. Does NOT commit.
+
+    Raises:
+        HTTPException (409): If the order changed status concurrently; the transaction is rolled back.
+
+    Returns:
+        The status the order was moved from.
+    """
+    previous_status = order.status
+    order_id, tenant_id = order.id, order.tenant_id
+    db.flush()
+    claimed = change_tracking.stamped_update(db, db.query(Order).filter(
+        Order.id == order_id,
+        Order.status == previous_status
+    ), values, tenant_id=tenant_id) # type: ignore
+    if not claimed:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Order status was changed concurrently. Reload and retry.")
+    db.refresh(order)
+    return previous_status # type: ignore
+
 def counter_complete_order_pickup(db: Session, order: Order, counter_user: User,
                                   request_data: CounterOrderCompleteRequest,
                                   lane_service_module: Any) -> Order:
-    """Completes an order pickup, updates status, and clears lane if assigned."""
+    """
+    Completes an order pickup, updates status, and clears lane if assigned.
+    The transition is claimed with a conditional UPDATE (see `_claim_order_transition`), so a
+    concurrent cancellation and pickup of one order cannot both succeed.
+
+    Raises:
+        HTTPException (400): If the order cannot be completed in its current status.
+        HTTPException (409): If the order changed status concurrently.
+    """
     if order.tenant_id != counter_user.tenant_id: # type: ignore
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized for this tenant's order.")
 
     if order.status not in [DBOrderStatusEnum.READY_FOR_PICKUP, DBOrderStatusEnum.PROCESSING]: # type: ignore
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Order cannot be completed from current status: {order.status.value}") # type: ignore
 
-    order.status = DBOrderStatusEnum.COMPLETED # type: ignore
+    assigned_lane_id = order.assigned_lane_id
+    previous_status = _claim_order_transition(db, order, {
+        Order.status: DBOrderStatusEnum.COMPLETED,
+        Order.completed_at: datetime.datetime.utcnow(),
+        Order.assigned_lane_id: None
+    })
+    tenant_metrics_service.record_status_transition(db, order, old_status=previous_status)
     # if request_data.notes: order.counter_notes = request_data.notes # Add field if needed
+    if order.order_type == DBOrderTypeEnum.BOPIS:
+        handed_over: Dict[int, int] = {}
+        for item in order.order_items:
+            handed_over[item.product_id] = handed_over.get(item.product_id, 0) + item.quantity # type: ignore
+        inventory_service.record_handovers(db, tenant_id=order.tenant_id, quantities=handed_over) # type: ignore
+
+    if assigned_lane_id and lane_service_module:
+        lane_service_module.release_lane_for_order(db, lane_id=assigned_lane_id, order_id=order.id, tenant_id=order.tenant_id) # type: ignore
+
+    order_id = order.id
+    db.commit()
+    return get_order_with_details(db, order_id) # type: ignore
+
+# Orders that hold stock and can still be cancelled, by who is cancelling.
+CUSTOMER_CANCELLABLE_STATUSES = [DBOrderStatusEnum.ORDER_CONFIRMED]
+STAFF_CANCELLABLE_STATUSES = [DBOrderStatusEnum.ORDER_CONFIRMED, DBOrderStatusEnum.PROCESSING, DBOrderStatusEnum.READY_FOR_PICKUP]
+
+def cancel_order(db: Session, order: Order, acting_user: User) -> Order:
+    """
+    Cancels a confirmed BOPIS order.
+    - Claims the transition first with a conditional UPDATE (see `_claim_order_transition`), so of
+      concurrent cancellations and pickups of one order only one succeeds and stock is returned once.
+    - Returns the ordered quantities to stock and records them in the inventory ledger.
+    - Releases the booked pickup slot and the assigned lane (if it is still serving the order).
+    - Marks a paid order as refunded (payment is mocked).
+    - Notifies the customer when staff cancel the order.
+    All operations are performed in a single transaction.
+
+    Args:
+        db: SQLAlchemy database session.
+        order: The order to cancel (access must already be checked, e.g. by `get_order_details`).
+        acting_user: The user cancelling the order.
+
+    Raises:
+        HTTPException (400): If the order cannot be cancelled in its current status.
+        HTTPException (409): If the order changed status concurrently; nothing is changed.
+
+    Returns:
+        The cancelled Order object.
+    """
+    is_customer = acting_user.role == DBUserRoleEnum.customer
+    allowed_statuses = CUSTOMER_CANCELLABLE_STATUSES if is_customer else STAFF_CANCELLABLE_STATUSES
+    if order.order_type != DBOrderTypeEnum.BOPIS or order.status not in allowed_statuses:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Order cannot be cancelled from current status: {order.status.value}") # type: ignore
 
     assigned_lane_id = order.assigned_lane_id
+    was_paid = order.payment_status == DBPaymentStatusEnum.PAID
+    cancelled_values: Dict[Any, Any] = {Order.status: DBOrderStatusEnum.CANCELLED, Order.assigned_lane_id: None}
+    if was_paid:
+        cancelled_values[Order.payment_status] = DBPaymentStatusEnum.REFUNDED
+    previous_status = _claim_order_transition(db, order, cancelled_values)
+    tenant_metrics_service.record_status_transition(db, order, old_status=previous_status)
+    if was_paid:
+        tenant_metrics_service.record_refund(db, order)
+
+    restock_movements = []
+    for item in order.order_items:
+        restocked_product = product_service.increment_stock(db, product_id=item.product_id, quantity=item.quantity, tenant_id=order.tenant_id) # type: ignore
+        if restocked_product is None: # Product deleted since the sale; nothing to return to
+            continue
+        restock_movements.append({
+            "tenant_id": order.tenant_id,
+            "product_id": item.product_id,
+            "sku": restocked_product.sku,
+            "movement_type": InventoryMovementType.CANCELLATION,
+            "quantity_delta": item.quantity,
+            "quantity_after": restocked_product.stock_quantity,
+            "order_id": order.id,
+            "user_id": acting_user.id
+        })
+    inventory_service.record_movements(db, restock_movements)
+
+    if order.pickup_slot_id:
+        timeslot_service.decrement_slot_order_count(db, timeslot_id=order.pickup_slot_id, tenant_id=order.tenant_id) # type: ignore
     if assigned_lane_id:
-        order.assigned_lane_id = None # type: ignore
-        if lane_service_module:
-            lane_service_module.clear_lane_and_set_open(db, lane_id=assigned_lane_id, tenant_id=order.tenant_id) # type: ignore
+        lane_service.release_lane_for_order(db, lane_id=assigned_lane_id, order_id=order.id, tenant_id=order.tenant_id) # type: ignore
 
-    db.add(order)
+    if not is_customer:
+        db.add(Notification(
+            user_id=order.user_id,
+            tenant_id=order.tenant_id,
+            message=f"Your order #{order.id} has been cancelled by the store.",
+            related_order_id=order.id
+        ))
+
+    order_id = order.id
     db.commit()
-    db.refresh(order)
-    return order
+    if not is_customer:
+        metrics.NOTIFICATIONS_CREATED.inc()
+    return get_order_with_details(db, order_id) # type: ignore
+
 
 # --- POS Service Function ---
 def create_pos_order(
     db: Session,
     pos_order_in: POSOrderCreateRequest,
-    staff_user: User
+    staff_user: User,
+    before_commit: Optional[Callable[[Order], None]] = None
 ) -> Order:
     """
     Creates a Point of Sale order.
@@ -522,22 +711,20 @@ def create_pos_order(
     - Decrements stock using product_service.decrement_stock for optimistic locking.
     - Sets order status to COMPLETED and payment to PAID immediately.
     - All operations are within a single database transaction.
+    Idempotency keys are enforced by the caller through `idempotency_service`, which passes
+    `before_commit` to store its response in this transaction.
     """
     if not staff_user.tenant_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Staff performing POS sale must belong to a tenant.")
 
-    if pos_order_in.idempotency_key:
-        # TODO: Implement robust server-side idempotency key check against a persistent store.
-        # e.g., check if key exists, if yes, return original response or error if payload differs.
-        pass
-
     order_items_to_create: List[OrderItem] = []
     current_total_amount = decimal.Decimal("0.00")
 
     # Pre-fetch product details including version
     product_details_for_pos = []
+    products_by_id = product_service.get_products_by_ids(db, [item_in.product_id for item_in in pos_order_in.items], tenant_id=staff_user.tenant_id) # type: ignore
     for item_in in pos_order_in.items:
-        product = product_service.get_product_by_id(db, product_id=item_in.product_id, tenant_id=staff_user.tenant_id)
+        product = products_by_id.get(item_in.product_id)
         if not product:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Product with ID {item_in.product_id} not found.")
         if product.stock_quantity < item_in.quantity: # type: ignore
@@ -557,11 +744,13 @@ def create_pos_order(
         status=DBOrderStatusEnum.COMPLETED,
         payment_status=DBPaymentStatusEnum.PAID,
         total_amount=current_total_amount,
+        completed_at=datetime.datetime.utcnow(),
         # payment_details field could store pos_order_in.payment_method
     )
     db.add(db_order)
     db.flush() # Get order_id for items
 
+    sale_movements = []
     for detail in product_details_for_pos:
         order_items_to_create.append(
             OrderItem(
@@ -571,20 +760,245 @@ def create_pos_order(
                 price_at_purchase=detail["price_at_purchase"]
             )
         )
-        product_service.decrement_stock(
+        updated_product = product_service.decrement_stock(
             db,
             product_id=detail["product_db"].id,
             quantity=detail["quantity_ordered"],
             tenant_id=staff_user.tenant_id, # type: ignore
             expected_version=detail["expected_version"]
         )
+        sale_movements.append({
+            "tenant_id": staff_user.tenant_id,
+            "product_id": detail["product_db"].id,
+            "sku": updated_product.sku,
+            "movement_type": InventoryMovementType.POS_SALE,
+            "quantity_delta": -detail["quantity_ordered"],
+            "quantity_after": updated_product.stock_quantity,
+            "order_id": db_order.id,
+            "user_id": staff_user.id
+        })
 
     db.add_all(order_items_to_create)
+    inventory_service.record_movements(db, sale_movements)
+    tenant_metrics_service.record_status_transition(db, db_order, old_status=None)
+    tenant_metrics_service.record_payment(db, db_order)
 
+    if before_commit is not None:
+        before_commit(get_order_with_details(db, db_order.id)) # type: ignore
     db.commit()
+    metrics.POS_SALES.inc(source="online")
     db.refresh(db_order)
 
     refreshed_order = db.query(Order).options(
         selectinload(Order.order_items).selectinload(OrderItem.product)
     ).filter(Order.id == db_order.id).first()
     return refreshed_order # type: ignore
+
+
+def _to_naive_utc(value: datetime.datetime) -> datetime.datetime:
+    """Normalizes a client timestamp to naive UTC, the form stored in the database."""
+    if value.tzinfo is not None:
+        return value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def create_pos_orders_batch(
+    db: Session,
+    batch_in: POSOrderBatchRequest,
+    staff_user: User
+) -> POSOrderBatchResponse:
+    """
+    Records a batch of POS sales captured offline by a terminal.
+    - Products for the whole batch are fetched with a single query.
+    - Sales are validated in client-timestamp order against the running stock, so earlier sales win.
+    - Stock is decremented with one conditional UPDATE per product for the whole batch.
+    - Each created sale stores a COMPLETED idempotency record in the same transaction, so
+      retrying the batch (or sending one of its sales to `POST /pos/orders`) replays instead of re-selling.
+    - A rejected sale does not fail the batch; the outcome of every sale is reported.
+
+    Args:
+        db: SQLAlchemy database session.
+        batch_in: The offline sales to record.
+        staff_user: The authenticated staff user uploading the batch.
+
+    Raises:
+        HTTPException (403): If the staff user does not belong to a tenant.
+        HTTPException (409): If stock or an idempotency key changed concurrently; the whole batch is rolled back.
+
+    Returns:
+        POSOrderBatchResponse with per-sale results in request order.
+    """
+    if not staff_user.tenant_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Staff performing POS sale must belong to a tenant.")
+    tenant_id: int = staff_user.tenant_id # type: ignore
+
+    now = datetime.datetime.utcnow()
+    results: Dict[int, POSBatchSaleResult] = {}
+
+    # Same fingerprint as `POST /pos/orders`, so a sale sent both ways is recognised as one.
+    fingerprints = [
+        idempotency_service.compute_request_fingerprint("pos.orders", {
+            "staff_user_id": staff_user.id,
+            "body": sale.model_dump(mode="json", include={"items", "payment_method"})
+        })
+        for sale in batch_in.sales
+    ]
+
+    # Expired records and abandoned claims free their key, as for `POST /pos/orders`; this commits,
+    # so it happens before the batch touches anything. Then a single lookup of keys that are still used.
+    keys = {sale.idempotency_key for sale in batch_in.sales}
+    idempotency_service.discard_stale_records(db, tenant_id=tenant_id, keys=keys)
+    existing_records = {
+        record.key: record for record in db.query(IdempotencyRecord).filter(
+            IdempotencyRecord.tenant_id == tenant_id,
+            IdempotencyRecord.key.in_(keys)
+        ).all()
+    }
+
+    # Single prefetch of every product referenced by the batch, locked for the stock check.
+    product_ids = {item.product_id for sale in batch_in.sales for item in sale.items}
+    products = {
+        p.id: p for p in db.query(Product).filter(
+            Product.tenant_id == tenant_id,
+            Product.id.in_(product_ids)
+        ).with_for_update().all()
+    }
+    available_stock = {pid: p.stock_quantity for pid, p in products.items()}
+
+    first_index_for_key: Dict[str, int] = {}
+    accepted: List[tuple] = [] # (index, Order)
+    quantities_to_decrement: Dict[int, int] = {}
+    sold_quantities: List[tuple] = [] # (Order, product_id, quantity, stock after the sale) for the ledger
+
+    processing_order = sorted(range(len(batch_in.sales)), key=lambda i: (_to_naive_utc(batch_in.sales[i].client_created_at), i))
+    for index in processing_order:
+        sale = batch_in.sales[index]
+        key = sale.idempotency_key
+
+        def _fail(error: str) -> None:
+            results[index] = POSBatchSaleResult(index=index, idempotency_key=key, status=POSBatchSaleStatusEnum.FAILED, error=error)
+
+        record = existing_records.get(key)
+        if record is not None:
+            if record.request_fingerprint != fingerprints[index]:
+                _fail("Idempotency-Key has already been used with a different request.")
+            elif record.status == IdempotencyStatus.COMPLETED:
+                results[index] = POSBatchSaleResult(
+                    index=index, idempotency_key=key, status=POSBatchSaleStatusEnum.REPLAYED,
+                    order=OrderResponse(**idempotency_service.get_stored_response(record))
+                )
+            else:
+                _fail("A request with this Idempotency-Key is still being processed. Retry later.")
+            continue
+
+        if key in first_index_for_key: # Same key twice in one batch; resolved once the first occurrence is final
+            continue
+        first_index_for_key[key] = index
+
+        requested: Dict[int, int] = {}
+        for item in sale.items:
+            requested[item.product_id] = requested.get(item.product_id, 0) + item.quantity
+        missing = [pid for pid in requested if pid not in products]
+        if missing:
+            _fail(f"Product with ID {missing[0]} not found.")
+            continue
+        short = [pid for pid, qty in requested.items() if available_stock[pid] < qty]
+        if short:
+            product = products[short[0]]
+            _fail(f"Insufficient stock for product {product.name} (ID: {product.id}). Available: {available_stock[product.id]}, Requested: {requested[product.id]}")
+            continue
+
+        client_created_at = _to_naive_utc(sale.client_created_at)
+        db_order = Order(
+            user_id=staff_user.id,
+            tenant_id=tenant_id,
+            order_type=DBOrderTypeEnum.POS_SALE,
+            status=DBOrderStatusEnum.COMPLETED,
+            payment_status=DBPaymentStatusEnum.PAID,
+            total_amount=sum((products[item.product_id].price * item.quantity for item in sale.items), decimal.Decimal("0.00")),
+            created_at=client_created_at, # Keep the time of sale, not the time of upload
+            paid_at=client_created_at,
+            completed_at=now, # Upload time, so late uploads are still picked up by the sales rollups
+            updated_at=now,
+            order_items=[
+                OrderItem(product_id=item.product_id, quantity=item.quantity, price_at_purchase=products[item.product_id].price)
+                for item in sale.items
+            ]
+        )
+        accepted.append((index, db_order))
+        for pid, qty in requested.items():
+            available_stock[pid] -= qty
+            quantities_to_decrement[pid] = quantities_to_decrement.get(pid, 0) + qty
+            sold_quantities.append((db_order, pid, qty, available_stock[pid]))
+
+    if accepted:
+        db.add_all([order for _, order in accepted])
+        db.flush()
+        product_service.decrement_stock_bulk(db, quantities=quantities_to_decrement, tenant_id=tenant_id)
+        inventory_service.record_movements(db, [
+            {
+                "tenant_id": tenant_id,
+                "product_id": pid,
+                "sku": products[pid].sku,
+                "movement_type": InventoryMovementType.POS_SALE,
+                "quantity_delta": -qty,
+                "quantity_after": stock_after, # Rows are locked above, so the running stock is exact
+                "order_id": db_order.id,
+                "user_id": staff_user.id,
+                "created_at": db_order.created_at # Roll up on the day of sale, not of upload
+            }
+            for db_order, pid, qty, stock_after in sold_quantities
+        ])
+        sales_by_day: Dict[datetime.date, tuple] = {}
+        for _, db_order in accepted:
+            paid_orders, revenue = sales_by_day.get(db_order.paid_at.date(), (0, decimal.Decimal("0.00"))) # type: ignore
+            sales_by_day[db_order.paid_at.date()] = (paid_orders + 1, revenue + db_order.total_amount) # type: ignore
+        slot = tenant_metrics_service.counter_slot(accepted[0][1].id) # type: ignore # One slot for the whole batch
+        tenant_metrics_service.record_status_changes(db, tenant_id, {DBOrderStatusEnum.COMPLETED: len(accepted)}, slot=slot)
+        tenant_metrics_service.record_sales(db, tenant_id, sales_by_day, slot=slot)
+
+        expires_at = now + datetime.timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+        new_records = []
+        for index, db_order in accepted:
+            order_response = OrderResponse.model_validate(db_order, from_attributes=True)
+            results[index] = POSBatchSaleResult(
+                index=index, idempotency_key=batch_in.sales[index].idempotency_key, status=POSBatchSaleStatusEnum.CREATED, order=order_response
+            )
+            new_records.append(IdempotencyRecord(
+                tenant_id=tenant_id,
+                key=batch_in.sales[index].idempotency_key,
+                request_fingerprint=fingerprints[index],
+                status=IdempotencyStatus.COMPLETED,
+                response_status_code=status.HTTP_201_CREATED,
+                response_body=json.dumps(order_response.model_dump(mode="json")),
+                expires_at=expires_at
+            ))
+        try:
+            with db.begin_nested():
+                db.add_all(new_records)
+        except IntegrityError:
+            db.rollback()
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Some sales of this batch are being recorded by another request. Retry the batch.")
+
+    db.commit()
+    if accepted:
+        metrics.POS_SALES.inc(len(accepted), source="offline")
+
+    # Later occurrences of a key inside the batch mirror the first one.
+    for index, sale in enumerate(batch_in.sales):
+        if index in results:
+            continue
+        first = results[first_index_for_key[sale.idempotency_key]]
+        if first.status == POSBatchSaleStatusEnum.FAILED or fingerprints[index] != fingerprints[first.index]:
+            error = first.error if fingerprints[index] == fingerprints[first.index] else "Idempotency-Key has already been used with a different request."
+            results[index] = POSBatchSaleResult(index=index, idempotency_key=sale.idempotency_key, status=POSBatchSaleStatusEnum.FAILED, error=error)
+        else:
+            results[index] = POSBatchSaleResult(index=index, idempotency_key=sale.idempotency_key, status=POSBatchSaleStatusEnum.REPLAYED, order=first.order)
+
+    ordered_results = [results[i] for i in range(len(batch_in.sales))]
+    return POSOrderBatchResponse(
+        created=sum(1 for r in ordered_results if r.status == POSBatchSaleStatusEnum.CREATED),
+        replayed=sum(1 for r in ordered_results if r.status == POSBatchSaleStatusEnum.REPLAYED),
+        failed=sum(1 for r in ordered_results if r.status == POSBatchSaleStatusEnum.FAILED),
+        results=ordered_results
+    )
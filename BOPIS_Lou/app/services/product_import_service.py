@@ -0,0 +1,209 @@
+"""
+Service layer for bulk product import (catalog loads and nightly refreshes).
+
+Input is streamed as CSV or JSON Lines and processed in chunks. For each chunk:
+- Rows are validated with `ProductCreate`; invalid rows are reported with their line number.
+- Duplicate SKUs within a chunk are collapsed (the later row wins).
+- Rows are upserted with one `INSERT ... ON CONFLICT (sku, tenant_id) DO UPDATE` statement,
+  relying on `_sku_tenant_uc`. The update only fires when a column actually differs, so
+  `version` and `change_seq` move only for real changes.
+- Stock set by the import is recorded in the inventory ledger: initial stock of new products as
+  RECEIPT, changed stock of existing ones as STOCK_COUNT (their rows are locked while the chunk
+  is written, so the recorded delta is exact).
+- The chunk is committed on its own, so a bad chunk does not undo earlier ones.
+
+Only columns present in the input are updated; e.g. a price-only file leaves stock untouched.
+"""
+from collections import defaultdict
+from sqlalchemy.orm import Session
+from sqlalchemy import func, or_
+from sqlalchemy.exc import SQLAlchemyError
+from pydantic import ValidationError
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, Optional, TextIO, Tuple, Union
+import csv
+import json
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.db import change_tracking
+from app.db.upsert import get_upsert_insert
+from app.models.sql_models import Product, InventoryMovementType
+from app.schemas.product_schemas import ProductCreate, ProductImportResponse, ProductImportRowError
+from app.services import inventory_service, stock_alert_service
+
+# Columns an import may change on an existing product (sku and tenant_id identify it).
+UPDATABLE_FIELDS = ("name", "description", "price", "stock_quantity", "image_url", "reorder_threshold")
+
+# A parsed input row: (line number, field values) or (line number, parse error message).
+ParsedRow = Tuple[int, Union[Dict[str, Any], str]]
+
+
+def parse_csv_rows(stream: TextIO) -> Iterator[ParsedRow]:
+    """
+    Parses CSV with a header row (name, sku, price, and optionally description,
+    stock_quantity, image_url, reorder_threshold). Empty cells are treated as missing values.
+    """
+    reader = csv.DictReader(stream)
+    for record in reader:
+        values = {key.strip(): value.strip() for key, value in record.items() if key is not None and value is not None and value.strip() != ""}
+        yield reader.line_num, values
+
+
+def parse_jsonl_rows(stream: TextIO) -> Iterator[ParsedRow]:
+    """Parses JSON Lines: one product object per line. Blank lines are ignored."""
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            values = json.loads(line)
+        except ValueError as e:
+            yield line_number, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(values, dict):
+            yield line_number, "Each line must be a JSON object."
+            continue
+        yield line_number, values
+
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" for e in error.errors())
+
+
+def _upsert_chunk(db: Session, tenant_id: int, rows: List[Tuple[int, ProductCreate, FrozenSet[str]]], user_id: Optional[int] = None) -> Tuple[int, int, int]:
+    """
+    Upserts one chunk of validated rows (unique SKUs) and commits.
+
+    Returns:
+        Tuple (inserted, updated, unchanged).
+    """
+    insert = get_upsert_insert(db)
+    if insert is None:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail="Bulk import requires PostgreSQL or SQLite.")
+    products = Product.__table__
+
+    skus = [row.sku for _, row, _ in rows]
+    previous_stock = {
+        row.sku: row.stock_quantity
+        for row in db.query(Product.sku, Product.stock_quantity).filter(Product.tenant_id == tenant_id, Product.sku.in_(skus)).with_for_update().all()
+    }
+    existing_skus = set(previous_stock)
+
+    # Core statements bypass the flush hook: reserve change sequences for the chunk up front.
+    # Rows left unchanged simply leave gaps in the sequence.
+    next_seq = change_tracking.allocate_change_seqs(db.connection(), tenant_id=tenant_id, count=len(rows))
+
+    # Rows providing the same columns share one multi-row statement.
+    groups: Dict[FrozenSet[str], List[Dict[str, Any]]] = defaultdict(list)
+    for offset, (_, row, provided_fields) in enumerate(rows):
+        groups[provided_fields].append({
+            "tenant_id": tenant_id,
+            "sku": row.sku,
+            "name": row.name,
+            "description": row.description,
+            "price": row.price,
+            "stock_quantity": row.stock_quantity,
+            "image_url": row.image_url,
+            "reorder_threshold": row.reorder_threshold,
+            "version": 1,
+            "change_seq": next_seq + offset,
+        })
+
+    written: Dict[str, Any] = {} # sku -> (id, sku, stock_quantity) after the upsert
+    for provided_fields, values in groups.items():
+        statement = insert(products).values(values)
+        update_fields = [field for field in UPDATABLE_FIELDS if field in provided_fields]
+        statement = statement.on_conflict_do_update(
+            index_elements=[products.c.sku, products.c.tenant_id],
+            set_={
+                **{field: statement.excluded[field] for field in update_fields},
+                "version": products.c.version + 1,
+                "change_seq": statement.excluded.change_seq,
+                "updated_at": func.now(),
+                "last_synced_at": func.now(),
+            },
+            where=or_(*[products.c[field].is_distinct_from(statement.excluded[field]) for field in update_fields])
+        ).returning(products.c.id, products.c.sku, products.c.stock_quantity)
+        written.update({row.sku: row for row in db.execute(statement)})
+
+    movements = [
+        {
+            "tenant_id": tenant_id,
+            "product_id": row.id,
+            "sku": row.sku,
+            "movement_type": InventoryMovementType.STOCK_COUNT if row.sku in previous_stock else InventoryMovementType.RECEIPT,
+            "quantity_delta": row.stock_quantity - previous_stock.get(row.sku, 0),
+            "quantity_after": row.stock_quantity,
+            "user_id": user_id,
+            "note": "Product import"
+        }
+        for row in written.values() if row.stock_quantity != previous_stock.get(row.sku, 0)
+    ]
+    inventory_service.record_movements(db, movements) # Also evaluates the stock alerts of these products
+    moved_ids = {movement["product_id"] for movement in movements}
+    stock_alert_service.evaluate_stock_levels(db, tenant_id, {row.id: row.stock_quantity for row in written.values() if row.id not in moved_ids})
+
+    db.commit()
+
+    inserted = len(written.keys() - existing_skus)
+    updated = len(written.keys() & existing_skus)
+    return inserted, updated, len(rows) - inserted - updated
+
+
+def import_products(
+    db: Session, tenant_id: int, parsed_rows: Iterable[ParsedRow], chunk_size: Optional[int] = None, user_id: Optional[int] = None
+) -> ProductImportResponse:
+    """
+    Validates and upserts products for a tenant in chunks.
+
+    Args:
+        db: SQLAlchemy database session.
+        tenant_id: ID of the tenant the products belong to.
+        parsed_rows: Rows from `parse_csv_rows` or `parse_jsonl_rows`.
+        chunk_size: Rows per statement/transaction (defaults to PRODUCT_IMPORT_CHUNK_SIZE).
+        user_id: ID of the user running the import (recorded in the inventory ledger).
+
+    Raises:
+        HTTPException (501): If the database does not support ON CONFLICT upserts.
+
+    Returns:
+        ProductImportResponse with counts and per-row errors (capped at PRODUCT_IMPORT_MAX_REPORTED_ERRORS).
+    """
+    chunk_size = chunk_size or settings.PRODUCT_IMPORT_CHUNK_SIZE
+    result = ProductImportResponse()
+
+    def record_error(line_number: int, sku: Optional[str], message: str) -> None:
+        result.failed += 1
+        if len(result.errors) < settings.PRODUCT_IMPORT_MAX_REPORTED_ERRORS:
+            result.errors.append(ProductImportRowError(row=line_number, sku=sku, error=message))
+        else:
+            result.errors_truncated = True
+
+    def flush_chunk(chunk: Dict[str, Tuple[int, ProductCreate, FrozenSet[str]]]) -> None:
+        try:
+            inserted, updated, unchanged = _upsert_chunk(db, tenant_id, list(chunk.values()), user_id=user_id)
+        except SQLAlchemyError as e:
+            db.rollback()
+            for line_number, row, _ in chunk.values():
+                record_error(line_number, row.sku, f"Database error: {e.__class__.__name__}")
+            return
+        result.inserted += inserted
+        result.updated += updated
+        result.unchanged += unchanged
+
+    chunk: Dict[str, Tuple[int, ProductCreate, FrozenSet[str]]] = {}
+    for line_number, values in parsed_rows:
+        if isinstance(values, str):
+            record_error(line_number, None, values)
+            continue
+        try:
+            row = ProductCreate(**values)
+        except ValidationError as e:
+            record_error(line_number, values.get("sku"), _format_validation_error(e))
+            continue
+        chunk[row.sku] = (line_number, row, frozenset(row.model_fields_set)) # Later duplicates win
+        if len(chunk) >= chunk_size:
+            flush_chunk(chunk)
+            chunk = {}
+    if chunk:
+        flush_chunk(chunk)
+    return result
@@ -0,0 +1,132 @@
+"""
+Service layer for tenant-scoped product search.
+
+Every word of the query is matched as a prefix against product names and SKUs, so the
+customer app and POS can autocomplete while typing. Results are ranked by relevance and
+paginated with a keyset cursor over (score, id), which stays cheap on deep pages.
+
+Backends:
+- PostgreSQL: GIN index on `product_search_document(name, sku)` queried with a prefix
+  `to_tsquery`, ranked by `ts_rank`. SKU prefix matches get a boost through the
+  `text_pattern_ops` index.
+- SQLite: the `products_fts` FTS5 table (see app/models/sql_models.py), ranked by `bm25`.
+- Other databases: case-insensitive substring match without ranking.
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import select, text, or_, and_, case, func, literal, literal_column, bindparam, Integer, Float
+from typing import List, Optional, Tuple
+import base64
+import json
+import re
+from fastapi import HTTPException, status
+
+from app.models.sql_models import Product, product_search_document
+
+MAX_QUERY_TERMS = 8
+
+
+def _tokenize(query: str) -> List[str]:
+    terms = re.findall(r"\w+", query.lower())[:MAX_QUERY_TERMS]
+    if not terms:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Search query must contain at least one letter or digit.")
+    return terms
+
+
+def encode_search_cursor(score: float, product_id: int) -> str:
+    """Encodes the position after a result as an opaque cursor."""
+    return base64.urlsafe_b64encode(json.dumps([score, product_id]).encode("utf-8")).decode("ascii")
+
+
+def decode_search_cursor(cursor: str) -> Tuple[float, int]:
+    """
+    Decodes a cursor returned by `search_products`.
+
+    Raises:
+        HTTPException (400): If the cursor is malformed.
+    """
+    try:
+        score, product_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return float(score), int(product_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid search cursor.")
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("!", "!!").replace("%", "!%").replace("_", "!_")
+
+
+def _ranked_postgresql(query: str, terms: List[str], tenant_id: int):
+    document = product_search_document(Product.name, Product.sku)
+    ts_query = func.to_tsquery(literal_column("'simple'"), bindparam("ts_query", " & ".join(f"{term}:*" for term in terms)))
+    sku_prefix = Product.sku.like(_escape_like(query.strip()) + "%", escape="!")
+    score = (func.ts_rank(document, ts_query) + case((sku_prefix, 1.0), else_=0.0)).label("score")
+    return select(Product.id.label("id"), score).where(
+        Product.tenant_id == tenant_id,
+        or_(document.op("@@")(ts_query), sku_prefix)
+    ).subquery("ranked")
+
+
+def _ranked_sqlite_fts(terms: List[str], tenant_id: int):
+    match = " ".join(f'"{term}"*' for term in terms)
+    return text(
+        "SELECT p.id AS id, -bm25(products_fts) AS score "
+        "FROM products_fts JOIN products p ON p.id = products_fts.rowid "
+        "WHERE products_fts MATCH :match AND p.tenant_id = :tenant_id"
+    ).bindparams(match=match, tenant_id=tenant_id).columns(id=Integer, score=Float).subquery("ranked")
+
+
+def _ranked_fallback(terms: List[str], tenant_id: int):
+    conditions = [
+        or_(Product.name.ilike(f"%{_escape_like(term)}%", escape="!"), Product.sku.ilike(f"%{_escape_like(term)}%", escape="!"))
+        for term in terms
+    ]
+    return select(Product.id.label("id"), literal(0.0, Float).label("score")).where(
+        Product.tenant_id == tenant_id, *conditions
+    ).subquery("ranked")
+
+
+def _has_sqlite_fts(db: Session) -> bool:
+    return db.execute(text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'")).first() is not None
+
+
+def search_products(db: Session, tenant_id: int, query: str, limit: int = 20, cursor: Optional[str] = None) -> Tuple[List[Product], Optional[str]]:
+    """
+    Searches the products of a tenant by name and SKU prefixes, best matches first.
+
+    Args:
+        db: SQLAlchemy database session.
+        tenant_id: ID of the tenant.
+        query: User input; every word must match the start of a word in the name or SKU.
+        limit: Maximum number of products to return.
+        cursor: Cursor returned with the previous page, if any.
+
+    Raises:
+        HTTPException (400): If the query has no searchable words or the cursor is invalid.
+
+    Returns:
+        A tuple (products, next_cursor). `next_cursor` is None on the last page.
+    """
+    terms = _tokenize(query)
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        ranked = _ranked_postgresql(query, terms, tenant_id)
+    elif dialect == "sqlite" and _has_sqlite_fts(db):
+        ranked = _ranked_sqlite_fts(terms, tenant_id)
+    else:
+        ranked = _ranked_fallback(terms, tenant_id)
+
+    statement = select(ranked.c.id, ranked.c.score)
+    if cursor:
+        after_score, after_id = decode_search_cursor(cursor)
+        statement = statement.where(or_(
+            ranked.c.score < after_score,
+            and_(ranked.c.score == after_score, ranked.c.id > after_id)
+        ))
+    rows = db.execute(statement.order_by(ranked.c.score.desc(), ranked.c.id.asc()).limit(limit + 1)).all()
+
+    page = rows[:limit]
+    next_cursor = encode_search_cursor(page[-1].score, page[-1].id) if len(rows) > limit else None
+    if not page:
+        return [], None
+    products_by_id = {p.id: p for p in db.query(Product).filter(Product.id.in_([row.id for row in page])).all()}
+    return [products_by_id[row.id] for row in page if row.id in products_by_id], next_cursor
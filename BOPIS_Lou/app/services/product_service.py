@@ -7,9 +7,12 @@ optimistic locking.
 """
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from typing import List, Optional
-from app.models.sql_models import Product
-from app.schemas.product_schemas import ProductCreate, ProductUpdate
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from app.models.sql_models import Product, InventoryMovementType
+from app.core import metrics
+from app.db import change_tracking
+from app.services import inventory_service, stock_alert_service
+from app.schemas.product_schemas import ProductCreate, ProductUpdate, ProductSummaryResponse
 from fastapi import HTTPException, status
 import datetime # Keep for updated_since type hint
 
@@ -27,6 +30,23 @@ def get_product_by_id(db: Session, product_id: int, tenant_id: int) -> Optional[
     """
     return db.query(Product).filter(Product.id == product_id, Product.tenant_id == tenant_id).first()
 
+def get_products_by_ids(db: Session, product_ids: Iterable[int], tenant_id: int) -> Dict[int, Product]:
+    """
+    Retrieves several products of a tenant in one query (e.g. the lines of a checkout).
+
+    Args:
+        db: SQLAlchemy database session.
+        product_ids: IDs of the products.
+        tenant_id: ID of the tenant to which the products must belong.
+
+    Returns:
+        Mapping of product ID to Product. Products not found are absent.
+    """
+    ids = set(product_ids)
+    if not ids:
+        return {}
+    return {product.id: product for product in db.query(Product).filter(Product.tenant_id == tenant_id, Product.id.in_(ids)).all()} # type: ignore
+
 def get_product_by_sku_and_tenant(db: Session, sku: str, tenant_id: int) -> Optional[Product]:
     """
     Retrieves a product by its SKU and tenant ID.
@@ -41,6 +61,21 @@ def get_product_by_sku_and_tenant(db: Session, sku: str, tenant_id: int) -> Opti
     """
     return db.query(Product).filter(Product.sku == sku, Product.tenant_id == tenant_id).first()
 
+def get_product_version(db: Session, product_id: int, tenant_id: int) -> Optional[Tuple[int, Optional[int]]]:
+    """
+    Retrieves only the version columns of a product, for cheap cache validation.
+
+    Args:
+        db: SQLAlchemy database session.
+        product_id: ID of the product.
+        tenant_id: ID of the tenant to which the product must belong.
+
+    Returns:
+        Tuple (version, change_seq), or None if the product is not found.
+    """
+    row = db.query(Product.version, Product.change_seq).filter(Product.id == product_id, Product.tenant_id == tenant_id).first()
+    return (row.version, row.change_seq) if row else None
+
 def get_products_by_tenant(
     db: Session,
     tenant_id: int,
@@ -61,19 +96,38 @@ def get_products_by_tenant(
     Returns:
         A list of Product objects.
     """
-    query = db.query(Product).filter(Product.tenant_id == tenant_id)
+    return _tenant_products_query(db.query(Product), tenant_id, updated_since).offset(skip).limit(limit).all()
+
+def get_product_summary_rows_by_tenant(
+    db: Session,
+    tenant_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    updated_since: Optional[datetime.datetime] = None
+) -> List[Any]:
+    """
+    Same listing as `get_products_by_tenant`, but selects only the `ProductSummaryResponse`
+    columns in SQL and builds no ORM objects (list screens). Returns result rows,
+    for `serialization.rows_response`.
+    """
+    columns = [getattr(Product, field) for field in ProductSummaryResponse.model_fields]
+    return _tenant_products_query(db.query(*columns), tenant_id, updated_since).offset(skip).limit(limit).all()
+
+def _tenant_products_query(query, tenant_id: int, updated_since: Optional[datetime.datetime]):
+    query = query.filter(Product.tenant_id == tenant_id)
     if updated_since:
         query = query.filter(Product.updated_at >= updated_since)
-    return query.order_by(Product.id).offset(skip).limit(limit).all() # Added order_by for consistent pagination
+    return query.order_by(Product.id) # Added order_by for consistent pagination
 
-def create_product(db: Session, product_create_data: ProductCreate, tenant_id: int) -> Product:
+def create_product(db: Session, product_create_data: ProductCreate, tenant_id: int, user_id: Optional[int] = None) -> Product:
     """
-    Creates a new product for a tenant.
+    Creates a new product for a tenant. Initial stock is recorded as a RECEIPT in the inventory ledger.
 
     Args:
         db: SQLAlchemy database session.
         product_create_data: Pydantic schema with product creation data.
         tenant_id: ID of the tenant to associate the product with.
+        user_id: ID of the user creating the product (recorded in the ledger).
 
     Raises:
         HTTPException (400): If a product with the same SKU already exists for the tenant.
@@ -91,20 +145,37 @@ def create_product(db: Session, product_create_data: ProductCreate, tenant_id: i
         version=1, # Initial version
     )
     db.add(db_product)
+    db.flush()
+    if db_product.stock_quantity:
+        inventory_service.record_movements(db, [{ # Also evaluates the stock alert
+            "tenant_id": tenant_id,
+            "product_id": db_product.id,
+            "sku": db_product.sku,
+            "movement_type": InventoryMovementType.RECEIPT,
+            "quantity_delta": db_product.stock_quantity,
+            "quantity_after": db_product.stock_quantity,
+            "user_id": user_id,
+            "note": "Initial stock"
+        }])
+    else:
+        stock_alert_service.evaluate_stock_levels(db, tenant_id, {db_product.id: db_product.stock_quantity}) # type: ignore
     db.commit()
     db.refresh(db_product)
     return db_product
 
-def update_product(db: Session, db_product: Product, product_update_data: ProductUpdate) -> Product:
+def update_product(db: Session, db_product: Product, product_update_data: ProductUpdate, user_id: Optional[int] = None) -> Product:
     """
     Updates an existing product. Handles optimistic locking via 'version' field.
     Note: Direct stock updates via this general function are possible but less controlled
-    than using dedicated stock adjustment functions like `decrement_stock`.
+    than using dedicated stock adjustment functions like `decrement_stock`. A changed
+    `stock_quantity` is recorded as a CORRECTION in the inventory ledger; the product row
+    is locked first, so the recorded delta is against the current stock.
 
     Args:
         db: SQLAlchemy database session.
         db_product: The existing Product ORM instance to update.
         product_update_data: Pydantic schema with product update data.
+        user_id: ID of the user updating the product (recorded in the ledger).
 
     Raises:
         HTTPException (409): If optimistic lock version mismatch.
@@ -114,6 +185,9 @@ def update_product(db: Session, db_product: Product, product_update_data: Produc
         The updated Product object.
     """
     update_data = product_update_data.model_dump(exclude_unset=True) # Changed to model_dump()
+    if 'stock_quantity' in update_data:
+        db.refresh(db_product, with_for_update=True) # Concurrent sales wait until this commits
+    previous_stock = db_product.stock_quantity
 
     if product_update_data.version is not None:
         if db_product.version != product_update_data.version:
@@ -137,6 +211,21 @@ def update_product(db: Session, db_product: Product, product_update_data: Produc
              raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Product with SKU '{update_data['sku']}' already exists for this tenant.")
 
     db.add(db_product)
+    if db_product.stock_quantity != previous_stock:
+        db.flush()
+        inventory_service.record_movements(db, [{ # Also evaluates the stock alert
+            "tenant_id": db_product.tenant_id,
+            "product_id": db_product.id,
+            "sku": db_product.sku,
+            "movement_type": InventoryMovementType.CORRECTION,
+            "quantity_delta": db_product.stock_quantity - previous_stock, # type: ignore
+            "quantity_after": db_product.stock_quantity,
+            "user_id": user_id,
+            "note": "Product update"
+        }])
+    elif 'reorder_threshold' in update_data:
+        db.flush()
+        stock_alert_service.evaluate_stock_levels(db, db_product.tenant_id, {db_product.id: db_product.stock_quantity}) # type: ignore
     db.commit()
     db.refresh(db_product)
     return db_product
@@ -160,9 +249,10 @@ def delete_product(db: Session, db_product: Product) -> Product:
 def decrement_stock(db: Session, product_id: int, quantity: int, tenant_id: int, expected_version: Optional[int] = None) -> Product:
     """
     Decrements the stock of a product, with optional optimistic locking.
-    This function flushes the session to update the product state within the
-    current transaction but does NOT commit. The commit should be handled
-    by the calling service to ensure atomicity of the overall operation.
+    The stock (and version) check is part of a single conditional UPDATE, so concurrent
+    writers can neither oversell nor overwrite each other's decrement.
+    This function does NOT commit. The commit should be handled by the calling
+    service to ensure atomicity of the overall operation.
 
     Args:
         db: SQLAlchemy database session.
@@ -177,28 +267,95 @@ def decrement_stock(db: Session, product_id: int, quantity: int, tenant_id: int,
         HTTPException (400): If insufficient stock.
 
     Returns:
-        The updated Product object (after flush and refresh).
+        The updated Product object (reloaded after the UPDATE).
     """
-    db_product = db.query(Product).filter(Product.id == product_id, Product.tenant_id == tenant_id).first()
-    if not db_product:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Product {product_id} not found in tenant {tenant_id} for stock decrement.")
-
-    if expected_version is not None and db_product.version != expected_version:
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail=f"Stock update conflict for product {db_product.name}. Data may be stale. Expected version {expected_version}, found {db_product.version}.",
-        )
-
-    if db_product.stock_quantity < quantity: # type: ignore
+    conditions = [Product.id == product_id, Product.tenant_id == tenant_id, Product.stock_quantity >= quantity]
+    if expected_version is not None:
+        conditions.append(Product.version == expected_version)
+    db.flush() # Pending ORM changes of the product must not overwrite the UPDATE later
+    updated = change_tracking.stamped_update(db, db.query(Product).filter(*conditions), {
+        Product.stock_quantity: Product.stock_quantity - quantity,
+        Product.version: Product.version + 1
+    }, tenant_id=tenant_id)
+
+    # populate_existing: a previously loaded instance must show the row as it is now.
+    db_product = db.query(Product).filter(Product.id == product_id, Product.tenant_id == tenant_id).populate_existing().first()
+    if updated != 1:
+        if not db_product:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Product {product_id} not found in tenant {tenant_id} for stock decrement.")
+        if expected_version is not None and db_product.version != expected_version:
+            metrics.STOCK_CONFLICTS.inc(operation="decrement_stock")
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Stock update conflict for product {db_product.name}. Data may be stale. Expected version {expected_version}, found {db_product.version}.",
+            )
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Insufficient stock for product {db_product.name}. Available: {db_product.stock_quantity}, Requested: {quantity}",
         )
 
-    db_product.stock_quantity -= quantity # type: ignore
-    db_product.version += 1 # type: ignore
+    return db_product # type: ignore
 
-    db.add(db_product)
-    db.flush()
-    db.refresh(db_product)
-    return db_product
+
+def increment_stock(db: Session, product_id: int, quantity: int, tenant_id: int) -> Optional[Product]:
+    """
+    Increments the stock of a product, e.g. when a cancelled order returns its items.
+    The increment is applied in SQL (one UPDATE), so it cannot overwrite a concurrent decrement.
+    This function does NOT commit.
+
+    Args:
+        db: SQLAlchemy database session.
+        product_id: ID of the product to update.
+        quantity: Amount to increment stock by.
+        tenant_id: ID of the tenant to which the product belongs.
+
+    Returns:
+        The updated Product object (reloaded after the UPDATE), or None if the product no longer exists.
+    """
+    db.flush() # Pending ORM changes of the product must not overwrite the UPDATE later
+    updated = change_tracking.stamped_update(db, db.query(Product).filter(Product.id == product_id, Product.tenant_id == tenant_id), {
+        Product.stock_quantity: Product.stock_quantity + quantity,
+        Product.version: Product.version + 1
+    }, tenant_id=tenant_id)
+    if updated != 1:
+        return None
+
+    # populate_existing: the row is locked by the UPDATE, so this is the stock right after it.
+    return db.query(Product).filter(Product.id == product_id, Product.tenant_id == tenant_id).populate_existing().first()
+
+
+def decrement_stock_bulk(db: Session, quantities: Dict[int, int], tenant_id: int) -> None:
+    """
+    Decrements stock for several products with one conditional UPDATE per product.
+    Quantities must already be coalesced per product. The stock check is part of the
+    UPDATE itself, so concurrent writers can never drive stock negative.
+    This function does NOT commit; loaded instances of the affected products are expired.
+
+    Args:
+        db: SQLAlchemy database session.
+        quantities: Mapping of product ID to the total quantity to decrement.
+        tenant_id: ID of the tenant to which the products belong.
+
+    Raises:
+        HTTPException (409): If a product no longer has enough stock (changed concurrently).
+    """
+    if not quantities:
+        return
+    for product_id, quantity in sorted(quantities.items()): # Fixed order avoids deadlocks between concurrent batches
+        updated = change_tracking.stamped_update(db, db.query(Product).filter(
+            Product.id == product_id,
+            Product.tenant_id == tenant_id,
+            Product.stock_quantity >= quantity
+        ), {
+            Product.stock_quantity: Product.stock_quantity - quantity,
+            Product.version: Product.version + 1
+        }, tenant_id=tenant_id)
+        if updated != 1:
+            metrics.STOCK_CONFLICTS.inc(operation="decrement_stock_bulk")
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Stock for product {product_id} changed concurrently. Retry the request.",
+            )
+        loaded_product = db.identity_map.get(db.identity_key(Product, product_id)) # type: ignore
+        if loaded_product is not None:
+            db.expire(loaded_product, ["stock_quantity", "version", "change_seq"])
@@ -0,0 +1,212 @@
+"""
+Service layer for sales analytics (hourly and daily sales per product, channel and payment status).
+
+Completed orders are aggregated into `sales_rollups` incrementally:
+- Each tenant has a watermark (`SalesRollupWatermark.completed_until`). A refresh only reads
+  orders with `completed_at` after the watermark, adds their totals to the HOUR and DAY
+  buckets of the time of sale (`paid_at`) with SQL-side increments, and moves the watermark,
+  all in one transaction. Nothing is rescanned.
+- The refresh stops SALES_ROLLUP_LAG_SECONDS before now, so orders completed by transactions
+  still in flight are not skipped.
+- The first refresh of a tenant also picks up completed orders from before `completed_at` existed.
+
+Buckets keep the SKU and name of their product, so deleting a product (once its orders are
+archived) sets `product_id` to NULL but keeps its sales in reports and exports.
+
+Reports and exports only read the rollups. Exports stream rows with `yield_per` (a server-side
+cursor on PostgreSQL), so memory stays constant regardless of the date range.
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import select, func, or_
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import csv
+import datetime
+import decimal
+import io
+import json
+
+from app.core.config import settings
+from app.db.upsert import upsert_increment
+from app.models.sql_models import (
+    Order, OrderItem, Product, SalesRollup, SalesRollupWatermark, SalesBucketGranularity,
+    OrderStatus as DBOrderStatusEnum,
+    OrderType as DBOrderTypeEnum,
+    PaymentStatus as DBPaymentStatusEnum
+)
+from app.schemas.analytics_schemas import (
+    SalesBucket, SalesReportResponse, SalesRollupRefreshResult, SalesBucketGranularityEnum, SalesExportFormatEnum
+)
+
+EXPORT_COLUMNS = ("bucket_start", "product_id", "sku", "product_name", "order_type", "payment_status", "order_count", "quantity", "revenue")
+
+
+def _to_naive_utc(value: datetime.datetime) -> datetime.datetime:
+    if value.tzinfo is not None:
+        return value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def refresh_sales_rollups(db: Session, tenant_id: int, until: Optional[datetime.datetime] = None) -> SalesRollupRefreshResult:
+    """
+    Adds orders completed since the tenant's watermark to the sales rollups, then commits.
+    Concurrent refreshes of the same tenant are serialized by a lock on the watermark row.
+
+    Args:
+        db: SQLAlchemy database session.
+        tenant_id: ID of the tenant.
+        until: Include orders completed up to this UTC time (defaults to now minus SALES_ROLLUP_LAG_SECONDS).
+
+    Returns:
+        SalesRollupRefreshResult with the number of orders processed and the new watermark.
+    """
+    now = datetime.datetime.utcnow()
+    until = until or now - datetime.timedelta(seconds=settings.SALES_ROLLUP_LAG_SECONDS)
+    watermark = db.query(SalesRollupWatermark).filter(SalesRollupWatermark.tenant_id == tenant_id).with_for_update().first()
+    if watermark is not None and _to_naive_utc(watermark.completed_until) >= until: # type: ignore
+        db.commit() # Nothing to do; release the lock
+        return SalesRollupRefreshResult(tenant_id=tenant_id, orders_processed=0, buckets_updated=0, complete_until=watermark.completed_until) # type: ignore
+
+    if watermark is None: # First run: include orders completed before completion times were recorded
+        completed_filter = or_(Order.completed_at <= until, Order.completed_at.is_(None))
+    else:
+        completed_filter = (Order.completed_at > watermark.completed_until) & (Order.completed_at <= until)
+
+    statement = select(
+        Order.id, func.coalesce(Order.paid_at, Order.created_at).label("sold_at"), Order.order_type, Order.payment_status,
+        OrderItem.product_id, Product.sku, Product.name, OrderItem.quantity, OrderItem.price_at_purchase
+    ).join(OrderItem, OrderItem.order_id == Order.id).join(Product, Product.id == OrderItem.product_id).where(
+        Order.tenant_id == tenant_id,
+        Order.status == DBOrderStatusEnum.COMPLETED,
+        completed_filter
+    ).order_by(Order.id).execution_options(yield_per=settings.SALES_STREAM_BATCH_SIZE)
+
+    # Totals per bucket key; bounded by the number of buckets, not of orders.
+    totals: Dict[Tuple[Any, ...], List[Any]] = {}
+    last_order_by_key: Dict[Tuple[Any, ...], int] = {}
+    product_labels: Dict[int, Tuple[str, str]] = {} # product_id -> (sku, name), stored on new buckets
+    order_ids = set()
+    for row in db.execute(statement):
+        order_ids.add(row.id)
+        product_labels[row.product_id] = (row.sku, row.name)
+        hour = _to_naive_utc(row.sold_at).replace(minute=0, second=0, microsecond=0)
+        for granularity, bucket_start in ((SalesBucketGranularity.HOUR, hour), (SalesBucketGranularity.DAY, hour.replace(hour=0))):
+            key = (granularity, bucket_start, row.product_id, row.order_type, row.payment_status)
+            bucket = totals.setdefault(key, [0, 0, decimal.Decimal("0.00")])
+            if last_order_by_key.get(key) != row.id: # Rows are ordered by order, so each order counts once per bucket
+                bucket[0] += 1
+                last_order_by_key[key] = row.id
+            bucket[1] += row.quantity
+            bucket[2] += row.price_at_purchase * row.quantity
+
+    upsert_increment(db, SalesRollup,
+        key_columns=("tenant_id", "granularity", "bucket_start", "product_id", "order_type", "payment_status"),
+        value_columns=("order_count", "quantity", "revenue"),
+        rows=[
+            {
+                "tenant_id": tenant_id, "granularity": granularity, "bucket_start": bucket_start, "product_id": product_id,
+                "sku": product_labels[product_id][0], "product_name": product_labels[product_id][1], "order_type": order_type, "payment_status": payment_status,
+                "order_count": order_count, "quantity": quantity, "revenue": revenue
+            }
+            for (granularity, bucket_start, product_id, order_type, payment_status), (order_count, quantity, revenue) in totals.items()
+        ]
+    )
+    if watermark is None:
+        watermark = SalesRollupWatermark(tenant_id=tenant_id)
+        db.add(watermark)
+    watermark.completed_until = until # type: ignore
+    watermark.refreshed_at = now # type: ignore
+    db.commit()
+    return SalesRollupRefreshResult(tenant_id=tenant_id, orders_processed=len(order_ids), buckets_updated=len(totals), complete_until=until)
+
+
+def _buckets_statement(
+    tenant_id: int, granularity: SalesBucketGranularityEnum, start_date: datetime.date, end_date: datetime.date,
+    product_id: Optional[int] = None, order_type: Optional[str] = None, payment_status: Optional[str] = None
+):
+    # Current SKU and name of live products; the stored ones for deleted products.
+    statement = select(
+        SalesRollup.bucket_start, SalesRollup.product_id,
+        func.coalesce(Product.sku, SalesRollup.sku).label("sku"), func.coalesce(Product.name, SalesRollup.product_name).label("product_name"),
+        SalesRollup.order_type, SalesRollup.payment_status, SalesRollup.order_count, SalesRollup.quantity, SalesRollup.revenue
+    ).outerjoin(Product, Product.id == SalesRollup.product_id).where(
+        SalesRollup.tenant_id == tenant_id,
+        SalesRollup.granularity == SalesBucketGranularity(granularity.value),
+        SalesRollup.bucket_start >= datetime.datetime.combine(start_date, datetime.time.min),
+        SalesRollup.bucket_start < datetime.datetime.combine(end_date + datetime.timedelta(days=1), datetime.time.min)
+    )
+    if product_id is not None:
+        statement = statement.where(SalesRollup.product_id == product_id)
+    if order_type is not None:
+        statement = statement.where(SalesRollup.order_type == DBOrderTypeEnum(order_type))
+    if payment_status is not None:
+        statement = statement.where(SalesRollup.payment_status == DBPaymentStatusEnum(payment_status))
+    return statement.order_by(SalesRollup.bucket_start, SalesRollup.product_id, SalesRollup.sku, SalesRollup.order_type, SalesRollup.payment_status)
+
+
+def get_sales_report(
+    db: Session, tenant_id: int, granularity: SalesBucketGranularityEnum, start_date: datetime.date, end_date: datetime.date,
+    product_id: Optional[int] = None, order_type: Optional[str] = None, payment_status: Optional[str] = None
+) -> SalesReportResponse:
+    """
+    Reads sales buckets of a tenant from the rollups (UTC days, inclusive). Empty buckets are omitted.
+
+    Args:
+        db: SQLAlchemy database session.
+        tenant_id: ID of the tenant.
+        granularity: HOUR or DAY buckets.
+        start_date: First day of the report.
+        end_date: Last day of the report.
+        product_id: Restrict the report to one product.
+        order_type: Restrict the report to one channel (BOPIS or POS_SALE).
+        payment_status: Restrict the report to one payment status.
+
+    Returns:
+        SalesReportResponse, including how far the rollups are complete.
+    """
+    rows = db.execute(_buckets_statement(tenant_id, granularity, start_date, end_date, product_id, order_type, payment_status)).all()
+    complete_until = db.query(SalesRollupWatermark.completed_until).filter(SalesRollupWatermark.tenant_id == tenant_id).scalar()
+    return SalesReportResponse(
+        granularity=granularity,
+        start_date=start_date,
+        end_date=end_date,
+        complete_until=complete_until,
+        buckets=[SalesBucket(**_bucket_values(row)) for row in rows]
+    )
+
+
+def _bucket_values(row: Any) -> Dict[str, Any]:
+    values = dict(row._mapping)
+    values["order_type"] = row.order_type.value
+    values["payment_status"] = row.payment_status.value
+    return values
+
+
+def iter_sales_export(
+    db: Session, tenant_id: int, granularity: SalesBucketGranularityEnum, start_date: datetime.date, end_date: datetime.date,
+    file_format: SalesExportFormatEnum
+) -> Iterator[str]:
+    """
+    Streams the sales buckets of a date range as CSV (with header) or JSON Lines.
+    Rows are fetched SALES_STREAM_BATCH_SIZE at a time and yielded as one chunk per batch.
+    """
+    statement = _buckets_statement(tenant_id, granularity, start_date, end_date).execution_options(yield_per=settings.SALES_STREAM_BATCH_SIZE)
+    if file_format == SalesExportFormatEnum.CSV:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+        yield buffer.getvalue()
+    for partition in db.execute(statement).partitions():
+        buffer = io.StringIO()
+        if file_format == SalesExportFormatEnum.CSV:
+            writer = csv.writer(buffer)
+            for row in partition:
+                values = _bucket_values(row)
+                values["bucket_start"] = _to_naive_utc(values["bucket_start"]).isoformat()
+                writer.writerow([values[column] for column in EXPORT_COLUMNS])
+        else:
+            for row in partition:
+                values = _bucket_values(row)
+                values["bucket_start"] = _to_naive_utc(values["bucket_start"]).isoformat()
+                values["revenue"] = str(values["revenue"])
+                buffer.write(json.dumps(values) + "\n")
+        yield buffer.getvalue()
@@ -0,0 +1,134 @@
+"""
+Service layer for low-stock alerts.
+
+Alerts are evaluated when stock changes, not when the dashboard loads: every stock mutation
+path passes the new quantities of the products it touched to `evaluate_stock_levels` within
+its own transaction. A product is low when its stock is at or below its `reorder_threshold`,
+or the tenant's `default_reorder_threshold` if it has none.
+
+- Each product has at most one `StockAlert` row, which is switched active/resolved, so
+  repeated sales of a low product do not create duplicates.
+- Evaluation runs one query for thresholds and alert state and writes only on transitions.
+- Tenant admins are notified when an alert is raised, at most once per
+  STOCK_ALERT_RENOTIFY_MINUTES per product (stock hovering around the threshold).
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from typing import Dict, List, Optional
+import datetime
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.models.sql_models import Product, Tenant, StockAlert, User, UserRole as DBUserRoleEnum
+from app.services import notification_service
+
+_EVALUATION_CHUNK_SIZE = 500
+
+
+def evaluate_stock_levels(db: Session, tenant_id: int, stock_levels: Dict[int, int]) -> None:
+    """
+    Raises or resolves low-stock alerts for products whose stock just changed.
+    Does NOT commit; call it in the transaction changing the stock.
+
+    Args:
+        db: SQLAlchemy database session.
+        tenant_id: ID of the tenant the products belong to.
+        stock_levels: Mapping of product ID to its new stock quantity.
+    """
+    if not stock_levels:
+        return
+    now = datetime.datetime.utcnow()
+    threshold = func.coalesce(Product.reorder_threshold, Tenant.default_reorder_threshold)
+    rows = db.query(Product.id, Product.name, Product.sku, threshold.label("threshold"), StockAlert).join(
+        Tenant, Tenant.id == Product.tenant_id
+    ).outerjoin(
+        StockAlert, StockAlert.product_id == Product.id
+    ).filter(
+        Product.tenant_id == tenant_id,
+        Product.id.in_(stock_levels.keys())
+    ).all()
+
+    raised: List[str] = []
+    for row in rows:
+        stock = stock_levels[row.id]
+        alert: Optional[StockAlert] = row.StockAlert
+        is_low = row.threshold is not None and stock <= row.threshold
+        if is_low and (alert is None or not alert.is_active):
+            if alert is None:
+                alert = StockAlert(tenant_id=tenant_id, product_id=row.id)
+                db.add(alert)
+            alert.is_active = True # type: ignore
+            alert.threshold = row.threshold
+            alert.triggered_stock_quantity = stock # type: ignore
+            alert.triggered_at = now # type: ignore
+            alert.resolved_at = None # type: ignore
+            renotify_after = datetime.timedelta(minutes=settings.STOCK_ALERT_RENOTIFY_MINUTES)
+            if alert.last_notified_at is None or alert.last_notified_at.replace(tzinfo=None) <= now - renotify_after:
+                alert.last_notified_at = now # type: ignore
+                raised.append(f"{row.name} ({row.sku}): {stock} left, threshold {row.threshold}")
+        elif not is_low and alert is not None and alert.is_active:
+            alert.is_active = False # type: ignore
+            alert.resolved_at = now # type: ignore
+
+    if raised:
+        message = "Low stock: " + "; ".join(raised[:20]) + (f" and {len(raised) - 20} more." if len(raised) > 20 else "")
+        admin_ids = db.query(User.id).filter(User.tenant_id == tenant_id, User.role == DBUserRoleEnum.tenant_admin, User.is_active == True).all()
+        for (admin_id,) in admin_ids:
+            notification_service.create_notification(db, user_id=admin_id, tenant_id=tenant_id, message=message)
+    db.flush()
+
+
+def evaluate_tenant(db: Session, tenant_id: int) -> None:
+    """
+    Re-evaluates every product of a tenant, e.g. after its default threshold changed.
+    Does NOT commit.
+    """
+    rows = db.query(Product.id, Product.stock_quantity).filter(Product.tenant_id == tenant_id).order_by(Product.id).all()
+    for start in range(0, len(rows), _EVALUATION_CHUNK_SIZE):
+        evaluate_stock_levels(db, tenant_id, {row.id: row.stock_quantity for row in rows[start:start + _EVALUATION_CHUNK_SIZE]})
+
+
+def set_default_reorder_threshold(db: Session, tenant_id: int, threshold: Optional[int]) -> Tenant:
+    """
+    Sets a tenant's default reorder threshold and re-evaluates all its products.
+
+    Raises:
+        HTTPException (404): If the tenant does not exist.
+
+    Returns:
+        The updated Tenant object.
+    """
+    tenant = db.query(Tenant).filter(Tenant.id == tenant_id).first()
+    if tenant is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tenant not found.")
+    tenant.default_reorder_threshold = threshold # type: ignore
+    db.flush()
+    evaluate_tenant(db, tenant_id)
+    db.commit()
+    db.refresh(tenant)
+    return tenant
+
+
+def list_active_alerts(db: Session, tenant_id: int) -> List[dict]:
+    """
+    Lists the active low-stock alerts of a tenant with the products' current stock,
+    most recent first. Served by the (tenant_id, is_active) index.
+    """
+    rows = db.query(StockAlert, Product.sku, Product.name, Product.stock_quantity).join(
+        Product, Product.id == StockAlert.product_id
+    ).filter(
+        StockAlert.tenant_id == tenant_id,
+        StockAlert.is_active == True
+    ).order_by(StockAlert.triggered_at.desc(), StockAlert.id.desc()).all()
+    return [
+        {
+            "product_id": alert.product_id,
+            "sku": sku,
+            "name": name,
+            "stock_quantity": stock_quantity,
+            "threshold": alert.threshold,
+            "triggered_stock_quantity": alert.triggered_stock_quantity,
+            "triggered_at": alert.triggered_at,
+        }
+        for alert, sku, name, stock_quantity in rows
+    ]
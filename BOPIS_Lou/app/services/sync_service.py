@@ -0,0 +1,147 @@
+"""
+Service layer for the delta sync change feed.
+
+Tracked rows carry a per-tenant `change_seq` (see `app.db.change_tracking`); deletions are
+recorded as tombstones. A client passes the highest sequence it has applied and receives the
+next batch of changes across all entity types in sequence order.
+
+Payloads are flat: each entity type selects only the columns of its payload schema, and the
+items of the orders on a page are read with one IN query. No ORM objects or relationships
+are loaded, so a page costs one query per entity type plus one for items and one for tombstones.
+"""
+from collections import defaultdict
+from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.models.sql_models import Product, Order, OrderItem, PickupTimeSlot, Lane, SyncTombstone
+from app.schemas.product_schemas import ProductResponse
+from app.schemas.timeslot_schemas import PickupTimeSlotResponse
+from app.schemas.lane_schemas import LaneResponse
+from app.schemas.sync_schemas import (
+    SyncChange, SyncChangesResponse, SyncEntityTypeEnum, SyncOperationEnum, SyncOrderData, SyncOrderItemData
+)
+
+_ENTITY_MODELS = {
+    SyncEntityTypeEnum.product: (Product, ProductResponse),
+    SyncEntityTypeEnum.order: (Order, SyncOrderData),
+    SyncEntityTypeEnum.timeslot: (PickupTimeSlot, PickupTimeSlotResponse),
+    SyncEntityTypeEnum.lane: (Lane, LaneResponse),
+}
+
+
+def _payload_columns(model, payload_schema) -> List[Any]:
+    """Table columns backing the payload schema's fields (fields without a column, like order items, are skipped)."""
+    table = model.__table__
+    return [table.c[name] for name in payload_schema.model_fields if name in table.c]
+
+
+def _order_items_by_order(db: Session, order_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+    """Item lines of the given orders, with one IN query."""
+    items: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+    if not order_ids:
+        return items
+    columns = _payload_columns(OrderItem, SyncOrderItemData)
+    rows = db.execute(
+        select(OrderItem.__table__.c.order_id, *columns).where(OrderItem.__table__.c.order_id.in_(order_ids)).order_by(OrderItem.__table__.c.id)
+    )
+    for row in rows:
+        values = dict(row._mapping)
+        items[values.pop("order_id")].append(values)
+    return items
+
+
+def get_collection_version(db: Session, entity_type: SyncEntityTypeEnum, tenant_id: int) -> Tuple[int, int]:
+    """
+    Returns (row count, highest change_seq) of an entity type within a tenant.
+    Every insert and update raises the highest change_seq and every delete lowers the count,
+    so the pair changes whenever any row does. Both aggregates are served by the
+    (tenant_id, change_seq) index without reading the rows.
+
+    Args:
+        db: SQLAlchemy database session.
+        entity_type: The entity type.
+        tenant_id: ID of the tenant.
+
+    Returns:
+        Tuple (count, max_change_seq); max_change_seq is 0 if no row has been stamped yet.
+    """
+    model = _ENTITY_MODELS[entity_type][0]
+    count, max_seq = db.query(func.count(model.id), func.max(model.change_seq)).filter(model.tenant_id == tenant_id).one()
+    return count, max_seq or 0
+
+
+def get_changes(
+    db: Session,
+    tenant_id: int,
+    since: int,
+    limit: int = 500,
+    entity_types: Optional[Iterable[SyncEntityTypeEnum]] = None,
+    customer_user_id: Optional[int] = None
+) -> SyncChangesResponse:
+    """
+    Returns the changes of a tenant with a sequence number greater than `since`.
+    Each entity type is read with one indexed range query on (tenant_id, change_seq),
+    fetching at most `limit + 1` rows; the results are merged and cut at `limit`.
+
+    Args:
+        db: SQLAlchemy database session.
+        tenant_id: ID of the tenant.
+        since: Highest change sequence the client has already applied (0 for none).
+        limit: Maximum number of changes to return.
+        entity_types: Entity types to include; all types if None.
+        customer_user_id: If set, only this customer's orders are included. Carts are never included (they have no `change_seq`).
+
+    Returns:
+        SyncChangesResponse ordered by change_seq.
+    """
+    types = set(entity_types) if entity_types else set(SyncEntityTypeEnum)
+    candidates: List[Tuple[int, SyncChange]] = []
+
+    for entity_type in types:
+        model, payload_schema = _ENTITY_MODELS[entity_type]
+        table = model.__table__
+        statement = select(*_payload_columns(model, payload_schema), table.c.change_seq).where(
+            table.c.tenant_id == tenant_id, table.c.change_seq > since
+        )
+        if model is Order and customer_user_id is not None:
+            statement = statement.where(table.c.user_id == customer_user_id)
+        rows = [dict(row._mapping) for row in db.execute(statement.order_by(table.c.change_seq).limit(limit + 1))]
+        if model is Order:
+            items = _order_items_by_order(db, [row["id"] for row in rows])
+            for row in rows:
+                row["items"] = items.get(row["id"], [])
+        for row in rows:
+            change_seq = row.pop("change_seq")
+            candidates.append((change_seq, SyncChange(
+                entity_type=entity_type,
+                entity_id=row["id"],
+                op=SyncOperationEnum.upsert,
+                change_seq=change_seq,
+                data=payload_schema.model_validate(row).model_dump(mode="json")
+            )))
+
+    tombstone_types = [t.value for t in types]
+    if customer_user_id is not None:
+        tombstone_types = [t for t in tombstone_types if t != SyncEntityTypeEnum.order.value] # IDs of other customers' orders are not shared
+    tombstones = db.query(SyncTombstone).filter(
+        SyncTombstone.tenant_id == tenant_id,
+        SyncTombstone.change_seq > since,
+        SyncTombstone.entity_type.in_(tombstone_types)
+    ).order_by(SyncTombstone.change_seq).limit(limit + 1).all()
+    for tombstone in tombstones:
+        candidates.append((tombstone.change_seq, SyncChange( # type: ignore
+            entity_type=SyncEntityTypeEnum(tombstone.entity_type),
+            entity_id=tombstone.entity_id, # type: ignore
+            op=SyncOperationEnum.delete,
+            change_seq=tombstone.change_seq # type: ignore
+        )))
+
+    candidates.sort(key=lambda candidate: candidate[0])
+    changes = [change for _, change in candidates[:limit]]
+    return SyncChangesResponse(
+        since=since,
+        next_since=changes[-1].change_seq if changes else since,
+        has_more=len(candidates) > limit,
+        changes=changes
+    )
@@ -0,0 +1,245 @@
+"""
+Service layer for the tenant admin dashboard metrics.
+
+The dashboard never aggregates `orders` or `order_items`. Counters are maintained incrementally
+by `order_service` in the transaction that changes an order:
+- `TenantOrderStatusCount`: number of orders per status (carts are not counted), moved on every
+  status transition.
+- `TenantDailySales`: paid orders and revenue per UTC day of payment, net of refunds.
+
+Increments are applied in SQL (`upsert_increment`), so concurrent transitions never overwrite
+each other. They still lock the row they increment until commit, and every sale of a tenant
+hits the same COMPLETED and today's-sales counters. Each counter is therefore spread over
+DASHBOARD_COUNTER_SLOTS rows: an order increments the slot `order_id % DASHBOARD_COUNTER_SLOTS`,
+so concurrent transactions rarely wait on each other, and readers sum the slots (at most
+DASHBOARD_COUNTER_SLOTS small rows per value). This keeps the dashboard exact at all times,
+unlike deferring the deltas to the reconcile job. The slot count can be raised at any time;
+rows of higher slots are simply summed.
+
+`reconcile_tenant_metrics` recomputes the counters from the orders and is run periodically
+(see app/cli/reconcile_metrics.py) to repair drift, e.g. from manual data fixes.
+
+Slot utilization and lane status are read from `pickup_time_slots` and `lanes`, which already
+hold the current state per row.
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from typing import Dict, Optional, Tuple
+import datetime
+import decimal
+
+from app.core.config import settings
+from app.db.upsert import upsert_increment
+from app.models.sql_models import (
+    Order, ArchivedOrder, PickupTimeSlot, Lane, TenantOrderStatusCount, TenantDailySales,
+    OrderStatus as DBOrderStatusEnum,
+    PaymentStatus as DBPaymentStatusEnum
+)
+from app.schemas.tenant_schemas import (
+    TenantDashboardResponse, TenantDashboardSales, TenantDashboardSlot, TenantDashboardLane, TenantReconcileResponse
+)
+
+# (paid orders, revenue) change for one day.
+SalesDelta = Tuple[int, decimal.Decimal]
+
+
+def counter_slot(order_id: int) -> int:
+    """Counter slot an order's changes are recorded in."""
+    return order_id % settings.DASHBOARD_COUNTER_SLOTS
+
+
+def record_status_changes(db: Session, tenant_id: int, changes: Dict[DBOrderStatusEnum, int], slot: int = 0) -> None:
+    """
+    Adds signed per-status deltas to the order status counters. Carts are ignored.
+    Does NOT commit; call it in the transaction changing the orders.
+
+    Args:
+        db: SQLAlchemy database session.
+        tenant_id: ID of the tenant the orders belong to.
+        changes: Mapping of order status to the change in its order count.
+        slot: Counter slot to add to (see `counter_slot`).
+    """
+    rows = [
+        {"tenant_id": tenant_id, "status": order_status, "slot": slot, "order_count": delta}
+        for order_status, delta in changes.items()
+        if order_status != DBOrderStatusEnum.CART and delta
+    ]
+    if rows:
+        upsert_increment(db, TenantOrderStatusCount, key_columns=("tenant_id", "status", "slot"), value_columns=("order_count",), rows=rows)
+
+
+def record_status_transition(db: Session, order: Order, old_status: Optional[DBOrderStatusEnum]) -> None:
+    """
+    Moves one order between status counters after `order.status` was changed.
+    `old_status` is None for orders created directly in their status (POS sales).
+    Does NOT commit.
+    """
+    if old_status == order.status:
+        return
+    changes: Dict[DBOrderStatusEnum, int] = {order.status: 1} # type: ignore
+    if old_status is not None:
+        changes[old_status] = -1
+    record_status_changes(db, order.tenant_id, changes, slot=counter_slot(order.id)) # type: ignore
+
+
+def record_sales(db: Session, tenant_id: int, sales: Dict[datetime.date, SalesDelta], slot: int = 0) -> None:
+    """
+    Adds signed paid order and revenue deltas to the daily sales counters.
+    Does NOT commit; call it in the transaction recording the payment or refund.
+
+    Args:
+        db: SQLAlchemy database session.
+        tenant_id: ID of the tenant.
+        sales: Mapping of UTC payment day to (paid orders, revenue) deltas.
+        slot: Counter slot to add to (see `counter_slot`).
+    """
+    rows = [
+        {"tenant_id": tenant_id, "day": day, "slot": slot, "paid_orders": paid_orders, "revenue": revenue}
+        for day, (paid_orders, revenue) in sales.items()
+    ]
+    if rows:
+        upsert_increment(db, TenantDailySales, key_columns=("tenant_id", "day", "slot"), value_columns=("paid_orders", "revenue"), rows=rows)
+
+
+def record_payment(db: Session, order: Order, paid_at: Optional[datetime.datetime] = None) -> None:
+    """
+    Stamps `order.paid_at` and counts the order in that day's sales. Does NOT commit.
+
+    Args:
+        db: SQLAlchemy database session.
+        order: The order that was just paid (total already calculated).
+        paid_at: Time of payment in UTC (defaults to now; offline POS sales pass the time of sale).
+    """
+    order.paid_at = paid_at or datetime.datetime.utcnow() # type: ignore
+    record_sales(db, order.tenant_id, {order.paid_at.date(): (1, order.total_amount)}, slot=counter_slot(order.id)) # type: ignore
+
+
+def record_refund(db: Session, order: Order) -> None:
+    """Removes a refunded order from the sales of the day it was paid. Does NOT commit."""
+    if order.paid_at is None: # Paid before payment times were recorded; fixed by reconciliation
+        return
+    record_sales(db, order.tenant_id, {order.paid_at.date(): (-1, -order.total_amount)}, slot=counter_slot(order.id)) # type: ignore
+
+
+def get_dashboard(db: Session, tenant_id: int, today: Optional[datetime.date] = None) -> TenantDashboardResponse:
+    """
+    Builds the tenant admin dashboard from the counters and the current slot and lane rows.
+    Runs a fixed number of indexed queries, independent of the number of orders.
+
+    Args:
+        db: SQLAlchemy database session.
+        tenant_id: ID of the tenant.
+        today: UTC day to report sales and slots for (defaults to today).
+
+    Returns:
+        TenantDashboardResponse.
+    """
+    today = today or datetime.datetime.utcnow().date()
+    day_start = datetime.datetime.combine(today, datetime.time.min)
+
+    orders_by_status = {
+        order_status.value: order_count
+        for order_status, order_count in _status_counts(db, tenant_id).items()
+        if order_count
+    }
+    sales_row = db.query(
+        func.coalesce(func.sum(TenantDailySales.paid_orders), 0).label("paid_orders"),
+        func.coalesce(func.sum(TenantDailySales.revenue), decimal.Decimal("0.00")).label("revenue")
+    ).filter(TenantDailySales.tenant_id == tenant_id, TenantDailySales.day == today).one()
+    slots = db.query(PickupTimeSlot).filter(
+        PickupTimeSlot.tenant_id == tenant_id,
+        PickupTimeSlot.is_active == True,
+        PickupTimeSlot.date >= day_start,
+        PickupTimeSlot.date < day_start + datetime.timedelta(days=1)
+    ).order_by(PickupTimeSlot.start_time).all()
+    lanes = db.query(Lane).filter(Lane.tenant_id == tenant_id).order_by(Lane.name).all()
+
+    capacity = sum(slot.capacity for slot in slots)
+    booked = sum(slot.current_orders for slot in slots)
+    return TenantDashboardResponse(
+        tenant_id=tenant_id,
+        day=today,
+        orders_by_status=orders_by_status,
+        sales=TenantDashboardSales(paid_orders=sales_row.paid_orders, revenue=sales_row.revenue),
+        slot_capacity=capacity,
+        slot_booked=booked,
+        slot_utilization=round(booked / capacity, 4) if capacity else 0.0,
+        slots=[TenantDashboardSlot.model_validate(slot, from_attributes=True) for slot in slots],
+        lanes=[TenantDashboardLane.model_validate(lane, from_attributes=True) for lane in lanes]
+    )
+
+
+def _status_counts(db: Session, tenant_id: int) -> Dict[DBOrderStatusEnum, int]:
+    """Order count per status, summed over the counter slots."""
+    return dict(db.query(TenantOrderStatusCount.status, func.sum(TenantOrderStatusCount.order_count)).filter(
+        TenantOrderStatusCount.tenant_id == tenant_id
+    ).group_by(TenantOrderStatusCount.status).all())
+
+
+def _as_date(value) -> datetime.date:
+    # func.date() returns a date on PostgreSQL and an ISO string on SQLite.
+    return value if isinstance(value, datetime.date) else datetime.date.fromisoformat(value)
+
+
+def reconcile_tenant_metrics(db: Session, tenant_id: int, days: int = 35) -> TenantReconcileResponse:
+    """
+    Recomputes the dashboard counters of a tenant from its orders (hot and archived) and corrects them, then commits.
+    Status counters are rebuilt completely; daily sales only for the last `days` days,
+    which are the ones the dashboard reads.
+
+    The recomputation and the correction run in one transaction; an order changed concurrently
+    may be counted against the old state until the next run.
+
+    Args:
+        db: SQLAlchemy database session.
+        tenant_id: ID of the tenant.
+        days: Number of days of sales to recompute, including today.
+
+    Returns:
+        TenantReconcileResponse with the number of statuses and days whose counters were corrected.
+    """
+    first_day = datetime.datetime.utcnow().date() - datetime.timedelta(days=days - 1)
+
+    expected_counts: Dict[DBOrderStatusEnum, int] = {}
+    expected_sales: Dict[datetime.date, SalesDelta] = {}
+    for model in (Order, ArchivedOrder): # Archived orders still count
+        for order_status, order_count in db.query(model.status, func.count(model.id)).filter(
+            model.tenant_id == tenant_id, model.status != DBOrderStatusEnum.CART
+        ).group_by(model.status).all():
+            expected_counts[order_status] = expected_counts.get(order_status, 0) + order_count
+
+        paid_day = func.date(model.paid_at)
+        for day, paid_orders, revenue in db.query(paid_day, func.count(model.id), func.sum(model.total_amount)).filter(
+            model.tenant_id == tenant_id,
+            model.payment_status == DBPaymentStatusEnum.PAID,
+            model.paid_at >= datetime.datetime.combine(first_day, datetime.time.min)
+        ).group_by(paid_day).all():
+            day_orders, day_revenue = expected_sales.get(_as_date(day), (0, decimal.Decimal("0.00")))
+            expected_sales[_as_date(day)] = (day_orders + paid_orders, day_revenue + revenue)
+
+    # Corrections are added to slot 0 as deltas, so increments committed meanwhile are kept.
+    counted = _status_counts(db, tenant_id)
+    status_changes = {
+        order_status: expected_counts.get(order_status, 0) - counted.get(order_status, 0)
+        for order_status in set(counted) | set(expected_counts)
+    }
+    status_changes = {order_status: delta for order_status, delta in status_changes.items() if delta}
+    record_status_changes(db, tenant_id, status_changes)
+
+    counted_sales = {
+        _as_date(day): (paid_orders, revenue)
+        for day, paid_orders, revenue in db.query(
+            TenantDailySales.day, func.sum(TenantDailySales.paid_orders), func.sum(TenantDailySales.revenue)
+        ).filter(TenantDailySales.tenant_id == tenant_id, TenantDailySales.day >= first_day).group_by(TenantDailySales.day).all()
+    }
+    sales_changes: Dict[datetime.date, SalesDelta] = {}
+    for day in set(counted_sales) | set(expected_sales):
+        paid_orders, revenue = expected_sales.get(day, (0, decimal.Decimal("0.00")))
+        counted_orders, counted_revenue = counted_sales.get(day, (0, decimal.Decimal("0.00")))
+        if (paid_orders, revenue) != (counted_orders, counted_revenue):
+            sales_changes[day] = (paid_orders - counted_orders, revenue - counted_revenue)
+    record_sales(db, tenant_id, sales_changes)
+
+    db.commit()
+    return TenantReconcileResponse(tenant_id=tenant_id, status_counters_corrected=len(status_changes), daily_sales_corrected=len(sales_changes))
+
@@ -5,11 +5,13 @@ This module provides functions for creating, retrieving, updating,
 deleting, and managing capacity for pickup time slots.
 """
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy import Date, func
+from typing import Any, List, Optional, Tuple
 import datetime
+from app.db import change_tracking
 from app.models.sql_models import PickupTimeSlot
 from app.models.sql_models import LaneStatus as DBLaneStatusEnum # Not used here, but good practice if related
-from app.schemas.timeslot_schemas import PickupTimeSlotCreate, PickupTimeSlotUpdate
+from app.schemas.timeslot_schemas import PickupTimeSlotCreate, PickupTimeSlotUpdate, PickupTimeSlotSummaryResponse
 from app.schemas.notification_schemas import NotificationStatusEnum # Corrected import
 # For timeslot, is_active is a boolean. If filtering by a status enum, it would be defined in timeslot_schemas.
 # The current filter `is_active: Optional[bool]` is fine.
@@ -29,6 +31,23 @@ def get_timeslot_by_id(db: Session, timeslot_id: int, tenant_id: int) -> Optiona
     """
     return db.query(PickupTimeSlot).filter(PickupTimeSlot.id == timeslot_id, PickupTimeSlot.tenant_id == tenant_id).first()
 
+def get_timeslot_version(db: Session, timeslot_id: int, tenant_id: int) -> Optional[Tuple[Optional[int], Optional[datetime.datetime]]]:
+    """
+    Retrieves only the version columns of a time slot, for cheap cache validation.
+
+    Args:
+        db: SQLAlchemy database session.
+        timeslot_id: ID of the time slot.
+        tenant_id: ID of the tenant to which the time slot must belong.
+
+    Returns:
+        Tuple (change_seq, updated_at), or None if the time slot is not found.
+    """
+    row = db.query(PickupTimeSlot.change_seq, PickupTimeSlot.updated_at).filter(
+        PickupTimeSlot.id == timeslot_id, PickupTimeSlot.tenant_id == tenant_id
+    ).first()
+    return (row.change_seq, row.updated_at) if row else None
+
 def get_timeslots_by_tenant(
     db: Session,
     tenant_id: int,
@@ -55,7 +74,34 @@ def get_timeslots_by_tenant(
     Returns:
         A list of PickupTimeSlot objects.
     """
-    query = db.query(PickupTimeSlot).filter(PickupTimeSlot.tenant_id == tenant_id)
+    query = _tenant_timeslots_query(db.query(PickupTimeSlot), tenant_id, date_from, date_to, only_available, is_active)
+    return query.offset(skip).limit(limit).all()
+
+def get_timeslot_summary_rows_by_tenant(
+    db: Session,
+    tenant_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    date_from: Optional[datetime.date] = None,
+    date_to: Optional[datetime.date] = None,
+    only_available: bool = False,
+    is_active: Optional[bool] = True
+) -> List[Any]:
+    """
+    Same listing as `get_timeslots_by_tenant`, but selects only the `PickupTimeSlotSummaryResponse`
+    columns in SQL and builds no ORM objects (list screens). Returns result rows,
+    for `serialization.rows_response`.
+    """
+    # `date` is stored as a midnight timestamp; select it as a date, as the schema serializes it
+    columns = [
+        func.date(PickupTimeSlot.date, type_=Date).label("date") if field == "date" else getattr(PickupTimeSlot, field)
+        for field in PickupTimeSlotSummaryResponse.model_fields
+    ]
+    query = _tenant_timeslots_query(db.query(*columns), tenant_id, date_from, date_to, only_available, is_active)
+    return query.offset(skip).limit(limit).all()
+
+def _tenant_timeslots_query(query, tenant_id: int, date_from: Optional[datetime.date], date_to: Optional[datetime.date], only_available: bool, is_active: Optional[bool]):
+    query = query.filter(PickupTimeSlot.tenant_id == tenant_id)
 
     if date_from:
         query = query.filter(PickupTimeSlot.date >= date_from)
@@ -66,7 +112,7 @@ def get_timeslots_by_tenant(
     if is_active is not None: # Allows filtering for False or True
         query = query.filter(PickupTimeSlot.is_active == is_active)
 
-    return query.order_by(PickupTimeSlot.date, PickupTimeSlot.start_time).offset(skip).limit(limit).all()
+    return query.order_by(PickupTimeSlot.date, PickupTimeSlot.start_time)
 
 def create_timeslot(db: Session, timeslot_create_data: PickupTimeSlotCreate, tenant_id: int) -> PickupTimeSlot:
     """
@@ -165,6 +211,8 @@ def delete_timeslot(db: Session, db_timeslot: PickupTimeSlot) -> PickupTimeSlot:
 def increment_slot_order_count(db: Session, timeslot_id: int, tenant_id: int) -> Optional[PickupTimeSlot]:
     """
     Increments the current_orders count for a timeslot.
+    The capacity check is part of a single conditional UPDATE, so concurrent bookings
+    can never overbook the slot.
     Does NOT commit the session; relies on the calling function to commit.
 
     Args:
@@ -177,23 +225,20 @@ def increment_slot_order_count(db: Session, timeslot_id: int, tenant_id: int) ->
     Raises:
         HTTPException (400/409): If slot is inactive or full.
     """
-    slot = get_timeslot_by_id(db, timeslot_id, tenant_id)
-    if slot:
+    updated = _update_slot_order_count(db, timeslot_id, tenant_id, delta=1, conditions=[
+        PickupTimeSlot.is_active == True,
+        PickupTimeSlot.current_orders < PickupTimeSlot.capacity
+    ])
+    slot = _reload_timeslot(db, timeslot_id, tenant_id)
+    if slot and not updated:
         if not slot.is_active:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cannot book order for an inactive time slot.")
-        if slot.current_orders < slot.capacity: # type: ignore
-            slot.current_orders += 1 # type: ignore
-            db.add(slot)
-            db.flush() # Make change available in current transaction
-            db.refresh(slot)
-            return slot
-        else:
-            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Time slot is full.")
-    return None # Or raise HTTPException(status_code=404, detail="Timeslot not found")
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Time slot is full.")
+    return slot # None if not found
 
 def decrement_slot_order_count(db: Session, timeslot_id: int, tenant_id: int) -> Optional[PickupTimeSlot]:
     """
-    Decrements the current_orders count for a timeslot.
+    Decrements the current_orders count for a timeslot, never below zero (single conditional UPDATE).
     Does NOT commit the session; relies on the calling function to commit.
 
     Args:
@@ -204,13 +249,22 @@ def decrement_slot_order_count(db: Session, timeslot_id: int, tenant_id: int) ->
     Returns:
         The updated PickupTimeSlot object if found and decremented, else None.
     """
-    slot = get_timeslot_by_id(db, timeslot_id, tenant_id)
-    if slot:
-        if slot.current_orders > 0: # type: ignore
-            slot.current_orders -= 1 # type: ignore
-            db.add(slot)
-            db.flush() # Make change available in current transaction
-            db.refresh(slot)
-            return slot
-        # else: current_orders is already 0, no change needed or raise error if desired.
-    return None # Or raise HTTPException(status_code=404, detail="Timeslot not found")
+    if not _update_slot_order_count(db, timeslot_id, tenant_id, delta=-1, conditions=[PickupTimeSlot.current_orders > 0]):
+        return None # Not found, or current_orders is already 0
+    return _reload_timeslot(db, timeslot_id, tenant_id)
+
+def _update_slot_order_count(db: Session, timeslot_id: int, tenant_id: int, delta: int, conditions: list) -> bool:
+    """Adds `delta` to current_orders if `conditions` hold, in one UPDATE; True if the row was updated."""
+    db.flush() # Pending ORM changes of the slot must not overwrite the UPDATE later
+    updated = change_tracking.stamped_update(db, db.query(PickupTimeSlot).filter(
+        PickupTimeSlot.id == timeslot_id,
+        PickupTimeSlot.tenant_id == tenant_id,
+        *conditions
+    ), {PickupTimeSlot.current_orders: PickupTimeSlot.current_orders + delta}, tenant_id=tenant_id)
+    return updated == 1
+
+def _reload_timeslot(db: Session, timeslot_id: int, tenant_id: int) -> Optional[PickupTimeSlot]:
+    return db.query(PickupTimeSlot).filter(
+        PickupTimeSlot.id == timeslot_id,
+        PickupTimeSlot.tenant_id == tenant_id
+    ).populate_existing().first()
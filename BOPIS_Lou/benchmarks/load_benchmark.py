@@ -0,0 +1,381 @@
+"""
+Load test of the core BOPIS and POS flows.
+
+Concurrent workers run a weighted mix of operations:
+- browse: GET /products/ as a customer.
+- add_to_cart: POST /orders/cart/items.
+- checkout: POST /orders/{cart_id}/checkout; adds an item first if the cart is empty.
+- pick: start-picking + ready-for-pickup on a checked-out order.
+- verify_pickup: POST /orders/verify-pickup on a ready order.
+- complete: POST /orders/{order_id}/complete-pickup on a verified order.
+- pos_sale: POST /pos/orders as counter staff.
+
+Orders move through a pipeline, so pick / verify_pickup / complete work on orders produced by
+earlier operations; when none is waiting, the previous step runs instead. Each worker shops as
+its own customer, so carts never contend. Stock and slot capacity are large enough for the run.
+
+Targets:
+- in-process (default): the app behind httpx's ASGI transport, on a fresh file-backed SQLite
+  database (`--database-url` for another one). Measures the app without network overhead.
+- `--base-url http://127.0.0.1:8000`: a running server (e.g. uvicorn with several workers).
+  Needs an existing super admin (`--admin-username` / `--admin-password`); each run creates
+  its own tenant, staff, customers, products and slot.
+
+The report (JSON, stdout or `--output`) has throughput and p50/p95/p99 latency per endpoint.
+`--baseline FILE` compares against a stored report: a p95 more than `--tolerance` above the
+baseline, or a throughput more than `--tolerance` below it, is a regression (exit code 1).
+`--save-baseline FILE` stores the report. Baselines depend on the machine; store them from the
+machine that compares (benchmarks/baselines/ holds the reference in-process SQLite run).
+
+Usage (from BOPIS_Lou/):
+    python -m benchmarks.load_benchmark [--operations 2000] [--concurrency 8]
+    python -m benchmarks.load_benchmark --mix browse=50,checkout=20,pick=10,verify_pickup=10,complete=10
+    python -m benchmarks.load_benchmark --baseline benchmarks/baselines/in_process_sqlite.json
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import datetime
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import uuid
+
+import httpx
+
+DEFAULT_MIX = {"browse": 40, "add_to_cart": 15, "checkout": 12, "pick": 10, "verify_pickup": 8, "complete": 8, "pos_sale": 7}
+PASSWORD = "load-test-password"
+
+
+@dataclass
+class LoadFixture:
+    """Tenant, users and catalog a run works on; created by `setup_fixture`."""
+
+    tenant_id: int
+    picker_headers: Dict[str, str]
+    counter_headers: Dict[str, str]
+    customer_headers: List[Dict[str, str]]
+    product_ids: List[int]
+    slot_id: int
+
+
+@dataclass
+class Recorder:
+    """Latencies (seconds) and failed requests (by status code, "error" for transport errors) per endpoint label."""
+
+    latencies: Dict[str, List[float]] = field(default_factory=dict)
+    errors: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+    def record(self, label: str, seconds: float, status: Optional[int]) -> None:
+        self.latencies.setdefault(label, []).append(seconds)
+        if status is None or status >= 400:
+            by_status = self.errors.setdefault(label, {})
+            key = str(status) if status is not None else "error"
+            by_status[key] = by_status.get(key, 0) + 1
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        endpoints = {}
+        for label, values in sorted(self.latencies.items()):
+            ordered = sorted(values)
+            endpoints[label] = {
+                "count": len(ordered),
+                "errors": sum(self.errors.get(label, {}).values()),
+                "error_statuses": self.errors.get(label, {}),
+                "throughput_rps": round(len(ordered) / elapsed, 2),
+                "mean_ms": round(sum(ordered) / len(ordered) * 1000, 2),
+                **{f"p{q}_ms": round(percentile(ordered, q) * 1000, 2) for q in (50, 95, 99)},
+            }
+        total = sum(len(values) for values in self.latencies.values())
+        return {
+            "duration_s": round(elapsed, 3),
+            "requests": total,
+            "errors": sum(sum(by_status.values()) for by_status in self.errors.values()),
+            "throughput_rps": round(total / elapsed, 2),
+            "endpoints": endpoints,
+        }
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    """Nearest-rank percentile of a sorted list."""
+    if not ordered:
+        return 0.0
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"Unknown operation '{name}'. Choose from: {', '.join(DEFAULT_MIX)}")
+        mix[name.strip()] = int(weight)
+    return mix
+
+
+async def _login(client: httpx.AsyncClient, username: str, password: str) -> Dict[str, str]:
+    response = await client.post("/auth/login", data={"username": username, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def setup_fixture(client: httpx.AsyncClient, admin_username: str, admin_password: str, customers: int, products: int) -> LoadFixture:
+    """Creates a tenant with staff, `customers` customers, `products` products and one large pickup slot."""
+    run_id = uuid.uuid4().hex[:8]
+    admin_headers = await _login(client, admin_username, admin_password)
+    response = await client.post("/tenants/", json={"name": f"Load Test {run_id}"}, headers=admin_headers)
+    response.raise_for_status()
+    tenant_id = response.json()["id"]
+
+    async def create_staff(role: str) -> Dict[str, str]:
+        username = f"load_{role}_{run_id}"
+        response = await client.post(f"/tenants/{tenant_id}/staff", json={
+            "username": username, "email": f"{username}@example.com", "password": PASSWORD, "role": role
+        }, headers=admin_headers)
+        response.raise_for_status()
+        return await _login(client, username, PASSWORD)
+
+    tenant_admin_headers = await create_staff("tenant_admin")
+    picker_headers = await create_staff("picker")
+    counter_headers = await create_staff("counter")
+
+    customer_headers = []
+    for index in range(customers):
+        username = f"load_customer_{index}_{run_id}"
+        response = await client.post("/auth/register", json={
+            "username": username, "email": f"{username}@example.com", "password": PASSWORD, "role": "customer", "tenant_id": tenant_id
+        })
+        response.raise_for_status()
+        customer_headers.append(await _login(client, username, PASSWORD))
+
+    product_ids = []
+    for index in range(products):
+        response = await client.post("/products/", json={
+            "name": f"Load Product {index}", "price": 1.0 + index % 10, "sku": f"LOAD-{run_id}-{index}", "stock_quantity": 1_000_000
+        }, headers=tenant_admin_headers)
+        response.raise_for_status()
+        product_ids.append(response.json()["id"])
+
+    response = await client.post("/timeslots/", json={
+        "date": (datetime.date.today() + datetime.timedelta(days=1)).isoformat(),
+        "start_time": "09:00:00", "end_time": "21:00:00", "capacity": 1_000_000
+    }, headers=tenant_admin_headers)
+    response.raise_for_status()
+    return LoadFixture(tenant_id, picker_headers, counter_headers, customer_headers, product_ids, response.json()["id"])
+
+
+class Workload:
+    """Runs the operation mix against `client` (see module docstring)."""
+
+    def __init__(self, client: httpx.AsyncClient, fixture: LoadFixture, mix: Dict[str, int], seed: int = 0):
+        self.client = client
+        self.fixture = fixture
+        self.operations = [name for name, weight in mix.items() if weight > 0]
+        self.weights = [mix[name] for name in self.operations]
+        self.random = random.Random(seed)
+        self.recorder = Recorder()
+        self.carts: Dict[int, int] = {} # Worker -> cart order ID with items
+        self.confirmed: List[int] = []
+        self.ready: List[Tuple[int, str]] = [] # (order ID, pickup token)
+        self.verified: List[int] = []
+
+    async def _request(self, label: str, method: str, url: str, **kwargs: Any) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.recorder.record(label, time.perf_counter() - started, status=None)
+            return None
+        self.recorder.record(label, time.perf_counter() - started, status=response.status_code)
+        return response if response.is_success else None
+
+    async def browse(self, worker: int) -> None:
+        await self._request("GET /products/", "GET", "/products/", params={"tenantId": self.fixture.tenant_id, "limit": 50},
+                            headers=self.fixture.customer_headers[worker])
+
+    async def add_to_cart(self, worker: int) -> None:
+        response = await self._request("POST /orders/cart/items", "POST", "/orders/cart/items",
+                                       json={"product_id": self.random.choice(self.fixture.product_ids), "quantity": 1},
+                                       headers=self.fixture.customer_headers[worker])
+        if response is not None:
+            self.carts[worker] = response.json()["id"]
+
+    async def checkout(self, worker: int) -> None:
+        if worker not in self.carts:
+            await self.add_to_cart(worker)
+            if worker not in self.carts:
+                return
+        cart_id = self.carts.pop(worker)
+        response = await self._request("POST /orders/{cart_order_id}/checkout", "POST", f"/orders/{cart_id}/checkout",
+                                       json={"pickup_slot_id": self.fixture.slot_id}, headers=self.fixture.customer_headers[worker])
+        if response is not None:
+            self.confirmed.append(cart_id)
+
+    async def pick(self, worker: int) -> None:
+        if not self.confirmed:
+            await self.checkout(worker)
+            return
+        order_id = self.confirmed.pop(0)
+        headers = self.fixture.picker_headers
+        if await self._request("POST /picker/orders/{order_id}/start-picking", "POST", f"/picker/orders/{order_id}/start-picking", headers=headers) is None:
+            return
+        response = await self._request("POST /picker/orders/{order_id}/ready-for-pickup", "POST", f"/picker/orders/{order_id}/ready-for-pickup",
+                                       json={}, headers=headers)
+        if response is not None:
+            self.ready.append((order_id, response.json()["pickup_token"]))
+
+    async def verify_pickup(self, worker: int) -> None:
+        if not self.ready:
+            await self.pick(worker)
+            return
+        order_id, pickup_token = self.ready.pop(0)
+        response = await self._request("POST /orders/verify-pickup", "POST", "/orders/verify-pickup",
+                                       json={"pickup_token": pickup_token}, headers=self.fixture.counter_headers)
+        if response is not None:
+            self.verified.append(order_id)
+
+    async def complete(self, worker: int) -> None:
+        if not self.verified:
+            await self.verify_pickup(worker)
+            return
+        order_id = self.verified.pop(0)
+        await self._request("POST /orders/{order_id}/complete-pickup", "POST", f"/orders/{order_id}/complete-pickup",
+                            json={}, headers=self.fixture.counter_headers)
+
+    async def pos_sale(self, worker: int) -> None:
+        items = [{"product_id": product_id, "quantity": 1} for product_id in self.random.sample(self.fixture.product_ids, min(2, len(self.fixture.product_ids)))]
+        await self._request("POST /pos/orders", "POST", "/pos/orders", json={"items": items}, headers=self.fixture.counter_headers)
+
+    async def run(self, operations: int, concurrency: int) -> Dict[str, Any]:
+        """Runs `operations` operations on `concurrency` workers; returns the report."""
+        remaining = operations
+
+        async def worker_loop(worker: int) -> None:
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                operation = self.random.choices(self.operations, weights=self.weights)[0]
+                await getattr(self, operation)(worker)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker_loop(worker) for worker in range(concurrency)))
+        return self.recorder.report(time.perf_counter() - started)
+
+
+def compare_to_baseline(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressions of `report` against `baseline`: slower p95 per endpoint, lower total throughput."""
+    regressions = []
+    if report["throughput_rps"] < baseline["throughput_rps"] * (1 - tolerance):
+        regressions.append(f"throughput {report['throughput_rps']} rps < baseline {baseline['throughput_rps']} rps")
+    for label, stats in report["endpoints"].items():
+        reference = baseline["endpoints"].get(label)
+        if reference and stats["p95_ms"] > reference["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{label}: p95 {stats['p95_ms']} ms > baseline {reference['p95_ms']} ms")
+    return regressions
+
+
+async def run_in_process(args: argparse.Namespace) -> Dict[str, Any]:
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from main import app
+    from app.db.base import Base
+    from app.db.session import get_db, get_read_db
+    from app.schemas.user_schemas import UserCreate, UserRoleEnum
+    from app.services import user_service
+
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bopis_load_'), 'load.db')}"
+    connect_args = {"check_same_thread": False, "timeout": 30} if database_url.startswith("sqlite") else {}
+    engine = create_engine(database_url, connect_args=connect_args)
+    Base.metadata.create_all(bind=engine)
+    LoadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def get_load_db():
+        db = LoadSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = get_load_db
+    app.dependency_overrides[get_read_db] = get_load_db
+    admin_username = f"load_admin_{uuid.uuid4().hex[:8]}"
+    with LoadSessionLocal() as db:
+        user_service.create_user(db, UserCreate(username=admin_username, email=f"{admin_username}@example.com", password=PASSWORD, role=UserRoleEnum.super_admin))
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://load-test") as client:
+            return await run_against(client, args, admin_username, PASSWORD)
+    finally:
+        app.dependency_overrides.clear()
+        engine.dispose()
+
+
+async def run_against(client: httpx.AsyncClient, args: argparse.Namespace, admin_username: str, admin_password: str) -> Dict[str, Any]:
+    fixture = await setup_fixture(client, admin_username, admin_password, customers=args.concurrency, products=args.products)
+    workload = Workload(client, fixture, args.mix, seed=args.seed)
+    report = await workload.run(args.operations, args.concurrency)
+    report["config"] = {
+        "target": args.base_url or "in-process",
+        "operations": args.operations,
+        "concurrency": args.concurrency,
+        "products": args.products,
+        "mix": args.mix,
+        "python": platform.python_version(),
+    }
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Load test of the core BOPIS and POS flows.")
+    parser.add_argument("--operations", type=int, default=2000, help="Operations to run in total.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent workers (one customer each).")
+    parser.add_argument("--products", type=int, default=50, help="Products in the test catalog.")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help="Operation weights, e.g. browse=40,checkout=10,pos_sale=5.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--base-url", help="Run against a server instead of in-process.")
+    parser.add_argument("--admin-username", help="Existing super admin (with --base-url).")
+    parser.add_argument("--admin-password", help="Password of the super admin (with --base-url).")
+    parser.add_argument("--database-url", help="In-process database (default: a new SQLite file).")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout.")
+    parser.add_argument("--baseline", help="Compare against this stored report; exit 1 on regressions.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative p95 / throughput change (default: 0.25).")
+    parser.add_argument("--save-baseline", help="Store the report as a baseline at this path.")
+    args = parser.parse_args(argv)
+
+    if args.base_url:
+        if not (args.admin_username and args.admin_password):
+            parser.error("--base-url requires --admin-username and --admin-password")
+
+        async def run_remote() -> Dict[str, Any]:
+            async with httpx.AsyncClient(base_url=args.base_url, timeout=60) as client:
+                return await run_against(client, args, args.admin_username, args.admin_password)
+        report = asyncio.run(run_remote())
+    else:
+        report = asyncio.run(run_in_process(args))
+
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(rendered + "\n")
+    else:
+        print(rendered)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save_baseline)), exist_ok=True)
+        with open(args.save_baseline, "w") as baseline_file:
+            baseline_file.write(rendered + "\n")
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare_to_baseline(report, json.load(baseline_file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""
+Benchmark of the order list serialization paths on pages of 100 orders.
+
+Compares, per page:
+- legacy: per-object `OrderResponse.model_validate`, then `jsonable_encoder` and stdlib
+  `json.dumps` (what the orm_mode era of FastAPI did for every list response).
+- union response_model: what FastAPI does for `GET /orders/` declared with
+  `Union[List[OrderResponse], List[OrderSummaryResponse]]` when the endpoint returns ORM objects.
+- adapter: `serialization.model_list_response` with the precompiled `ORDER_LIST_ADAPTER`.
+- summary models: `view=summary` built as `OrderSummaryResponse` models and dumped by pydantic.
+- summary raw rows: `view=summary` rows encoded by `serialization.rows_response`.
+
+Orders are transient ORM objects (3 items each, with customer, products and pickup slot),
+so only serialization is measured, not the database.
+
+Usage (from BOPIS_Lou/):
+    python -m benchmarks.serialization_benchmark [--orders 100] [--repeat 200]
+"""
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from typing import Callable, List, Tuple, Union
+import argparse
+import datetime
+import decimal
+import json
+import time
+
+from app.api.endpoints.order_router import ORDER_LIST_ADAPTER
+from app.api.serialization import rows_response, model_list_response
+from app.models.sql_models import (
+    Order, OrderItem, Product, PickupTimeSlot, User,
+    OrderStatus, OrderType, PaymentStatus, UserRole
+)
+from app.schemas.order_schemas import OrderResponse, OrderSummaryResponse
+
+
+def build_orders(count: int) -> List[Order]:
+    now = datetime.datetime(2024, 5, 1, 9, 30, 15, 123456)
+    customer = User(id=1, username="customer", email="customer@example.com", role=UserRole.customer, is_active=True, created_at=now, tenant_id=1)
+    slot = PickupTimeSlot(
+        id=1, tenant_id=1, date=datetime.datetime(2024, 5, 2), start_time=datetime.time(10), end_time=datetime.time(11),
+        capacity=20, current_orders=5, is_active=True, created_at=now, updated_at=now
+    )
+    products = [
+        Product(
+            id=i, tenant_id=1, name=f"Product {i}", description="Fresh produce from the local farm", price=decimal.Decimal("2.50"),
+            sku=f"SKU-{i}", stock_quantity=100, image_url=None, reorder_threshold=None, version=1,
+            last_synced_at=now, created_at=now, updated_at=now
+        )
+        for i in range(1, 4)
+    ]
+    orders = []
+    for order_id in range(1, count + 1):
+        order = Order(
+            id=order_id, user_id=1, tenant_id=1, order_type=OrderType.BOPIS, status=OrderStatus.ORDER_CONFIRMED,
+            payment_status=PaymentStatus.PAID, total_amount=decimal.Decimal("15.00"), pickup_token=f"token-{order_id}",
+            pickup_slot_id=1, assigned_lane_id=None, identity_verification_product_id=None, created_at=now, updated_at=now
+        )
+        order.customer = customer
+        order.pickup_slot = slot
+        order.order_items = [
+            OrderItem(id=order_id * 10 + i, order_id=order_id, product_id=product.id, quantity=2, price_at_purchase=product.price, product=product)
+            for i, product in enumerate(products)
+        ]
+        orders.append(order)
+    return orders
+
+
+class SummaryRow:
+    # Stand-in for a SQLAlchemy Row of `order_service.list_order_summary_rows_for_user`.
+    def __init__(self, order: Order):
+        self._mapping = {
+            "id": order.id, "order_type": order.order_type, "status": order.status, "payment_status": order.payment_status,
+            "total_amount": order.total_amount, "item_count": sum(item.quantity for item in order.order_items),
+            "pickup_slot_id": order.pickup_slot_id, "assigned_lane_id": order.assigned_lane_id, "created_at": order.created_at
+        }
+
+
+def time_per_page(function: Callable[[], bytes], repeat: int) -> Tuple[float, int]:
+    function() # Warm up
+    started = time.perf_counter()
+    for _ in range(repeat):
+        body = function()
+    return (time.perf_counter() - started) / repeat * 1000, len(body)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--orders", type=int, default=100, help="Orders per page.")
+    parser.add_argument("--repeat", type=int, default=200, help="Pages serialized per path.")
+    args = parser.parse_args()
+
+    orders = build_orders(args.orders)
+    rows = [SummaryRow(order) for order in orders]
+    union_adapter = TypeAdapter(Union[List[OrderResponse], List[OrderSummaryResponse]])
+    summary_adapter = TypeAdapter(List[OrderSummaryResponse])
+
+    def legacy() -> bytes:
+        content = jsonable_encoder([OrderResponse.model_validate(order) for order in orders])
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+    def union_response_model() -> bytes:
+        return union_adapter.dump_json(union_adapter.validate_python(orders, from_attributes=True))
+
+    def summary_models() -> bytes:
+        summaries = [
+            OrderSummaryResponse(**{**row._mapping, "order_type": row._mapping["order_type"].value, "status": row._mapping["status"].value,
+                                    "payment_status": row._mapping["payment_status"].value})
+            for row in rows
+        ]
+        return summary_adapter.dump_json(summaries)
+
+    paths = [
+        ("legacy (validate + jsonable_encoder + json)", legacy),
+        ("union response_model", union_response_model),
+        ("adapter (model_list_response)", lambda: model_list_response(ORDER_LIST_ADAPTER, orders).body),
+        ("summary models", summary_models),
+        ("summary raw rows (rows_response)", lambda: rows_response(rows).body),
+    ]
+    baseline = None
+    print(f"{args.orders} orders per page, {args.repeat} pages per path")
+    for name, function in paths:
+        ms, size = time_per_page(function, args.repeat)
+        baseline = baseline or ms
+        print(f"{name:<45} {ms:8.3f} ms/page {baseline / ms:6.1f}x {size:>8} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,10 @@
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles # Added
+from app.api.serialization import FastJSONResponse
+from app.api.compression import CompressionMiddleware
+from app.api.query_metrics import QueryMetricsMiddleware
+from app.api.request_metrics import RequestMetricsMiddleware
+from app.api.static_files import PrecompressedStaticFiles, static_directory
+from app.core.config import settings
 from app.api.endpoints import (
     auth_router,
     tenant_router,
@@ -11,15 +16,35 @@ from app.api.endpoints import (
     picker_router,
     counter_router,
     pos_router,
-    notification_router # Added notification_router
+    notification_router, # Added notification_router
+    sync_router,
+    inventory_router,
+    analytics_router,
+    metrics_router,
+    admin_router
 )
 
 app = FastAPI(
     title="BOPIS/POS API",
     description="API for Buy Online, Pick up In Store (BOPIS) and Point of Sale (POS) operations.",
-    version="0.1.0"
+    version="0.1.0",
+    default_response_class=FastJSONResponse # orjson for endpoints without a response_model
 )
 
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+    zstd_level=settings.COMPRESSION_ZSTD_LEVEL
+)
+app.add_middleware(
+    QueryMetricsMiddleware,
+    add_headers=settings.QUERY_METRICS_HEADERS,
+    repeat_warning_threshold=settings.QUERY_REPEAT_WARNING_THRESHOLD
+)
+app.add_middleware(RequestMetricsMiddleware) # Outermost, so latency includes compression and query counting
+
 @app.get("/")
 async def read_root():
     return {"message": "Welcome to the BOPIS/POS API"}
@@ -35,10 +60,15 @@ app.include_router(picker_router.router, prefix="/picker", tags=["Picker Workflo
 app.include_router(counter_router.router, prefix="/counter", tags=["Counter Workflow"])
 app.include_router(pos_router.router, prefix="/pos", tags=["Point of Sale (POS)"])
 app.include_router(notification_router.router, prefix="/notifications", tags=["Notifications"])
+app.include_router(sync_router.router, prefix="/sync", tags=["Delta Sync"])
+app.include_router(inventory_router.router, prefix="/inventory", tags=["Inventory"])
+app.include_router(analytics_router.router, prefix="/analytics", tags=["Analytics"])
+app.include_router(metrics_router.router, tags=["Monitoring"]) # GET /metrics (Prometheus)
+app.include_router(admin_router.router, prefix="/admin", tags=["Admin"])
 
-# Static files
-app.mount("/frontend", StaticFiles(directory="frontend"), name="frontend")
-app.mount("/mockups", StaticFiles(directory="mockups", html=True), name="mockups")
+# Static files; served from the content-hashed, precompressed build once `python -m app.cli.build_static` has run
+app.mount("/frontend", PrecompressedStaticFiles(directory=static_directory("frontend", settings.STATIC_BUILD_DIR)), name="frontend")
+app.mount("/mockups", PrecompressedStaticFiles(directory=static_directory("mockups", settings.STATIC_BUILD_DIR), html=True), name="mockups")
 
 
 # Further routers will be included here later
@@ -8,7 +8,7 @@ from sqlalchemy.orm import sessionmaker, Session as SQLAlchemySession
 
 from main import app # Main FastAPI app
 from app.db.base import Base # SQLAlchemy Base
-from app.db.session import get_db # Original get_db for overriding
+from app.db.session import get_db, get_read_db # Original dependencies for overriding
 from app.models.sql_models import UserRole, User as UserModel
 from app.schemas.user_schemas import UserCreate, UserRoleEnum
 from app.schemas.token_schemas import Token
@@ -39,6 +39,7 @@ def db_session() -> Generator[SQLAlchemySession, None, None]:
     # Override the app's get_db dependency for this session
     original_get_db = app.dependency_overrides.get(get_db)
     app.dependency_overrides[get_db] = lambda: session
+    app.dependency_overrides[get_read_db] = lambda: session # Tests have no replica; reads see the test transaction
 
     yield session
 
@@ -50,6 +51,7 @@ def db_session() -> Generator[SQLAlchemySession, None, None]:
         app.dependency_overrides[get_db] = original_get_db
     else:
         del app.dependency_overrides[get_db]
+    del app.dependency_overrides[get_read_db]
 
 @pytest.fixture(scope="session")
 def event_loop(request) -> Generator[asyncio.AbstractEventLoop, None, None]:
@@ -0,0 +1,108 @@
+import pytest
+import httpx
+from sqlalchemy.orm import Session as SQLAlchemySession
+from typing import Dict, Callable, Awaitable
+import datetime
+import json
+
+from app.models.sql_models import (
+    User as UserModel, Tenant, Order, OrderItem, Notification, ArchivedOrder, ArchivedNotification, NotificationStatus
+)
+from app.schemas.user_schemas import UserRoleEnum
+from app.schemas.tenant_schemas import TenantResponse
+from app.services import archive_service, sales_analytics_service, tenant_metrics_service
+
+pytestmark = pytest.mark.asyncio
+
+async def test_finished_orders_move_to_archive_and_stay_readable_on_request(
+    async_client: httpx.AsyncClient,
+    db_session: SQLAlchemySession,
+    create_test_user_directly: Callable[..., Awaitable[UserModel]],
+    get_auth_headers: Callable[..., Awaitable[Dict[str, str]]]
+):
+    await create_test_user_directly(username="sa_archive", email="sa_archive@example.com", password="sapassword", role=UserRoleEnum.super_admin)
+    sa_headers = await get_auth_headers(username="sa_archive", password="sapassword")
+    tenants = []
+    for name in ("Archive Mart", "Other Archive Mart"):
+        response = await async_client.post("/tenants/", json={"name": name}, headers=sa_headers)
+        response.raise_for_status()
+        tenants.append(TenantResponse(**response.json()))
+    admins, headers = [], []
+    for index, tenant in enumerate(tenants):
+        admins.append(await create_test_user_directly(username=f"ta_archive{index}", email=f"ta_archive{index}@example.com", password="tapassword", role=UserRoleEnum.tenant_admin, tenant_id=tenant.id))
+        headers.append(await get_auth_headers(username=f"ta_archive{index}", password="tapassword"))
+
+    response = await async_client.post("/products/", json={"name": "Jam", "price": 2.5, "sku": "ARCHIVE-JAM", "stock_quantity": 10}, headers=headers[0])
+    response.raise_for_status()
+    response = await async_client.post("/pos/orders", json={"items": [{"product_id": response.json()["id"], "quantity": 2}]}, headers=headers[0])
+    assert response.status_code == 201, response.text
+    order_id = response.json()["id"]
+    db_session.add(Notification(user_id=admins[0].id, tenant_id=tenants[0].id, message="Sold", related_order_id=order_id))
+    db_session.commit()
+
+    later = datetime.datetime.utcnow() + datetime.timedelta(days=400)
+    # Not in the sales rollups yet: the order stays in place.
+    result = archive_service.archive_orders(db_session, tenant_id=tenants[0].id, now=later)
+    assert result.orders_archived == 0
+    sales_analytics_service.refresh_sales_rollups(db_session, tenant_id=tenants[0].id, until=datetime.datetime.utcnow() + datetime.timedelta(minutes=1))
+
+    result = archive_service.archive_orders(db_session, tenant_id=tenants[0].id, batch_size=1, now=later)
+    assert (result.orders_archived, result.order_items_archived, result.notifications_archived, result.batches) == (1, 1, 1, 1)
+    assert db_session.get(Order, order_id) is None
+    assert db_session.query(OrderItem).filter(OrderItem.order_id == order_id).count() == 0
+    assert db_session.get(ArchivedOrder, order_id).status.value == "COMPLETED"
+
+    # Hot reads no longer see it; explicit archive reads do.
+    response = await async_client.get(f"/orders/{order_id}", headers=headers[0])
+    assert response.status_code == 404
+    response = await async_client.get(f"/orders/{order_id}", params={"include_archived": True}, headers=headers[0])
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert (body["id"], body["status"], body["total_amount"]) == (order_id, "COMPLETED", "5.00")
+    assert [(item["quantity"], item["product"]["sku"]) for item in body["order_items"]] == [(2, "ARCHIVE-JAM")]
+    response = await async_client.get(f"/orders/{order_id}", params={"include_archived": True}, headers=headers[1])
+    assert response.status_code == 403
+
+    response = await async_client.get("/orders/export", headers=headers[0])
+    assert response.text == ""
+    response = await async_client.get("/orders/export", params={"include_archived": True}, headers=headers[0])
+    assert [(row["order_id"], row["sku"]) for row in map(json.loads, response.text.splitlines())] == [(order_id, "ARCHIVE-JAM")]
+
+    # Offline clients are told to drop the order.
+    response = await async_client.get("/sync/changes", params={"since": 0}, headers=headers[0])
+    assert {(c["entity_type"], c["entity_id"], c["op"]) for c in response.json()["changes"]} >= {("order", order_id, "delete")}
+
+    # Dashboard counters still count the archived order.
+    reconciled = tenant_metrics_service.reconcile_tenant_metrics(db_session, tenant_id=tenants[0].id)
+    assert (reconciled.status_counters_corrected, reconciled.daily_sales_corrected) == (0, 0)
+
+async def test_read_notifications_move_to_archive(
+    async_client: httpx.AsyncClient,
+    db_session: SQLAlchemySession,
+    create_test_user_directly: Callable[..., Awaitable[UserModel]],
+    get_auth_headers: Callable[..., Awaitable[Dict[str, str]]]
+):
+    user = await create_test_user_directly(username="cust_archive", email="cust_archive@example.com", password="custpassword", role=UserRoleEnum.customer)
+    headers = await get_auth_headers(username="cust_archive", password="custpassword")
+    tenant = Tenant(name="Notification Archive Mart")
+    db_session.add(tenant)
+    db_session.flush()
+    tenant_id = tenant.id
+    old = datetime.datetime.utcnow() - datetime.timedelta(days=60)
+    db_session.add_all([
+        Notification(user_id=user.id, tenant_id=tenant_id, message="Old read", status=NotificationStatus.READ, created_at=old),
+        Notification(user_id=user.id, tenant_id=tenant_id, message="Old unread", status=NotificationStatus.UNREAD, created_at=old - datetime.timedelta(hours=1)),
+        Notification(user_id=user.id, tenant_id=tenant_id, message="New read", status=NotificationStatus.READ),
+    ])
+    db_session.commit()
+
+    result = archive_service.archive_notifications(db_session, retention_days=30)
+    assert (result.notifications_archived, result.batches) == (1, 1)
+    assert db_session.query(ArchivedNotification).filter(ArchivedNotification.user_id == user.id).one().message == "Old read"
+
+    response = await async_client.get("/notifications/", headers=headers)
+    assert [n["message"] for n in response.json()] == ["New read", "Old unread"]
+    response = await async_client.get("/notifications/", params={"include_archived": True}, headers=headers)
+    assert [n["message"] for n in response.json()] == ["New read", "Old read", "Old unread"]
+    response = await async_client.get("/notifications/", params={"include_archived": True, "skip": 1, "limit": 1}, headers=headers)
+    assert [n["message"] for n in response.json()] == ["Old read"]
@@ -0,0 +1,70 @@
+import gzip
+import json
+import pytest
+import pytest_asyncio
+import httpx
+from typing import Dict, Callable, Awaitable, Any
+
+from app.core.config import settings
+from app.models.sql_models import User as UserModel
+from app.schemas.user_schemas import UserRoleEnum
+from app.schemas.tenant_schemas import TenantResponse
+
+pytestmark = pytest.mark.asyncio
+
+@pytest_asyncio.fixture
+async def snapshot_setup(
+    async_client: httpx.AsyncClient,
+    create_test_user_directly: Callable[..., Awaitable[UserModel]],
+    get_auth_headers: Callable[..., Awaitable[Dict[str, str]]],
+    tmp_path: Any,
+    monkeypatch: Any
+):
+    monkeypatch.setattr(settings, "CATALOG_SNAPSHOT_DIR", str(tmp_path))
+    await create_test_user_directly(username="sa_snap", email="sa_snap@example.com", password="sapassword", role=UserRoleEnum.super_admin)
+    sa_headers = await get_auth_headers(username="sa_snap", password="sapassword")
+    response = await async_client.post("/tenants/", json={"name": "Snapshot Mart"}, headers=sa_headers)
+    response.raise_for_status()
+    tenant = TenantResponse(**response.json())
+
+    await create_test_user_directly(username="ta_snap", email="ta_snap@example.com", password="tapassword", role=UserRoleEnum.tenant_admin, tenant_id=tenant.id)
+    ta_headers = await get_auth_headers(username="ta_snap", password="tapassword")
+    product_ids = []
+    for i in range(3):
+        response = await async_client.post("/products/", json={"name": f"Snap {i}", "price": 3.0, "sku": f"SNAP_{tenant.id}_{i}", "stock_quantity": 4}, headers=ta_headers)
+        response.raise_for_status()
+        product_ids.append(response.json()["id"])
+    return tenant, ta_headers, product_ids
+
+def _parse_snapshot(content: bytes):
+    lines = gzip.decompress(content).decode("utf-8").splitlines()
+    return json.loads(lines[0])["meta"], [json.loads(line) for line in lines[1:]]
+
+async def test_snapshot_download_revalidation_and_incremental_rebuild(async_client: httpx.AsyncClient, snapshot_setup: Any):
+    _, ta_headers, product_ids = snapshot_setup
+
+    response = await async_client.get("/products/snapshot", headers=ta_headers)
+    assert response.status_code == 200, response.text
+    meta, rows = _parse_snapshot(response.content)
+    assert [row["id"] for row in rows] == product_ids
+    assert int(response.headers["X-Change-Seq"]) == meta["change_seq"]
+    etag = response.headers["ETag"]
+
+    response = await async_client.get("/products/snapshot", headers={**ta_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+
+    response = await async_client.get("/products/snapshot", headers={**ta_headers, "Range": "bytes=0-9"})
+    assert response.status_code == 206
+    assert len(response.content) == 10
+
+    response = await async_client.put(f"/products/{product_ids[0]}", json={"price": 9.5}, headers=ta_headers)
+    response.raise_for_status()
+    response = await async_client.delete(f"/products/{product_ids[2]}", headers=ta_headers)
+    response.raise_for_status()
+
+    response = await async_client.get("/products/snapshot", headers={**ta_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    new_meta, rows = _parse_snapshot(response.content)
+    assert new_meta["change_seq"] > meta["change_seq"]
+    assert {row["id"]: row["price"] for row in rows} == {product_ids[0]: "9.50", product_ids[1]: "3.00"}
@@ -0,0 +1,74 @@
+import pytest
+import httpx
+import gzip
+from fastapi import FastAPI
+from httpx import ASGITransport
+
+from app.api.compression import negotiate_encoding
+from app.api.static_files import PrecompressedStaticFiles, IMMUTABLE_CACHE_CONTROL
+from app.cli.build_static import build_static
+
+pytestmark = pytest.mark.asyncio
+
+async def test_responses_are_compressed_with_negotiated_encoding(async_client: httpx.AsyncClient):
+    response = await async_client.get("/openapi.json", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert int(response.headers["Content-Length"]) * 4 < len(response.content) # httpx decodes; JSON schemas shrink a lot
+    assert response.json()["info"]["title"] == "BOPIS/POS API"
+
+    for accept_encoding in ("identity", "gzip;q=0, *;q=0", "deflate"):
+        response = await async_client.get("/openapi.json", headers={"Accept-Encoding": accept_encoding})
+        assert "Content-Encoding" not in response.headers, accept_encoding
+
+    response = await async_client.get("/", headers={"Accept-Encoding": "gzip"}) # Below the minimum size
+    assert "Content-Encoding" not in response.headers
+
+    # Streamed file responses are compressed chunk by chunk.
+    response = await async_client.get("/mockups/styles.css", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    with open("mockups/styles.css", "rb") as source:
+        assert response.content == source.read()
+
+    assert negotiate_encoding("gzip;q=0.5, br", ["br", "gzip"]) == "br"
+    assert negotiate_encoding("gzip, br;q=0.5", ["br", "gzip"]) == "gzip"
+    assert negotiate_encoding("br", ["gzip"]) is None
+    assert negotiate_encoding("*", ["zstd", "gzip"]) == "zstd"
+
+async def test_built_static_assets_are_hashed_precompressed_and_cached(tmp_path):
+    source_root = tmp_path / "src"
+    (source_root / "site" / "js").mkdir(parents=True)
+    (source_root / "site" / "js" / "util.js").write_text("export const greet = () => '" + "hello " * 400 + "';\n")
+    (source_root / "site" / "js" / "app.js").write_text("import { greet } from './util.js';\nconsole.log(greet());\n")
+    (source_root / "site" / "index.html").write_text('<html><script type="module" src="js/app.js"></script>' + "<p>x</p>" * 300 + "</html>")
+    output_dir = tmp_path / "build"
+
+    totals = build_static(str(source_root), str(output_dir), directories=["site"], minimum_size=100)
+    assert (totals["files"], totals["hashed_files"]) == (3, 2)
+    assert totals["gz_bytes"] < totals["bytes"] / 2
+
+    built_app = FastAPI()
+    built_app.mount("/site", PrecompressedStaticFiles(directory=str(output_dir / "site"), html=True), name="site")
+    async with httpx.AsyncClient(transport=ASGITransport(app=built_app), base_url="http://test") as client:
+        index = await client.get("/site/", headers={"Accept-Encoding": "gzip"})
+        assert index.status_code == 200
+        assert index.headers["Cache-Control"] == "no-cache"
+        app_url = index.text.split('src="')[1].split('"')[0]
+        assert app_url.startswith("js/app.") and app_url != "js/app.js"
+
+        app_js = await client.get(f"/site/{app_url}", headers={"Accept-Encoding": "gzip"})
+        assert app_js.headers["Cache-Control"] == IMMUTABLE_CACHE_CONTROL
+        util_url = app_js.text.split("from './")[1].split("'")[0]
+        util_js = await client.get(f"/site/js/{util_url}", headers={"Accept-Encoding": "gzip"})
+        assert util_js.headers["Content-Encoding"] == "gzip" # Served from the .gz sibling
+        assert util_js.headers["Content-Type"].startswith(("text/javascript", "application/javascript"))
+        assert util_js.text == (source_root / "site" / "js" / "util.js").read_text()
+        assert int(util_js.headers["Content-Length"]) == len(gzip.compress(util_js.content, compresslevel=9, mtime=0))
+
+        not_modified = await client.get(f"/site/js/{util_url}", headers={"Accept-Encoding": "gzip", "If-None-Match": util_js.headers["ETag"]})
+        assert not_modified.status_code == 304
+        identity = await client.get(f"/site/js/{util_url}", headers={"Accept-Encoding": "identity"})
+        assert "Content-Encoding" not in identity.headers
+        assert identity.headers["ETag"] != util_js.headers["ETag"]
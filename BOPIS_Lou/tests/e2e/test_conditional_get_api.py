@@ -0,0 +1,84 @@
+import pytest
+import pytest_asyncio
+import httpx
+from typing import Dict, Callable, Awaitable, Any
+import datetime
+
+from sqlalchemy.orm import Session as SQLAlchemySession
+
+from app.models.sql_models import User as UserModel, Lane
+from app.schemas.user_schemas import UserRoleEnum
+from app.schemas.tenant_schemas import TenantResponse
+
+pytestmark = pytest.mark.asyncio
+
+@pytest_asyncio.fixture
+async def conditional_setup(
+    async_client: httpx.AsyncClient,
+    create_test_user_directly: Callable[..., Awaitable[UserModel]],
+    get_auth_headers: Callable[..., Awaitable[Dict[str, str]]]
+):
+    await create_test_user_directly(username="sa_etag", email="sa_etag@example.com", password="sapassword", role=UserRoleEnum.super_admin)
+    sa_headers = await get_auth_headers(username="sa_etag", password="sapassword")
+    response = await async_client.post("/tenants/", json={"name": "ETag Mart"}, headers=sa_headers)
+    response.raise_for_status()
+    tenant = TenantResponse(**response.json())
+
+    await create_test_user_directly(username="ta_etag", email="ta_etag@example.com", password="tapassword", role=UserRoleEnum.tenant_admin, tenant_id=tenant.id)
+    ta_headers = await get_auth_headers(username="ta_etag", password="tapassword")
+    response = await async_client.post("/products/", json={"name": "Cached", "price": 2.0, "sku": f"ETAG_{tenant.id}_1", "stock_quantity": 3}, headers=ta_headers)
+    response.raise_for_status()
+    return tenant, ta_headers, response.json()["id"]
+
+async def _assert_revalidates(async_client: httpx.AsyncClient, url: str, headers: Dict[str, str], params: Any = None) -> str:
+    response = await async_client.get(url, params=params, headers=headers)
+    assert response.status_code == 200, response.text
+    etag = response.headers["ETag"]
+    response = await async_client.get(url, params=params, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    return etag
+
+async def test_product_list_and_detail_return_304_until_changed(async_client: httpx.AsyncClient, conditional_setup: Any):
+    tenant, ta_headers, product_id = conditional_setup
+    list_etag = await _assert_revalidates(async_client, "/products/", ta_headers)
+    detail_etag = await _assert_revalidates(async_client, f"/products/{product_id}", ta_headers)
+
+    response = await async_client.put(f"/products/{product_id}", json={"price": 2.5}, headers=ta_headers)
+    response.raise_for_status()
+
+    response = await async_client.get("/products/", headers={**ta_headers, "If-None-Match": list_etag})
+    assert response.status_code == 200
+    assert response.json()[0]["price"] == "2.50"
+    response = await async_client.get(f"/products/{product_id}", headers={**ta_headers, "If-None-Match": detail_etag})
+    assert response.status_code == 200
+
+    # Deleting a product changes the list validator as well.
+    list_etag = await _assert_revalidates(async_client, "/products/", ta_headers)
+    response = await async_client.delete(f"/products/{product_id}", headers=ta_headers)
+    response.raise_for_status()
+    response = await async_client.get("/products/", headers={**ta_headers, "If-None-Match": list_etag})
+    assert response.status_code == 200
+    assert response.json() == []
+
+async def test_timeslot_and_lane_lists_return_304(async_client: httpx.AsyncClient, db_session: SQLAlchemySession, conditional_setup: Any):
+    tenant, ta_headers, _ = conditional_setup
+    response = await async_client.post("/timeslots/", json={
+        "date": (datetime.date.today() + datetime.timedelta(days=1)).isoformat(),
+        "start_time": "09:00:00", "end_time": "10:00:00", "capacity": 4
+    }, headers=ta_headers)
+    response.raise_for_status()
+    slot_id = response.json()["id"]
+    db_session.add(Lane(name="Lane E", tenant_id=tenant.id))
+    db_session.commit()
+
+    await _assert_revalidates(async_client, "/timeslots/", ta_headers)
+    await _assert_revalidates(async_client, f"/timeslots/{slot_id}", ta_headers)
+    available_etag = await _assert_revalidates(async_client, f"/timeslots/tenant/{tenant.id}/available", ta_headers)
+    await _assert_revalidates(async_client, "/lanes/", ta_headers)
+
+    response = await async_client.put(f"/timeslots/{slot_id}", json={"capacity": 6}, headers=ta_headers)
+    response.raise_for_status()
+    response = await async_client.get(f"/timeslots/tenant/{tenant.id}/available", headers={**ta_headers, "If-None-Match": available_etag})
+    assert response.status_code == 200
+    assert response.json()[0]["capacity"] == 6
@@ -0,0 +1,167 @@
+import pytest
+import pytest_asyncio
+import httpx
+from typing import Dict, Callable, Awaitable, Any
+import datetime
+from sqlalchemy.orm import Session as SQLAlchemySession
+
+from app.models.sql_models import User as UserModel, IdempotencyRecord, IdempotencyStatus
+from app.schemas.user_schemas import UserRoleEnum
+from app.schemas.tenant_schemas import TenantResponse
+from app.schemas.product_schemas import ProductCreate, ProductResponse
+from app.schemas.timeslot_schemas import PickupTimeSlotCreate, PickupTimeSlotResponse
+
+pytestmark = pytest.mark.asyncio
+
+@pytest_asyncio.fixture
+async def idempotency_setup(
+    async_client: httpx.AsyncClient,
+    create_test_user_directly: Callable[..., Awaitable[UserModel]],
+    get_auth_headers: Callable[..., Awaitable[Dict[str, str]]]
+):
+    await create_test_user_directly(username="sa_idem", email="sa_idem@example.com", password="sapassword", role=UserRoleEnum.super_admin)
+    sa_headers = await get_auth_headers(username="sa_idem", password="sapassword")
+    response = await async_client.post("/tenants/", json={"name": "Idempotency Mart"}, headers=sa_headers)
+    response.raise_for_status()
+    tenant = TenantResponse(**response.json())
+
+    await create_test_user_directly(username="ta_idem", email="ta_idem@example.com", password="tapassword", role=UserRoleEnum.tenant_admin, tenant_id=tenant.id)
+    ta_headers = await get_auth_headers(username="ta_idem", password="tapassword")
+    await create_test_user_directly(username="counter_idem", email="counter_idem@example.com", password="counterpassword", role=UserRoleEnum.counter, tenant_id=tenant.id)
+    counter_headers = await get_auth_headers(username="counter_idem", password="counterpassword")
+    await create_test_user_directly(username="cust_idem", email="cust_idem@example.com", password="custpassword", role=UserRoleEnum.customer, tenant_id=tenant.id)
+    customer_headers = await get_auth_headers(username="cust_idem", password="custpassword")
+
+    product_data = ProductCreate(name="Idempotent Tea", price=5.00, sku=f"IDEM_{tenant.id}_001", stock_quantity=10)
+    response = await async_client.post("/products/", json=product_data.model_dump(mode='json'), headers=ta_headers)
+    response.raise_for_status()
+    product = ProductResponse(**response.json())
+
+    timeslot_data = PickupTimeSlotCreate(
+        date=datetime.date.today() + datetime.timedelta(days=1),
+        start_time=datetime.time(10, 0),
+        end_time=datetime.time(11, 0),
+        capacity=5
+    )
+    response = await async_client.post("/timeslots/", json=timeslot_data.model_dump(mode='json'), headers=ta_headers)
+    response.raise_for_status()
+    timeslot = PickupTimeSlotResponse(**response.json())
+
+    return tenant, product, timeslot, ta_headers, counter_headers, customer_headers
+
+async def test_checkout_replay_does_not_book_twice(async_client: httpx.AsyncClient, idempotency_setup: Any):
+    tenant, product, timeslot, ta_headers, _, customer_headers = idempotency_setup
+
+    response = await async_client.post("/orders/cart/items", json={"product_id": product.id, "quantity": 2}, headers=customer_headers)
+    response.raise_for_status()
+    cart_id = response.json()["id"]
+
+    headers = {**customer_headers, "Idempotency-Key": "checkout-key-1"}
+    first = await async_client.post(f"/orders/{cart_id}/checkout", json={"pickup_slot_id": timeslot.id}, headers=headers)
+    assert first.status_code == 200, first.text
+    assert "Idempotent-Replayed" not in first.headers
+
+    # The cart is no longer in CART status, but the retry is answered from the store.
+    retry = await async_client.post(f"/orders/{cart_id}/checkout", json={"pickup_slot_id": timeslot.id}, headers=headers)
+    assert retry.status_code == 200, retry.text
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json()["id"] == first.json()["id"]
+    assert retry.json()["pickup_token"] == first.json()["pickup_token"]
+
+    response = await async_client.get(f"/products/{product.id}", headers=ta_headers)
+    assert response.json()["stock_quantity"] == 8
+    response = await async_client.get(f"/timeslots/{timeslot.id}", headers=ta_headers)
+    assert response.json()["current_orders"] == 1
+
+async def test_idempotency_key_reused_with_different_payload(async_client: httpx.AsyncClient, idempotency_setup: Any):
+    _, product, _, _, counter_headers, _ = idempotency_setup
+    headers = {**counter_headers, "Idempotency-Key": "pos-key-mismatch"}
+
+    response = await async_client.post("/pos/orders", json={"items": [{"product_id": product.id, "quantity": 1}]}, headers=headers)
+    assert response.status_code == 201, response.text
+
+    response = await async_client.post("/pos/orders", json={"items": [{"product_id": product.id, "quantity": 3}]}, headers=headers)
+    assert response.status_code == 422
+
+async def test_pos_order_replay_decrements_stock_once(async_client: httpx.AsyncClient, idempotency_setup: Any):
+    _, product, _, ta_headers, counter_headers, _ = idempotency_setup
+    body = {"items": [{"product_id": product.id, "quantity": 3}], "idempotency_key": "pos-key-1"}
+
+    first = await async_client.post("/pos/orders", json=body, headers=counter_headers)
+    assert first.status_code == 201, first.text
+    retry = await async_client.post("/pos/orders", json=body, headers=counter_headers)
+    assert retry.status_code == 201, retry.text
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json()["id"] == first.json()["id"]
+
+    response = await async_client.get(f"/products/{product.id}", headers=ta_headers)
+    assert response.json()["stock_quantity"] == 7
+
+async def test_pos_batch_upload_partial_success_and_retry(async_client: httpx.AsyncClient, idempotency_setup: Any):
+    _, product, _, ta_headers, counter_headers, _ = idempotency_setup
+    sold_at = datetime.datetime(2024, 5, 1, 9, 30)
+    body = {"sales": [
+        {"items": [{"product_id": product.id, "quantity": 7}], "idempotency_key": "offline-1", "client_created_at": (sold_at + datetime.timedelta(minutes=1)).isoformat()},
+        {"items": [{"product_id": product.id, "quantity": 5}], "idempotency_key": "offline-2", "client_created_at": sold_at.isoformat()},
+        {"items": [{"product_id": 999999, "quantity": 1}], "idempotency_key": "offline-3", "client_created_at": sold_at.isoformat()},
+    ]}
+
+    response = await async_client.post("/pos/orders:batch", json=body, headers=counter_headers)
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert (data["created"], data["replayed"], data["failed"]) == (1, 0, 2)
+    results = data["results"]
+    # The earlier sale (offline-2) gets the stock; the later one no longer fits.
+    assert results[1]["status"] == "CREATED"
+    assert results[1]["order"]["created_at"].startswith("2024-05-01T09:30")
+    assert results[0]["status"] == "FAILED" and "Insufficient stock" in results[0]["error"]
+    assert results[2]["status"] == "FAILED"
+
+    retry = await async_client.post("/pos/orders:batch", json=body, headers=counter_headers)
+    assert retry.status_code == 200, retry.text
+    assert retry.json()["results"][1]["status"] == "REPLAYED"
+    assert retry.json()["results"][1]["order"]["id"] == results[1]["order"]["id"]
+
+    response = await async_client.get(f"/products/{product.id}", headers=ta_headers)
+    assert response.json()["stock_quantity"] == 5
+
+async def test_pos_batch_sale_replays_on_single_endpoint(async_client: httpx.AsyncClient, idempotency_setup: Any):
+    _, product, _, ta_headers, counter_headers, _ = idempotency_setup
+    sale = {"items": [{"product_id": product.id, "quantity": 2}], "idempotency_key": "offline-single", "client_created_at": "2024-05-01T10:00:00Z"}
+
+    response = await async_client.post("/pos/orders:batch", json={"sales": [sale, sale]}, headers=counter_headers)
+    assert response.status_code == 200, response.text
+    assert [r["status"] for r in response.json()["results"]] == ["CREATED", "REPLAYED"]
+
+    single = await async_client.post("/pos/orders", json={"items": sale["items"], "idempotency_key": "offline-single"}, headers=counter_headers)
+    assert single.status_code == 201, single.text
+    assert single.headers["Idempotent-Replayed"] == "true"
+
+    response = await async_client.get(f"/products/{product.id}", headers=ta_headers)
+    assert response.json()["stock_quantity"] == 8
+
+async def test_pos_batch_takes_over_abandoned_claims(async_client: httpx.AsyncClient, idempotency_setup: Any, db_session: SQLAlchemySession):
+    tenant, product, _, ta_headers, counter_headers, _ = idempotency_setup
+    now = datetime.datetime.utcnow()
+    expires_at = now + datetime.timedelta(hours=1)
+    db_session.add_all([
+        IdempotencyRecord(tenant_id=tenant.id, key="offline-abandoned", request_fingerprint="crashed", status=IdempotencyStatus.IN_PROGRESS,
+                          locked_until=now - datetime.timedelta(seconds=1), expires_at=expires_at),
+        IdempotencyRecord(tenant_id=tenant.id, key="offline-running", request_fingerprint="running", status=IdempotencyStatus.IN_PROGRESS,
+                          locked_until=now + datetime.timedelta(minutes=5), expires_at=expires_at),
+    ])
+    db_session.commit()
+    sales = [
+        {"items": [{"product_id": product.id, "quantity": 1}], "idempotency_key": key, "client_created_at": "2024-05-01T10:00:00Z"}
+        for key in ("offline-abandoned", "offline-running")
+    ]
+
+    response = await async_client.post("/pos/orders:batch", json={"sales": sales}, headers=counter_headers)
+    assert response.status_code == 200, response.text
+    results = response.json()["results"]
+    assert results[0]["status"] == "CREATED"
+    assert results[1]["status"] == "FAILED" # A live claim is left alone
+    assert db_session.query(IdempotencyRecord).filter(IdempotencyRecord.key == "offline-running").one().status == IdempotencyStatus.IN_PROGRESS
+
+    response = await async_client.get(f"/products/{product.id}", headers=ta_headers)
+    assert response.json()["stock_quantity"] == 9
@@ -0,0 +1,19 @@
+from app.cli.index_audit import AUDIT_CASES, AuditCase, run_audit
+from app.services import order_service
+
+def test_hot_queries_use_their_indexes():
+    results = run_audit("sqlite://")
+    assert [result["case"] for result in results] == [case.name for case in AUDIT_CASES]
+    failures = [result for result in results if not result["ok"]]
+    assert failures == []
+    counter_queue = next(result for result in results if result["case"] == "counter queue")
+    assert any("ix_orders_ready_tenant_updated_at" in line for line in counter_queue["plan"]) # Partial index matched
+
+def test_audit_reports_plans_missing_the_expected_index():
+    unindexed = AuditCase("staff order list", "orders", "ix_orders_does_not_exist",
+                          lambda db, f: order_service.list_orders_for_picker(db, f.picker))
+    missing_table = AuditCase("no query", "lanes", "ix_lanes_tenant_change_seq", lambda db, f: None)
+    results = run_audit("sqlite://", [unindexed, missing_table])
+    assert [result["ok"] for result in results] == [False, False]
+    assert results[0]["plan"]
+    assert "No SELECT from lanes" in results[1]["error"]
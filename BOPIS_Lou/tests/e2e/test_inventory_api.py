@@ -0,0 +1,228 @@
+import pytest
+import pytest_asyncio
+import httpx
+from typing import Dict, Callable, Awaitable, Any
+import datetime
+from sqlalchemy.orm import Session as SQLAlchemySession
+
+from app.models.sql_models import User as UserModel, Order as OrderModel, OrderStatus, InventoryMovement, InventoryMovementType
+from app.schemas.user_schemas import UserRoleEnum
+from app.schemas.tenant_schemas import TenantResponse
+
+pytestmark = pytest.mark.asyncio
+
+@pytest_asyncio.fixture
+async def inventory_setup(
+    async_client: httpx.AsyncClient,
+    create_test_user_directly: Callable[..., Awaitable[UserModel]],
+    get_auth_headers: Callable[..., Awaitable[Dict[str, str]]]
+):
+    await create_test_user_directly(username="sa_inv", email="sa_inv@example.com", password="sapassword", role=UserRoleEnum.super_admin)
+    sa_headers = await get_auth_headers(username="sa_inv", password="sapassword")
+    response = await async_client.post("/tenants/", json={"name": "Inventory Mart"}, headers=sa_headers)
+    response.raise_for_status()
+    tenant = TenantResponse(**response.json())
+
+    await create_test_user_directly(username="ta_inv", email="ta_inv@example.com", password="tapassword", role=UserRoleEnum.tenant_admin, tenant_id=tenant.id)
+    ta_headers = await get_auth_headers(username="ta_inv", password="tapassword")
+    await create_test_user_directly(username="counter_inv", email="counter_inv@example.com", password="counterpassword", role=UserRoleEnum.counter, tenant_id=tenant.id)
+    counter_headers = await get_auth_headers(username="counter_inv", password="counterpassword")
+    for sku, stock in [("MILK-1", 10), ("EGGS-1", 4)]:
+        response = await async_client.post("/products/", json={"name": sku, "price": 2.0, "sku": sku, "stock_quantity": stock}, headers=ta_headers)
+        response.raise_for_status()
+    return tenant, ta_headers, counter_headers
+
+async def _checkout(async_client: httpx.AsyncClient, headers: Dict[str, str], product_id: int, quantity: int, timeslot_id: int) -> int:
+    response = await async_client.post("/orders/cart/items", json={"product_id": product_id, "quantity": quantity}, headers=headers)
+    response.raise_for_status()
+    response = await async_client.post(f"/orders/{response.json()['id']}/checkout", json={"pickup_slot_id": timeslot_id}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+async def test_bulk_adjustments_apply_in_order_and_write_ledger(async_client: httpx.AsyncClient, db_session: SQLAlchemySession, inventory_setup: Any):
+    tenant, ta_headers, counter_headers = inventory_setup
+    payload = {"adjustments": [
+        {"sku": "MILK-1", "delta": 24, "reason": "RECEIPT"},
+        {"sku": "EGGS-1", "absolute": 9, "reason": "STOCK_COUNT"},
+        {"sku": "MILK-1", "delta": -2, "reason": "DAMAGE", "note": "Leaking cartons"},
+    ]}
+    headers = {**counter_headers, "Idempotency-Key": "truck-0001"}
+    response = await async_client.post("/inventory/adjustments", json=payload, headers=headers)
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["movements_recorded"] == 3
+    by_sku = {p["sku"]: p for p in body["products"]}
+    assert (by_sku["MILK-1"]["previous_quantity"], by_sku["MILK-1"]["new_quantity"], by_sku["MILK-1"]["version"]) == (10, 32, 2)
+    assert (by_sku["EGGS-1"]["previous_quantity"], by_sku["EGGS-1"]["new_quantity"]) == (4, 9)
+
+    movements = db_session.query(InventoryMovement).filter(InventoryMovement.tenant_id == tenant.id).order_by(InventoryMovement.id).all()
+    assert [(m.sku, m.movement_type, m.quantity_delta, m.quantity_after) for m in movements[:2]] == [ # Initial stock of the fixture
+        ("MILK-1", InventoryMovementType.RECEIPT, 10, 10),
+        ("EGGS-1", InventoryMovementType.RECEIPT, 4, 4),
+    ]
+    assert [(m.movement_type, m.quantity_delta, m.quantity_after) for m in movements[2:]] == [
+        (InventoryMovementType.RECEIPT, 24, 34),
+        (InventoryMovementType.STOCK_COUNT, 5, 9),
+        (InventoryMovementType.DAMAGE, -2, 32),
+    ]
+
+    # A retried upload is replayed, not applied twice.
+    response = await async_client.post("/inventory/adjustments", json=payload, headers=headers)
+    assert response.status_code == 200
+    assert response.headers.get("Idempotent-Replayed") == "true"
+    response = await async_client.get(f"/products/{by_sku['MILK-1']['product_id']}", headers=ta_headers)
+    assert response.json()["stock_quantity"] == 32
+
+async def test_adjustments_are_all_or_nothing(async_client: httpx.AsyncClient, db_session: SQLAlchemySession, inventory_setup: Any):
+    tenant, ta_headers, _ = inventory_setup
+    response = await async_client.post("/inventory/adjustments", json={"adjustments": [
+        {"sku": "MILK-1", "delta": 5, "reason": "RECEIPT"},
+        {"sku": "NOPE-1", "delta": 5, "reason": "RECEIPT"},
+    ]}, headers=ta_headers)
+    assert response.status_code == 422
+    assert response.json()["detail"]["unknown_skus"] == ["NOPE-1"]
+
+    response = await async_client.post("/inventory/adjustments", json={"adjustments": [
+        {"sku": "MILK-1", "delta": 5, "reason": "RECEIPT"},
+        {"sku": "EGGS-1", "delta": -5, "reason": "DAMAGE"},
+    ]}, headers=ta_headers)
+    assert response.status_code == 422
+    assert response.json()["detail"]["errors"][0]["index"] == 1
+
+    response = await async_client.post("/inventory/adjustments", json={"adjustments": [{"sku": "MILK-1", "delta": 1, "absolute": 3, "reason": "CORRECTION"}]}, headers=ta_headers)
+    assert response.status_code == 422
+
+    response = await async_client.get("/products/", headers=ta_headers)
+    assert {p["sku"]: p["stock_quantity"] for p in response.json()} == {"MILK-1": 10, "EGGS-1": 4}
+    assert db_session.query(InventoryMovement).filter(InventoryMovement.tenant_id == tenant.id).count() == 2 # Initial stock only
+
+async def test_ledger_and_reconciliation_cover_sales_cancellations_and_handover(
+    async_client: httpx.AsyncClient,
+    db_session: SQLAlchemySession,
+    create_test_user_directly: Callable[..., Awaitable[UserModel]],
+    get_auth_headers: Callable[..., Awaitable[Dict[str, str]]],
+    inventory_setup: Any
+):
+    tenant, ta_headers, counter_headers = inventory_setup
+    await create_test_user_directly(username="cust_inv", email="cust_inv@example.com", password="custpassword", role=UserRoleEnum.customer, tenant_id=tenant.id)
+    customer_headers = await get_auth_headers(username="cust_inv", password="custpassword")
+    response = await async_client.post("/timeslots/", json={
+        "date": (datetime.date.today() + datetime.timedelta(days=1)).isoformat(), "start_time": "10:00:00", "end_time": "11:00:00", "capacity": 5
+    }, headers=ta_headers)
+    response.raise_for_status()
+    timeslot_id = response.json()["id"]
+    milk_id = (await async_client.get("/products/sku/MILK-1", headers=ta_headers)).json()["id"]
+
+    response = await async_client.post("/inventory/adjustments", json={"adjustments": [{"sku": "MILK-1", "delta": 5, "reason": "RECEIPT"}]}, headers=counter_headers)
+    response.raise_for_status()
+    cancelled_order_id = await _checkout(async_client, customer_headers, milk_id, 2, timeslot_id)
+    handed_over_order_id = await _checkout(async_client, customer_headers, milk_id, 1, timeslot_id)
+    response = await async_client.post("/pos/orders", json={"items": [{"product_id": milk_id, "quantity": 3}]}, headers=counter_headers)
+    assert response.status_code == 201, response.text
+
+    response = await async_client.post(f"/orders/{cancelled_order_id}/cancel", headers=customer_headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["status"] == "CANCELLED"
+    response = await async_client.post(f"/orders/{cancelled_order_id}/cancel", headers=customer_headers)
+    assert response.status_code == 400
+    response = await async_client.get(f"/timeslots/{timeslot_id}", headers=ta_headers)
+    assert response.json()["current_orders"] == 1
+
+    db_session.get(OrderModel, handed_over_order_id).status = OrderStatus.READY_FOR_PICKUP
+    db_session.commit()
+    response = await async_client.post(f"/orders/{handed_over_order_id}/complete-pickup", json={}, headers=counter_headers)
+    assert response.status_code == 200, response.text
+
+    movements = db_session.query(InventoryMovement).filter(InventoryMovement.product_id == milk_id).order_by(InventoryMovement.id).all()
+    assert [(m.movement_type, m.quantity_delta, m.quantity_after) for m in movements] == [
+        (InventoryMovementType.RECEIPT, 10, 10),
+        (InventoryMovementType.RECEIPT, 5, 15),
+        (InventoryMovementType.SALE, -2, 13),
+        (InventoryMovementType.SALE, -1, 12),
+        (InventoryMovementType.POS_SALE, -3, 9),
+        (InventoryMovementType.CANCELLATION, 2, 11),
+    ]
+
+    today = datetime.datetime.utcnow().date().isoformat()
+    response = await async_client.get("/inventory/reconciliation", params={"start_date": today, "end_date": today}, headers=ta_headers)
+    assert response.status_code == 200, response.text
+    report = response.json()
+    assert [line["sku"] for line in report["lines"]] == ["EGGS-1", "MILK-1"]
+    milk = report["lines"][1]
+    assert {k: milk[k] for k in ("received", "sold_bopis", "sold_pos", "cancelled", "adjusted", "handed_over", "net_change", "awaiting_handover")} == {
+        "received": 15, "sold_bopis": 3, "sold_pos": 3, "cancelled": 2, "adjusted": 0, "handed_over": 1, "net_change": 11, "awaiting_handover": 0
+    }
+    assert report["totals"]["net_change"] == 15
+    response = await async_client.get(f"/products/{milk_id}", headers=ta_headers)
+    assert response.json()["stock_quantity"] == milk["net_change"] # Every unit since the product was created is in the ledger
+
+    response = await async_client.get("/inventory/reconciliation", params={"start_date": today, "end_date": today}, headers=counter_headers)
+    assert response.status_code == 403
+
+async def test_product_edits_and_imports_record_stock_changes_in_the_ledger(async_client: httpx.AsyncClient, db_session: SQLAlchemySession, inventory_setup: Any):
+    tenant, ta_headers, _ = inventory_setup
+    milk_id = (await async_client.get("/products/sku/MILK-1", headers=ta_headers)).json()["id"]
+    response = await async_client.put(f"/products/{milk_id}", json={"stock_quantity": 7}, headers=ta_headers)
+    response.raise_for_status()
+    response = await async_client.put(f"/products/{milk_id}", json={"name": "Milk"}, headers=ta_headers) # No stock change, no movement
+    response.raise_for_status()
+
+    csv_body = "sku,name,price,stock_quantity\nMILK-1,Milk,2.0,12\nJAM-1,Jam,3.0,6\n"
+    response = await async_client.post("/products/import", files={"file": ("products.csv", csv_body, "text/csv")}, headers=ta_headers)
+    assert response.status_code == 200, response.text
+    response = await async_client.post("/products/import", files={"file": ("prices.csv", "sku,name,price\nEGGS-1,EGGS-1,2.5\n", "text/csv")}, headers=ta_headers)
+    assert response.json()["updated"] == 1
+
+    movements = db_session.query(InventoryMovement).filter(InventoryMovement.tenant_id == tenant.id).order_by(InventoryMovement.id).all()
+    assert [(m.sku, m.movement_type, m.quantity_delta, m.quantity_after) for m in movements] == [
+        ("MILK-1", InventoryMovementType.RECEIPT, 10, 10),
+        ("EGGS-1", InventoryMovementType.RECEIPT, 4, 4),
+        ("MILK-1", InventoryMovementType.CORRECTION, -3, 7),
+        ("MILK-1", InventoryMovementType.STOCK_COUNT, 5, 12),
+        ("JAM-1", InventoryMovementType.RECEIPT, 6, 6),
+    ]
+
+    # Deleting a product keeps its ledger history; the report still adds up.
+    jam_id = movements[-1].product_id
+    response = await async_client.delete(f"/products/{jam_id}", headers=ta_headers)
+    response.raise_for_status()
+    db_session.expire_all()
+    assert db_session.query(InventoryMovement).filter(InventoryMovement.sku == "JAM-1").count() == 1
+    today = datetime.datetime.utcnow().date().isoformat()
+    report = (await async_client.get("/inventory/reconciliation", params={"start_date": today, "end_date": today}, headers=ta_headers)).json()
+    assert [(line["sku"], line["net_change"]) for line in report["lines"]] == [("EGGS-1", 4), ("MILK-1", 12), (None, 6)]
+    assert report["totals"]["net_change"] == 22
+
+async def test_low_stock_alerts_follow_stock_changes(async_client: httpx.AsyncClient, inventory_setup: Any):
+    _, ta_headers, counter_headers = inventory_setup
+    milk = (await async_client.get("/products/sku/MILK-1", headers=ta_headers)).json()
+    response = await async_client.put(f"/products/{milk['id']}", json={"reorder_threshold": 8}, headers=ta_headers)
+    response.raise_for_status()
+    response = await async_client.get("/inventory/alerts", headers=counter_headers)
+    assert response.json() == []
+
+    response = await async_client.post("/pos/orders", json={"items": [{"product_id": milk["id"], "quantity": 3}]}, headers=counter_headers)
+    assert response.status_code == 201, response.text
+    response = await async_client.get("/inventory/alerts", headers=counter_headers)
+    assert [(a["sku"], a["stock_quantity"], a["threshold"]) for a in response.json()] == [("MILK-1", 7, 8)]
+    notifications = (await async_client.get("/notifications/", headers=ta_headers)).json()
+    assert len(notifications) == 1 and "MILK-1" in notifications[0]["message"]
+
+    # Further sales keep the single alert; restocking resolves it.
+    response = await async_client.post("/pos/orders", json={"items": [{"product_id": milk["id"], "quantity": 1}]}, headers=counter_headers)
+    assert response.status_code == 201
+    response = await async_client.post("/inventory/adjustments", json={"adjustments": [{"sku": "MILK-1", "delta": 10, "reason": "RECEIPT"}]}, headers=counter_headers)
+    response.raise_for_status()
+    assert (await async_client.get("/inventory/alerts", headers=counter_headers)).json() == []
+
+    # Dropping again right away re-raises the alert without notifying again (rate limit).
+    response = await async_client.post("/inventory/adjustments", json={"adjustments": [{"sku": "MILK-1", "absolute": 2, "reason": "STOCK_COUNT"}]}, headers=counter_headers)
+    response.raise_for_status()
+    assert len((await async_client.get("/inventory/alerts", headers=counter_headers)).json()) == 1
+    assert len((await async_client.get("/notifications/", headers=ta_headers)).json()) == 1
+
+    # The tenant default applies to products without their own threshold.
+    response = await async_client.put("/inventory/alert-settings", json={"default_reorder_threshold": 5}, headers=ta_headers)
+    assert response.status_code == 200, response.text
+    alerts = (await async_client.get("/inventory/alerts", headers=counter_headers)).json()
+    assert sorted((a["sku"], a["threshold"]) for a in alerts) == [("EGGS-1", 5), ("MILK-1", 8)]
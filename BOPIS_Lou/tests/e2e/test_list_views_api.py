@@ -0,0 +1,75 @@
+import pytest
+import httpx
+from typing import Dict, Callable, Awaitable, List, Tuple
+import datetime
+from sqlalchemy import event
+from sqlalchemy.orm import Session as SQLAlchemySession
+
+from app.models.sql_models import User as UserModel
+from app.schemas.user_schemas import UserRoleEnum
+from app.schemas.tenant_schemas import TenantResponse
+
+pytestmark = pytest.mark.asyncio
+
+async def _get_counting_statements(async_client: httpx.AsyncClient, db_session: SQLAlchemySession, url: str, **kwargs) -> Tuple[httpx.Response, List[str]]:
+    statements: List[str] = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db_session.get_bind(), "before_cursor_execute", listener)
+    try:
+        response = await async_client.get(url, **kwargs)
+    finally:
+        event.remove(db_session.get_bind(), "before_cursor_execute", listener)
+    return response, statements
+
+async def test_summary_views_return_flat_rows_with_fewer_queries(
+    async_client: httpx.AsyncClient,
+    db_session: SQLAlchemySession,
+    create_test_user_directly: Callable[..., Awaitable[UserModel]],
+    get_auth_headers: Callable[..., Awaitable[Dict[str, str]]]
+):
+    await create_test_user_directly(username="sa_views", email="sa_views@example.com", password="sapassword", role=UserRoleEnum.super_admin)
+    sa_headers = await get_auth_headers(username="sa_views", password="sapassword")
+    response = await async_client.post("/tenants/", json={"name": "Views Mart"}, headers=sa_headers)
+    response.raise_for_status()
+    tenant = TenantResponse(**response.json())
+    await create_test_user_directly(username="ta_views", email="ta_views@example.com", password="tapassword", role=UserRoleEnum.tenant_admin, tenant_id=tenant.id)
+    ta_headers = await get_auth_headers(username="ta_views", password="tapassword")
+    await create_test_user_directly(username="cust_views", email="cust_views@example.com", password="custpassword", role=UserRoleEnum.customer, tenant_id=tenant.id)
+    customer_headers = await get_auth_headers(username="cust_views", password="custpassword")
+
+    product_ids = []
+    for sku in ("APPLE-1", "PEAR-1"):
+        response = await async_client.post("/products/", json={"name": sku, "description": "Fresh fruit", "price": 0.5, "sku": sku, "stock_quantity": 30}, headers=ta_headers)
+        response.raise_for_status()
+        product_ids.append(response.json()["id"])
+    slot_date = (datetime.date.today() + datetime.timedelta(days=1)).isoformat()
+    response = await async_client.post("/timeslots/", json={"date": slot_date, "start_time": "09:00:00", "end_time": "10:00:00", "capacity": 3}, headers=ta_headers)
+    response.raise_for_status()
+    timeslot_id = response.json()["id"]
+    for product_id, quantity in zip(product_ids, (3, 2)):
+        response = await async_client.post("/orders/cart/items", json={"product_id": product_id, "quantity": quantity}, headers=customer_headers)
+        response.raise_for_status()
+    response = await async_client.post(f"/orders/{response.json()['id']}/checkout", json={"pickup_slot_id": timeslot_id}, headers=customer_headers)
+    assert response.status_code == 200, response.text
+
+    response = await async_client.get("/products/", params={"view": "summary"}, headers=ta_headers)
+    assert response.status_code == 200, response.text
+    assert set(response.json()[0]) == {"id", "name", "sku", "price", "stock_quantity", "image_url", "version"}
+    full = await async_client.get("/products/", headers=ta_headers)
+    assert "description" in full.json()[0]
+    assert response.headers["ETag"] != full.headers["ETag"]
+
+    response = await async_client.get(f"/timeslots/tenant/{tenant.id}/available", params={"view": "summary"})
+    assert response.status_code == 200, response.text
+    assert response.json() == [{"id": timeslot_id, "date": slot_date, "start_time": "09:00:00", "end_time": "10:00:00", "capacity": 3, "current_orders": 1, "is_active": True}]
+
+    summary, summary_statements = await _get_counting_statements(async_client, db_session, "/orders/", params={"view": "summary"}, headers=ta_headers)
+    assert summary.status_code == 200, summary.text
+    orders = [o for o in summary.json() if o["status"] != "CART"]
+    assert [(o["item_count"], o["status"], o["pickup_slot_id"]) for o in orders] == [(5, "ORDER_CONFIRMED", timeslot_id)]
+    assert "order_items" not in orders[0]
+
+    full, full_statements = await _get_counting_statements(async_client, db_session, "/orders/", headers=ta_headers)
+    assert full.status_code == 200
+    assert len(summary.content) * 3 < len(full.content)
+    assert len(summary_statements) < len(full_statements)
@@ -0,0 +1,33 @@
+import pytest
+import httpx
+from typing import Callable, Awaitable
+
+from app.models.sql_models import User as UserModel
+from app.schemas.user_schemas import UserRoleEnum
+from benchmarks.load_benchmark import DEFAULT_MIX, Workload, compare_to_baseline, percentile, setup_fixture
+
+pytestmark = pytest.mark.asyncio
+
+async def test_workload_runs_every_flow_and_reports_percentiles(
+    async_client: httpx.AsyncClient,
+    create_test_user_directly: Callable[..., Awaitable[UserModel]]
+):
+    await create_test_user_directly(username="sa_load", email="sa_load@example.com", password="sapassword", role=UserRoleEnum.super_admin)
+    fixture = await setup_fixture(async_client, "sa_load", "sapassword", customers=1, products=3)
+
+    # One worker: the test database is a single shared session.
+    report = await Workload(async_client, fixture, DEFAULT_MIX, seed=1).run(operations=60, concurrency=1)
+    assert report["errors"] == 0, report
+    for label in ("GET /products/", "POST /orders/{cart_order_id}/checkout", "POST /picker/orders/{order_id}/ready-for-pickup",
+                  "POST /orders/verify-pickup", "POST /orders/{order_id}/complete-pickup", "POST /pos/orders"):
+        stats = report["endpoints"][label]
+        assert stats["count"] > 0, label
+        assert 0 < stats["p50_ms"] <= stats["p95_ms"] <= stats["p99_ms"]
+    assert report["requests"] == sum(stats["count"] for stats in report["endpoints"].values())
+
+    slower = {**report, "endpoints": {label: {**stats, "p95_ms": stats["p95_ms"] * 2} for label, stats in report["endpoints"].items()}}
+    assert compare_to_baseline(report, report, tolerance=0.25) == []
+    assert len(compare_to_baseline(slower, report, tolerance=0.25)) == len(report["endpoints"])
+
+    assert percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.0
+    assert percentile([1.0, 2.0, 3.0, 4.0], 99) == 4.0
@@ -0,0 +1,109 @@
+import pytest
+import httpx
+import decimal
+import json
+import os
+from typing import Dict, Callable, Awaitable
+import datetime
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session as SQLAlchemySession
+
+from app.core import metrics
+from app.core.config import settings
+from app.models.sql_models import Tenant, Product, User as UserModel
+from app.schemas.user_schemas import UserRoleEnum
+from app.schemas.tenant_schemas import TenantResponse
+from app.services import product_service
+
+pytestmark = pytest.mark.asyncio
+
+def _sample(text: str, line_prefix: str) -> float:
+    return float(next(line for line in text.splitlines() if line.startswith(line_prefix)).rsplit(" ", 1)[1])
+
+async def test_metrics_endpoint_reports_requests_latency_and_business_counters(
+    async_client: httpx.AsyncClient,
+    create_test_user_directly: Callable[..., Awaitable[UserModel]],
+    get_auth_headers: Callable[..., Awaitable[Dict[str, str]]]
+):
+    await create_test_user_directly(username="sa_metrics", email="sa_metrics@example.com", password="sapassword", role=UserRoleEnum.super_admin)
+    sa_headers = await get_auth_headers(username="sa_metrics", password="sapassword")
+    response = await async_client.post("/tenants/", json={"name": "Metrics Mart"}, headers=sa_headers)
+    tenant = TenantResponse(**response.json())
+    await create_test_user_directly(username="ta_metrics", email="ta_metrics@example.com", password="tapassword", role=UserRoleEnum.tenant_admin, tenant_id=tenant.id)
+    ta_headers = await get_auth_headers(username="ta_metrics", password="tapassword")
+    await create_test_user_directly(username="cust_metrics", email="cust_metrics@example.com", password="custpassword", role=UserRoleEnum.customer, tenant_id=tenant.id)
+    customer_headers = await get_auth_headers(username="cust_metrics", password="custpassword")
+
+    checkouts_before = metrics.CHECKOUTS.value()
+    bookings_before = metrics.SLOT_BOOKINGS.value()
+    response = await async_client.post("/timeslots/", json={"date": datetime.date.today().isoformat(), "start_time": "10:00:00", "end_time": "11:00:00", "capacity": 5}, headers=ta_headers)
+    timeslot_id = response.json()["id"]
+    response = await async_client.post("/products/", json={"name": "Gauge", "price": 3.0, "sku": "METRICS-1", "stock_quantity": 10}, headers=ta_headers)
+    response = await async_client.post("/orders/cart/items", json={"product_id": response.json()["id"], "quantity": 1}, headers=customer_headers)
+    response = await async_client.post(f"/orders/{response.json()['id']}/checkout", json={"pickup_slot_id": timeslot_id}, headers=customer_headers)
+    assert response.status_code == 200, response.text
+    order_id = response.json()["id"]
+    for _ in range(2):
+        assert (await async_client.get(f"/orders/{order_id}", headers=customer_headers)).status_code == 200
+    assert (await async_client.get("/orders/999999", headers=customer_headers)).status_code == 404
+
+    response = await async_client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert "# TYPE bopis_http_request_duration_seconds histogram" in text
+    # Labelled by route template, not by concrete path.
+    assert _sample(text, 'bopis_http_requests_total{method="GET",route="/orders/{order_id}",status="200"}') >= 2
+    assert _sample(text, 'bopis_http_requests_total{method="GET",route="/orders/{order_id}",status="404"}') >= 1
+    assert "route=\"/orders/999999\"" not in text
+    assert _sample(text, 'bopis_http_request_duration_seconds_bucket{method="GET",route="/orders/{order_id}",status="200",le="+Inf"}') >= 2
+    assert _sample(text, 'bopis_db_queries_total{method="GET",route="/orders/{order_id}"}') > 0
+    assert _sample(text, "bopis_http_requests_in_progress ") == 1 # The scrape itself
+    assert _sample(text, "bopis_checkouts_total ") == checkouts_before + 1
+    assert _sample(text, "bopis_slot_bookings_total ") == bookings_before + 1
+
+async def test_stock_conflicts_are_counted(db_session: SQLAlchemySession):
+    tenant = Tenant(name="Conflict Mart")
+    db_session.add(tenant)
+    db_session.flush()
+    product = Product(name="Contended", sku="CONFLICT_1", price=decimal.Decimal("1.00"), tenant_id=tenant.id, stock_quantity=5)
+    db_session.add(product)
+    db_session.commit()
+
+    before = metrics.STOCK_CONFLICTS.value(operation="decrement_stock")
+    with pytest.raises(HTTPException) as conflict:
+        product_service.decrement_stock(db_session, product_id=product.id, quantity=1, tenant_id=tenant.id, expected_version=product.version + 1)
+    assert conflict.value.status_code == 409
+    assert metrics.STOCK_CONFLICTS.value(operation="decrement_stock") == before + 1
+
+async def test_metrics_token_is_enforced(async_client: httpx.AsyncClient, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_BEARER_TOKEN", "scrape-secret")
+    assert (await async_client.get("/metrics")).status_code == 401
+    assert (await async_client.get("/metrics", headers={"Authorization": "Bearer wrong"})).status_code == 401
+    assert (await async_client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})).status_code == 200
+
+async def test_multiprocess_snapshots_are_merged(tmp_path):
+    registry = metrics.Registry(multiprocess_dir=str(tmp_path))
+    requests = metrics.Counter("test_requests_total", "Requests.", ("route",), registry=registry)
+    latency = metrics.Histogram("test_latency_seconds", "Latency.", registry=registry, buckets=(0.1, 1.0))
+    in_flight = metrics.Gauge("test_in_flight", "In flight.", registry=registry)
+    pool = metrics.Gauge("test_pool_checked_out", "Pool.", registry=registry, multiprocess_mode="all")
+    requests.inc(route="/a")
+    latency.observe(0.05)
+    in_flight.set(2)
+    pool.set(3)
+    registry.flush()
+
+    # Another running worker (the parent process) and one that has exited.
+    own_snapshot = json.loads((tmp_path / f"metrics-{os.getpid()}.json").read_text())
+    for pid in (os.getppid(), 2 ** 22 + 1):
+        (tmp_path / f"metrics-{pid}.json").write_text(json.dumps({**own_snapshot, "pid": pid}))
+
+    text = registry.render()
+    assert _sample(text, 'test_requests_total{route="/a"}') == 3 # Counters keep exited workers' totals
+    assert _sample(text, 'test_latency_seconds_bucket{le="0.1"}') == 3
+    assert _sample(text, 'test_latency_seconds_count') == 3
+    assert _sample(text, "test_in_flight ") == 4 # Live workers only
+    assert _sample(text, f'test_pool_checked_out{{pid="{os.getppid()}"}}') == 3
+    assert f'pid="{2 ** 22 + 1}"' not in text
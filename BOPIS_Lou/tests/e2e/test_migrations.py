@@ -0,0 +1,112 @@
+from contextlib import contextmanager
+import os
+import pytest
+
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import create_engine, inspect, text
+
+from app.core.config import settings
+from app.db import online_migrations
+from app.db.base import Base
+
+ALEMBIC_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "alembic")
+
+def _alembic_config() -> Config:
+    config = Config() # No ini file: env.py leaves the test run's logging configuration alone
+    config.set_main_option("script_location", ALEMBIC_DIR)
+    return config
+
+@contextmanager
+def migration_operations(engine):
+    """Runs `op.*` on a new connection of `engine`, inside a migration transaction like `alembic upgrade`."""
+    with engine.connect() as connection:
+        context = MigrationContext.configure(connection, opts={"transactional_ddl": True})
+        with Operations.context(context), context.begin_transaction():
+            yield
+
+def test_migrations_build_the_model_schema_and_downgrade_cleanly(tmp_path, monkeypatch: pytest.MonkeyPatch):
+    database_url = f"sqlite:///{tmp_path / 'migrated.db'}"
+    monkeypatch.setattr(settings, "SQLALCHEMY_DATABASE_URL", database_url) # env.py takes the URL from settings
+    command.upgrade(_alembic_config(), "head")
+
+    engine = create_engine(database_url)
+    with engine.connect() as connection:
+        context = MigrationContext.configure(connection, opts={"include_object": lambda obj, name, type_, *_: not (type_ == "table" and name.startswith("products_fts"))})
+        differences = [
+            difference for difference in compare_metadata(context, Base.metadata)
+            if not (difference[0] == "add_index" and difference[1].name == "ix_products_tenant_sku_prefix") # PostgreSQL only
+        ]
+        assert differences == []
+        connection.execute(text("INSERT INTO tenants (name) VALUES ('Migrated')"))
+        connection.execute(text("INSERT INTO users (username, email, password_hash, role, tenant_id) VALUES ('u', 'u@example.com', 'x', 'customer', 1)"))
+        connection.execute(text("INSERT INTO products (name, sku, price, tenant_id, stock_quantity) VALUES ('Searchable', 'MIG-1', 1, 1, 0)"))
+        assert connection.execute(text("SELECT rowid FROM products_fts WHERE products_fts MATCH 'Searchable'")).all() == [(1,)]
+        connection.rollback()
+
+    command.downgrade(_alembic_config(), "base")
+    assert inspect(engine).get_table_names() == ["alembic_version"]
+    engine.dispose()
+
+def test_series_revision_backfills_change_seq_of_existing_rows(tmp_path, monkeypatch: pytest.MonkeyPatch):
+    database_url = f"sqlite:///{tmp_path / 'pre_series.db'}"
+    monkeypatch.setattr(settings, "SQLALCHEMY_DATABASE_URL", database_url)
+    command.upgrade(_alembic_config(), "5271de4ae265")
+    engine = create_engine(database_url)
+    with engine.begin() as connection: # Rows written by the application before the series revision
+        connection.execute(text("INSERT INTO tenants (id, name) VALUES (1, 'Old Mart'), (2, 'Other Old Mart')"))
+        connection.execute(text("INSERT INTO users (id, username, email, password_hash, role, tenant_id) VALUES (1, 'u', 'u@example.com', 'x', 'customer', 1)"))
+        connection.execute(text("INSERT INTO products (id, name, sku, price, tenant_id, stock_quantity) VALUES (1, 'Old Jam', 'OLD-1', 1, 1, 5), (2, 'Old Tea', 'OLD-2', 1, 2, 5)"))
+        connection.execute(text("INSERT INTO lanes (id, tenant_id, name, status) VALUES (1, 1, 'Lane 1', 'OPEN')"))
+        connection.execute(text(
+            "INSERT INTO orders (id, user_id, tenant_id, order_type, status, payment_status, total_amount) "
+            "VALUES (1, 1, 1, 'BOPIS', 'ORDER_CONFIRMED', 'PAID', 1), (2, 1, 1, 'BOPIS', 'CART', 'UNPAID', 1)"
+        ))
+
+    command.upgrade(_alembic_config(), "head")
+    with engine.connect() as connection:
+        seqs = connection.execute(text(
+            "SELECT change_seq FROM products WHERE tenant_id = 1 UNION ALL SELECT change_seq FROM lanes UNION ALL SELECT change_seq FROM orders WHERE id = 1"
+        )).scalars().all()
+        assert None not in seqs and len(set(seqs)) == 3
+        assert connection.execute(text("SELECT change_seq FROM orders WHERE id = 2")).scalar() is None # Carts are not tracked
+        counters = dict(connection.execute(text("SELECT tenant_id, last_seq FROM tenant_change_counters")).all())
+        assert counters == {1: max(seqs), 2: connection.execute(text("SELECT change_seq FROM products WHERE tenant_id = 2")).scalar()}
+        assert connection.execute(text("SELECT rowid FROM products_fts WHERE products_fts MATCH 'Jam'")).all() == [(1,)]
+    engine.dispose()
+
+def test_backfill_in_batches_commits_each_key_range_and_resumes(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'backfill.db'}")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, amount INTEGER, doubled INTEGER)"))
+        connection.execute(text("INSERT INTO items (id, amount, doubled) VALUES (:id, :id, NULL)"), [{"id": item_id} for item_id in range(1, 26)])
+        connection.execute(text("UPDATE items SET doubled = 0 WHERE id = 3")) # Done by an earlier, interrupted run
+
+    progress = []
+    with migration_operations(engine):
+        updated = online_migrations.backfill_in_batches(
+                "items", "doubled = amount * 2", where="doubled IS NULL", batch_size=10,
+                progress=lambda table, rows, done_up_to, highest, elapsed: progress.append((rows, done_up_to, highest))
+            )
+    assert updated == 24
+    assert progress == [(9, 10, 25), (19, 20, 25), (24, 25, 25)]
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT COUNT(*) FROM items WHERE doubled = amount * 2")).scalar() == 24
+        assert connection.execute(text("SELECT doubled FROM items WHERE id = 3")).scalar() == 0
+    engine.dispose()
+
+def test_create_index_concurrently_is_idempotent(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'index.db'}")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, status VARCHAR, amount INTEGER)"))
+    for _ in range(2):
+        with migration_operations(engine):
+            online_migrations.create_index_concurrently("ix_items_open_amount", "items", ["amount"], where="status = 'OPEN'")
+    assert [index["name"] for index in inspect(engine).get_indexes("items")] == ["ix_items_open_amount"]
+    with migration_operations(engine):
+        online_migrations.drop_index_concurrently("ix_items_open_amount", "items")
+    assert inspect(engine).get_indexes("items") == []
+    engine.dispose()
@@ -0,0 +1,54 @@
+import pytest
+import httpx
+from typing import Dict, Callable, Awaitable
+import csv
+import io
+import json
+
+from app.models.sql_models import User as UserModel
+from app.schemas.user_schemas import UserRoleEnum
+from app.schemas.tenant_schemas import TenantResponse
+
+pytestmark = pytest.mark.asyncio
+
+async def test_export_streams_flat_order_item_rows(
+    async_client: httpx.AsyncClient,
+    create_test_user_directly: Callable[..., Awaitable[UserModel]],
+    get_auth_headers: Callable[..., Awaitable[Dict[str, str]]]
+):
+    await create_test_user_directly(username="sa_export", email="sa_export@example.com", password="sapassword", role=UserRoleEnum.super_admin)
+    sa_headers = await get_auth_headers(username="sa_export", password="sapassword")
+    tenants = []
+    for name in ("Export Mart", "Other Export Mart"):
+        response = await async_client.post("/tenants/", json={"name": name}, headers=sa_headers)
+        response.raise_for_status()
+        tenants.append(TenantResponse(**response.json()))
+    headers = []
+    for index, tenant in enumerate(tenants):
+        await create_test_user_directly(username=f"ta_export{index}", email=f"ta_export{index}@example.com", password="tapassword", role=UserRoleEnum.tenant_admin, tenant_id=tenant.id)
+        headers.append(await get_auth_headers(username=f"ta_export{index}", password="tapassword"))
+
+    skus = {}
+    for sku in ("JAM-1", "TOAST-1"):
+        response = await async_client.post("/products/", json={"name": sku, "price": 1.5, "sku": sku, "stock_quantity": 10}, headers=headers[0])
+        response.raise_for_status()
+        skus[sku] = response.json()["id"]
+    response = await async_client.post("/pos/orders", json={"items": [{"product_id": skus["JAM-1"], "quantity": 2}, {"product_id": skus["TOAST-1"], "quantity": 1}]}, headers=headers[0])
+    assert response.status_code == 201, response.text
+    order_id = response.json()["id"]
+
+    response = await async_client.get("/orders/export", headers=headers[0])
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [(r["order_id"], r["sku"], r["quantity"], r["status"], r["price_at_purchase"]) for r in rows] == [
+        (order_id, "JAM-1", 2, "COMPLETED", "1.50"), (order_id, "TOAST-1", 1, "COMPLETED", "1.50")
+    ]
+
+    response = await async_client.get("/orders/export", params={"format": "csv", "status": "COMPLETED"}, headers=headers[0])
+    records = list(csv.DictReader(io.StringIO(response.text)))
+    assert [(r["order_id"], r["sku"]) for r in records] == [(str(order_id), "JAM-1"), (str(order_id), "TOAST-1")]
+
+    # Other tenants' orders are not visible.
+    response = await async_client.get("/orders/export", headers=headers[1])
+    assert response.status_code == 200 and response.text == ""
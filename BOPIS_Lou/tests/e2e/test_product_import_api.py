@@ -0,0 +1,77 @@
+import pytest
+import pytest_asyncio
+import httpx
+import json
+from typing import Dict, Callable, Awaitable, Any
+
+from app.models.sql_models import User as UserModel
+from app.schemas.user_schemas import UserRoleEnum
+from app.schemas.tenant_schemas import TenantResponse
+
+pytestmark = pytest.mark.asyncio
+
+@pytest_asyncio.fixture
+async def import_setup(
+    async_client: httpx.AsyncClient,
+    create_test_user_directly: Callable[..., Awaitable[UserModel]],
+    get_auth_headers: Callable[..., Awaitable[Dict[str, str]]]
+):
+    await create_test_user_directly(username="sa_import", email="sa_import@example.com", password="sapassword", role=UserRoleEnum.super_admin)
+    sa_headers = await get_auth_headers(username="sa_import", password="sapassword")
+    response = await async_client.post("/tenants/", json={"name": "Import Mart"}, headers=sa_headers)
+    response.raise_for_status()
+    tenant = TenantResponse(**response.json())
+
+    await create_test_user_directly(username="ta_import", email="ta_import@example.com", password="tapassword", role=UserRoleEnum.tenant_admin, tenant_id=tenant.id)
+    ta_headers = await get_auth_headers(username="ta_import", password="tapassword")
+    response = await async_client.post("/products/", json={"name": "Rice", "price": 5.0, "sku": "RICE-1", "stock_quantity": 10}, headers=ta_headers)
+    response.raise_for_status()
+    response = await async_client.post("/products/", json={"name": "Salt", "price": 1.0, "sku": "SALT-1", "stock_quantity": 3}, headers=ta_headers)
+    response.raise_for_status()
+    return tenant, ta_headers
+
+async def _products_by_sku(async_client: httpx.AsyncClient, headers: Dict[str, str]) -> Dict[str, Any]:
+    response = await async_client.get("/products/", headers=headers)
+    response.raise_for_status()
+    return {p["sku"]: p for p in response.json()}
+
+async def test_csv_import_upserts_and_reports_row_errors(async_client: httpx.AsyncClient, import_setup: Any):
+    tenant, ta_headers = import_setup
+    csv_body = (
+        "sku,name,price,stock_quantity\n"
+        "RICE-1,Rice,6.00,10\n"       # price changed
+        "SALT-1,Salt,1.00,3\n"        # identical
+        "MISO-1,Miso,4.50,7\n"        # new
+        "BAD-1,Bad,not-a-price,1\n"   # invalid
+    )
+    response = await async_client.post("/products/import", files={"file": ("products.csv", csv_body, "text/csv")}, headers=ta_headers)
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert (result["inserted"], result["updated"], result["unchanged"], result["failed"]) == (1, 1, 1, 1)
+    assert result["errors"][0]["row"] == 5 and result["errors"][0]["sku"] == "BAD-1"
+
+    products = await _products_by_sku(async_client, ta_headers)
+    assert float(products["RICE-1"]["price"]) == 6.0 and products["RICE-1"]["version"] == 2
+    assert products["SALT-1"]["version"] == 1
+    assert products["MISO-1"]["stock_quantity"] == 7 and products["MISO-1"]["tenant_id"] == tenant.id
+    assert "BAD-1" not in products
+
+async def test_jsonl_import_updates_only_provided_columns(async_client: httpx.AsyncClient, import_setup: Any):
+    _, ta_headers = import_setup
+    lines = [
+        {"sku": "RICE-1", "name": "Rice", "price": "5.00"}, # Matches; stock not provided and left alone
+        {"sku": "SALT-1", "name": "Sea Salt", "price": "1.00"},
+        {"sku": "SALT-1", "name": "Rock Salt", "price": "1.00"}, # Later duplicate wins
+    ]
+    body = "\n".join(json.dumps(line) for line in lines) + "\nnot json\n"
+    response = await async_client.post("/products/import", params={"format": "jsonl"}, files={"file": ("upload.txt", body)}, headers=ta_headers)
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert (result["inserted"], result["updated"], result["unchanged"], result["failed"]) == (0, 1, 1, 1)
+
+    products = await _products_by_sku(async_client, ta_headers)
+    assert products["SALT-1"]["name"] == "Rock Salt" and products["SALT-1"]["stock_quantity"] == 3
+    assert products["RICE-1"]["stock_quantity"] == 10 and products["RICE-1"]["version"] == 1
+
+    response = await async_client.post("/products/import", files={"file": ("upload.txt", body)}, headers=ta_headers)
+    assert response.status_code == 400
@@ -0,0 +1,26 @@
+import decimal
+from sqlalchemy.orm import Session as SQLAlchemySession
+
+from app.models.sql_models import Tenant, Product
+from app.services import product_service
+
+def test_get_products_by_ids_reads_current_rows_of_the_tenant(db_session: SQLAlchemySession):
+    tenant = Tenant(name="Product Lookup Mart")
+    other_tenant = Tenant(name="Other Product Lookup Mart")
+    db_session.add_all([tenant, other_tenant])
+    db_session.flush()
+    product = Product(name="Hot Item", sku="LOOKUP_1", price=decimal.Decimal("4.00"), tenant_id=tenant.id, stock_quantity=9)
+    foreign_product = Product(name="Other Item", sku="LOOKUP_2", price=decimal.Decimal("1.00"), tenant_id=other_tenant.id, stock_quantity=1)
+    db_session.add_all([product, foreign_product])
+    db_session.commit()
+
+    found = product_service.get_products_by_ids(db_session, [product.id, foreign_product.id, product.id], tenant_id=tenant.id)
+    assert list(found) == [product.id]
+    assert found[product.id].stock_quantity == 9
+
+    # A bulk update (e.g. a sale in another worker) is visible on the next read.
+    db_session.query(Product).filter(Product.id == product.id).update({Product.stock_quantity: 5, Product.price: decimal.Decimal("4.50")}, synchronize_session=False)
+    db_session.expire_all()
+    found = product_service.get_products_by_ids(db_session, [product.id], tenant_id=tenant.id)
+    assert (found[product.id].stock_quantity, found[product.id].price) == (5, decimal.Decimal("4.50"))
+    assert product_service.get_products_by_ids(db_session, [], tenant_id=tenant.id) == {}
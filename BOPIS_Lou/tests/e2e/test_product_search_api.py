@@ -0,0 +1,82 @@
+import pytest
+import pytest_asyncio
+import httpx
+from typing import Dict, Callable, Awaitable, Any
+
+from app.models.sql_models import User as UserModel
+from app.schemas.user_schemas import UserRoleEnum
+from app.schemas.tenant_schemas import TenantResponse
+
+pytestmark = pytest.mark.asyncio
+
+@pytest_asyncio.fixture
+async def search_setup(
+    async_client: httpx.AsyncClient,
+    create_test_user_directly: Callable[..., Awaitable[UserModel]],
+    get_auth_headers: Callable[..., Awaitable[Dict[str, str]]]
+):
+    await create_test_user_directly(username="sa_search", email="sa_search@example.com", password="sapassword", role=UserRoleEnum.super_admin)
+    sa_headers = await get_auth_headers(username="sa_search", password="sapassword")
+    tenants = []
+    for name in ("Search Mart", "Other Mart"):
+        response = await async_client.post("/tenants/", json={"name": name}, headers=sa_headers)
+        response.raise_for_status()
+        tenants.append(TenantResponse(**response.json()))
+
+    await create_test_user_directly(username="ta_search", email="ta_search@example.com", password="tapassword", role=UserRoleEnum.tenant_admin, tenant_id=tenants[0].id)
+    ta_headers = await get_auth_headers(username="ta_search", password="tapassword")
+    await create_test_user_directly(username="ta_other", email="ta_other@example.com", password="tapassword", role=UserRoleEnum.tenant_admin, tenant_id=tenants[1].id)
+    other_headers = await get_auth_headers(username="ta_other", password="tapassword")
+
+    for name, sku in [("Green Tea", "TEA-001"), ("Green Tea Latte", "TEA-002"), ("Black Coffee", "COF-001"), ("Greek Yogurt", "YOG-001")]:
+        response = await async_client.post("/products/", json={"name": name, "price": 2.0, "sku": sku, "stock_quantity": 1}, headers=ta_headers)
+        response.raise_for_status()
+    response = await async_client.post("/products/", json={"name": "Green Tea", "price": 2.0, "sku": "TEA-001", "stock_quantity": 1}, headers=other_headers)
+    response.raise_for_status()
+    return tenants[0], ta_headers
+
+async def test_prefix_search_is_tenant_scoped_and_paginated(async_client: httpx.AsyncClient, search_setup: Any):
+    tenant, ta_headers = search_setup
+
+    response = await async_client.get("/products/search", params={"q": "gre"}, headers=ta_headers)
+    assert response.status_code == 200, response.text
+    names = [p["name"] for p in response.json()["items"]]
+    assert sorted(names) == ["Greek Yogurt", "Green Tea", "Green Tea Latte"]
+    assert all(p["tenant_id"] == tenant.id for p in response.json()["items"])
+
+    response = await async_client.get("/products/search", params={"q": "green te"}, headers=ta_headers)
+    assert sorted(p["name"] for p in response.json()["items"]) == ["Green Tea", "Green Tea Latte"]
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"q": "gre", "limit": 1}
+        if cursor:
+            params["cursor"] = cursor
+        page = (await async_client.get("/products/search", params=params, headers=ta_headers)).json()
+        seen.extend(p["id"] for p in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert len(seen) == 3 and len(set(seen)) == 3
+
+    # Renames are picked up by the index.
+    product_id = seen[0]
+    response = await async_client.put(f"/products/{product_id}", json={"name": "Matcha"}, headers=ta_headers)
+    response.raise_for_status()
+    response = await async_client.get("/products/search", params={"q": "matc"}, headers=ta_headers)
+    assert [p["id"] for p in response.json()["items"]] == [product_id]
+
+async def test_sku_search_and_exact_lookup(async_client: httpx.AsyncClient, search_setup: Any):
+    tenant, ta_headers = search_setup
+    response = await async_client.get("/products/search", params={"q": "cof"}, headers=ta_headers)
+    assert [p["sku"] for p in response.json()["items"]] == ["COF-001"]
+
+    response = await async_client.get("/products/sku/TEA-002", headers=ta_headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["name"] == "Green Tea Latte"
+    response = await async_client.get("/products/sku/NOPE-1", headers=ta_headers)
+    assert response.status_code == 404
+
+    response = await async_client.get("/products/search", params={"q": "--"}, headers=ta_headers)
+    assert response.status_code == 400
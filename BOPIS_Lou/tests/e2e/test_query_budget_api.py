@@ -0,0 +1,75 @@
+import pytest
+import httpx
+from typing import Dict, Callable, Awaitable
+import datetime
+
+from app.models.sql_models import User as UserModel
+from app.schemas.user_schemas import UserRoleEnum
+from app.schemas.tenant_schemas import TenantResponse
+from app.db.query_stats import assert_max_queries
+from app.api.query_metrics import route_query_totals
+
+pytestmark = pytest.mark.asyncio
+
+async def test_order_workflow_endpoints_stay_within_query_budgets(
+    async_client: httpx.AsyncClient,
+    create_test_user_directly: Callable[..., Awaitable[UserModel]],
+    get_auth_headers: Callable[..., Awaitable[Dict[str, str]]]
+):
+    await create_test_user_directly(username="sa_budget", email="sa_budget@example.com", password="sapassword", role=UserRoleEnum.super_admin)
+    sa_headers = await get_auth_headers(username="sa_budget", password="sapassword")
+    response = await async_client.post("/tenants/", json={"name": "Budget Mart"}, headers=sa_headers)
+    response.raise_for_status()
+    tenant = TenantResponse(**response.json())
+    await create_test_user_directly(username="ta_budget", email="ta_budget@example.com", password="tapassword", role=UserRoleEnum.tenant_admin, tenant_id=tenant.id)
+    ta_headers = await get_auth_headers(username="ta_budget", password="tapassword")
+    await create_test_user_directly(username="picker_budget", email="picker_budget@example.com", password="pickerpassword", role=UserRoleEnum.picker, tenant_id=tenant.id)
+    picker_headers = await get_auth_headers(username="picker_budget", password="pickerpassword")
+    await create_test_user_directly(username="counter_budget", email="counter_budget@example.com", password="counterpassword", role=UserRoleEnum.counter, tenant_id=tenant.id)
+    counter_headers = await get_auth_headers(username="counter_budget", password="counterpassword")
+    await create_test_user_directly(username="cust_budget", email="cust_budget@example.com", password="custpassword", role=UserRoleEnum.customer, tenant_id=tenant.id)
+    customer_headers = await get_auth_headers(username="cust_budget", password="custpassword")
+
+    response = await async_client.post("/timeslots/", json={"date": datetime.date.today().isoformat(), "start_time": "10:00:00", "end_time": "11:00:00", "capacity": 5}, headers=ta_headers)
+    response.raise_for_status()
+    timeslot_id = response.json()["id"]
+    for index in range(5): # Enough items that per-item lazy loads would exceed the budgets
+        response = await async_client.post("/products/", json={"name": f"Item {index}", "price": 1.0, "sku": f"BUDGET-{index}", "stock_quantity": 10}, headers=ta_headers)
+        response.raise_for_status()
+        response = await async_client.post("/orders/cart/items", json={"product_id": response.json()["id"], "quantity": 1}, headers=customer_headers)
+        response.raise_for_status()
+    response = await async_client.post(f"/orders/{response.json()['id']}/checkout", json={"pickup_slot_id": timeslot_id}, headers=customer_headers)
+    assert response.status_code == 200, response.text
+    order = response.json()
+    assert int(response.headers["X-Query-Count"]) > 0
+    assert response.headers["Server-Timing"].startswith("db;dur=")
+
+    # Budgets include the authentication query of get_current_user.
+    with assert_max_queries(4):
+        response = await async_client.get(f"/orders/{order['id']}", headers=customer_headers)
+    assert response.status_code == 200
+    assert len(response.json()["order_items"]) == 5
+    assert response.json()["order_items"][0]["product"]["sku"].startswith("BUDGET-")
+
+    with assert_max_queries(10):
+        response = await async_client.post(f"/picker/orders/{order['id']}/start-picking", headers=picker_headers)
+    assert response.status_code == 200, response.text
+    with assert_max_queries(12):
+        response = await async_client.post(f"/picker/orders/{order['id']}/ready-for-pickup", json={}, headers=picker_headers)
+    assert response.status_code == 200, response.text
+    assert len(response.json()["order_items"]) == 5
+
+    with assert_max_queries(4):
+        response = await async_client.post("/orders/verify-pickup", json={"pickup_token": order["pickup_token"]}, headers=counter_headers)
+    assert response.status_code == 200, response.text
+
+    with assert_max_queries(3) as stats:
+        response = await async_client.get(f"/orders/{order['id']}", headers=picker_headers)
+    assert int(response.headers["X-Query-Count"]) == stats.count
+
+    totals = route_query_totals()[("GET", "/orders/{order_id}")]
+    assert totals.requests >= 2 and totals.queries >= 2 * stats.count
+
+    with pytest.raises(AssertionError, match="Expected at most 0 queries"):
+        with assert_max_queries(0):
+            await async_client.get(f"/orders/{order['id']}", headers=customer_headers)
@@ -0,0 +1,106 @@
+import pytest
+import httpx
+from typing import Dict, Callable, Awaitable
+import datetime
+import json
+from sqlalchemy.orm import Session as SQLAlchemySession
+
+from app.models.sql_models import User as UserModel, SalesRollup
+from app.schemas.user_schemas import UserRoleEnum
+from app.schemas.tenant_schemas import TenantResponse
+from app.services import archive_service, sales_analytics_service
+
+pytestmark = pytest.mark.asyncio
+
+async def test_rollups_are_incremental_and_exported_as_stream(
+    async_client: httpx.AsyncClient,
+    db_session: SQLAlchemySession,
+    create_test_user_directly: Callable[..., Awaitable[UserModel]],
+    get_auth_headers: Callable[..., Awaitable[Dict[str, str]]]
+):
+    await create_test_user_directly(username="sa_sales", email="sa_sales@example.com", password="sapassword", role=UserRoleEnum.super_admin)
+    sa_headers = await get_auth_headers(username="sa_sales", password="sapassword")
+    response = await async_client.post("/tenants/", json={"name": "Sales Mart"}, headers=sa_headers)
+    response.raise_for_status()
+    tenant = TenantResponse(**response.json())
+    await create_test_user_directly(username="ta_sales", email="ta_sales@example.com", password="tapassword", role=UserRoleEnum.tenant_admin, tenant_id=tenant.id)
+    ta_headers = await get_auth_headers(username="ta_sales", password="tapassword")
+    await create_test_user_directly(username="counter_sales", email="counter_sales@example.com", password="counterpassword", role=UserRoleEnum.counter, tenant_id=tenant.id)
+    counter_headers = await get_auth_headers(username="counter_sales", password="counterpassword")
+
+    response = await async_client.post("/products/", json={"name": "Coffee", "price": 3.0, "sku": "COF-1", "stock_quantity": 50}, headers=ta_headers)
+    response.raise_for_status()
+    product_id = response.json()["id"]
+
+    for quantity in (2, 1):
+        response = await async_client.post("/pos/orders", json={"items": [{"product_id": product_id, "quantity": quantity}]}, headers=counter_headers)
+        assert response.status_code == 201, response.text
+
+    result = sales_analytics_service.refresh_sales_rollups(db_session, tenant_id=tenant.id, until=datetime.datetime.utcnow())
+    assert (result.orders_processed, result.buckets_updated) == (2, 2) # One HOUR and one DAY bucket
+
+    # Only orders completed after the watermark are read by the next run.
+    response = await async_client.post("/pos/orders", json={"items": [{"product_id": product_id, "quantity": 4}]}, headers=counter_headers)
+    assert response.status_code == 201, response.text
+    result = sales_analytics_service.refresh_sales_rollups(db_session, tenant_id=tenant.id, until=datetime.datetime.utcnow())
+    assert result.orders_processed == 1
+
+    today = datetime.datetime.utcnow().date().isoformat()
+    response = await async_client.get("/analytics/sales", params={"start_date": today, "end_date": today, "granularity": "DAY"}, headers=ta_headers)
+    assert response.status_code == 200, response.text
+    buckets = response.json()["buckets"]
+    assert [(b["sku"], b["order_type"], b["payment_status"], b["order_count"], b["quantity"], float(b["revenue"])) for b in buckets] == [
+        ("COF-1", "POS_SALE", "PAID", 3, 7, 21.0)
+    ]
+    response = await async_client.get("/analytics/sales", params={"start_date": today, "end_date": today, "granularity": "HOUR", "order_type": "BOPIS"}, headers=ta_headers)
+    assert response.json()["buckets"] == []
+
+    response = await async_client.get("/analytics/sales/export", params={"start_date": today, "end_date": today, "format": "csv"}, headers=ta_headers)
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("text/csv")
+    lines = response.text.strip().splitlines()
+    assert lines[0].startswith("bucket_start,product_id,sku") and len(lines) == 2
+    response = await async_client.get("/analytics/sales/export", params={"start_date": "2025-01-01", "end_date": today, "format": "jsonl", "granularity": "HOUR"}, headers=ta_headers)
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [(r["sku"], r["quantity"]) for r in rows] == [("COF-1", 7)]
+
+    response = await async_client.get("/analytics/sales", params={"start_date": "2025-01-01", "end_date": today, "granularity": "HOUR"}, headers=ta_headers)
+    assert response.status_code == 400
+    response = await async_client.get("/analytics/sales", params={"start_date": today, "end_date": today}, headers=counter_headers)
+    assert response.status_code == 403
+
+async def test_sales_of_deleted_products_stay_in_reports(
+    async_client: httpx.AsyncClient,
+    db_session: SQLAlchemySession,
+    create_test_user_directly: Callable[..., Awaitable[UserModel]],
+    get_auth_headers: Callable[..., Awaitable[Dict[str, str]]]
+):
+    await create_test_user_directly(username="sa_sales_del", email="sa_sales_del@example.com", password="sapassword", role=UserRoleEnum.super_admin)
+    sa_headers = await get_auth_headers(username="sa_sales_del", password="sapassword")
+    response = await async_client.post("/tenants/", json={"name": "Discontinued Mart"}, headers=sa_headers)
+    response.raise_for_status()
+    tenant = TenantResponse(**response.json())
+    await create_test_user_directly(username="ta_sales_del", email="ta_sales_del@example.com", password="tapassword", role=UserRoleEnum.tenant_admin, tenant_id=tenant.id)
+    ta_headers = await get_auth_headers(username="ta_sales_del", password="tapassword")
+
+    response = await async_client.post("/products/", json={"name": "Old Blend", "price": 4.0, "sku": "BLEND-OLD", "stock_quantity": 5}, headers=ta_headers)
+    response.raise_for_status()
+    product_id = response.json()["id"]
+    response = await async_client.post("/pos/orders", json={"items": [{"product_id": product_id, "quantity": 2}]}, headers=ta_headers)
+    assert response.status_code == 201, response.text
+    sales_analytics_service.refresh_sales_rollups(db_session, tenant_id=tenant.id, until=datetime.datetime.utcnow())
+
+    # Once its orders are archived, the product can be deleted; its sales remain.
+    result = archive_service.archive_orders(db_session, tenant_id=tenant.id, now=datetime.datetime.utcnow() + datetime.timedelta(days=400))
+    assert result.orders_archived == 1
+    response = await async_client.delete(f"/products/{product_id}", headers=ta_headers)
+    assert response.status_code in (200, 204), response.text
+    db_session.query(SalesRollup).filter(SalesRollup.product_id == product_id).update({SalesRollup.product_id: None}) # ON DELETE SET NULL; SQLite tests run without FK enforcement
+    db_session.commit()
+
+    today = datetime.datetime.utcnow().date().isoformat()
+    response = await async_client.get("/analytics/sales", params={"start_date": today, "end_date": today, "granularity": "DAY"}, headers=ta_headers)
+    assert response.status_code == 200, response.text
+    assert [(b["product_id"], b["sku"], b["product_name"], b["quantity"]) for b in response.json()["buckets"]] == [(None, "BLEND-OLD", "Old Blend", 2)]
+    response = await async_client.get("/analytics/sales/export", params={"start_date": today, "end_date": today, "format": "jsonl"}, headers=ta_headers)
+    assert [(r["sku"], r["quantity"]) for r in map(json.loads, response.text.splitlines())] == [("BLEND-OLD", 2)]
@@ -0,0 +1,80 @@
+import pytest
+import httpx
+from typing import Dict, Callable, Awaitable, List
+import datetime
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session as SQLAlchemySession
+
+from app.models.sql_models import User as UserModel
+from app.schemas.user_schemas import UserRoleEnum
+from app.schemas.tenant_schemas import TenantResponse
+from app.schemas.order_schemas import OrderResponse, OrderSummaryResponse
+from app.schemas.product_schemas import ProductResponse, ProductSummaryResponse
+from app.schemas.timeslot_schemas import PickupTimeSlotSummaryResponse
+from app.services import order_service, product_service, timeslot_service
+
+pytestmark = pytest.mark.asyncio
+
+def _standard_json(response_type, items):
+    # What FastAPI's response_model validation and serialization would produce.
+    adapter = TypeAdapter(response_type)
+    return adapter.dump_python(adapter.validate_python(items, from_attributes=True), mode="json")
+
+async def test_fast_list_serialization_matches_response_models(
+    async_client: httpx.AsyncClient,
+    db_session: SQLAlchemySession,
+    create_test_user_directly: Callable[..., Awaitable[UserModel]],
+    get_auth_headers: Callable[..., Awaitable[Dict[str, str]]]
+):
+    await create_test_user_directly(username="sa_ser", email="sa_ser@example.com", password="sapassword", role=UserRoleEnum.super_admin)
+    sa_headers = await get_auth_headers(username="sa_ser", password="sapassword")
+    response = await async_client.post("/tenants/", json={"name": "Serialization Mart"}, headers=sa_headers)
+    response.raise_for_status()
+    tenant = TenantResponse(**response.json())
+    ta_user = await create_test_user_directly(username="ta_ser", email="ta_ser@example.com", password="tapassword", role=UserRoleEnum.tenant_admin, tenant_id=tenant.id)
+    ta_headers = await get_auth_headers(username="ta_ser", password="tapassword")
+    await create_test_user_directly(username="cust_ser", email="cust_ser@example.com", password="custpassword", role=UserRoleEnum.customer, tenant_id=tenant.id)
+    customer_headers = await get_auth_headers(username="cust_ser", password="custpassword")
+
+    response = await async_client.post("/products/", json={"name": "Tea", "price": 3.75, "sku": "TEA-1", "stock_quantity": 10}, headers=ta_headers)
+    response.raise_for_status()
+    product_id = response.json()["id"]
+    slot_date = (datetime.date.today() + datetime.timedelta(days=1)).isoformat()
+    response = await async_client.post("/timeslots/", json={"date": slot_date, "start_time": "09:00:00", "end_time": "10:00:00", "capacity": 3}, headers=ta_headers)
+    response.raise_for_status()
+    timeslot_id = response.json()["id"]
+    response = await async_client.post("/orders/cart/items", json={"product_id": product_id, "quantity": 2}, headers=customer_headers)
+    response.raise_for_status()
+    response = await async_client.post(f"/orders/{response.json()['id']}/checkout", json={"pickup_slot_id": timeslot_id}, headers=customer_headers)
+    assert response.status_code == 200, response.text
+
+    # Each fast path returns exactly what the response model would serialize.
+    response = await async_client.get("/orders/", headers=ta_headers)
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"] == "application/json"
+    expected = _standard_json(List[OrderResponse], order_service.list_orders_for_user(db_session, user=ta_user))
+    assert response.json() == expected
+
+    response = await async_client.get("/orders/", params={"view": "summary"}, headers=ta_headers)
+    assert response.status_code == 200, response.text
+    expected = _standard_json(List[OrderSummaryResponse], order_service.list_order_summary_rows_for_user(db_session, user=ta_user))
+    assert response.json() == expected
+    assert response.json()[0]["total_amount"] == "7.50" # Decimals stay strings, as pydantic writes them
+
+    response = await async_client.get("/products/", headers=ta_headers)
+    assert response.status_code == 200, response.text
+    assert response.json() == _standard_json(List[ProductResponse], product_service.get_products_by_tenant(db_session, tenant_id=tenant.id))
+    assert response.headers["Cache-Control"] == "private, no-cache"
+    response = await async_client.get("/products/", headers={**ta_headers, "If-None-Match": response.headers["ETag"]})
+    assert response.status_code == 304
+
+    response = await async_client.get("/products/", params={"view": "summary"}, headers=ta_headers)
+    assert response.status_code == 200, response.text
+    assert response.json() == _standard_json(List[ProductSummaryResponse], product_service.get_product_summary_rows_by_tenant(db_session, tenant_id=tenant.id))
+    assert response.json()[0]["price"] == "3.75"
+
+    response = await async_client.get("/timeslots/", params={"view": "summary"}, headers=ta_headers)
+    assert response.status_code == 200, response.text
+    expected = _standard_json(List[PickupTimeSlotSummaryResponse], timeslot_service.get_timeslot_summary_rows_by_tenant(db_session, tenant_id=tenant.id, is_active=None))
+    assert response.json() == expected
+    assert (response.json()[0]["start_time"], response.json()[0]["current_orders"]) == ("09:00:00", 1)
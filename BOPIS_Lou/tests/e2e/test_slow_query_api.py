@@ -0,0 +1,55 @@
+import pytest
+import httpx
+from typing import Dict, Callable, Awaitable
+
+from app.core.config import settings
+from app.db import slow_queries
+from app.models.sql_models import User as UserModel
+from app.schemas.user_schemas import UserRoleEnum
+from app.schemas.tenant_schemas import TenantResponse
+
+pytestmark = pytest.mark.asyncio
+
+async def test_slow_query_log_records_origin_redacted_parameters_and_plan(
+    async_client: httpx.AsyncClient,
+    create_test_user_directly: Callable[..., Awaitable[UserModel]],
+    get_auth_headers: Callable[..., Awaitable[Dict[str, str]]],
+    monkeypatch: pytest.MonkeyPatch
+):
+    await create_test_user_directly(username="sa_slow", email="sa_slow@example.com", password="sapassword", role=UserRoleEnum.super_admin)
+    sa_headers = await get_auth_headers(username="sa_slow", password="sapassword")
+    response = await async_client.post("/tenants/", json={"name": "Slow Mart"}, headers=sa_headers)
+    tenant = TenantResponse(**response.json())
+    await create_test_user_directly(username="ta_slow", email="ta_slow@example.com", password="tapassword", role=UserRoleEnum.tenant_admin, tenant_id=tenant.id)
+    ta_headers = await get_auth_headers(username="ta_slow", password="tapassword")
+    response = await async_client.post("/products/", json={"name": "Secret", "price": 1.0, "sku": "SLOW-SECRET-SKU", "stock_quantity": 1}, headers=ta_headers)
+    assert response.status_code == 201, response.text
+
+    monkeypatch.setattr(settings, "SLOW_QUERY_THRESHOLD_MS", 0.0) # Every statement counts as slow
+    monkeypatch.setattr(settings, "SLOW_QUERY_EXPLAIN", True)
+    slow_queries.clear_slow_queries()
+    try:
+        response = await async_client.get("/products/sku/SLOW-SECRET-SKU", headers=ta_headers)
+        assert response.status_code == 200, response.text
+
+        assert (await async_client.get("/admin/slow-queries", headers=ta_headers)).status_code == 403
+        response = await async_client.get("/admin/slow-queries", headers=sa_headers)
+        assert response.status_code == 200, response.text
+        entries = response.json()
+        assert "SLOW-SECRET-SKU" not in response.text
+        lookup = next(entry for entry in entries if entry["origin"] == "GET /products/sku/{sku}" and "FROM products" in entry["statement"])
+        assert "<str>" in lookup["parameters"]
+        assert lookup["plan"] and not lookup["plan"][0].startswith("EXPLAIN failed")
+        assert lookup["duration_ms"] >= 0
+        assert all(entry["plan"] is None for entry in entries if not entry["statement"].lstrip().upper().startswith("SELECT"))
+
+        assert (await async_client.delete("/admin/slow-queries", headers=sa_headers)).status_code == 204
+        monkeypatch.setattr(settings, "SLOW_QUERY_THRESHOLD_MS", None)
+        response = await async_client.get("/admin/slow-queries", headers=sa_headers)
+        assert response.json() == []
+    finally:
+        slow_queries.clear_slow_queries()
+
+async def test_redact_parameters_keeps_shape_and_drops_values():
+    assert slow_queries.redact_parameters(("alice", 3, None, True)) == ["<str>", "<int>", None, True]
+    assert slow_queries.redact_parameters({"token": "abc", "ids": [1, 2]}) == {"token": "<str>", "ids": ["<int>", "<int>"]}
@@ -0,0 +1,140 @@
+import pytest
+import pytest_asyncio
+import httpx
+from typing import Dict, Callable, Awaitable, Any
+import datetime
+
+from sqlalchemy.orm import Session as SQLAlchemySession
+
+from app.models.sql_models import User as UserModel, Lane, Order, TenantChangeCounter
+from app.schemas.user_schemas import UserRoleEnum
+from app.schemas.tenant_schemas import TenantResponse
+from app.db.query_stats import assert_max_queries
+
+pytestmark = pytest.mark.asyncio
+
+@pytest_asyncio.fixture
+async def sync_setup(
+    async_client: httpx.AsyncClient,
+    create_test_user_directly: Callable[..., Awaitable[UserModel]],
+    get_auth_headers: Callable[..., Awaitable[Dict[str, str]]]
+):
+    await create_test_user_directly(username="sa_sync", email="sa_sync@example.com", password="sapassword", role=UserRoleEnum.super_admin)
+    sa_headers = await get_auth_headers(username="sa_sync", password="sapassword")
+    response = await async_client.post("/tenants/", json={"name": "Sync Mart"}, headers=sa_headers)
+    response.raise_for_status()
+    tenant = TenantResponse(**response.json())
+
+    await create_test_user_directly(username="ta_sync", email="ta_sync@example.com", password="tapassword", role=UserRoleEnum.tenant_admin, tenant_id=tenant.id)
+    ta_headers = await get_auth_headers(username="ta_sync", password="tapassword")
+    await create_test_user_directly(username="cust_sync", email="cust_sync@example.com", password="custpassword", role=UserRoleEnum.customer, tenant_id=tenant.id)
+    customer_headers = await get_auth_headers(username="cust_sync", password="custpassword")
+    return tenant, ta_headers, customer_headers
+
+async def test_change_feed_reports_upserts_and_deletes_in_order(async_client: httpx.AsyncClient, db_session: SQLAlchemySession, sync_setup: Any):
+    tenant, ta_headers, _ = sync_setup
+    product_ids = []
+    for i in range(3):
+        response = await async_client.post("/products/", json={"name": f"Sync Item {i}", "price": 1.5, "sku": f"SYNC_{tenant.id}_{i}", "stock_quantity": 5}, headers=ta_headers)
+        response.raise_for_status()
+        product_ids.append(response.json()["id"])
+    db_session.add(Lane(name="Lane S", tenant_id=tenant.id))
+    db_session.commit()
+
+    response = await async_client.get("/sync/changes", params={"since": 0, "limit": 2}, headers=ta_headers)
+    assert response.status_code == 200, response.text
+    first_page = response.json()
+    assert [c["entity_id"] for c in first_page["changes"]] == product_ids[:2]
+    assert first_page["has_more"] is True
+
+    response = await async_client.get("/sync/changes", params={"since": first_page["next_since"]}, headers=ta_headers)
+    second_page = response.json()
+    assert [(c["entity_type"], c["op"]) for c in second_page["changes"]] == [("product", "upsert"), ("lane", "upsert")]
+    assert second_page["has_more"] is False
+    cursor = second_page["next_since"]
+
+    response = await async_client.put(f"/products/{product_ids[0]}", json={"price": 2.0}, headers=ta_headers)
+    response.raise_for_status()
+    response = await async_client.delete(f"/products/{product_ids[1]}", headers=ta_headers)
+    assert response.status_code in (200, 204), response.text
+
+    response = await async_client.get("/sync/changes", params={"since": cursor}, headers=ta_headers)
+    changes = response.json()["changes"]
+    assert [(c["entity_id"], c["op"]) for c in changes] == [(product_ids[0], "upsert"), (product_ids[1], "delete")]
+    assert changes[0]["data"]["price"] == "2.00"
+    assert changes[0]["change_seq"] < changes[1]["change_seq"]
+
+    # Nothing new: the cursor stays put.
+    response = await async_client.get("/sync/changes", params={"since": response.json()["next_since"]}, headers=ta_headers)
+    assert response.json()["changes"] == []
+
+async def test_customer_feed_excludes_lanes(async_client: httpx.AsyncClient, db_session: SQLAlchemySession, sync_setup: Any):
+    tenant, ta_headers, customer_headers = sync_setup
+    db_session.add(Lane(name="Lane C", tenant_id=tenant.id))
+    db_session.commit()
+    response = await async_client.post("/products/", json={"name": "Visible", "price": 1.0, "sku": f"SYNC_{tenant.id}_C", "stock_quantity": 1}, headers=ta_headers)
+    response.raise_for_status()
+
+    response = await async_client.get("/sync/changes", headers=customer_headers)
+    assert response.status_code == 200, response.text
+    assert {c["entity_type"] for c in response.json()["changes"]} == {"product"}
+
+async def test_carts_are_not_tracked_until_checkout(async_client: httpx.AsyncClient, db_session: SQLAlchemySession, sync_setup: Any):
+    tenant, ta_headers, customer_headers = sync_setup
+    response = await async_client.post("/products/", json={"name": "Cart Item", "price": 1.0, "sku": f"SYNC_{tenant.id}_CART", "stock_quantity": 5}, headers=ta_headers)
+    response.raise_for_status()
+    product_id = response.json()["id"]
+    response = await async_client.post("/timeslots/", json={
+        "date": (datetime.date.today() + datetime.timedelta(days=1)).isoformat(), "start_time": "10:00:00", "end_time": "11:00:00", "capacity": 5
+    }, headers=ta_headers)
+    response.raise_for_status()
+    slot_id = response.json()["id"]
+    last_seq = db_session.get(TenantChangeCounter, tenant.id).last_seq
+
+    # Shopping does not take the tenant's change counter.
+    for quantity in (1, 2):
+        response = await async_client.post("/orders/cart/items", json={"product_id": product_id, "quantity": quantity}, headers=customer_headers)
+        response.raise_for_status()
+    cart_id = response.json()["id"]
+    db_session.expire_all()
+    assert db_session.get(TenantChangeCounter, tenant.id).last_seq == last_seq
+    assert db_session.get(Order, cart_id).change_seq is None
+    response = await async_client.get("/sync/changes", params={"since": last_seq}, headers=customer_headers)
+    assert response.json()["changes"] == []
+
+    response = await async_client.post(f"/orders/{cart_id}/checkout", json={"pickup_slot_id": slot_id}, headers=customer_headers)
+    assert response.status_code == 200, response.text
+    response = await async_client.get("/sync/changes", params={"since": last_seq, "types": ["order"]}, headers=customer_headers)
+    assert [(c["entity_id"], c["data"]["status"]) for c in response.json()["changes"]] == [(cart_id, "ORDER_CONFIRMED")]
+
+async def test_order_changes_are_flat_and_read_with_a_fixed_number_of_queries(
+    async_client: httpx.AsyncClient,
+    db_session: SQLAlchemySession,
+    create_test_user_directly: Callable[..., Awaitable[UserModel]],
+    get_auth_headers: Callable[..., Awaitable[Dict[str, str]]],
+    sync_setup: Any
+):
+    tenant, ta_headers, _ = sync_setup
+    await create_test_user_directly(username="counter_sync", email="counter_sync@example.com", password="counterpassword", role=UserRoleEnum.counter, tenant_id=tenant.id)
+    counter_headers = await get_auth_headers(username="counter_sync", password="counterpassword")
+    product_ids = []
+    for i in range(3):
+        response = await async_client.post("/products/", json={"name": f"Feed Item {i}", "price": 1.25, "sku": f"SYNC_{tenant.id}_F{i}", "stock_quantity": 20}, headers=ta_headers)
+        response.raise_for_status()
+        product_ids.append(response.json()["id"])
+    last_seq = db_session.get(TenantChangeCounter, tenant.id).last_seq
+    order_ids = []
+    for quantity in range(1, 5): # Enough multi-item orders that per-order lazy loads would exceed the budget
+        response = await async_client.post("/pos/orders", json={"items": [{"product_id": pid, "quantity": quantity} for pid in product_ids]}, headers=counter_headers)
+        assert response.status_code == 201, response.text
+        order_ids.append(response.json()["id"])
+
+    # Budget includes the authentication query: one query per entity type, one for order items, one for tombstones.
+    with assert_max_queries(7):
+        response = await async_client.get("/sync/changes", params={"since": last_seq}, headers=ta_headers)
+    assert response.status_code == 200, response.text
+    orders = [c["data"] for c in response.json()["changes"] if c["entity_type"] == "order"]
+    assert [order["id"] for order in orders] == order_ids
+    assert [(item["product_id"], item["quantity"], item["price_at_purchase"]) for item in orders[1]["items"]] == [(pid, 2, "1.25") for pid in product_ids]
+    assert (orders[0]["status"], orders[0]["total_amount"]) == ("COMPLETED", "3.75")
+    assert not {"customer", "order_items", "pickup_slot", "assigned_lane"} & set(orders[0])
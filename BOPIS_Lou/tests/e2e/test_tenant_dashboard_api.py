@@ -0,0 +1,81 @@
+import pytest
+import httpx
+from typing import Dict, Callable, Awaitable
+import datetime
+from sqlalchemy import event
+from sqlalchemy.orm import Session as SQLAlchemySession
+
+from app.models.sql_models import User as UserModel, TenantOrderStatusCount, OrderStatus
+from app.schemas.user_schemas import UserRoleEnum
+from app.schemas.tenant_schemas import TenantResponse
+from app.services import tenant_metrics_service
+
+pytestmark = pytest.mark.asyncio
+
+async def test_dashboard_follows_order_changes_without_aggregating_orders(
+    async_client: httpx.AsyncClient,
+    db_session: SQLAlchemySession,
+    create_test_user_directly: Callable[..., Awaitable[UserModel]],
+    get_auth_headers: Callable[..., Awaitable[Dict[str, str]]]
+):
+    await create_test_user_directly(username="sa_dash", email="sa_dash@example.com", password="sapassword", role=UserRoleEnum.super_admin)
+    sa_headers = await get_auth_headers(username="sa_dash", password="sapassword")
+    response = await async_client.post("/tenants/", json={"name": "Dashboard Mart"}, headers=sa_headers)
+    response.raise_for_status()
+    tenant = TenantResponse(**response.json())
+    await create_test_user_directly(username="ta_dash", email="ta_dash@example.com", password="tapassword", role=UserRoleEnum.tenant_admin, tenant_id=tenant.id)
+    ta_headers = await get_auth_headers(username="ta_dash", password="tapassword")
+    await create_test_user_directly(username="counter_dash", email="counter_dash@example.com", password="counterpassword", role=UserRoleEnum.counter, tenant_id=tenant.id)
+    counter_headers = await get_auth_headers(username="counter_dash", password="counterpassword")
+    await create_test_user_directly(username="cust_dash", email="cust_dash@example.com", password="custpassword", role=UserRoleEnum.customer, tenant_id=tenant.id)
+    customer_headers = await get_auth_headers(username="cust_dash", password="custpassword")
+
+    response = await async_client.post("/products/", json={"name": "Bread", "price": 2.5, "sku": "BREAD-1", "stock_quantity": 20}, headers=ta_headers)
+    response.raise_for_status()
+    product_id = response.json()["id"]
+    today = datetime.datetime.utcnow().date()
+    response = await async_client.post("/timeslots/", json={"date": today.isoformat(), "start_time": "10:00:00", "end_time": "11:00:00", "capacity": 4}, headers=ta_headers)
+    response.raise_for_status()
+    timeslot_id = response.json()["id"]
+
+    order_ids = []
+    for quantity in (2, 1):
+        response = await async_client.post("/orders/cart/items", json={"product_id": product_id, "quantity": quantity}, headers=customer_headers)
+        response.raise_for_status()
+        response = await async_client.post(f"/orders/{response.json()['id']}/checkout", json={"pickup_slot_id": timeslot_id}, headers=customer_headers)
+        assert response.status_code == 200, response.text
+        order_ids.append(response.json()["id"])
+    response = await async_client.post("/pos/orders", json={"items": [{"product_id": product_id, "quantity": 4}]}, headers=counter_headers)
+    assert response.status_code == 201, response.text
+    response = await async_client.post(f"/orders/{order_ids[1]}/cancel", headers=customer_headers)
+    assert response.status_code == 200, response.text
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db_session.get_bind(), "before_cursor_execute", listener)
+    try:
+        response = await async_client.get(f"/tenants/{tenant.id}/dashboard", headers=ta_headers)
+    finally:
+        event.remove(db_session.get_bind(), "before_cursor_execute", listener)
+    assert response.status_code == 200, response.text
+    assert not [s for s in statements if "FROM orders" in s or "FROM order_items" in s]
+
+    dashboard = response.json()
+    assert dashboard["orders_by_status"] == {"ORDER_CONFIRMED": 1, "COMPLETED": 1, "CANCELLED": 1}
+    assert dashboard["sales"]["paid_orders"] == 2
+    assert float(dashboard["sales"]["revenue"]) == 15.0 # 2 x 2.50 online + 4 x 2.50 POS
+    assert (dashboard["slot_capacity"], dashboard["slot_booked"], dashboard["slot_utilization"]) == (4, 1, 0.25)
+
+    response = await async_client.get(f"/tenants/{tenant.id}/dashboard", headers=counter_headers)
+    assert response.status_code == 403
+
+    # Reconciliation repairs drifted counters.
+    counter = db_session.query(TenantOrderStatusCount).filter(
+        TenantOrderStatusCount.tenant_id == tenant.id, TenantOrderStatusCount.status == OrderStatus.COMPLETED
+    ).one()
+    counter.order_count = 7
+    db_session.commit()
+    result = tenant_metrics_service.reconcile_tenant_metrics(db_session, tenant_id=tenant.id)
+    assert (result.status_counters_corrected, result.daily_sales_corrected) == (1, 0)
+    response = await async_client.get(f"/tenants/{tenant.id}/dashboard", headers=ta_headers)
+    assert response.json()["orders_by_status"]["COMPLETED"] == 1
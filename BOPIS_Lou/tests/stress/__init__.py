@@ -0,0 +1,3 @@
+"""
+This file makes the stress directory a Python package.
+"""
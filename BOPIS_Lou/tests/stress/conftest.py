@@ -0,0 +1,34 @@
+"""
+Fixtures for the concurrency stress tests.
+
+Workers need real concurrent connections, so the tests run on a file-backed SQLite database
+(one per test) or, when STRESS_DATABASE_URL is set, on that database (e.g. a local
+PostgreSQL; its tables are created and dropped by the tests, so never point it at real data).
+STRESS_WORKERS and STRESS_ATTEMPTS_PER_WORKER scale the load.
+"""
+import os
+import pytest
+from typing import Generator
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+
+STRESS_WORKERS = int(os.environ.get("STRESS_WORKERS", "8"))
+STRESS_ATTEMPTS_PER_WORKER = int(os.environ.get("STRESS_ATTEMPTS_PER_WORKER", "10"))
+
+@pytest.fixture()
+def stress_engine(tmp_path) -> Generator[Engine, None, None]:
+    database_url = os.environ.get("STRESS_DATABASE_URL") or f"sqlite:///{tmp_path / 'stress.db'}"
+    connect_args = {"check_same_thread": False, "timeout": 30} if database_url.startswith("sqlite") else {}
+    engine = create_engine(database_url, connect_args=connect_args, pool_size=STRESS_WORKERS + 2)
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+@pytest.fixture()
+def stress_sessionmaker(stress_engine: Engine) -> sessionmaker:
+    return sessionmaker(autocommit=False, autoflush=False, bind=stress_engine)
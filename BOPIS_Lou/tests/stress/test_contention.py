@@ -0,0 +1,313 @@
+"""
+Concurrency stress tests: parallel workers contend for one SKU, one pickup slot, one lane and
+one order through the service functions, each in its own session and transaction.
+
+Invariants: stock never goes negative and equals the initial stock minus successful sales
+plus restocks, a slot is never booked beyond capacity, a lane serves exactly one order, an
+order is either cancelled (and restocked once) or picked up, never both, retries of one
+idempotent sale sell once even when its claim is taken over, and the dashboard counters count
+every concurrent sale.
+Outcome counts (successes, conflicts, rejections, lock retries) and throughput are printed
+per scenario (`pytest -s tests/stress`).
+"""
+from collections import Counter
+from typing import Callable, Dict, List
+import datetime
+import decimal
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+
+from app.models.sql_models import (
+    Tenant, User, Product, PickupTimeSlot, Lane, Order, OrderItem, TenantOrderStatusCount,
+    UserRole, LaneStatus, OrderStatus, OrderType, PaymentStatus
+)
+from app.schemas.order_schemas import OrderResponse
+from app.schemas.pos_schemas import POSOrderCreateRequest, POSOrderItemSchema
+from app.services import idempotency_service, lane_service, order_service, product_service, tenant_metrics_service, timeslot_service
+from .conftest import STRESS_WORKERS, STRESS_ATTEMPTS_PER_WORKER
+
+MAX_LOCK_RETRIES = 50
+
+def run_workers(make_session: sessionmaker, attempt: Callable[[Session, int], str], workers: int, attempts: int, label: str) -> Counter:
+    """
+    Runs `attempts` calls of `attempt(session, worker)` on each of `workers` threads, started together.
+    `attempt` returns an outcome name; HTTP 409 counts as "conflict", other HTTP errors as "rejected".
+    Database lock errors (SQLite "database is locked") are rolled back and retried, counted as "lock_retry".
+    """
+    outcomes: Counter = Counter()
+    outcomes_lock = threading.Lock()
+    barrier = threading.Barrier(workers)
+
+    def worker_loop(worker: int) -> None:
+        local: Counter = Counter()
+        with make_session() as session:
+            barrier.wait()
+            for _ in range(attempts):
+                for _ in range(MAX_LOCK_RETRIES):
+                    try:
+                        local[attempt(session, worker)] += 1
+                        session.commit()
+                    except HTTPException as e:
+                        session.rollback()
+                        local["conflict" if e.status_code == 409 else "rejected"] += 1
+                    except OperationalError:
+                        session.rollback()
+                        local["lock_retry"] += 1
+                        continue
+                    break
+        with outcomes_lock:
+            outcomes.update(local)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker_loop, args=(worker,)) for worker in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    completed = sum(count for outcome, count in outcomes.items() if outcome != "lock_retry")
+    print(f"\n{label}: {dict(outcomes)}, {completed / elapsed:.0f} attempts/s, "
+          f"conflict rate {outcomes['conflict'] / max(completed, 1):.1%}")
+    return outcomes
+
+def _create_tenant(make_session: sessionmaker) -> Dict[str, int]:
+    with make_session() as session:
+        tenant = Tenant(name="Contention Mart")
+        session.add(tenant)
+        session.flush()
+        counter_user = User(username="stress_counter", email="stress_counter@example.com", password_hash="x", role=UserRole.counter, tenant_id=tenant.id)
+        product = Product(name="Hot SKU", sku="STRESS-1", price=decimal.Decimal("1.00"), tenant_id=tenant.id, stock_quantity=0)
+        session.add_all([counter_user, product])
+        session.commit()
+        return {"tenant_id": tenant.id, "counter_user_id": counter_user.id, "product_id": product.id} # type: ignore
+
+def _set_stock(make_session: sessionmaker, product_id: int, stock: int) -> None:
+    with make_session() as session:
+        session.get(Product, product_id).stock_quantity = stock # type: ignore
+        session.commit()
+
+def test_concurrent_stock_decrements_never_oversell(stress_sessionmaker: sessionmaker):
+    ids = _create_tenant(stress_sessionmaker)
+    total_attempts = STRESS_WORKERS * STRESS_ATTEMPTS_PER_WORKER
+
+    # Optimistic: each worker reads the version first, so concurrent readers conflict.
+    initial_stock = total_attempts // 2
+    _set_stock(stress_sessionmaker, ids["product_id"], initial_stock)
+    with stress_sessionmaker() as session:
+        initial_version = session.get(Product, ids["product_id"]).version # type: ignore
+
+    def optimistic_sale(session: Session, worker: int) -> str:
+        version = session.query(Product.version).filter(Product.id == ids["product_id"]).scalar()
+        product_service.decrement_stock(session, ids["product_id"], quantity=1, tenant_id=ids["tenant_id"], expected_version=version)
+        return "sold"
+
+    outcomes = run_workers(stress_sessionmaker, optimistic_sale, STRESS_WORKERS, STRESS_ATTEMPTS_PER_WORKER, "stock (expected_version)")
+    with stress_sessionmaker() as session:
+        product = session.get(Product, ids["product_id"])
+        assert product.stock_quantity >= 0 # type: ignore
+        assert product.stock_quantity == initial_stock - outcomes["sold"] # type: ignore
+        assert product.version == initial_version + outcomes["sold"] # type: ignore
+    assert outcomes["sold"] + outcomes["conflict"] + outcomes["rejected"] == total_attempts
+
+    # Unversioned: the conditional UPDATE alone must sell exactly the available stock.
+    _set_stock(stress_sessionmaker, ids["product_id"], initial_stock)
+
+    def blind_sale(session: Session, worker: int) -> str:
+        product_service.decrement_stock(session, ids["product_id"], quantity=1, tenant_id=ids["tenant_id"])
+        return "sold"
+
+    outcomes = run_workers(stress_sessionmaker, blind_sale, STRESS_WORKERS, STRESS_ATTEMPTS_PER_WORKER, "stock (unversioned)")
+    assert outcomes["sold"] == initial_stock
+    assert outcomes["rejected"] == total_attempts - initial_stock # 400 insufficient stock
+    with stress_sessionmaker() as session:
+        assert session.get(Product, ids["product_id"]).stock_quantity == 0 # type: ignore
+
+def test_concurrent_restocks_and_sales_keep_every_change(stress_sessionmaker: sessionmaker):
+    ids = _create_tenant(stress_sessionmaker)
+    total_attempts = STRESS_WORKERS * STRESS_ATTEMPTS_PER_WORKER
+    _set_stock(stress_sessionmaker, ids["product_id"], total_attempts)
+    with stress_sessionmaker() as session:
+        initial_version = session.get(Product, ids["product_id"]).version # type: ignore
+
+    # Even workers return items to stock (cancellations), odd workers sell.
+    def restock_or_sell(session: Session, worker: int) -> str:
+        if worker % 2 == 0:
+            product_service.increment_stock(session, ids["product_id"], quantity=2, tenant_id=ids["tenant_id"])
+            return "restocked"
+        product_service.decrement_stock(session, ids["product_id"], quantity=1, tenant_id=ids["tenant_id"])
+        return "sold"
+
+    outcomes = run_workers(stress_sessionmaker, restock_or_sell, STRESS_WORKERS, STRESS_ATTEMPTS_PER_WORKER, "restocks and sales")
+    assert outcomes["restocked"] + outcomes["sold"] == total_attempts
+    with stress_sessionmaker() as session:
+        product = session.get(Product, ids["product_id"])
+        assert product.stock_quantity == total_attempts + 2 * outcomes["restocked"] - outcomes["sold"] # type: ignore
+        assert product.version == initial_version + total_attempts # type: ignore
+
+def test_concurrent_slot_bookings_never_overbook(stress_sessionmaker: sessionmaker):
+    ids = _create_tenant(stress_sessionmaker)
+    capacity = STRESS_WORKERS * STRESS_ATTEMPTS_PER_WORKER // 2
+    with stress_sessionmaker() as session:
+        slot = PickupTimeSlot(
+            tenant_id=ids["tenant_id"], date=datetime.datetime(2030, 1, 1), start_time=datetime.time(10), end_time=datetime.time(11),
+            capacity=capacity, current_orders=0, is_active=True
+        )
+        session.add(slot)
+        session.commit()
+        slot_id = slot.id
+
+    def book(session: Session, worker: int) -> str:
+        timeslot_service.increment_slot_order_count(session, timeslot_id=slot_id, tenant_id=ids["tenant_id"]) # type: ignore
+        return "booked"
+
+    outcomes = run_workers(stress_sessionmaker, book, STRESS_WORKERS, STRESS_ATTEMPTS_PER_WORKER, "slot bookings")
+    assert outcomes["booked"] == capacity
+    assert outcomes["conflict"] == STRESS_WORKERS * STRESS_ATTEMPTS_PER_WORKER - capacity # 409 slot full
+    with stress_sessionmaker() as session:
+        assert session.get(PickupTimeSlot, slot_id).current_orders == capacity # type: ignore
+
+    def release(session: Session, worker: int) -> str:
+        released = timeslot_service.decrement_slot_order_count(session, timeslot_id=slot_id, tenant_id=ids["tenant_id"]) # type: ignore
+        return "released" if released else "empty"
+
+    outcomes = run_workers(stress_sessionmaker, release, STRESS_WORKERS, STRESS_ATTEMPTS_PER_WORKER, "slot releases")
+    assert outcomes["released"] == capacity
+    with stress_sessionmaker() as session:
+        assert session.get(PickupTimeSlot, slot_id).current_orders == 0 # type: ignore
+
+def test_concurrent_lane_assignments_serve_one_order(stress_sessionmaker: sessionmaker):
+    ids = _create_tenant(stress_sessionmaker)
+    with stress_sessionmaker() as session:
+        lane = Lane(tenant_id=ids["tenant_id"], name="Lane 1", status=LaneStatus.OPEN)
+        orders = [
+            Order(
+                user_id=ids["counter_user_id"], tenant_id=ids["tenant_id"], order_type=OrderType.BOPIS,
+                status=OrderStatus.READY_FOR_PICKUP, payment_status=PaymentStatus.PAID, total_amount=decimal.Decimal("1.00"),
+                pickup_token=f"stress-token-{index}"
+            )
+            for index in range(STRESS_WORKERS)
+        ]
+        session.add_all([lane, *orders])
+        session.commit()
+        lane_id = lane.id
+        order_ids: List[int] = [order.id for order in orders] # type: ignore
+
+    def assign(session: Session, worker: int) -> str:
+        counter_user = session.get(User, ids["counter_user_id"])
+        lane = session.get(Lane, lane_id, populate_existing=True)
+        order = session.get(Order, order_ids[worker], populate_existing=True)
+        try:
+            lane_service.assign_order_to_lane(session, lane=lane, order=order, counter_user=counter_user) # type: ignore
+        except HTTPException as e:
+            if e.status_code == 400: # Lane already busy when read
+                return "lane_busy"
+            raise
+        return "assigned"
+
+    outcomes = run_workers(stress_sessionmaker, assign, STRESS_WORKERS, 1, "lane assignments")
+    assert outcomes["assigned"] == 1
+    assert outcomes["lane_busy"] + outcomes["conflict"] == STRESS_WORKERS - 1
+    with stress_sessionmaker() as session:
+        lane = session.get(Lane, lane_id)
+        assigned_orders = session.query(Order).filter(Order.assigned_lane_id == lane_id).all()
+        assert len(assigned_orders) == 1
+        assert lane.status == LaneStatus.BUSY and lane.current_order_id == assigned_orders[0].id # type: ignore
+
+def test_concurrent_cancel_and_pickup_finish_an_order_once(stress_sessionmaker: sessionmaker):
+    ids = _create_tenant(stress_sessionmaker)
+    _set_stock(stress_sessionmaker, ids["product_id"], 10)
+    with stress_sessionmaker() as session:
+        order = Order(
+            user_id=ids["counter_user_id"], tenant_id=ids["tenant_id"], order_type=OrderType.BOPIS,
+            status=OrderStatus.READY_FOR_PICKUP, payment_status=PaymentStatus.PAID, total_amount=decimal.Decimal("3.00"),
+            pickup_token="stress-cancel-token"
+        )
+        session.add(order)
+        session.flush()
+        session.add(OrderItem(order_id=order.id, product_id=ids["product_id"], quantity=3, price_at_purchase=decimal.Decimal("1.00")))
+        lane = Lane(tenant_id=ids["tenant_id"], name="Lane 1", status=LaneStatus.BUSY, current_order_id=order.id)
+        session.add(lane)
+        session.flush()
+        order.assigned_lane_id = lane.id
+        session.commit()
+        order_id, lane_id = order.id, lane.id
+
+    # Even workers cancel, odd workers hand the order over; the loser sees a 400 or a 409.
+    def cancel_or_complete(session: Session, worker: int) -> str:
+        counter_user = session.get(User, ids["counter_user_id"])
+        order = session.get(Order, order_id, populate_existing=True)
+        if worker % 2 == 0:
+            order_service.cancel_order(session, order=order, acting_user=counter_user) # type: ignore
+            return "cancelled"
+        order_service.counter_complete_order_pickup(session, order=order, counter_user=counter_user, request_data=None, lane_service_module=lane_service) # type: ignore
+        return "completed"
+
+    outcomes = run_workers(stress_sessionmaker, cancel_or_complete, STRESS_WORKERS, 1, "cancel and pickup")
+    assert outcomes["cancelled"] + outcomes["completed"] == 1
+    assert outcomes["rejected"] + outcomes["conflict"] == STRESS_WORKERS - 1
+    with stress_sessionmaker() as session:
+        order = session.get(Order, order_id)
+        assert order.status == (OrderStatus.CANCELLED if outcomes["cancelled"] else OrderStatus.COMPLETED) # type: ignore
+        assert session.get(Product, ids["product_id"]).stock_quantity == (13 if outcomes["cancelled"] else 10) # type: ignore
+        lane = session.get(Lane, lane_id)
+        assert lane.status == LaneStatus.OPEN and lane.current_order_id is None and order.assigned_lane_id is None # type: ignore
+
+def test_concurrent_retries_of_one_idempotent_sale_sell_once(stress_sessionmaker: sessionmaker, monkeypatch: pytest.MonkeyPatch):
+    ids = _create_tenant(stress_sessionmaker)
+    _set_stock(stress_sessionmaker, ids["product_id"], 10)
+    # Every claim looks abandoned at once, so retries keep taking over the key from a running sale.
+    monkeypatch.setattr(settings, "IDEMPOTENCY_LOCK_TIMEOUT_SECONDS", 0)
+    pos_order_in = POSOrderCreateRequest(items=[POSOrderItemSchema(product_id=ids["product_id"], quantity=3)], idempotency_key="stress-retry")
+
+    def retry_sale(session: Session, worker: int) -> str:
+        staff_user = session.get(User, ids["counter_user_id"])
+        # A sale whose claim was taken over before its commit is rolled back with a 409.
+        _, replayed = idempotency_service.execute_idempotent(
+            session,
+            tenant_id=ids["tenant_id"],
+            idempotency_key=pos_order_in.idempotency_key,
+            request_fingerprint="stress-retry",
+            operation=lambda before_commit: order_service.create_pos_order(session, pos_order_in=pos_order_in, staff_user=staff_user, before_commit=before_commit), # type: ignore
+            serializer=lambda order: OrderResponse.model_validate(order, from_attributes=True).model_dump(mode="json")
+        )
+        return "replayed" if replayed else "sold"
+
+    outcomes = run_workers(stress_sessionmaker, retry_sale, STRESS_WORKERS, STRESS_ATTEMPTS_PER_WORKER, "idempotent sale retries")
+    assert outcomes["sold"] == 1
+    assert outcomes["sold"] + outcomes["replayed"] + outcomes["conflict"] == STRESS_WORKERS * STRESS_ATTEMPTS_PER_WORKER
+    with stress_sessionmaker() as session:
+        assert session.query(Order).filter(Order.tenant_id == ids["tenant_id"], Order.order_type == OrderType.POS_SALE).count() == 1
+        assert session.get(Product, ids["product_id"]).stock_quantity == 7 # type: ignore
+
+def test_concurrent_sales_keep_dashboard_counters_exact(stress_sessionmaker: sessionmaker):
+    ids = _create_tenant(stress_sessionmaker)
+    total_attempts = STRESS_WORKERS * STRESS_ATTEMPTS_PER_WORKER
+
+    def sell(session: Session, worker: int) -> str:
+        order = Order(
+            user_id=ids["counter_user_id"], tenant_id=ids["tenant_id"], order_type=OrderType.POS_SALE, status=OrderStatus.COMPLETED,
+            payment_status=PaymentStatus.PAID, total_amount=decimal.Decimal("2.50"), completed_at=datetime.datetime.utcnow()
+        )
+        session.add(order)
+        session.flush()
+        tenant_metrics_service.record_status_transition(session, order, old_status=None)
+        tenant_metrics_service.record_payment(session, order)
+        return "sold"
+
+    outcomes = run_workers(stress_sessionmaker, sell, STRESS_WORKERS, STRESS_ATTEMPTS_PER_WORKER, "dashboard counters")
+    assert outcomes["sold"] == total_attempts
+    with stress_sessionmaker() as session:
+        dashboard = tenant_metrics_service.get_dashboard(session, tenant_id=ids["tenant_id"])
+        assert dashboard.orders_by_status == {"COMPLETED": total_attempts}
+        assert (dashboard.sales.paid_orders, dashboard.sales.revenue) == (total_attempts, decimal.Decimal("2.50") * total_attempts)
+        # Consecutive orders land in different counter rows.
+        assert session.query(TenantOrderStatusCount).filter(TenantOrderStatusCount.tenant_id == ids["tenant_id"]).count() == min(total_attempts, settings.DASHBOARD_COUNTER_SLOTS)
+        reconciled = tenant_metrics_service.reconcile_tenant_metrics(session, tenant_id=ids["tenant_id"])
+        assert (reconciled.status_counters_corrected, reconciled.daily_sales_corrected) == (0, 0)